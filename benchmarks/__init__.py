@@ -0,0 +1,6 @@
+"""Load-test and benchmark suite for the API.
+
+Run `python -m benchmarks.run --help`. By default the app runs against an in-memory
+mongomock database (with GridFS); set BENCH_MONGO_URI to benchmark against a real
+MongoDB server (the `petzy_bench` database on it is dropped and re-seeded).
+"""
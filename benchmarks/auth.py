@@ -0,0 +1,67 @@
+"""Cost of authenticating a request: jwt.decode vs the verified-token cache.
+
+    python -m benchmarks.auth --repeat 2000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.harness import bootstrap_app
+
+
+def time_us(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare token verification paths.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    web_app, _ = bootstrap_app()
+    from web.security import authenticate_request, create_access_token, login_required, verified_tokens, verify_token
+
+    app = web_app.app
+    token = create_access_token("bench")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    @login_required
+    @login_required
+    def nested_view():
+        return "ok"
+
+    def uncached_verify():
+        verified_tokens.clear()
+        verify_token(token)
+
+    def request_path():
+        with app.test_request_context("/", headers=headers):
+            app.preprocess_request()
+            authenticate_request()
+            nested_view()
+
+    def uncached_request_path():
+        verified_tokens.clear()
+        request_path()
+
+    results = {
+        "verify_token (decode)": uncached_verify,
+        "verify_token (cached)": lambda: verify_token(token),
+        "request, two decorators (decode)": uncached_request_path,
+        "request, two decorators (cached)": request_path,
+    }
+    verify_token(token)
+    median_us = {name: round(time_us(func, args.repeat), 1) for name, func in results.items()}
+
+    print(json.dumps({"repeat": args.repeat, "median_us": median_us}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""App bootstrap, request drivers and latency statistics for the benchmark suite."""
+
+import json
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from unittest.mock import patch
+
+import bcrypt
+
+
+BENCH_DB_NAME = "petzy_bench"
+
+
+def bootstrap_app(mongo_uri: Optional[str] = None):
+    """
+    Import the Flask app wired to the benchmark database.
+
+    Args:
+        mongo_uri: Real MongoDB URI, or None for an in-memory mongomock database
+
+    Returns:
+        tuple: (web.app module, db)
+    """
+    os.environ.setdefault("FLASK_SECRET_KEY", "bench-secret-key")
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key")
+    os.environ.setdefault("ADMIN_USERNAME", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD_HASH", bcrypt.hashpw(b"bench-admin", bcrypt.gensalt()).decode())
+    for name, value in (("MONGO_USER", "bench"), ("MONGO_PASS", "bench"), ("MONGO_DB", BENCH_DB_NAME)):
+        os.environ.setdefault(name, value)
+    os.environ.setdefault("RATELIMIT_STORAGE_URI", "memory://")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    if mongo_uri:
+        from pymongo import MongoClient
+
+        client = MongoClient(mongo_uri)
+        client.drop_database(BENCH_DB_NAME)
+    else:
+        import mongomock
+        import mongomock.gridfs
+
+        mongomock.gridfs.enable_gridfs_integration()
+        client = mongomock.MongoClient()
+
+    db = client[BENCH_DB_NAME]
+    # Same approach as tests/conftest.py: web.app and web.security bind web.db.db at import
+    with patch("web.db.db", db), patch("web.db.client", client):
+        import web.app as web_app
+
+    # Login is benchmarked repeatedly from one address
+    web_app.limiter.enabled = False
+    return web_app, db
+
+
+class TestClientDriver:
+    """Drive the app in-process through Flask's test client (one client per thread)."""
+
+    mode = "testclient"
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, token: Optional[str], body: Optional[dict]) -> int:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class WsgiServerDriver:
+    """Drive the app over HTTP through a threaded werkzeug WSGI server on a free local port."""
+
+    mode = "wsgi"
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method: str, path: str, token: Optional[str], body: Optional[dict]) -> int:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def close(self):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending, non-empty list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(call: Callable[[], int], iterations: int, concurrency: int, warmup: int = 2) -> dict:
+    """
+    Call `call` `iterations` times with `concurrency` parallel callers.
+
+    Returns:
+        dict: requests, errors, rps and p50/p95/p99/max latency in milliseconds
+    """
+    for _ in range(warmup):
+        call()
+
+    def timed(_) -> Tuple[int, float]:
+        started = time.perf_counter()
+        status = call()
+        return status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+    else:
+        samples = [timed(i) for i in range(iterations)]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for _, seconds in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for status, _ in samples if status >= 400),
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
@@ -0,0 +1,133 @@
+"""Photo upload processing: full decode vs the staged pipeline, over a corpus of images.
+
+    python -m benchmarks.images                      # generated phone-like photos
+    python -m benchmarks.images --corpus ~/Pictures  # every image in a directory
+
+Each image is processed in a fresh process per pipeline, as the peak RSS (ru_maxrss)
+of a process never goes down; a child starts from its parent's peak, so the corpus is
+generated in a separate process too. Reported per image and pipeline: wall time and
+peak RSS increase; for the staged pipeline also time and pixel memory per stage.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from PIL import Image
+
+
+PIPELINES = ("legacy", "staged")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+
+# (file name, size, format, mode): 12 MP and 48 MP phone JPEGs, a screenshot-like PNG with alpha
+GENERATED_CORPUS = (
+    ("phone-12mp.jpg", (4032, 3024), "JPEG", "RGB"),
+    ("phone-48mp.jpg", (8064, 6048), "JPEG", "RGB"),
+    ("screenshot-alpha.png", (2880, 1800), "PNG", "RGBA"),
+)
+
+
+def legacy_optimize(file, max_width=1920, max_height=1920, quality=85):
+    """The upload conversion before the staged pipeline: full decode, convert, thumbnail, WebP method 6."""
+    file.seek(0)
+    image = Image.open(file)
+    if image.mode in ("RGBA", "LA", "P"):
+        rgb_image = Image.new("RGB", image.size, (255, 255, 255))
+        if image.mode == "P":
+            image = image.convert("RGBA")
+        rgb_image.paste(image, mask=image.split()[-1] if image.mode in ("RGBA", "LA") else None)
+        image = rgb_image
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.width > max_width or image.height > max_height:
+        image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    image.save(output, format="WEBP", quality=quality, method=6)
+    return output
+
+
+def generate_corpus(directory: str) -> None:
+    """Write photo-like images (noise over a gradient, so they compress like photos)."""
+    for name, size, format, mode in GENERATED_CORPUS:
+        noise = Image.effect_noise(size, 40).convert(mode)
+        gradient = Image.linear_gradient("L").resize(size).convert(mode)
+        Image.blend(noise, gradient, 0.5).save(os.path.join(directory, name), format=format, quality=92)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_pipeline(pipeline: str, path: str) -> dict:
+    from web.images import optimize_image
+
+    with open(path, "rb") as f:
+        upload = BytesIO(f.read())
+    baseline = peak_rss_mb()
+    stages = {}
+
+    started = time.perf_counter()
+    if pipeline == "legacy":
+        output = legacy_optimize(upload)
+    else:
+        output, _ = optimize_image(upload, stages=stages)
+    seconds = time.perf_counter() - started
+
+    result = {
+        "seconds": round(seconds, 3),
+        "peak_rss_increase_mb": round(peak_rss_mb() - baseline, 1),
+        "output_kb": round(len(output.getvalue()) / 1024, 1),
+    }
+    if stages:
+        result["stages"] = {
+            name: {"ms": round(stats["seconds"] * 1000, 1), "pixel_mb": round(stats["peak_bytes"] / 1024 / 1024, 1)}
+            for name, stats in stages.items()
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare photo upload pipelines.")
+    parser.add_argument("--corpus", help="Directory of sample images (default: generated photos)")
+    parser.add_argument("--run", nargs=2, metavar=("PIPELINE", "PATH"), help="Process one image in this process")
+    parser.add_argument("--generate", metavar="DIRECTORY", help="Write the generated corpus and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_corpus(args.generate)
+        return
+    if args.run:
+        pipeline, path = args.run
+        print(json.dumps(run_pipeline(pipeline, path)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = args.corpus
+        if not corpus:
+            subprocess.run([sys.executable, "-m", "benchmarks.images", "--generate", directory], check=True)
+            corpus = directory
+        names = sorted(name for name in os.listdir(corpus) if name.lower().endswith(IMAGE_EXTENSIONS))
+        paths = [os.path.join(corpus, name) for name in names]
+
+        report = {}
+        for path in paths:
+            with Image.open(path) as image:
+                entry = {"size": f"{image.width}x{image.height}", "file_kb": round(os.path.getsize(path) / 1024, 1)}
+            for pipeline in PIPELINES:
+                command = [sys.executable, "-m", "benchmarks.images", "--run", pipeline, path]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                entry[pipeline] = json.loads(output.strip().splitlines()[-1])
+            report[os.path.basename(path)] = entry
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Peak memory of concurrent photo downloads: whole-file read vs chunked streaming.
+
+    python -m benchmarks.photos --size-mb 20 --concurrency 8
+
+Each delivery mode runs in its own process, as the peak RSS (ru_maxrss) of a process
+never goes down. Clients read the response body in blocks and discard it, like a
+browser writing to its cache; the reported increase is the peak RSS during the
+downloads minus the peak after seeding the photo.
+
+Use BENCH_MONGO_URI for representative numbers: mongomock materialises every chunk of a
+file when the sorted chunk cursor is opened, so streamed downloads still hold a copy
+of the file there, while a MongoDB server returns the chunks in batches.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from benchmarks.harness import bootstrap_app
+
+
+MODES = ("buffered", "streamed")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, size_mb: int, concurrency: int, rounds: int) -> dict:
+    web_app, db = bootstrap_app(os.getenv("BENCH_MONGO_URI"))
+    from web.app import app
+    from web.security import create_access_token
+    from web.streaming import send_bytes
+
+    photo_file_id = web_app.fs.put(os.urandom(size_mb * 1024 * 1024), filename="big.jpg", content_type="image/jpeg")
+    pet_id = db["pets"].insert_one(
+        {"name": "Bench Cat", "owner": "bench", "shared_with": [], "created_at": datetime.now(timezone.utc)}
+    ).inserted_id
+    db["pets"].update_one({"_id": pet_id}, {"$set": {"photo_file_id": str(photo_file_id)}})
+    headers = {"Authorization": f"Bearer {create_access_token('bench')}"}
+    url = f"/api/pets/{pet_id}/photo"
+    errors = []
+
+    def download():
+        with app.test_client() as client:
+            for _ in range(rounds):
+                response = client.get(url, headers=headers, buffered=False)
+                received = sum(len(block) for block in response.response)
+                response.close()
+                if response.status_code != 200 or received != size_mb * 1024 * 1024:
+                    errors.append(response.status_code)
+
+    def buffered_send(grid_out, *args):
+        """Delivery before streaming: the whole file is read into memory first."""
+        return send_bytes(grid_out.read(), *args)
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    delivery = patch("web.pets.send_gridfs_file", buffered_send) if mode == "buffered" else contextlib.nullcontext()
+    with delivery:
+        threads = [threading.Thread(target=download) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return {
+        "mode": mode,
+        "errors": len(errors),
+        "seconds": round(time.perf_counter() - started, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "increase_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of photo delivery modes.")
+    parser.add_argument("--size-mb", type=int, default=20, help="Size of the stored photo")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel downloads")
+    parser.add_argument("--rounds", type=int, default=3, help="Downloads per client")
+    parser.add_argument("--mode", choices=MODES, help="Run a single mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.size_mb, args.concurrency, args.rounds)))
+        return
+
+    results = []
+    for mode in MODES:
+        command = [sys.executable, "-m", "benchmarks.photos", "--mode", mode]
+        command += ["--size-mb", str(args.size_mb), "--concurrency", str(args.concurrency), "--rounds", str(args.rounds)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps({"size_mb": args.size_mb, "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Run the benchmark suite and write/compare JSON baselines.
+
+Examples:
+    python -m benchmarks.run --scale small --output benchmarks/baselines/small.json
+    python -m benchmarks.run --scale small --compare benchmarks/baselines/small.json
+    BENCH_MONGO_URI=mongodb://localhost:27017 python -m benchmarks.run --scale medium --mode wsgi
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from benchmarks.harness import TestClientDriver, WsgiServerDriver, bootstrap_app, measure
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import SCALES, seed
+
+
+DRIVERS = {"testclient": TestClientDriver, "wsgi": WsgiServerDriver}
+
+
+def run_suite(args) -> dict:
+    """Seed the database, run every selected scenario with every selected driver and return the report."""
+    mongo_uri = os.getenv("BENCH_MONGO_URI")
+    web_app, db = bootstrap_app(mongo_uri)
+
+    from web.indexes import ensure_indexes
+    from web.security import create_access_token
+
+    seed_started = time.perf_counter()
+    data = seed(db, SCALES[args.scale])
+    ensure_indexes(db)
+    seed_seconds = round(time.perf_counter() - seed_started, 1)
+    token = create_access_token(data.username)
+
+    scenarios = [s for s in SCENARIOS if not args.only or s.name in args.only]
+    modes = list(DRIVERS) if args.mode == "all" else [args.mode]
+
+    results = []
+    for mode in modes:
+        driver = DRIVERS[mode](web_app.app)
+        # The in-process test client measures per-request cost, the server measures behaviour under concurrency
+        concurrency = 1 if mode == "testclient" else args.concurrency
+        try:
+            for scenario in scenarios:
+                path = scenario.path(data)
+                body = scenario.body(data) if scenario.body else None
+                auth = token if scenario.authenticated else None
+                iterations = min(args.iterations, scenario.max_iterations or args.iterations)
+
+                stats = measure(
+                    lambda: driver.request(scenario.method, path, auth, body), iterations, concurrency
+                )
+                results.append({"scenario": scenario.name, "mode": mode, "concurrency": concurrency, **stats})
+                print(
+                    f"{mode:<10} {scenario.name:<26} p50={stats['p50_ms']:>8.2f}ms p95={stats['p95_ms']:>8.2f}ms "
+                    f"p99={stats['p99_ms']:>8.2f}ms rps={stats['rps']:>7.1f} errors={stats['errors']}"
+                )
+        finally:
+            driver.close()
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "backend": "mongodb" if mongo_uri else "mongomock",
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "seed_seconds": seed_seconds,
+            "records": data.counts,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[Tuple[str, str, float, float, float]]:
+    """
+    Compare p95 latency per (scenario, mode) with a baseline report.
+
+    Returns:
+        list: (scenario, mode, baseline_p95, current_p95, ratio) for scenarios slower than allowed
+    """
+    previous: Dict[Tuple[str, str], dict] = {(r["scenario"], r["mode"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'scenario':<26} {'mode':<10} {'baseline p95':>13} {'current p95':>12} {'change':>8}")
+    for result in report["results"]:
+        key = (result["scenario"], result["mode"])
+        if key not in previous:
+            continue
+        before, after = previous[key]["p95_ms"], result["p95_ms"]
+        ratio = after / before if before else 1.0
+        print(f"{key[0]:<26} {key[1]:<10} {before:>11.2f}ms {after:>10.2f}ms {(ratio - 1) * 100:>+7.1f}%")
+        if ratio > 1 + max_regression:
+            regressions.append((key[0], key[1], before, after, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API routes and compare with a JSON baseline.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--mode", choices=[*DRIVERS, "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=50, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel clients in wsgi mode")
+    parser.add_argument("--only", nargs="*", help="Scenario names to run (default: all)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to diff against")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.25, help="Allowed p95 slowdown vs baseline (0.25 = 25%%)"
+    )
+    args = parser.parse_args()
+
+    report = run_suite(args)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed by more than {args.max_regression:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmarked requests."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from benchmarks.seed import BenchData
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A single benchmarked request shape."""
+
+    name: str
+    path: Callable[[BenchData], str]
+    method: str = "GET"
+    body: Optional[Callable[[BenchData], dict]] = None
+    authenticated: bool = True
+    # Upper bound on iterations for intentionally slow routes (bcrypt login)
+    max_iterations: Optional[int] = None
+
+
+def _pet(data: BenchData) -> str:
+    return data.pet_ids[0]
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("pets_list", lambda d: "/api/pets"),
+    Scenario("weight_list", lambda d: f"/api/weight?pet_id={_pet(d)}"),
+    Scenario("feeding_list_first_page", lambda d: f"/api/feeding?pet_id={_pet(d)}&page_size=100"),
+    Scenario("feeding_list_page_1000", lambda d: f"/api/feeding?pet_id={_pet(d)}&page_size=1000"),
+    Scenario("feeding_list_deep_page", lambda d: f"/api/feeding?pet_id={_pet(d)}&page_size=100&page=10"),
+    Scenario(
+        "feeding_list_no_total", lambda d: f"/api/feeding?pet_id={_pet(d)}&page_size=100&include_total=false"
+    ),
+    Scenario("medication_intakes_list", lambda d: f"/api/medications/intakes?pet_id={_pet(d)}"),
+    Scenario("stats_weight_raw", lambda d: f"/api/stats/health?pet_id={_pet(d)}&type=weight&days=365"),
+    Scenario("stats_feeding_daily", lambda d: f"/api/stats/health?pet_id={_pet(d)}&type=feeding&days=365&bucket=day"),
+    Scenario("export_feeding_csv", lambda d: f"/api/export/feeding/csv?pet_id={_pet(d)}"),
+    Scenario("export_medications_md", lambda d: f"/api/export/medications/md?pet_id={_pet(d)}"),
+    Scenario("photo_original", lambda d: f"/api/pets/{d.photo_pet_ids[0]}/photo"),
+    Scenario("photo_avatar", lambda d: f"/api/pets/{d.photo_pet_ids[0]}/photo?w=48"),
+    Scenario(
+        "medications_upcoming",
+        lambda d: f"/api/medications/upcoming?pet_id={_pet(d)}&client_datetime={datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}",
+    ),
+    Scenario(
+        "login",
+        lambda d: "/api/auth/login",
+        method="POST",
+        body=lambda d: {"username": d.username, "password": d.password},
+        authenticated=False,
+        max_iterations=20,
+    ),
+]
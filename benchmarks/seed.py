@@ -0,0 +1,178 @@
+"""Realistic data volumes for the benchmark suite."""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Dict, List
+
+import bcrypt
+from bson import ObjectId
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+
+INSERT_BATCH_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class SeedScale:
+    """Size of a seeded dataset."""
+
+    pets: int
+    years: int
+    photos: int
+
+
+SCALES: Dict[str, SeedScale] = {
+    "small": SeedScale(pets=3, years=1, photos=1),
+    "medium": SeedScale(pets=20, years=3, photos=5),
+    "large": SeedScale(pets=100, years=5, photos=20),
+}
+
+# Average events per day and a factory for the type-specific fields of each record collection
+RECORD_PROFILES = {
+    "feedings": (3.0, lambda rnd: {"food_weight": rnd.choice([40, 50, 60, 70]), "comment": ""}),
+    "weights": (1 / 7, lambda rnd: {"weight": round(rnd.uniform(3.5, 6.0), 2), "food": "Сухой корм", "comment": ""}),
+    "defecations": (1.5, lambda rnd: {"stool_type": "Обычный", "color": "Коричневый", "food": "", "comment": ""}),
+    "litter_changes": (1 / 3, lambda rnd: {"comment": ""}),
+    "asthma_attacks": (1 / 10, lambda rnd: {"duration": "2 мин", "reason": "", "inhalation": rnd.random() < 0.5}),
+    "eye_drops": (1.0, lambda rnd: {"drops_type": "Обычные", "comment": ""}),
+    "tooth_brushing": (1 / 2, lambda rnd: {"brushing_type": "Щетка", "comment": ""}),
+    "ear_cleaning": (1 / 7, lambda rnd: {"cleaning_type": "Лосьон", "comment": ""}),
+}
+
+
+@dataclass
+class BenchData:
+    """Identifiers the scenarios need after seeding."""
+
+    username: str
+    password: str
+    pet_ids: List[str]
+    photo_pet_ids: List[str]
+    counts: Dict[str, int]
+
+
+def _photo(rnd: random.Random) -> FileStorage:
+    """A phone-sized JPEG upload."""
+    img = Image.new("RGB", (1600, 1200), color=(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)))
+    output = BytesIO()
+    img.save(output, format="JPEG", quality=90)
+    output.seek(0)
+    return FileStorage(stream=output, filename="cat.jpg", content_type="image/jpeg")
+
+
+def _insert_batched(collection, documents) -> int:
+    """insert_many in fixed-size batches from a generator."""
+    inserted = 0
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            collection.insert_many(batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+        inserted += len(batch)
+    return inserted
+
+
+def _records(pet_id: str, rate: float, fields, start: datetime, days: int, rnd: random.Random):
+    """Generate records of one collection spread over `days` days."""
+    for day in range(days):
+        events = int(rate) + (1 if rnd.random() < rate - int(rate) else 0)
+        for _ in range(events):
+            yield {
+                "pet_id": pet_id,
+                "date_time": start + timedelta(days=day, minutes=rnd.randrange(24 * 60)),
+                "username": BENCH_USERNAME,
+                **fields(rnd),
+            }
+
+
+def seed(db, scale: SeedScale, seed_value: int = 42) -> BenchData:
+    """
+    Fill the benchmark database: one user owning `scale.pets` pets with `scale.years` years
+    of records in every collection, two medication courses with intakes per pet and
+    `scale.photos` pet photos (stored through the regular upload path, renditions included).
+    """
+    import web.app as app
+    from web.pets import store_pet_photo
+    from web.rollups import rebuild_rollups
+
+    rnd = random.Random(seed_value)
+    days = 365 * scale.years
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    counts: Dict[str, int] = {}
+
+    db["users"].insert_one(
+        {
+            "username": BENCH_USERNAME,
+            "password_hash": bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt()).decode(),
+            "full_name": "Benchmark User",
+            "email": "",
+            "created_at": datetime.utcnow(),
+            "created_by": "admin",
+            "is_active": True,
+        }
+    )
+
+    pet_ids = []
+    for index in range(scale.pets):
+        pet_id = db["pets"].insert_one(
+            {"name": f"Cat {index}", "owner": BENCH_USERNAME, "shared_with": [], "created_at": datetime.utcnow()}
+        ).inserted_id
+        pet_ids.append(str(pet_id))
+
+    for pet_id in pet_ids:
+        for collection_name, (rate, fields) in RECORD_PROFILES.items():
+            counts[collection_name] = counts.get(collection_name, 0) + _insert_batched(
+                db[collection_name], _records(pet_id, rate, fields, start, days, rnd)
+            )
+
+        for name, times in (("Преднизолон", ["09:00"]), ("Сальбутамол", ["08:00", "20:00"])):
+            medication_id = db["medications"].insert_one(
+                {
+                    "pet_id": pet_id,
+                    "name": name,
+                    "type": "Таблетка",
+                    "default_dose": 1.0,
+                    "schedule": {"days": list(range(7)), "times": times},
+                    "inventory_enabled": True,
+                    "inventory_current": 30.0,
+                    "inventory_warning_threshold": 5.0,
+                    "is_active": True,
+                    "username": BENCH_USERNAME,
+                    "created_at": datetime.utcnow(),
+                }
+            ).inserted_id
+            intakes = (
+                {
+                    "pet_id": pet_id,
+                    "medication_id": str(medication_id),
+                    "date_time": start + timedelta(days=day, hours=int(time[:2])),
+                    "dose_taken": 1.0,
+                    "username": BENCH_USERNAME,
+                }
+                for day in range(days)
+                for time in times
+            )
+            counts["medication_intakes"] = counts.get("medication_intakes", 0) + _insert_batched(
+                db["medication_intakes"], intakes
+            )
+
+    # Records are bulk-inserted around the routes, like historical data
+    counts["daily_rollups"] = rebuild_rollups()
+
+    photo_pet_ids = pet_ids[: scale.photos]
+    for pet_id in photo_pet_ids:
+        photo_file_id = store_pet_photo(_photo(rnd))
+        db["pets"].update_one({"_id": ObjectId(pet_id)}, {"$set": {"photo_file_id": photo_file_id}})
+
+    app.logger.warning(f"Benchmark data seeded: pets={scale.pets}, years={scale.years}, records={counts}")
+    return BenchData(BENCH_USERNAME, BENCH_PASSWORD, pet_ids, photo_pet_ids, counts)
@@ -0,0 +1,88 @@
+"""Serialization cost of a list page: per-field conversion loop vs the app JSON providers.
+
+    python -m benchmarks.serialization --page-size 1000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from web.json_provider import MongoJSONProvider, OrjsonProvider, orjson
+
+
+def make_page(page_size: int) -> list:
+    """Feeding records as returned by the cursor."""
+    start = datetime(2024, 1, 1)
+    pet_id = str(ObjectId())
+    return [
+        {
+            "_id": ObjectId(),
+            "pet_id": pet_id,
+            "date_time": start + timedelta(hours=8 * i),
+            "food_weight": 50,
+            "comment": "Утренняя порция",
+            "username": "bench",
+            "updated_at": start + timedelta(hours=8 * i, minutes=1),
+        }
+        for i in range(page_size)
+    ]
+
+
+def legacy_convert(records: list) -> list:
+    """The conversion every list route did before handing records to jsonify."""
+    for record in records:
+        record["_id"] = str(record["_id"])
+        record["pet_id"] = str(record.get("pet_id", ""))
+        record["username"] = record.get("username", "")
+        for field in ("date_time", "updated_at"):
+            if isinstance(record.get(field), datetime):
+                record[field] = record[field].strftime("%Y-%m-%d %H:%M")
+    return records
+
+
+def time_ms(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list payload serialization paths.")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    candidates = {
+        "convert loop + default provider": (DefaultJSONProvider(app), True),
+        "stdlib MongoJSONProvider": (MongoJSONProvider(app), False),
+    }
+    if orjson is not None:
+        candidates["OrjsonProvider"] = (OrjsonProvider(app), False)
+
+    results = {}
+    with app.app_context():
+        for name, (provider, convert) in candidates.items():
+
+            def run(provider=provider, convert=convert):
+                page = make_page(args.page_size)
+                if convert:
+                    page = legacy_convert(page)
+                provider.response({"feedings": page, "page": 1, "page_size": args.page_size}).get_data()
+
+            results[name] = round(time_ms(run, args.repeat) - time_ms(lambda: make_page(args.page_size), args.repeat), 2)
+
+    print(json.dumps({"page_size": args.page_size, "median_ms": results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
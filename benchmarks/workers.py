@@ -0,0 +1,156 @@
+"""Gunicorn worker classes under concurrent load: sync vs gevent with the same number of workers.
+
+    python -m benchmarks.workers --concurrency 50 --requests 1000
+    BENCH_MONGO_URI=mongodb://localhost:27017 python -m benchmarks.workers
+
+For each worker class a gunicorn server (gunicorn.conf.py, preloaded app) is started on
+a seeded database and scripts/load_test.py runs against the pet list, a record list and
+a photo. Set BENCH_MONGO_URI to measure against a real MongoDB.
+
+Without it the database is mongomock, which answers in-process: there is no network
+wait for gevent to overlap, only CPU. --mongo-latency-ms stands in for the round trip
+to a MongoDB server by sleeping in every mongomock collection call; the sleep blocks a
+sync worker and yields under gevent, as a socket read would.
+"""
+
+import argparse
+import functools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+WORKER_CLASSES = ("sync", "gevent")
+
+# mongomock calls that stand for one round trip to the server
+ROUND_TRIP_METHODS = ("find", "find_one", "count_documents", "aggregate", "insert_one", "update_one", "delete_one")
+
+
+def _simulate_latency(seconds: float) -> None:
+    import mongomock
+
+    def delayed(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            time.sleep(seconds)
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    for name in ROUND_TRIP_METHODS:
+        setattr(mongomock.Collection, name, delayed(getattr(mongomock.Collection, name)))
+
+
+def create_app():
+    """Gunicorn entry point: the seeded app; the paths to load are written to BENCH_WORKERS_INFO."""
+    from benchmarks.harness import bootstrap_app
+    from benchmarks.seed import SCALES, seed
+
+    mongo_uri = os.getenv("BENCH_MONGO_URI")
+    web_app, db = bootstrap_app(mongo_uri)
+
+    from web.indexes import ensure_indexes
+
+    data = seed(db, SCALES[os.getenv("BENCH_SCALE", "small")])
+    ensure_indexes(db)
+
+    latency_ms = float(os.getenv("BENCH_MONGO_LATENCY_MS", "0"))
+    if latency_ms and not mongo_uri:
+        _simulate_latency(latency_ms / 1000)
+
+    pet_id = data.pet_ids[0]
+    paths = ["/api/pets", f"/api/weight?pet_id={pet_id}", f"/api/pets/{data.photo_pet_ids[0]}/photo?w=300"]
+    with open(os.environ["BENCH_WORKERS_INFO"], "w") as f:
+        json.dump({"username": data.username, "password": data.password, "paths": paths}, f)
+    return web_app.app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, info_path: str, server: subprocess.Popen, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+        if os.path.getsize(info_path):
+            try:
+                urllib.request.urlopen(f"{url}/api/pets")
+            except urllib.error.HTTPError:
+                return  # 401: the server is up
+            except OSError:
+                pass
+        time.sleep(0.5)
+    raise RuntimeError("gunicorn did not start")
+
+
+def run_worker_class(worker_class: str, args) -> dict:
+    """Start gunicorn with this worker class, run the load test against it and stop it."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.NamedTemporaryFile(suffix=".json") as info:
+        env = {
+            **os.environ,
+            "GUNICORN_WORKER_CLASS": worker_class,
+            "GUNICORN_WORKERS": str(args.workers),
+            "BENCH_WORKERS_INFO": info.name,
+            "BENCH_SCALE": args.scale,
+            "BENCH_MONGO_LATENCY_MS": str(args.mongo_latency_ms),
+            "LOG_LEVEL": "WARNING",
+        }
+        command = [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{port}", "--access-logfile", "/dev/null",
+            "benchmarks.workers:create_app()",
+        ]
+        server = subprocess.Popen(command, env=env)
+        try:
+            _wait_ready(url, info.name, server)
+            with open(info.name) as f:
+                target = json.load(f)
+            load = [
+                sys.executable, "scripts/load_test.py", "--url", url,
+                "--username", target["username"], "--password", target["password"],
+                "--concurrency", str(args.concurrency), "--requests", str(args.requests),
+            ]
+            for path in target["paths"]:
+                load += ["--path", path]
+            output = subprocess.run(load, check=True, capture_output=True, text=True).stdout
+            return json.loads(output)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gunicorn worker classes under the same load.")
+    parser.add_argument("--classes", nargs="+", default=list(WORKER_CLASSES), choices=WORKER_CLASSES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--scale", default="small", choices=["small", "medium", "large"])
+    parser.add_argument(
+        "--mongo-latency-ms", type=float, default=0, help="Simulated round trip per mongomock call (no BENCH_MONGO_URI)"
+    )
+    args = parser.parse_args()
+
+    report = {
+        "backend": "mongodb" if os.getenv("BENCH_MONGO_URI") else "mongomock",
+        "mongo_latency_ms": 0 if os.getenv("BENCH_MONGO_URI") else args.mongo_latency_ms,
+        "workers": args.workers,
+        "results": {worker_class: run_worker_class(worker_class, args) for worker_class in args.classes},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,16 @@
 
 import os
 
+# Worker class: "sync" (default) or "gevent" (cooperative, see web/offload.py)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+
+if worker_class == "gevent":
+    # The app is preloaded in the master (preload_app below), so patch before it imports
+    # pymongo/Flask; pymongo and GridFS are gevent-safe once socket/threading are patched
+    from gevent import monkey
+
+    monkey.patch_all()
+
 # Server socket
 bind = "0.0.0.0:5000"
 backlog = 2048
@@ -9,8 +19,8 @@ backlog = 2048
 # Worker processes
 # Default to 2 workers (can be overridden via GUNICORN_WORKERS env var)
 workers = int(os.getenv("GUNICORN_WORKERS", 2))
-worker_class = "sync"
-worker_connections = 1000
+# Concurrent requests per gevent worker; Mongo operations beyond maxPoolSize (web/db.py) wait for a connection
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
 timeout = 30
 keepalive = 2
 
@@ -41,3 +51,37 @@ tmp_upload_dir = None
 preload_app = True
 max_requests = 1000
 max_requests_jitter = 50
+
+
+def on_starting(server):
+    """Drop metrics snapshots of the previous run so /metrics restarts from zero with the server."""
+    metrics_dir = os.getenv("METRICS_MULTIPROC_DIR")
+    if os.getenv("METRICS_ENABLED", "False").lower() == "true" and metrics_dir:
+        from web.metrics import clear_snapshots
+
+        clear_snapshots(metrics_dir)
+
+
+def worker_exit(server, worker):
+    """Write the worker's final metrics snapshot, with the requests served since its last periodic flush."""
+    from web.metrics import ENABLED, flush_snapshot
+
+    if ENABLED:
+        flush_snapshot(force=True)
+
+
+def child_exit(server, worker):
+    """Fold the metrics snapshot of an exited worker into the dead workers' total (runs in the master)."""
+    metrics_dir = os.getenv("METRICS_MULTIPROC_DIR")
+    if os.getenv("METRICS_ENABLED", "False").lower() == "true" and metrics_dir:
+        from web.metrics import fold_snapshot
+
+        fold_snapshot(metrics_dir, worker.pid)
+
+
+def post_fork(server, worker):
+    """Start the worker's cache invalidation watcher (threads do not survive the fork of a preloaded app)."""
+    from web.app import db
+    from web.invalidation import start_watcher
+
+    start_watcher(db)
@@ -0,0 +1,94 @@
+"""Concurrent load test against a running backend.
+
+Used to compare gunicorn worker classes (GUNICORN_WORKER_CLASS=sync vs gevent) under the
+same number of workers. Only the standard library is required.
+
+Example:
+    # terminal 1
+    GUNICORN_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py web.app:app
+    # terminal 2
+    python scripts/load_test.py --url http://localhost:5000 --username admin --password secret \\
+        --path "/api/pets" --path "/api/pets/<pet_id>/photo?w=300" --concurrency 50 --requests 1000
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    """Obtain an access token (a single login, the route is rate limited)."""
+    request = urllib.request.Request(
+        f"{base_url}/api/auth/login",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["access_token"]
+
+
+def timed_get(base_url: str, path: str, token: str):
+    """Perform one GET and return (status, seconds)."""
+    request = urllib.request.Request(f"{base_url}{path}", headers={"Authorization": f"Bearer {token}"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, round(pct / 100 * len(ordered)) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", action="append", required=True, help="GET path, may be repeated")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    token = login(args.url, args.username, args.password)
+    paths = list(islice(cycle(args.path), args.requests))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda path: timed_get(args.url, path, token), paths))
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for _, seconds in results]
+    errors = sum(1 for status, _ in results if not 200 <= status < 400)
+    print(
+        json.dumps(
+            {
+                "requests": len(results),
+                "concurrency": args.concurrency,
+                "errors": errors,
+                "rps": round(len(results) / elapsed, 1),
+                "p50_ms": round(statistics.median(latencies), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "p99_ms": round(percentile(latencies, 99), 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
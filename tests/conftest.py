@@ -5,7 +5,9 @@ import bcrypt
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
 
+import gridfs
 import jwt
+import mongomock.gridfs
 import pytest
 from mongomock import MongoClient
 
@@ -28,6 +30,7 @@ _mock_db = _mock_client["test_db"]
 # Patch db and GridFS before importing app so ensure_default_admin uses mock_db
 with patch("web.db.db", _mock_db), patch("web.db.client", _mock_client), patch("gridfs.GridFS", MagicMock):
     from web.app import app
+    from web.refresh_tokens import token_hash
     from web.security import create_access_token
 
 
@@ -71,6 +74,15 @@ def mock_db():
         mock_client.drop_database("test_db")
 
 
+@pytest.fixture
+def real_fs(mock_db):
+    """Replace the mocked GridFS with a mongomock-backed one."""
+    mongomock.gridfs.enable_gridfs_integration()
+    fs = gridfs.GridFS(mock_db)
+    with patch("web.app.fs", fs):
+        yield fs
+
+
 @pytest.fixture(scope="function")
 def client(mock_db):
     """Create a Flask test client."""
@@ -101,7 +113,12 @@ def admin_refresh_token(mock_db):
     from web.app import db
 
     db["refresh_tokens"].insert_one(
-        {"token": token, "username": "admin", "created_at": datetime.now(timezone.utc), "expires_at": expire}
+        {
+            "token_hash": token_hash(token),
+            "username": "admin",
+            "created_at": datetime.now(timezone.utc),
+            "expires_at": expire,
+        }
     )
 
     return token
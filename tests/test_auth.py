@@ -2,8 +2,11 @@
 
 import pytest
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
 import jwt
-from web.security import JWT_SECRET_KEY, JWT_ALGORITHM
+from web.refresh_tokens import token_hash
+from web.security import JWT_SECRET_KEY, JWT_ALGORITHM, VerifiedTokenCache, verified_tokens, verify_token
 
 
 @pytest.mark.auth
@@ -61,7 +64,7 @@ class TestAuthentication:
 
         db["refresh_tokens"].insert_one(
             {
-                "token": admin_refresh_token,
+                "token_hash": token_hash(admin_refresh_token),
                 "username": "admin",
                 "created_at": datetime.now(timezone.utc),
                 "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
@@ -99,11 +102,11 @@ class TestAuthentication:
         from web.app import db
 
         # Ensure token exists
-        existing = db["refresh_tokens"].find_one({"token": admin_refresh_token})
+        existing = db["refresh_tokens"].find_one({"token_hash": token_hash(admin_refresh_token)})
         if not existing:
             db["refresh_tokens"].insert_one(
                 {
-                    "token": admin_refresh_token,
+                    "token_hash": token_hash(admin_refresh_token),
                     "username": "admin",
                     "created_at": datetime.now(timezone.utc),
                     "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
@@ -118,7 +121,7 @@ class TestAuthentication:
         assert data["success"] is True
 
         # Check token is removed from database
-        token_record = db["refresh_tokens"].find_one({"token": admin_refresh_token})
+        token_record = db["refresh_tokens"].find_one({"token_hash": token_hash(admin_refresh_token)})
         assert token_record is None
 
     def test_login_page_get(self, client):
@@ -177,7 +180,7 @@ class TestAuthentication:
 
         db["refresh_tokens"].insert_one(
             {
-                "token": admin_refresh_token,
+                "token_hash": token_hash(admin_refresh_token),
                 "username": "admin",
                 "created_at": datetime.now(timezone.utc),
                 "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
@@ -236,3 +239,67 @@ class TestAuthentication:
         assert response.status_code == 200
         data = response.get_json()
         assert data["is_admin"] is False
+
+
+@pytest.mark.auth
+@pytest.mark.unit
+class TestVerifiedTokenCache:
+    """Test the verified-token cache and per-request identity resolution."""
+
+    @staticmethod
+    def _token(username="admin", token_type="access", minutes=15):
+        payload = {
+            "username": username,
+            "exp": datetime.now(timezone.utc) + timedelta(minutes=minutes),
+            "type": token_type,
+        }
+        return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+    def test_cache_hit_skips_decode(self):
+        """A verified token is not decoded again."""
+        verified_tokens.clear()
+        token = self._token()
+        assert verify_token(token)["username"] == "admin"
+
+        with patch("web.security.jwt.decode", side_effect=AssertionError("decoded twice")):
+            assert verify_token(token)["username"] == "admin"
+
+    def test_cached_token_type_is_still_checked(self):
+        """A cached refresh token is not accepted as an access token."""
+        verified_tokens.clear()
+        token = self._token(token_type="refresh")
+
+        assert verify_token(token, "refresh") is not None
+        assert verify_token(token, "access") is None
+
+    def test_expired_entries_are_dropped(self):
+        """Entries are not served past the token's exp."""
+        cache = VerifiedTokenCache(4)
+        cache.put("token", {"username": "admin", "exp": 1000})
+
+        with patch("web.security.time.time", return_value=999):
+            assert cache.get("token") == {"username": "admin", "exp": 1000}
+        with patch("web.security.time.time", return_value=1000):
+            assert cache.get("token") is None
+
+    def test_size_is_bounded_lru(self):
+        """The least recently used entry is evicted first."""
+        cache = VerifiedTokenCache(2)
+        exp = datetime.now(timezone.utc).timestamp() + 60
+        cache.put("a", {"exp": exp})
+        cache.put("b", {"exp": exp})
+        cache.get("a")
+        cache.put("c", {"exp": exp})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_token_decoded_once_per_request(self, client, mock_db, admin_token):
+        """The before_request hook verifies the token; nested decorators reuse it."""
+        verified_tokens.clear()
+        with patch("web.security.jwt.decode", wraps=jwt.decode) as decode:
+            response = client.get("/api/users", headers={"Authorization": f"Bearer {admin_token}"})
+
+        assert response.status_code == 200
+        assert decode.call_count == 1
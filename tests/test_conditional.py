@@ -0,0 +1,145 @@
+"""Tests for conditional GET (ETag / If-None-Match) handling on list routes."""
+
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+
+@pytest.mark.health_records
+class TestConditionalRecordLists:
+    """Test 304 responses for per-pet record lists."""
+
+    def _get(self, client, token, pet, etag=None, path="/api/weight", extra=""):
+        headers = {"Authorization": f"Bearer {token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        return client.get(f"{path}?pet_id={pet['_id']}{extra}", headers=headers)
+
+    def _add_weight(self, client, token, pet, weight="4.5"):
+        response = client.post(
+            "/api/weight",
+            json={"pet_id": str(pet["_id"]), "date": "2024-01-15", "time": "14:30", "weight": weight},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 201
+
+    def test_list_sets_etag_and_cache_control(self, client, mock_db, regular_user_token, test_pet):
+        """List responses carry a weak ETag and must be revalidated."""
+        self._add_weight(client, regular_user_token, test_pet)
+
+        response = self._get(client, regular_user_token, test_pet)
+
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('W/"')
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    def test_matching_etag_returns_304_without_loading_records(self, client, mock_db, regular_user_token, test_pet):
+        """A matching validator short-circuits before the records are queried."""
+        self._add_weight(client, regular_user_token, test_pet)
+        etag = self._get(client, regular_user_token, test_pet).headers["ETag"]
+
+        with patch("web.health_records.paginate_records", side_effect=AssertionError("records must not be loaded")):
+            response = self._get(client, regular_user_token, test_pet, etag=etag)
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.data == b""
+
+    def test_insert_changes_etag(self, client, mock_db, regular_user_token, test_pet):
+        """Adding a record invalidates the validator."""
+        self._add_weight(client, regular_user_token, test_pet)
+        etag = self._get(client, regular_user_token, test_pet).headers["ETag"]
+
+        self._add_weight(client, regular_user_token, test_pet, weight="4.6")
+        response = self._get(client, regular_user_token, test_pet, etag=etag)
+
+        assert response.status_code == 200
+        assert len(response.get_json()["weights"]) == 2
+
+    def test_update_changes_etag(self, client, mock_db, regular_user_token, test_pet):
+        """Editing a record invalidates the validator even though count and ids are unchanged."""
+        self._add_weight(client, regular_user_token, test_pet)
+        record = mock_db["weights"].find_one({"pet_id": str(test_pet["_id"])})
+        etag = self._get(client, regular_user_token, test_pet).headers["ETag"]
+
+        update = client.put(
+            f"/api/weight/{record['_id']}",
+            json={"weight": "5.0"},
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+        assert update.status_code == 200
+        assert isinstance(mock_db["weights"].find_one({"_id": record["_id"]})["updated_at"], datetime)
+
+        response = self._get(client, regular_user_token, test_pet, etag=etag)
+        assert response.status_code == 200
+
+    def test_delete_changes_etag(self, client, mock_db, regular_user_token, test_pet):
+        """Deleting a record invalidates the validator."""
+        self._add_weight(client, regular_user_token, test_pet)
+        self._add_weight(client, regular_user_token, test_pet, weight="4.6")
+        record = mock_db["weights"].find_one({"pet_id": str(test_pet["_id"])})
+        etag = self._get(client, regular_user_token, test_pet).headers["ETag"]
+
+        client.delete(f"/api/weight/{record['_id']}", headers={"Authorization": f"Bearer {regular_user_token}"})
+
+        assert self._get(client, regular_user_token, test_pet, etag=etag).status_code == 200
+
+    def test_etag_differs_per_page(self, client, mock_db, regular_user_token, test_pet):
+        """Different pages of the same list have different validators."""
+        self._add_weight(client, regular_user_token, test_pet)
+        first = self._get(client, regular_user_token, test_pet, extra="&page=1&page_size=1")
+        second = self._get(client, regular_user_token, test_pet, extra="&page=2&page_size=1")
+
+        assert first.headers["ETag"] != second.headers["ETag"]
+
+    def test_validator_reads_at_most_one_record(self, client, mock_db, regular_user_token, test_pet):
+        """The validator counts and reads the latest stamp; it never scans the records."""
+        self._add_weight(client, regular_user_token, test_pet)
+        self._add_weight(client, regular_user_token, test_pet, weight="4.6")
+        etag = self._get(client, regular_user_token, test_pet).headers["ETag"]
+
+        with patch("mongomock.collection.Collection.aggregate", side_effect=AssertionError("no aggregation")):
+            response = self._get(client, regular_user_token, test_pet, etag=etag)
+
+        assert response.status_code == 304
+
+
+@pytest.mark.pets
+class TestConditionalPetList:
+    """Test 304 responses for the pet list."""
+
+    def _get(self, client, token, etag=None):
+        headers = {"Authorization": f"Bearer {token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        return client.get("/api/pets", headers=headers)
+
+    def test_pet_list_returns_304_when_unchanged(self, client, mock_db, regular_user_token, test_pet):
+        """Unchanged pet list is revalidated with 304."""
+        etag = self._get(client, regular_user_token).headers["ETag"]
+
+        response = self._get(client, regular_user_token, etag=etag)
+
+        assert response.status_code == 304
+
+    def test_pet_update_changes_etag(self, client, mock_db, regular_user_token, test_pet):
+        """Updating a pet invalidates the list validator."""
+        etag = self._get(client, regular_user_token).headers["ETag"]
+
+        client.put(
+            f"/api/pets/{test_pet['_id']}",
+            json={"name": "Renamed Cat"},
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+        response = self._get(client, regular_user_token, etag=etag)
+
+        assert response.status_code == 200
+        assert response.get_json()["pets"][0]["name"] == "Renamed Cat"
+
+    def test_pet_list_etag_is_per_user(self, client, mock_db, regular_user_token, admin_token, test_pet):
+        """Validators are not shared between users."""
+        user_etag = self._get(client, regular_user_token).headers["ETag"]
+
+        response = self._get(client, admin_token, etag=user_etag)
+
+        assert response.status_code == 200
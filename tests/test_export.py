@@ -862,3 +862,109 @@ class TestDataExport:
         assert b"# " in response.data
         assert "Чистка зубов".encode("utf-8") in response.data
         assert "Пользователь".encode("utf-8") in response.data
+
+
+@pytest.mark.health
+class TestExportStreaming:
+    """Tests for the streaming export pipeline."""
+
+    def test_export_response_is_streamed(self, client, mock_db, regular_user_token, test_pet):
+        """Export responses should be streamed instead of buffered in memory."""
+        from web.app import db
+
+        db["weights"].insert_one(
+            {"pet_id": str(test_pet["_id"]), "date_time": datetime(2024, 1, 15, 14, 30), "weight": 4.5}
+        )
+
+        response = client.get(
+            f"/api/export/weight/csv?pet_id={test_pet['_id']}",
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.headers.get("Content-Length") is None
+
+    def test_export_markdown_uses_real_newlines(self, client, mock_db, regular_user_token, test_pet):
+        """Markdown export should contain one table row per line."""
+        from web.app import db
+
+        db["litter_changes"].insert_many(
+            [
+                {"pet_id": str(test_pet["_id"]), "date_time": datetime(2024, 1, 15, 14, 30), "username": "testuser"},
+                {"pet_id": str(test_pet["_id"]), "date_time": datetime(2024, 1, 16, 14, 30), "username": "testuser"},
+            ]
+        )
+
+        response = client.get(
+            f"/api/export/litter/md?pet_id={test_pet['_id']}",
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        lines = response.data.decode("utf-8").splitlines()
+        assert lines[0] == "# Смена лотка"
+        assert lines[2].startswith("| Дата и время")
+        assert lines[4].startswith("| 16.01.2024 14:30")
+        assert len(lines) == 6
+
+    def test_export_medication_names_resolved(self, client, mock_db, regular_user_token, test_pet):
+        """Intake export should resolve medication names and fall back to 'Unknown'."""
+        from web.app import db
+
+        med_id = db["medications"].insert_one({"pet_id": str(test_pet["_id"]), "name": "Prednisolone"}).inserted_id
+        db["medication_intakes"].insert_many(
+            [
+                {
+                    "pet_id": str(test_pet["_id"]),
+                    "medication_id": str(med_id),
+                    "date_time": datetime(2024, 1, 15, 14, 30),
+                    "dose_taken": 1.0,
+                },
+                {
+                    "pet_id": str(test_pet["_id"]),
+                    "medication_id": "507f1f77bcf86cd799439011",
+                    "date_time": datetime(2024, 1, 14, 14, 30),
+                    "dose_taken": 0.5,
+                },
+            ]
+        )
+
+        response = client.get(
+            f"/api/export/medications/csv?pet_id={test_pet['_id']}",
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        rows = list(csv.reader(io.StringIO(response.data.decode("utf-8-sig"))))
+        assert rows[1][2] == "Prednisolone"
+        assert rows[2][2] == "Unknown"
+
+    @pytest.mark.parametrize("format_type", ["csv", "tsv", "html", "md"])
+    def test_export_peak_memory_is_bounded(self, client, format_type):
+        """Peak memory must not grow with the number of exported records."""
+        import tracemalloc
+        from web.export import EXPORT_TYPES, iter_export_chunks
+
+        def records(count):
+            for i in range(count):
+                yield {
+                    "date_time": datetime(2024, 1, 1, i % 24, i % 60),
+                    "username": "testuser",
+                    "weight": 4.5,
+                    "food": "Сухой корм",
+                    "comment": "Комментарий " * 4,
+                }
+
+        def measure(count):
+            tracemalloc.start()
+            try:
+                total_bytes = sum(len(chunk) for chunk in iter_export_chunks(records(count), EXPORT_TYPES["weight"], format_type))
+                return total_bytes, tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small_bytes, small_peak = measure(2_000)
+        large_bytes, large_peak = measure(20_000)
+
+        assert large_bytes > 9 * small_bytes
+        assert large_peak < 1024 * 1024
+        assert large_peak < small_peak * 2
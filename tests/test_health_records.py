@@ -1,7 +1,12 @@
 """Tests for health records endpoints (asthma, defecation, litter, weight, feeding)."""
 
+import gzip
+import json
+import os
+
 import pytest
 from datetime import datetime, timezone
+from unittest.mock import patch
 
 
 @pytest.mark.health_records
@@ -1258,3 +1263,248 @@ class TestFeedingRecords:
 
         assert response.status_code == 200
         assert mock_db["feedings"].find_one({"_id": record.inserted_id}) is None
+
+
+@pytest.mark.health_records
+class TestKeysetPagination:
+    """Test cursor-based pagination shared by record and intake lists."""
+
+    def _seed(self, mock_db, collection, pet_id, count, same_time_every=1):
+        base = datetime(2024, 1, 1, 12, 0)
+        mock_db[collection].insert_many(
+            [
+                {"pet_id": pet_id, "date_time": base.replace(hour=i // same_time_every), "username": "testuser"}
+                for i in range(count)
+            ]
+        )
+
+    def _walk(self, client, token, url, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = f"{url}&page_size={page_size}" + (f"&cursor={cursor}" if cursor else "")
+            data = client.get(query, headers={"Authorization": f"Bearer {token}"}).get_json()
+            ids.extend(item["_id"] for item in data[next(key for key in data if isinstance(data[key], list))])
+            pages += 1
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids, pages
+
+    def test_cursor_walk_returns_every_record_once(self, client, mock_db, regular_user_token, test_pet):
+        """Following next_cursor visits all records in order, even with equal date_time values."""
+        pet_id = str(test_pet["_id"])
+        self._seed(mock_db, "litter_changes", pet_id, 7, same_time_every=3)
+
+        ids, pages = self._walk(client, regular_user_token, f"/api/litter?pet_id={pet_id}", page_size=2)
+
+        expected = [
+            str(doc["_id"])
+            for doc in mock_db["litter_changes"].find({"pet_id": pet_id}).sort([("date_time", -1), ("_id", -1)])
+        ]
+        assert ids == expected
+        assert pages == 4
+
+    def test_cursor_page_matches_offset_page(self, client, mock_db, regular_user_token, test_pet):
+        """The page after a cursor equals the equivalent offset page."""
+        pet_id = str(test_pet["_id"])
+        self._seed(mock_db, "weights", pet_id, 5)
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+
+        first = client.get(f"/api/weight?pet_id={pet_id}&page_size=2", headers=headers).get_json()
+        by_cursor = client.get(
+            f"/api/weight?pet_id={pet_id}&page_size=2&cursor={first['next_cursor']}", headers=headers
+        ).get_json()
+        by_page = client.get(f"/api/weight?pet_id={pet_id}&page_size=2&page=2", headers=headers).get_json()
+
+        assert [w["_id"] for w in by_cursor["weights"]] == [w["_id"] for w in by_page["weights"]]
+
+    def test_last_page_has_no_next_cursor(self, client, mock_db, regular_user_token, test_pet):
+        """next_cursor is null when there are no more records."""
+        pet_id = str(test_pet["_id"])
+        self._seed(mock_db, "feedings", pet_id, 2)
+
+        data = client.get(
+            f"/api/feeding?pet_id={pet_id}&page_size=2", headers={"Authorization": f"Bearer {regular_user_token}"}
+        ).get_json()
+
+        assert len(data["feedings"]) == 2
+        assert data["next_cursor"] is None
+
+    def test_include_total_false_skips_count(self, client, mock_db, regular_user_token, test_pet):
+        """include_total=false returns total=null without counting."""
+        from unittest.mock import patch
+        from mongomock.collection import Collection
+
+        pet_id = str(test_pet["_id"])
+        self._seed(mock_db, "eye_drops", pet_id, 3)
+
+        with patch.object(Collection, "count_documents", side_effect=AssertionError("count must be skipped")):
+            response = client.get(
+                f"/api/eye_drops?pet_id={pet_id}&include_total=false",
+                headers={"Authorization": f"Bearer {regular_user_token}"},
+            )
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["total"] is None
+        assert len(data["eye_drops"]) == 3
+
+    def test_invalid_cursor(self, client, mock_db, regular_user_token, test_pet):
+        """Malformed cursors are rejected."""
+        response = client.get(
+            f"/api/asthma?pet_id={test_pet['_id']}&cursor=not-a-cursor",
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        assert response.status_code == 422
+        assert response.get_json()["code"] == "invalid_cursor"
+
+    def test_medication_intakes_support_cursor(self, client, mock_db, regular_user_token, test_pet):
+        """/api/medications/intakes uses the same cursor pagination."""
+        from bson import ObjectId
+
+        pet_id = str(test_pet["_id"])
+        med_id = mock_db["medications"].insert_one({"pet_id": pet_id, "name": "Med"}).inserted_id
+        mock_db["medication_intakes"].insert_many(
+            [
+                {
+                    "pet_id": pet_id,
+                    "medication_id": str(med_id),
+                    "date_time": datetime(2024, 1, 1, hour),
+                    "dose_taken": 1.0,
+                    "username": "testuser",
+                }
+                for hour in range(5)
+            ]
+        )
+
+        ids, pages = self._walk(client, regular_user_token, f"/api/medications/intakes?pet_id={pet_id}", page_size=2)
+
+        assert len(set(ids)) == 5
+        assert pages == 3
+        assert all(ObjectId.is_valid(intake_id) for intake_id in ids)
+
+
+@pytest.mark.health_records
+class TestBatchRecords:
+    """Test POST /api/records/batch."""
+
+    def _record(self, record_type, pet_id, **fields):
+        return {"type": record_type, "pet_id": str(pet_id), "date": "2024-01-15", "time": "08:00", **fields}
+
+    def test_mixed_types_are_created(self, client, mock_db, regular_user_token, test_pet):
+        """Records of different types land in their collections in one request."""
+        records = [
+            self._record("weight", test_pet["_id"], client_id="a", weight="4.5"),
+            self._record("feeding", test_pet["_id"], client_id="b", food_weight=50),
+            self._record("litter", test_pet["_id"], client_id="c"),
+        ]
+
+        response = client.post(
+            "/api/records/batch", json={"records": records}, headers={"Authorization": f"Bearer {regular_user_token}"}
+        )
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["created"] == 3 and data["failed"] == 0
+        assert [result["client_id"] for result in data["results"]] == ["a", "b", "c"]
+        feeding = mock_db["feedings"].find_one({"pet_id": str(test_pet["_id"])})
+        assert str(feeding["_id"]) == data["results"][1]["id"]
+        assert feeding["food_weight"] == 50
+        assert feeding["username"] == "testuser"
+        assert feeding["date_time"] == datetime(2024, 1, 15, 8, 0)
+
+    def test_per_item_errors_do_not_reject_batch(self, client, mock_db, regular_user_token, test_pet):
+        """Invalid records and records of inaccessible pets fail individually."""
+        other_pet = mock_db["pets"].insert_one({"name": "Other", "owner": "someone", "shared_with": []}).inserted_id
+        records = [
+            self._record("weight", test_pet["_id"], weight="4.5"),
+            self._record("weight", test_pet["_id"], time="25:99"),
+            self._record("asthma", other_pet),
+        ]
+
+        response = client.post(
+            "/api/records/batch", json={"records": records}, headers={"Authorization": f"Bearer {regular_user_token}"}
+        )
+
+        results = response.get_json()["results"]
+        assert [result["status"] for result in results] == [201, 422, 403]
+        assert results[2]["code"] == "pet_forbidden"
+        assert mock_db["weights"].count_documents({}) == 1
+        assert mock_db["asthma_attacks"].count_documents({}) == 0
+
+    def test_pet_access_checked_once_per_pet(self, client, mock_db, regular_user_token, test_pet):
+        """Many records of one pet trigger a single access check."""
+        records = [self._record("eye_drops", test_pet["_id"]) for _ in range(5)]
+
+        with patch("web.batch.check_pet_access", return_value=True) as check:
+            response = client.post(
+                "/api/records/batch",
+                json={"records": records},
+                headers={"Authorization": f"Bearer {regular_user_token}"},
+            )
+
+        assert response.get_json()["created"] == 5
+        check.assert_called_once_with(str(test_pet["_id"]), "testuser")
+
+    def test_gzip_body(self, client, mock_db, regular_user_token, test_pet):
+        """Content-Encoding: gzip bodies are inflated before validation."""
+        body = gzip.compress(json.dumps({"records": [self._record("tooth_brushing", test_pet["_id"])]}).encode())
+
+        response = client.post(
+            "/api/records/batch",
+            data=body,
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {regular_user_token}", "Content-Encoding": "gzip"},
+        )
+
+        assert response.status_code == 200
+        assert response.get_json()["created"] == 1
+
+    def test_gzip_bomb_rejected(self, client, mock_db, regular_user_token):
+        """Bodies inflating beyond the limit are refused without inflating them fully."""
+        from web.batch import MAX_BATCH_BODY_BYTES
+
+        response = client.post(
+            "/api/records/batch",
+            data=gzip.compress(b" " * (MAX_BATCH_BODY_BYTES + 10)),
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {regular_user_token}", "Content-Encoding": "gzip"},
+        )
+
+        assert response.status_code == 413
+
+    def test_large_compressed_body_rejected_before_reading(self, client, mock_db, regular_user_token):
+        """A compressed body over the limit is refused from its Content-Length."""
+        from web.batch import MAX_BATCH_BODY_BYTES
+
+        body = gzip.compress(os.urandom(MAX_BATCH_BODY_BYTES + 10))
+        with patch("web.decorators.get_input_stream", side_effect=AssertionError("body must not be read")):
+            response = client.post(
+                "/api/records/batch",
+                data=body,
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {regular_user_token}", "Content-Encoding": "gzip"},
+            )
+
+        assert response.status_code == 413
+
+    def test_truncated_gzip_rejected(self, client, mock_db, regular_user_token, test_pet):
+        """A gzip stream that ends early is an invalid encoding."""
+        body = gzip.compress(json.dumps({"records": [self._record("tooth_brushing", test_pet["_id"])]}).encode())
+
+        response = client.post(
+            "/api/records/batch",
+            data=body[:-10],
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {regular_user_token}", "Content-Encoding": "gzip"},
+        )
+
+        assert response.status_code == 400
+
+    def test_invalid_batch_shape(self, client, mock_db, regular_user_token):
+        """Unknown types and empty batches are request-level validation errors."""
+        for body in ({"records": []}, {"records": [{"type": "unknown"}]}):
+            response = client.post(
+                "/api/records/batch", json=body, headers={"Authorization": f"Bearer {regular_user_token}"}
+            )
+            assert response.status_code == 422
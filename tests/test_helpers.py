@@ -158,3 +158,112 @@ class TestParseEventDateTimeSafe:
         assert error_response2 is None
         assert isinstance(event_dt1, datetime)
         assert isinstance(event_dt2, datetime)
+
+
+@pytest.mark.unit
+class TestPetAccessCache:
+    """Tests for per-request and cross-request pet access caching."""
+
+    @pytest.fixture
+    def pet_lookups(self):
+        """Count find_one calls against the pets collection."""
+        from unittest.mock import patch
+        from mongomock.collection import Collection
+
+        original = Collection.find_one
+        calls = []
+
+        def counting_find_one(collection, *args, **kwargs):
+            if collection.name == "pets":
+                calls.append(args)
+            return original(collection, *args, **kwargs)
+
+        with patch.object(Collection, "find_one", counting_find_one):
+            yield calls
+
+    @pytest.fixture
+    def acl_cache(self):
+        """Enable the cross-request ACL cache for one test."""
+        from unittest.mock import patch
+        from web import helpers
+
+        helpers._pet_acl_cache.clear()
+        with patch.dict(helpers.CACHE_CONFIG, {"pet_acl_ttl_seconds": 60}):
+            yield helpers._pet_acl_cache
+        helpers._pet_acl_cache.clear()
+
+    def test_pet_loaded_once_per_request(self, client, mock_db, regular_user, test_pet, pet_lookups):
+        """Repeated access checks in one request reuse the loaded pet."""
+        from web.app import app
+        from web.helpers import check_pet_access, get_pet_and_validate
+
+        with app.app_context():
+            assert check_pet_access(str(test_pet["_id"]), regular_user["username"]) is True
+            assert check_pet_access(str(test_pet["_id"]), regular_user["username"]) is True
+            assert len(pet_lookups) == 1
+
+            # Upgrading to the full document costs one more lookup, later calls are free
+            pet, error = get_pet_and_validate(str(test_pet["_id"]), regular_user["username"])
+            assert error is None
+            assert pet["name"] == test_pet["name"]
+            get_pet_and_validate(str(test_pet["_id"]), regular_user["username"], require_owner=True)
+            check_pet_access(str(test_pet["_id"]), regular_user["username"])
+            assert len(pet_lookups) == 2
+
+    def test_access_check_uses_projection(self, client, mock_db, regular_user, test_pet, pet_lookups):
+        """Plain access checks fetch only owner/shared_with."""
+        from web.app import app
+        from web.helpers import PET_ACL_PROJECTION, check_pet_access
+
+        with app.app_context():
+            check_pet_access(str(test_pet["_id"]), regular_user["username"])
+
+        assert pet_lookups[0][1] == PET_ACL_PROJECTION
+
+    def test_pet_update_route_loads_pet_once(self, client, mock_db, regular_user_token, test_pet, pet_lookups):
+        """PUT /api/pets/<id> no longer reads the pet twice."""
+        response = client.put(
+            f"/api/pets/{test_pet['_id']}",
+            json={"name": "Renamed"},
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        assert response.status_code == 200
+        assert len(pet_lookups) == 1
+
+    def test_acl_cache_serves_across_requests(self, client, mock_db, regular_user_token, test_pet, pet_lookups, acl_cache):
+        """With a TTL configured, later requests skip the pets lookup."""
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        client.get(f"/api/weight?pet_id={test_pet['_id']}", headers=headers)
+        client.get(f"/api/weight?pet_id={test_pet['_id']}", headers=headers)
+
+        assert len(pet_lookups) == 1
+        assert str(test_pet["_id"]) in acl_cache
+
+    def test_acl_cache_invalidated_on_unshare(self, client, mock_db, regular_user_token, test_pet, acl_cache):
+        """Unsharing a pet revokes cached access immediately."""
+        from web.app import app
+        from web.helpers import check_pet_access
+
+        mock_db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"shared_with": ["shareduser"]}})
+        assert check_pet_access(str(test_pet["_id"]), "shareduser") is True
+
+        response = client.delete(
+            f"/api/pets/{test_pet['_id']}/share/shareduser",
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        assert response.status_code == 200
+        assert str(test_pet["_id"]) not in acl_cache
+        with app.app_context():
+            assert check_pet_access(str(test_pet["_id"]), "shareduser") is False
+
+    def test_acl_cache_disabled_by_default(self, client, mock_db, regular_user, test_pet, pet_lookups):
+        """Without a TTL every request reads the pet again."""
+        from web.helpers import check_pet_access, _pet_acl_cache
+
+        check_pet_access(str(test_pet["_id"]), regular_user["username"])
+        check_pet_access(str(test_pet["_id"]), regular_user["username"])
+
+        assert len(pet_lookups) == 2
+        assert _pet_acl_cache == {}
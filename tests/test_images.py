@@ -0,0 +1,114 @@
+"""Tests for the photo upload pipeline (web/images.py)."""
+
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from web.app import app
+from web.images import ImageTooLarge, optimize_image
+
+
+def _image_bytes(size, format="JPEG", mode="RGB"):
+    output = BytesIO()
+    Image.new(mode, size, color="orange").save(output, format=format)
+    output.seek(0)
+    return output
+
+
+def _max_pixels(limit):
+    return patch.dict("web.images.IMAGE_CONFIG", {"max_pixels": limit})
+
+
+@pytest.mark.unit
+class TestOptimizeImage:
+    """Uploads are decoded at reduced scale and bounded by pixel count."""
+
+    def test_jpeg_is_decoded_at_reduced_scale(self):
+        stages = {}
+
+        output, content_type = optimize_image(_image_bytes((4000, 3000)), stages=stages)
+
+        assert content_type == "image/webp"
+        assert Image.open(output).size == (1920, 1440)
+        # libjpeg decoded at 1/2 scale: 2000x1500, never the full 12 MP
+        assert stages["decode"]["peak_bytes"] == 2000 * 1500 * 4
+        assert set(stages) == {"probe", "decode", "reduce", "convert", "resize", "encode"}
+        assert all(stats["seconds"] >= 0 for stats in stages.values())
+
+    def test_other_formats_are_reduced_before_resampling(self):
+        stages = {}
+
+        output, _ = optimize_image(_image_bytes((8000, 2000), format="PNG"), stages=stages)
+
+        assert Image.open(output).size == (1920, 480)
+        # Box-reduced by 2 before LANCZOS: the resize stage works on 4000x1000
+        assert stages["resize"]["peak_bytes"] == (4000 * 1000 + 1920 * 480) * 4
+
+    def test_transparency_is_flattened(self):
+        output, _ = optimize_image(_image_bytes((300, 200), format="PNG", mode="RGBA"))
+
+        assert Image.open(output).mode == "RGB"
+
+    def test_small_images_keep_their_size(self):
+        output, _ = optimize_image(_image_bytes((300, 200)))
+
+        assert Image.open(output).size == (300, 200)
+
+    def test_pixel_limit_is_checked_before_decoding(self):
+        upload = _image_bytes((200, 100))
+        with _max_pixels(10_000), patch.object(Image.Image, "load", side_effect=AssertionError("decoded")):
+            with pytest.raises(ImageTooLarge):
+                optimize_image(upload)
+
+    def test_unreadable_file_returns_none(self):
+        assert optimize_image(BytesIO(b"not an image")) is None
+
+
+@pytest.mark.unit
+class TestUploadSpooling:
+    """Large multipart file parts are spooled to disk."""
+
+    def test_large_file_part_is_spooled(self):
+        data = {"photo_file": (BytesIO(b"x" * 200_000), "cat.jpg", "image/jpeg")}
+        with patch.dict("web.images.IMAGE_CONFIG", {"spool_threshold_bytes": 1024}):
+            with app.test_request_context("/", method="POST", data=data, content_type="multipart/form-data"):
+                from flask import request
+
+                assert request.files["photo_file"].stream._rolled
+
+
+@pytest.mark.pets
+class TestPhotoUploadLimits:
+    """Oversized photos are rejected with 413 and nothing changes."""
+
+    def test_create_pet_rejects_oversized_photo(self, client, mock_db, real_fs, regular_user_token):
+        with _max_pixels(10_000):
+            response = client.post(
+                "/api/pets",
+                data={"name": "Big Cat", "photo_file": (_image_bytes((200, 100)), "cat.jpg", "image/jpeg")},
+                headers={"Authorization": f"Bearer {regular_user_token}"},
+                content_type="multipart/form-data",
+            )
+
+        assert response.status_code == 413
+        assert response.get_json()["code"] == "image_too_large"
+        assert mock_db["pets"].count_documents({"name": "Big Cat"}) == 0
+        assert mock_db["fs.files"].count_documents({}) == 0
+
+    def test_update_pet_keeps_current_photo_when_rejected(self, client, mock_db, real_fs, regular_user_token, test_pet):
+        photo_file_id = str(real_fs.put(_image_bytes((50, 50)).getvalue(), content_type="image/jpeg"))
+        mock_db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"photo_file_id": photo_file_id}})
+
+        with _max_pixels(10_000):
+            response = client.put(
+                f"/api/pets/{test_pet['_id']}",
+                data={"name": "Test Cat", "photo_file": (_image_bytes((200, 100)), "cat.jpg", "image/jpeg")},
+                headers={"Authorization": f"Bearer {regular_user_token}"},
+                content_type="multipart/form-data",
+            )
+
+        assert response.status_code == 413
+        assert mock_db["pets"].find_one({"_id": test_pet["_id"]})["photo_file_id"] == photo_file_id
+        assert mock_db["fs.files"].count_documents({}) == 1
@@ -0,0 +1,137 @@
+"""Tests for the MongoDB index registry (web/indexes.py)."""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from web.indexes import INDEXES, RECORD_COLLECTIONS, ensure_indexes, index_report
+
+
+@pytest.mark.unit
+class TestIndexRegistry:
+    """Tests for ensure_indexes and index_report against mongomock."""
+
+    def test_ensure_indexes_creates_all_registered_indexes(self, mock_db):
+        """All registered indexes should be created on an empty database."""
+        created = ensure_indexes(mock_db)
+
+        assert len(created) == len(INDEXES)
+        for spec in INDEXES:
+            assert spec.name in mock_db[spec.collection].index_information()
+
+    def test_ensure_indexes_is_idempotent(self, mock_db):
+        """Second run should not create anything and report no drift."""
+        ensure_indexes(mock_db)
+
+        assert ensure_indexes(mock_db) == []
+        report = index_report(mock_db)
+        assert all(not entry["missing"] and not entry["extra"] for entry in report.values())
+
+    def test_index_report_lists_missing_and_extra(self, mock_db):
+        """Dropped registered indexes are missing, unknown indexes are extra."""
+        ensure_indexes(mock_db)
+        mock_db["weights"].drop_index("pet_id_1_date_time_-1__id_-1")
+        mock_db["weights"].create_index("comment")
+
+        report = index_report(mock_db)
+
+        assert report["weights"]["missing"] == ["pet_id_1_date_time_-1__id_-1"]
+        assert report["weights"]["extra"] == ["comment_1"]
+        assert report["feedings"] == {"missing": [], "extra": []}
+
+    def test_every_record_collection_has_pet_date_index(self):
+        """Each record collection must be listed by (pet_id, date_time, _id) for keyset pagination."""
+        registered = {(spec.collection, spec.keys) for spec in INDEXES}
+        for collection_name in RECORD_COLLECTIONS:
+            assert (collection_name, (("pet_id", 1), ("date_time", -1), ("_id", -1))) in registered
+
+    def test_username_index_is_unique(self, mock_db):
+        """users.username should reject duplicates once indexes are applied."""
+        ensure_indexes(mock_db)
+        mock_db["users"].delete_many({})
+        mock_db["users"].insert_one({"username": "dup"})
+
+        with pytest.raises(DuplicateKeyError):
+            mock_db["users"].insert_one({"username": "dup"})
+
+    def test_cli_check_reports_missing_indexes(self, mock_db):
+        """`flask ensure-indexes --check` exits non-zero while indexes are missing."""
+        from web.app import app
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["ensure-indexes", "--check"])
+        assert result.exit_code == 1
+        assert "missing=" in result.output
+
+        result = runner.invoke(args=["ensure-indexes"])
+        assert result.exit_code == 0
+        assert "All registered indexes are present" in result.output
+
+
+def _plan_stages(plan):
+    """Collect stage names from a winning plan tree."""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "inputStages", "queryPlan"):
+        child = plan.get(key)
+        if isinstance(child, list):
+            for item in child:
+                stages.extend(_plan_stages(item))
+        elif isinstance(child, dict):
+            stages.extend(_plan_stages(child))
+    return stages
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.getenv("MONGO_TEST_URI"), reason="MONGO_TEST_URI is not set (needs a real MongoDB)")
+class TestIndexExplainPlans:
+    """Explain-plan assertions: hot query shapes must not fall back to collection scans."""
+
+    @pytest.fixture
+    def real_db(self):
+        from pymongo import MongoClient
+
+        client = MongoClient(os.environ["MONGO_TEST_URI"])
+        database = client["petzy_index_explain_test"]
+        ensure_indexes(database)
+        yield database
+        client.drop_database("petzy_index_explain_test")
+        client.close()
+
+    def _stages(self, cursor):
+        return _plan_stages(cursor.explain()["queryPlanner"]["winningPlan"])
+
+    @pytest.mark.parametrize("collection_name", RECORD_COLLECTIONS)
+    def test_record_list_uses_index_without_sort(self, real_db, collection_name):
+        stages = self._stages(real_db[collection_name].find({"pet_id": "p1"}).sort("date_time", -1).limit(100))
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+        assert "SORT" not in stages
+
+    def test_stats_range_query_uses_index(self, real_db):
+        since = datetime.now() - timedelta(days=30)
+        stages = self._stages(real_db["weights"].find({"pet_id": "p1", "date_time": {"$gte": since}}).sort("date_time", 1))
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+
+    def test_intakes_by_medication_uses_index(self, real_db):
+        stages = self._stages(
+            real_db["medication_intakes"].find({"medication_id": {"$in": ["m1", "m2"]}, "date_time": {"$gte": datetime.now()}})
+        )
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+
+    @pytest.mark.parametrize(
+        "collection_name,query",
+        [
+            ("users", {"username": "admin", "is_active": True}),
+            ("refresh_tokens", {"token_hash": "abc"}),
+            ("medications", {"pet_id": "p1"}),
+            ("pets", {"$or": [{"owner": "admin"}, {"shared_with": "admin"}]}),
+        ],
+    )
+    def test_lookups_use_index(self, real_db, collection_name, query):
+        stages = self._stages(real_db[collection_name].find(query))
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
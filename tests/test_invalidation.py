@@ -0,0 +1,238 @@
+"""Tests for cross-worker cache invalidation (web/invalidation.py)."""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError
+
+from web import invalidation
+from web.invalidation import ChangeStreamWatcher, InvalidationBus, PollingWatcher, _select_watcher, change_scope
+
+
+class FakeChangeStream:
+    """Local stand-in for a pymongo ChangeStream delivering queued events."""
+
+    def __init__(self, events, stop):
+        self.events = list(events)
+        self.stop = stop
+
+    @property
+    def alive(self):
+        return True
+
+    def try_next(self):
+        if self.events:
+            return self.events.pop(0)
+        self.stop.set()
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeReplicaSet:
+    """Local stand-in for a database with change streams."""
+
+    def __init__(self, events, stop):
+        self.stream = FakeChangeStream(events, stop)
+
+    def watch(self, pipeline, **kwargs):
+        return self.stream
+
+
+@pytest.fixture
+def bumps():
+    """A private bus recording every published bump."""
+    bus = InvalidationBus()
+    published = []
+    bus.subscribe(lambda scope, key: published.append((scope, key)))
+    return bus, published
+
+
+@pytest.mark.unit
+class TestInvalidationBus:
+    """Test versions and subscribers."""
+
+    def test_publish_bumps_version_and_notifies(self, bumps):
+        bus, published = bumps
+        before = bus.version("pet", "p1")
+
+        bus.publish("pet", "p1")
+
+        assert bus.version("pet", "p1") != before
+        assert bus.version("pet", "p2") == before
+        assert published == [("pet", "p1")]
+
+    def test_publish_all_changes_every_version(self, bumps):
+        bus, published = bumps
+        bus.publish("user", "alice")
+        before = bus.version("user", "bob")
+
+        bus.publish_all()
+
+        assert bus.version("user", "bob") != before
+        assert published[-1] == (None, None)
+
+    def test_failing_subscriber_does_not_block_others(self, bumps):
+        bus, published = bumps
+
+        def broken(scope, key):
+            raise RuntimeError("boom")
+
+        bus.subscribe(broken)
+        bus.publish("pet", "p1")
+
+        assert published == [("pet", "p1")]
+
+
+@pytest.mark.unit
+class TestChangeScope:
+    """Change events map to pet and user scopes."""
+
+    def test_record_insert_bumps_its_pet(self):
+        change = {"operationType": "insert", "ns": {"coll": "feedings"}, "fullDocument": {"pet_id": "p1"}}
+        assert change_scope(change) == ("pet", "p1")
+
+    def test_pet_delete_uses_document_key(self):
+        pet_id = ObjectId()
+        change = {"operationType": "delete", "ns": {"coll": "pets"}, "documentKey": {"_id": pet_id}}
+        assert change_scope(change) == ("pet", str(pet_id))
+
+    def test_record_delete_is_left_to_its_tombstone(self):
+        change = {"operationType": "delete", "ns": {"coll": "weights"}, "documentKey": {"_id": ObjectId()}}
+        assert change_scope(change) is None
+
+    def test_user_update(self):
+        change = {"operationType": "update", "ns": {"coll": "users"}, "fullDocument": {"username": "alice"}}
+        assert change_scope(change) == ("user", "alice")
+
+
+@pytest.mark.unit
+class TestChangeStreamWatcher:
+    """Test the change stream consumer against a local stand-in."""
+
+    def test_events_are_published(self, bumps):
+        bus, published = bumps
+        stop = threading.Event()
+        events = [
+            {"operationType": "insert", "ns": {"coll": "weights"}, "fullDocument": {"pet_id": "p1"}},
+            {"operationType": "update", "ns": {"coll": "users"}, "fullDocument": {"username": "alice"}},
+        ]
+
+        ChangeStreamWatcher(FakeReplicaSet(events, stop), bus).run(stop)
+
+        assert published == [("pet", "p1"), ("user", "alice")]
+
+    def test_stream_errors_invalidate_everything(self, bumps):
+        bus, published = bumps
+        stop = threading.Event()
+
+        class BrokenDb:
+            def watch(self, pipeline, **kwargs):
+                stop.set()
+                raise OperationFailure("resume token not found")
+
+        with patch.dict("web.invalidation.INVALIDATION_CONFIG", {"poll_interval_seconds": 0}):
+            ChangeStreamWatcher(BrokenDb(), bus).run(stop)
+
+        assert published == [(None, None)]
+
+
+@pytest.mark.unit
+class TestPollingWatcher:
+    """Test the updated_at polling fallback on mongomock."""
+
+    def test_polls_stamped_writes_once(self, mock_db, bumps):
+        bus, published = bumps
+        watcher = PollingWatcher(mock_db, bus, since=datetime.utcnow() - timedelta(seconds=1))
+        pet_id = mock_db["pets"].insert_one({"name": "Cat", "updated_at": datetime.now(timezone.utc)}).inserted_id
+        mock_db["feedings"].insert_one({"pet_id": "p2", "updated_at": datetime.utcnow()})
+        mock_db["deleted_records"].insert_one({"pet_id": "p3", "collection": "weights", "deleted_at": datetime.utcnow()})
+        mock_db["users"].insert_one({"username": "alice", "updated_at": datetime.utcnow()})
+
+        assert watcher.poll_once() == 4
+        assert set(published) == {("pet", str(pet_id)), ("pet", "p2"), ("pet", "p3"), ("user", "alice")}
+
+        # Documents inside the overlap window are not published twice
+        assert watcher.poll_once() == 0
+
+    def test_old_writes_are_ignored(self, mock_db, bumps):
+        bus, published = bumps
+        mock_db["feedings"].insert_one({"pet_id": "p1", "updated_at": datetime.utcnow() - timedelta(hours=1)})
+
+        assert PollingWatcher(mock_db, bus).poll_once() == 0
+
+    def test_auto_mode_falls_back_to_polling(self, mock_db):
+        """Without change stream support (standalone server, mongomock) the watcher polls."""
+        watcher, stream = _select_watcher(mock_db, "auto")
+
+        assert isinstance(watcher, PollingWatcher)
+        assert stream is None
+
+
+@pytest.mark.unit
+class TestWatcherStartup:
+    """Starting the watcher after fork never fails the worker."""
+
+    def test_unreachable_server_is_retried_in_the_thread(self, mock_db):
+        """start_watcher returns at once; the thread retries, then falls back to polling."""
+        attempts = []
+        polled = []
+
+        def watch(pipeline, **kwargs):
+            attempts.append(pipeline)
+            if len(attempts) == 1:
+                raise ServerSelectionTimeoutError("No servers found")
+            raise NotImplementedError("mongomock has no change streams")
+
+        def poll(self, stop):
+            polled.append(self)
+            stop.set()
+
+        with patch.dict("web.invalidation.INVALIDATION_CONFIG", {"mode": "auto", "poll_interval_seconds": 0}), patch.object(
+            mock_db, "watch", side_effect=watch
+        ), patch.object(PollingWatcher, "run", poll), patch.object(invalidation.bus, "has_enabled_subscribers", return_value=True):
+            thread = invalidation.start_watcher(mock_db)
+            thread.join(5)
+            invalidation.stop_watcher()
+
+        assert len(attempts) == 2
+        assert len(polled) == 1
+
+    def test_no_watcher_without_enabled_caches(self, mock_db):
+        """The ACL cache is disabled by default, so nothing needs to be watched."""
+        from web import helpers
+
+        with patch.dict(helpers.CACHE_CONFIG, {"pet_acl_ttl_seconds": 0}):
+            assert invalidation.bus.has_enabled_subscribers() is False
+            assert invalidation.start_watcher(mock_db, "auto") is None
+        with patch.dict(helpers.CACHE_CONFIG, {"pet_acl_ttl_seconds": 5}):
+            assert invalidation.bus.has_enabled_subscribers() is True
+
+
+@pytest.mark.pets
+class TestPetAclCacheInvalidation:
+    """The ACL cache subscribes to the process-wide bus."""
+
+    def test_bump_from_another_worker_drops_cached_acl(self, mock_db, regular_user, test_pet):
+        from web import helpers
+        from web.app import app
+        from web.invalidation import bus
+
+        pet_id = str(test_pet["_id"])
+        helpers._pet_acl_cache.clear()
+        with patch.dict(helpers.CACHE_CONFIG, {"pet_acl_ttl_seconds": 60}):
+            with app.app_context():
+                assert helpers.check_pet_access(pet_id, regular_user["username"]) is True
+            assert pet_id in helpers._pet_acl_cache
+
+            bus.publish("pet", pet_id)
+
+            assert pet_id not in helpers._pet_acl_cache
+        helpers._pet_acl_cache.clear()
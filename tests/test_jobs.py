@@ -0,0 +1,391 @@
+"""Tests for the MongoDB job queue (web/jobs.py) and the routes handing work to it."""
+
+import pytest
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+from bson import ObjectId
+from PIL import Image
+
+from web import jobs
+from web.jobs import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    LeaseLost,
+    PermanentJobError,
+    claim,
+    complete,
+    enqueue,
+    fail,
+    renew,
+    run_next,
+)
+
+
+def _jobs_enabled():
+    return patch.dict("web.jobs.JOBS_CONFIG", {"enabled": True})
+
+
+def _later(seconds):
+    """Patch the queue clock `seconds` ahead of now."""
+    return patch("web.jobs._now", return_value=jobs._now() + timedelta(seconds=seconds))
+
+
+def _drain():
+    while run_next("test-worker"):
+        pass
+
+
+@pytest.fixture
+def handlers():
+    """Register test job kinds; `calls` collects the payloads they ran with."""
+    calls = []
+
+    def echo(payload):
+        calls.append(payload)
+        return {"echo": payload["n"]}
+
+    def flaky(payload):
+        calls.append(payload)
+        raise RuntimeError("temporary")
+
+    def broken(payload):
+        calls.append(payload)
+        raise PermanentJobError("cannot work")
+
+    with patch.dict("web.jobs.HANDLERS", {"echo": echo, "flaky": flaky, "broken": broken}):
+        yield calls
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """Claiming, leases, retries and failures."""
+
+    def test_claim_takes_highest_priority_first(self, mock_db, handlers):
+        low = enqueue("echo", {"n": 1}, priority=PRIORITY_LOW)
+        normal = enqueue("echo", {"n": 2})
+        high = enqueue("echo", {"n": 3}, priority=PRIORITY_HIGH)
+
+        claimed = [claim("w")["_id"] for _ in range(3)]
+
+        assert claimed == [high["_id"], normal["_id"], low["_id"]]
+        assert claim("w") is None
+
+    def test_claimed_job_is_hidden_until_visibility_timeout(self, mock_db, handlers):
+        enqueue("echo", {"n": 1})
+        first = claim("w1")
+
+        assert first["status"] == "running"
+        assert first["attempts"] == 1
+        assert claim("w2") is None
+
+        with _later(jobs.JOBS_CONFIG["visibility_timeout_seconds"] + 1):
+            second = claim("w2")
+
+        assert second["_id"] == first["_id"]
+        assert second["attempts"] == 2
+        assert second["worker"] == "w2"
+
+    def test_expired_lease_cannot_finish_the_job(self, mock_db, handlers):
+        enqueue("echo", {"n": 1})
+        first = claim("w1")
+        with _later(jobs.JOBS_CONFIG["visibility_timeout_seconds"] + 1):
+            second = claim("w2")
+
+        assert complete(first, {"by": "w1"}) is False
+        assert complete(second, {"by": "w2"}) is True
+        assert mock_db["jobs"].find_one({"_id": first["_id"]})["result"] == {"by": "w2"}
+
+    def test_successful_job_stores_result_and_expiry(self, mock_db, handlers):
+        job = enqueue("echo", {"n": 7})
+
+        _drain()
+
+        stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+        assert stored["status"] == "succeeded"
+        assert stored["result"] == {"echo": 7}
+        assert stored["expires_at"] > stored["finished_at"]
+
+    def test_failed_attempts_back_off_exponentially(self, mock_db, handlers):
+        job = enqueue("flaky", {"n": 1})
+        backoff = jobs.JOBS_CONFIG["backoff_seconds"]
+
+        _drain()
+        stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+        assert stored["status"] == "queued"
+        assert stored["error"] == "temporary"
+        assert claim("w") is None
+
+        with _later(backoff + 1):
+            assert run_next("w")
+        stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+        assert stored["attempts"] == 2
+        # Second failure waits twice as long
+        assert stored["run_at"] - jobs._now() > timedelta(seconds=backoff * 2 - 5)
+
+    def test_job_fails_after_max_attempts(self, mock_db, handlers):
+        job = enqueue("flaky", {"n": 1})
+
+        with patch.dict("web.jobs.JOBS_CONFIG", {"max_attempts": 3, "backoff_seconds": 0}):
+            _drain()
+
+        stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+        assert stored["status"] == "failed"
+        assert stored["attempts"] == 3
+        assert len(handlers) == 3
+
+    def test_lease_expiring_on_last_attempt_fails_the_job(self, mock_db, handlers):
+        job = enqueue("echo", {"n": 1})
+
+        with patch.dict("web.jobs.JOBS_CONFIG", {"max_attempts": 1}):
+            claim("w1")
+            with _later(jobs.JOBS_CONFIG["visibility_timeout_seconds"] + 1):
+                assert claim("w2") is None
+
+        assert mock_db["jobs"].find_one({"_id": job["_id"]})["status"] == "failed"
+
+    def test_permanent_error_is_not_retried(self, mock_db, handlers):
+        job = enqueue("broken", {"n": 1})
+
+        _drain()
+
+        stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+        assert stored["status"] == "failed"
+        assert stored["error"] == "cannot work"
+        assert len(handlers) == 1
+
+    def test_unknown_kind_is_rejected(self, mock_db):
+        with pytest.raises(ValueError):
+            enqueue("nope", {})
+
+    def test_renewed_lease_is_not_claimed_again(self, mock_db, handlers):
+        enqueue("echo", {"n": 1})
+        job = claim("w1")
+        timeout = jobs.JOBS_CONFIG["visibility_timeout_seconds"]
+
+        with _later(timeout - 1):
+            renew(job)
+        with _later(timeout + 1):
+            assert claim("w2") is None
+        with _later(timeout * 2):
+            assert claim("w2")["attempts"] == 2
+
+    def test_renew_after_lost_lease_raises(self, mock_db, handlers):
+        enqueue("echo", {"n": 1})
+        first = claim("w1")
+        with _later(jobs.JOBS_CONFIG["visibility_timeout_seconds"] + 1):
+            claim("w2")
+
+        with pytest.raises(LeaseLost):
+            renew(first)
+
+    def test_fail_after_lost_lease_is_ignored(self, mock_db, handlers):
+        enqueue("echo", {"n": 1})
+        first = claim("w1")
+        with _later(jobs.JOBS_CONFIG["visibility_timeout_seconds"] + 1):
+            claim("w2")
+
+        assert fail(first, "late") is False
+
+
+@pytest.mark.integration
+class TestJobRoutes:
+    """Status API and routes answering 202."""
+
+    def test_job_status_is_visible_to_its_owner_only(self, client, mock_db, handlers, regular_user_token, admin_token):
+        job = enqueue("echo", {"n": 1}, username="testuser")
+        url = f"/api/jobs/{job['_id']}"
+
+        response = client.get(url, headers={"Authorization": f"Bearer {regular_user_token}"})
+        assert response.status_code == 200
+        assert response.get_json()["job"]["status"] == "queued"
+        assert response.get_json()["job"]["status_url"] == url
+
+        response = client.get(url, headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 404
+        assert response.get_json()["code"] == "job_not_found"
+
+    def test_unknown_job_id_is_not_found(self, client, mock_db, regular_user_token):
+        for job_id in (str(ObjectId()), "invalid"):
+            response = client.get(f"/api/jobs/{job_id}", headers={"Authorization": f"Bearer {regular_user_token}"})
+            assert response.status_code == 404
+
+    def test_async_export_is_rendered_by_worker(self, client, mock_db, real_fs, regular_user_token, test_pet):
+        pet_id = str(test_pet["_id"])
+        mock_db["litter_changes"].insert_one({"pet_id": pet_id, "date_time": jobs._now(), "comment": "Свежий"})
+        headers = {"Authorization": f"Bearer {regular_user_token}", "Prefer": "respond-async"}
+
+        with _jobs_enabled():
+            response = client.get(f"/api/export/litter/csv?pet_id={pet_id}", headers=headers)
+        assert response.status_code == 202
+        status_url = response.headers["Location"]
+        assert response.get_json()["job"]["status_url"] == status_url
+
+        download_url = status_url + "/download"
+        assert client.get(download_url, headers=headers).status_code == 409
+
+        _drain()
+
+        job = client.get(status_url, headers=headers).get_json()["job"]
+        assert job["status"] == "succeeded"
+        assert job["download_url"] == download_url
+        response = client.get(download_url, headers=headers)
+        assert response.status_code == 200
+        assert "attachment" in response.headers["Content-Disposition"]
+        assert "Свежий" in response.data.decode("utf-8-sig")
+
+        # The export file expires with the job
+        with _later(jobs.JOBS_CONFIG["retention_hours"] * 3600 + 1):
+            assert jobs.purge_expired_files() == 1
+
+    def test_export_job_renews_its_lease(self, mock_db, real_fs, test_pet):
+        pet_id = str(test_pet["_id"])
+        mock_db["litter_changes"].insert_many([{"pet_id": pet_id, "date_time": jobs._now()} for _ in range(450)])
+
+        with _jobs_enabled():
+            job = enqueue("export", {"pet_id": pet_id, "export_type": "litter", "format_type": "csv"})
+            with patch("web.export.EXPORT_RENEW_CHUNKS", 1), patch("web.export.renew", wraps=jobs.renew) as renewed:
+                _drain()
+
+        assert renewed.call_count == 3  # one per 200-row chunk
+        assert mock_db["jobs"].find_one({"_id": job["_id"]})["status"] == "succeeded"
+
+    def test_export_stops_when_its_lease_is_lost(self, mock_db, real_fs, test_pet):
+        pet_id = str(test_pet["_id"])
+        mock_db["litter_changes"].insert_one({"pet_id": pet_id, "date_time": jobs._now()})
+
+        with _jobs_enabled():
+            job = enqueue("export", {"pet_id": pet_id, "export_type": "litter", "format_type": "csv"})
+            with patch("web.export.EXPORT_RENEW_CHUNKS", 1), patch("web.export.renew", side_effect=LeaseLost("lost")):
+                _drain()
+
+        stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+        # Left to the attempt that took the lease over: neither failed nor retried by this one
+        assert stored["status"] == "running"
+        assert stored.get("error") is None
+        assert mock_db["fs.files"].count_documents({}) == 0
+
+    def test_export_without_prefer_stays_synchronous(self, client, mock_db, regular_user_token, test_pet):
+        pet_id = str(test_pet["_id"])
+        mock_db["litter_changes"].insert_one({"pet_id": pet_id, "date_time": jobs._now()})
+
+        with _jobs_enabled():
+            response = client.get(
+                f"/api/export/litter/csv?pet_id={pet_id}", headers={"Authorization": f"Bearer {regular_user_token}"}
+            )
+
+        assert response.status_code == 200
+        assert mock_db["jobs"].count_documents({}) == 0
+
+
+@pytest.mark.pets
+class TestPetJobs:
+    """Pet deletion and photo uploads handed to workers."""
+
+    def test_delete_pet_purges_records_in_background(self, client, mock_db, real_fs, regular_user_token, test_pet):
+        pet_id = str(test_pet["_id"])
+        photo_file_id = str(real_fs.put(b"photo", content_type="image/jpeg"))
+        mock_db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"photo_file_id": photo_file_id}})
+        mock_db["weights"].insert_one({"pet_id": pet_id, "weight": 4.2, "date_time": jobs._now()})
+
+        with _jobs_enabled():
+            response = client.delete(f"/api/pets/{pet_id}", headers={"Authorization": f"Bearer {regular_user_token}"})
+
+        assert response.status_code == 202
+        assert mock_db["pets"].count_documents({"_id": test_pet["_id"]}) == 0
+        assert mock_db["weights"].count_documents({"pet_id": pet_id}) == 1
+
+        _drain()
+
+        assert mock_db["weights"].count_documents({"pet_id": pet_id}) == 0
+        assert mock_db["fs.files"].count_documents({}) == 0
+        # The pet's own tombstone survives the purge for sync clients
+        assert mock_db["deleted_records"].count_documents({"collection": "pets", "record_id": pet_id}) == 1
+
+    def test_failed_purge_is_retried(self, mock_db, real_fs, test_pet):
+        """A collection that could not be purged fails the attempt, and the retry finishes the job."""
+        from mongomock.collection import Collection
+
+        pet_id = str(test_pet["_id"])
+        mock_db["weights"].insert_one({"pet_id": pet_id, "weight": 4.2, "date_time": jobs._now()})
+        original_delete_many = Collection.delete_many
+
+        def flaky_delete_many(self, query, *args, **kwargs):
+            if self.name == "weights":
+                raise ConnectionError("connection reset")
+            return original_delete_many(self, query, *args, **kwargs)
+
+        with _jobs_enabled():
+            job = enqueue("purge_pet", {"pet_id": pet_id})
+            with patch.object(Collection, "delete_many", flaky_delete_many):
+                _drain()
+
+            stored = mock_db["jobs"].find_one({"_id": job["_id"]})
+            assert stored["status"] == "queued"
+            assert "weights" in stored["error"]
+
+            with _later(jobs.JOBS_CONFIG["backoff_seconds"] + 1):
+                assert run_next("w")
+
+        assert mock_db["jobs"].find_one({"_id": job["_id"]})["status"] == "succeeded"
+        assert mock_db["weights"].count_documents({"pet_id": pet_id}) == 0
+
+    def test_uploaded_photo_is_optimized_by_worker(self, client, mock_db, real_fs, regular_user_token, test_pet):
+        upload = BytesIO()
+        Image.new("RGB", (2400, 1600), color="orange").save(upload, format="PNG")
+        upload.seek(0)
+
+        with _jobs_enabled():
+            response = client.put(
+                f"/api/pets/{test_pet['_id']}",
+                data={"name": "Test Cat", "photo_file": (upload, "cat.png", "image/png")},
+                headers={"Authorization": f"Bearer {regular_user_token}"},
+                content_type="multipart/form-data",
+            )
+        assert response.status_code == 200
+        original_id = mock_db["pets"].find_one({"_id": test_pet["_id"]})["photo_file_id"]
+        assert real_fs.get(ObjectId(original_id)).content_type == "image/png"
+
+        _drain()
+
+        photo_file_id = mock_db["pets"].find_one({"_id": test_pet["_id"]})["photo_file_id"]
+        assert photo_file_id != original_id
+        optimized = real_fs.get(ObjectId(photo_file_id))
+        assert optimized.content_type == "image/webp"
+        assert Image.open(optimized).size == (1920, 1280)
+        assert mock_db["fs.files"].count_documents({"_id": ObjectId(original_id)}) == 0
+
+    def test_worker_streams_the_original_photo(self, mock_db, real_fs, test_pet):
+        """The stored upload is decoded from GridFS, never read whole into memory first."""
+        from gridfs.grid_file import GridOut
+
+        upload = BytesIO()
+        Image.new("RGB", (2400, 1600), color="orange").save(upload, format="PNG")
+        photo_file_id = str(real_fs.put(upload.getvalue(), filename="cat.png", content_type="image/png"))
+        mock_db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"photo_file_id": photo_file_id}})
+        reads = []
+        original_read = GridOut.read
+
+        def read(self, size=-1):
+            reads.append(size)
+            return original_read(self, size)
+
+        with _jobs_enabled(), patch.object(GridOut, "read", read):
+            enqueue("optimize_photo", {"photo_file_id": photo_file_id, "pet_id": str(test_pet["_id"])})
+            _drain()
+
+        assert mock_db["jobs"].find_one({"kind": "optimize_photo"})["status"] == "succeeded"
+        assert reads and all(size is not None and size >= 0 for size in reads)
+
+    def test_optimization_of_replaced_photo_is_skipped(self, mock_db, real_fs, test_pet):
+        photo_file_id = str(real_fs.put(b"photo", content_type="image/jpeg"))
+
+        with _jobs_enabled():
+            enqueue("optimize_photo", {"photo_file_id": photo_file_id, "pet_id": str(test_pet["_id"])})
+            _drain()
+
+        job = mock_db["jobs"].find_one({"kind": "optimize_photo"})
+        assert job["status"] == "succeeded"
+        assert job["result"] is None
+        assert mock_db["fs.files"].count_documents({}) == 1
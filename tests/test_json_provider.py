@@ -0,0 +1,88 @@
+"""Tests for the MongoDB-aware JSON provider (web/json_provider.py)."""
+
+import json
+from datetime import date, datetime
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from web.json_provider import MongoJSONProvider, OrjsonProvider, orjson, select_json_provider
+
+
+PROVIDERS = [MongoJSONProvider] + ([OrjsonProvider] if orjson is not None else [])
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("provider_class", PROVIDERS)
+class TestMongoJSONProviders:
+    """Both providers produce the same API formats."""
+
+    def test_encodes_objectid_and_datetimes(self, provider_class):
+        """ObjectId becomes its hex string, datetime/date use the API formats."""
+        provider = provider_class(Flask(__name__))
+        oid = ObjectId()
+
+        encoded = json.loads(
+            provider.dumps({"_id": oid, "date_time": datetime(2024, 3, 5, 7, 9, 30), "birth_date": date(2020, 1, 2)})
+        )
+
+        assert encoded == {"_id": str(oid), "date_time": "2024-03-05 07:09", "birth_date": "2020-01-02"}
+
+    def test_response_keeps_unicode_and_sorts_keys(self, provider_class):
+        """Responses are sorted like Flask's default provider and round-trip through loads."""
+        app = Flask(__name__)
+        provider = provider_class(app)
+        provider.ensure_ascii = False
+
+        with app.app_context():
+            response = provider.response({"b": "Кот", "a": 1})
+
+        body = response.get_data()
+        assert response.mimetype == "application/json"
+        assert body.index(b'"a"') < body.index(b'"b"')
+        assert provider.loads(body) == {"a": 1, "b": "Кот"}
+
+    def test_unknown_types_still_fail(self, provider_class):
+        """Values without a conversion raise TypeError like the default provider."""
+        provider = provider_class(Flask(__name__))
+
+        with pytest.raises(TypeError):
+            provider.dumps({"value": object()})
+
+
+@pytest.mark.unit
+class TestSelectJsonProvider:
+    """Test JSON_PROVIDER selection."""
+
+    def test_stdlib(self):
+        assert select_json_provider("stdlib") is MongoJSONProvider
+
+    @pytest.mark.skipif(orjson is None, reason="orjson not installed")
+    def test_auto_prefers_orjson(self):
+        assert select_json_provider("auto") is OrjsonProvider
+
+
+@pytest.mark.integration
+class TestListRoutesReturnRawDocuments:
+    """List routes rely on the provider instead of converting fields."""
+
+    def test_record_list_formats_ids_and_dates(self, client, mock_db, regular_user_token, test_pet):
+        """Records stored with ObjectId/datetime come back in the established string formats."""
+        record_id = mock_db["weights"].insert_one(
+            {
+                "pet_id": str(test_pet["_id"]),
+                "date_time": datetime(2024, 1, 15, 14, 30),
+                "weight": 4.5,
+                "username": "testuser",
+            }
+        ).inserted_id
+
+        response = client.get(
+            f"/api/weight?pet_id={test_pet['_id']}", headers={"Authorization": f"Bearer {regular_user_token}"}
+        )
+
+        assert response.status_code == 200
+        weight = response.get_json()["weights"][0]
+        assert weight["_id"] == str(record_id)
+        assert weight["date_time"] == "2024-01-15 14:30"
@@ -0,0 +1,131 @@
+"""Tests for request/Mongo/GridFS/Pillow instrumentation (web/metrics.py)."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def metrics_registry():
+    """Enable metrics with a fresh registry for one test."""
+    from web.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    with patch("web.metrics.ENABLED", True), patch("web.metrics.registry", registry):
+        yield registry
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    """Test registry bookkeeping, rendering and multi-worker merging."""
+
+    def test_histogram_renders_cumulative_buckets(self, metrics_registry):
+        """Observations land in the first bucket whose bound is >= the value."""
+        from web.metrics import render
+
+        labels = (("route", "/api/pets"), ("method", "GET"))
+        for seconds in (0.003, 0.02, 0.02, 20):
+            metrics_registry.observe("petzy_http_request_duration_seconds", seconds, labels)
+
+        text = render(metrics_registry)
+
+        assert "# TYPE petzy_http_request_duration_seconds histogram" in text
+        assert 'petzy_http_request_duration_seconds_bucket{route="/api/pets",method="GET",le="0.005"} 1' in text
+        assert 'petzy_http_request_duration_seconds_bucket{route="/api/pets",method="GET",le="0.025"} 3' in text
+        assert 'petzy_http_request_duration_seconds_bucket{route="/api/pets",method="GET",le="10"} 3' in text
+        assert 'petzy_http_request_duration_seconds_bucket{route="/api/pets",method="GET",le="+Inf"} 4' in text
+        assert 'petzy_http_request_duration_seconds_count{route="/api/pets",method="GET"} 4' in text
+
+    def test_snapshots_are_summed(self, metrics_registry, tmp_path):
+        """/metrics output covers every worker snapshot in the shared directory."""
+        from web.metrics import collect, render
+
+        other_worker = {
+            "counters": [["petzy_gridfs_read_bytes_total", [], 100.0]],
+            "histograms": [],
+        }
+        (tmp_path / "metrics-1.json").write_text(json.dumps(other_worker))
+        metrics_registry.inc("petzy_gridfs_read_bytes_total", (), 50)
+
+        with patch.dict("web.metrics.METRICS_CONFIG", {"multiproc_dir": str(tmp_path)}):
+            text = render(collect())
+
+        assert "petzy_gridfs_read_bytes_total 150" in text
+        # This worker's own snapshot was written as part of the scrape
+        assert len(list(tmp_path.glob("metrics-*.json"))) == 2
+
+    def test_exited_workers_are_folded(self, metrics_registry, tmp_path):
+        """Snapshots of exited workers are summed into one file; totals stay the same."""
+        from web.metrics import collect, fold_snapshot, render
+
+        for pid, value in ((101, 100.0), (102, 20.0)):
+            snapshot = {"counters": [["petzy_gridfs_read_bytes_total", [], value]], "histograms": []}
+            (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(snapshot))
+
+        fold_snapshot(str(tmp_path), 101)
+        fold_snapshot(str(tmp_path), 102)
+        fold_snapshot(str(tmp_path), 103)  # never wrote a snapshot
+
+        assert sorted(path.name for path in tmp_path.glob("metrics-*.json")) == ["metrics-dead.json"]
+        with patch.dict("web.metrics.METRICS_CONFIG", {"multiproc_dir": str(tmp_path)}):
+            assert "petzy_gridfs_read_bytes_total 120" in render(collect())
+
+    def test_mongo_listener_counts_commands(self, metrics_registry):
+        """Succeeded and failed commands are counted and timed by command name."""
+        from web.metrics import MongoCommandListener
+
+        listener = MongoCommandListener()
+        listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+        listener.failed(SimpleNamespace(command_name="find", duration_micros=500))
+
+        labels = (("command", "find"),)
+        assert metrics_registry.counters[("petzy_mongo_commands_total", labels)] == 2
+        assert metrics_registry.counters[("petzy_mongo_command_failures_total", labels)] == 1
+        assert metrics_registry.histograms[("petzy_mongo_command_duration_seconds", labels)][-1] == pytest.approx(0.002)
+
+    def test_disabled_records_nothing(self):
+        """With metrics off, hooks return without touching the registry."""
+        from web.metrics import MetricsRegistry, MongoCommandListener, mongo_event_listeners, record_gridfs_read
+
+        registry = MetricsRegistry()
+        with patch("web.metrics.ENABLED", False), patch("web.metrics.registry", registry):
+            record_gridfs_read(1000)
+            MongoCommandListener().succeeded(SimpleNamespace(command_name="find", duration_micros=10))
+            assert mongo_event_listeners() == []
+
+        assert registry.counters == {}
+        assert registry.histograms == {}
+
+
+@pytest.mark.integration
+class TestMetricsEndpoint:
+    """Test request instrumentation through the Flask app."""
+
+    def test_requests_are_recorded_per_route(self, client, mock_db, admin_token, metrics_registry):
+        """Latency is recorded under the URL rule, not the raw path."""
+        client.get("/api/pets", headers={"Authorization": f"Bearer {admin_token}"})
+        client.get("/api/pets/000000000000000000000000", headers={"Authorization": f"Bearer {admin_token}"})
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        text = response.get_data(as_text=True)
+        assert 'petzy_http_requests_total{route="/api/pets",method="GET",status="200"} 1' in text
+        assert 'petzy_http_request_duration_seconds_count{route="/api/pets/<pet_id>",method="GET"} 1' in text
+        assert "000000000000000000000000" not in text
+
+    def test_token_required_when_configured(self, client, mock_db, metrics_registry):
+        """METRICS_TOKEN protects the endpoint."""
+        with patch.dict("web.metrics.METRICS_CONFIG", {"token": "scrape-secret"}):
+            assert client.get("/metrics").status_code == 401
+            response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+
+        assert response.status_code == 200
+
+    def test_not_found_when_disabled(self, client, mock_db):
+        """The endpoint is hidden while metrics are disabled."""
+        with patch("web.metrics.ENABLED", False):
+            assert client.get("/metrics").status_code == 404
@@ -0,0 +1,77 @@
+"""Tests for CPU-bound work offloading (web/offload.py)."""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+import bcrypt
+
+
+@pytest.mark.unit
+class TestRunCpuBound:
+    """Test inline and gevent thread pool execution."""
+
+    def test_runs_inline_without_gevent(self):
+        """Sync workers execute the call directly."""
+        from web.offload import run_cpu_bound
+
+        with patch("web.offload.gevent_active", return_value=False), patch("web.offload._gevent_threadpool") as pool:
+            assert run_cpu_bound(sum, [1, 2, 3]) == 6
+
+        pool.assert_not_called()
+
+    def test_exceptions_propagate(self):
+        """Errors raised by the callable reach the caller unchanged."""
+        from web.offload import run_cpu_bound
+
+        with pytest.raises(ValueError):
+            run_cpu_bound(bcrypt.checkpw, b"password", b"not-a-hash")
+
+    def test_uses_gevent_threadpool_when_patched(self):
+        """Under gevent the call is submitted to the hub thread pool."""
+        from web.offload import run_cpu_bound
+
+        pool = MagicMock()
+        pool.apply.side_effect = lambda func, args, kwargs: func(*args, **kwargs)
+
+        with patch("web.offload.gevent_active", return_value=True), patch(
+            "web.offload._gevent_threadpool", return_value=pool
+        ):
+            result = run_cpu_bound(max, 3, 7, key=None)
+
+        assert result == 7
+        pool.apply.assert_called_once_with(max, (3, 7), {"key": None})
+
+    def test_gevent_inactive_in_tests(self):
+        """The test process is never monkey-patched, so offloading stays inline."""
+        from web.offload import gevent_active
+
+        assert gevent_active() is False
+
+
+@pytest.mark.auth
+class TestOffloadedCallers:
+    """Test that bcrypt work goes through the password pool."""
+
+    def test_password_check_is_offloaded(self, mock_db, regular_user):
+        """verify_user_credentials runs bcrypt.checkpw on the password pool."""
+        from web.passwords import password_pool
+        from web.security import verify_user_credentials
+
+        with patch("web.security.db", mock_db), patch.object(password_pool, "run", wraps=password_pool.run) as offload:
+            assert verify_user_credentials(regular_user["username"], "user123") is True
+
+        assert offload.call_args_list[0][0][0] is bcrypt.checkpw
+
+    def test_password_hashing_is_offloaded(self, client, mock_db, admin_token):
+        """Creating a user hashes the password on the password pool."""
+        from web.passwords import password_pool
+
+        with patch.object(password_pool, "run", wraps=password_pool.run) as offload:
+            response = client.post(
+                "/api/users",
+                json={"username": "offloaded", "password": "secret123"},
+                headers={"Authorization": f"Bearer {admin_token}"},
+            )
+
+        assert response.status_code == 201
+        assert offload.call_args[0][0] is bcrypt.hashpw
@@ -0,0 +1,134 @@
+"""Tests for the bcrypt pool and cost calibration (web/passwords.py)."""
+
+import threading
+from unittest.mock import patch
+
+import bcrypt
+import pytest
+
+from web.passwords import PasswordHashingBusy, PasswordPool, calibrate_rounds, hash_rounds, password_pool
+
+
+def _fixed_rounds(rounds):
+    return patch.dict("web.passwords.PASSWORD_CONFIG", {"rounds": rounds})
+
+
+@pytest.mark.unit
+class TestPasswordPool:
+    """Test the queue-depth limit."""
+
+    def test_runs_calls(self):
+        assert PasswordPool(threads=1, queue_depth=0).run(max, 3, 7) == 7
+
+    def test_saturated_pool_fails_fast(self):
+        pool = PasswordPool(threads=1, queue_depth=0)
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(slow,))
+        worker.start()
+        started.wait(5)
+        try:
+            with pytest.raises(PasswordHashingBusy) as busy:
+                pool.run(max, 1, 2)
+        finally:
+            release.set()
+            worker.join()
+
+        assert busy.value.retry_after >= 1
+        # Admission is released when the call finishes
+        assert pool.run(max, 1, 2) == 2
+
+
+@pytest.mark.unit
+class TestCalibration:
+    """The cost is the highest one hashing within the target."""
+
+    @pytest.mark.parametrize(
+        "measured_seconds,expected",
+        [(0.030, 14), (0.060, 13), (0.200, 12), (0.001, 14)],
+    )
+    def test_rounds_for_target(self, measured_seconds, expected):
+        with patch("web.passwords._time_hash", return_value=measured_seconds):
+            assert calibrate_rounds(target_ms=150, min_rounds=12, max_rounds=14) == expected
+
+    def test_floor_over_target_is_logged(self, caplog):
+        with patch("web.passwords._time_hash", return_value=0.280):
+            assert calibrate_rounds(target_ms=150, min_rounds=12, max_rounds=14) == 12
+
+        assert "over the 150ms target" in caplog.text
+
+    def test_fastest_measurement_is_used(self):
+        """A measurement slowed down by other load does not lower the cost."""
+        with patch("web.passwords._time_hash", side_effect=[0.200, 0.060, 0.090]):
+            assert calibrate_rounds(target_ms=150, min_rounds=12, max_rounds=14) == 13
+
+    def test_measurements_run_on_the_pool(self):
+        with patch("web.passwords._time_hash", return_value=0.2), patch.object(
+            password_pool, "run", wraps=password_pool.run
+        ) as run:
+            calibrate_rounds(target_ms=150, min_rounds=12, max_rounds=14)
+
+        assert run.call_count == 3
+        assert all(call.args[1] == 12 for call in run.call_args_list)
+
+    def test_hash_rounds(self):
+        assert hash_rounds(bcrypt.hashpw(b"secret", bcrypt.gensalt(5)).decode()) == 5
+        assert hash_rounds("not-a-hash") is None
+
+
+@pytest.mark.auth
+class TestPasswordRoutes:
+    """Saturation surfaces as 503 and logins upgrade the stored cost."""
+
+    def test_login_returns_503_when_saturated(self, client, mock_db):
+        from web.app import limiter
+
+        # Earlier login tests may have used up the login rate limit of the test client's address
+        with patch.object(limiter, "enabled", False), patch(
+            "web.security.check_password", side_effect=PasswordHashingBusy(3)
+        ):
+            response = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        assert response.get_json()["code"] == "service_busy"
+
+    def test_successful_login_rehashes_with_current_cost(self, mock_db):
+        from web.security import verify_user_credentials
+
+        mock_db["users"].insert_one(
+            {"username": "old", "is_active": True, "password_hash": bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode()}
+        )
+
+        with patch("web.security.db", mock_db), _fixed_rounds(5):
+            assert verify_user_credentials("old", "secret") is True
+
+        stored = mock_db["users"].find_one({"username": "old"})["password_hash"]
+        assert hash_rounds(stored) == 5
+        assert bcrypt.checkpw(b"secret", stored.encode())
+
+    def test_stronger_hash_is_not_downgraded(self, mock_db):
+        from web.security import verify_user_credentials
+
+        original = bcrypt.hashpw(b"secret", bcrypt.gensalt(6)).decode()
+        mock_db["users"].insert_one({"username": "strong", "is_active": True, "password_hash": original})
+
+        with patch("web.security.db", mock_db), _fixed_rounds(5):
+            assert verify_user_credentials("strong", "secret") is True
+
+        assert mock_db["users"].find_one({"username": "strong"})["password_hash"] == original
+
+    def test_failed_login_does_not_rehash(self, mock_db):
+        from web.security import verify_user_credentials
+
+        original = bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode()
+        mock_db["users"].insert_one({"username": "old", "is_active": True, "password_hash": original})
+
+        with patch("web.security.db", mock_db), _fixed_rounds(5):
+            assert verify_user_credentials("old", "wrong") is False
+
+        assert mock_db["users"].find_one({"username": "old"})["password_hash"] == original
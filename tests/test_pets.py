@@ -288,29 +288,22 @@ class TestPetManagement:
         data = response.get_json()
         assert "error" in data
 
-    def test_get_pet_photo_success(self, client, mock_db, regular_user_token, test_pet):
+    def test_get_pet_photo_success(self, client, mock_db, real_fs, regular_user_token, test_pet):
         """Test successfully getting pet photo."""
-        from web.app import db, fs
-        from bson import ObjectId
-        from unittest.mock import MagicMock, patch
+        from web.app import db
 
-        # Create photo file ID
-        photo_file_id = ObjectId()
+        photo_file_id = real_fs.put(b"fake_image_data", filename="cat.jpg", content_type="image/jpeg")
         db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"photo_file_id": str(photo_file_id)}})
 
-        # Mock GridFS file
-        mock_file = MagicMock()
-        mock_file.read.return_value = b"fake_image_data"
-        mock_file.content_type = "image/jpeg"
-
-        with patch.object(fs, "get", return_value=mock_file):
-            response = client.get(
-                f"/api/pets/{test_pet['_id']}/photo", headers={"Authorization": f"Bearer {regular_user_token}"}
-            )
+        response = client.get(
+            f"/api/pets/{test_pet['_id']}/photo", headers={"Authorization": f"Bearer {regular_user_token}"}
+        )
 
         assert response.status_code == 200
         assert response.data == b"fake_image_data"
         assert response.content_type == "image/jpeg"
+        assert response.headers["Content-Length"] == str(len(b"fake_image_data"))
+        assert response.headers["Accept-Ranges"] == "bytes"
         assert "inline" in response.headers.get("Content-Disposition", "")
         assert "max-age=" in response.headers.get("Cache-Control", "")
 
@@ -0,0 +1,127 @@
+"""Tests for the token-bucket rate limiting strategy (web/rate_limit.py)."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from limits import parse
+from limits.storage import MemoryStorage
+
+from web.rate_limit import TokenBucketRateLimiter
+
+
+LIMIT = parse("5 per 5 minutes")
+START = 1_800_000_000.0  # start of a 5-minute period
+
+
+def _at(moment):
+    return patch("web.rate_limit.time.time", return_value=moment)
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    """Test a single worker's buckets."""
+
+    def test_capacity_then_refill(self):
+        limiter = TokenBucketRateLimiter(MemoryStorage(), sync_interval_seconds=3600)
+        with _at(START):
+            assert [limiter.hit(LIMIT, "1.2.3.4") for _ in range(6)] == [True] * 5 + [False]
+
+        # One token per minute comes back
+        with _at(START + 61):
+            assert limiter.hit(LIMIT, "1.2.3.4") is True
+            assert limiter.hit(LIMIT, "1.2.3.4") is False
+
+    def test_no_burst_at_window_boundary(self):
+        """A fixed window would allow 10 hits around the boundary; the bucket allows 5 plus refill."""
+        limiter = TokenBucketRateLimiter(MemoryStorage(), sync_interval_seconds=3600)
+        with _at(START + 299):
+            assert all(limiter.hit(LIMIT, "1.2.3.4") for _ in range(5))
+        with _at(START + 301):
+            assert limiter.hit(LIMIT, "1.2.3.4") is False
+
+    def test_window_stats(self):
+        limiter = TokenBucketRateLimiter(MemoryStorage(), sync_interval_seconds=3600)
+        with _at(START):
+            limiter.hit(LIMIT, "1.2.3.4")
+            limiter.hit(LIMIT, "1.2.3.4")
+            reset_time, remaining = limiter.get_window_stats(LIMIT, "1.2.3.4")
+
+        assert remaining == 3
+        assert reset_time == START + 120
+
+    def test_hits_do_not_touch_storage_between_syncs(self):
+        storage = MemoryStorage()
+        with _at(START), patch.object(storage, "get", wraps=storage.get) as get, patch.object(
+            storage, "incr", wraps=storage.incr
+        ) as incr:
+            limiter = TokenBucketRateLimiter(storage, sync_interval_seconds=3600)
+            for _ in range(5):
+                limiter.hit(LIMIT, "1.2.3.4")
+
+        # Only the first use of the key reads the shared counter
+        assert get.call_count == 1
+        assert incr.call_count == 0
+
+
+@pytest.mark.unit
+class TestBucketReconciliation:
+    """Workers reconcile their buckets through a shared storage."""
+
+    def test_sync_publishes_consumption_to_new_workers(self):
+        storage = MemoryStorage()
+        first = TokenBucketRateLimiter(storage, sync_interval_seconds=3600)
+        with _at(START):
+            for _ in range(4):
+                first.hit(LIMIT, "1.2.3.4")
+            assert first.sync(START) == 1
+
+            second = TokenBucketRateLimiter(storage, sync_interval_seconds=3600)
+            assert [second.hit(LIMIT, "1.2.3.4") for _ in range(2)] == [True, False]
+
+    def test_sync_debits_foreign_consumption(self):
+        storage = MemoryStorage()
+        first = TokenBucketRateLimiter(storage, sync_interval_seconds=3600)
+        second = TokenBucketRateLimiter(storage, sync_interval_seconds=3600)
+        with _at(START):
+            first.hit(LIMIT, "1.2.3.4")
+            second.hit(LIMIT, "1.2.3.4")
+            for _ in range(3):
+                second.hit(LIMIT, "1.2.3.4")
+            second.sync(START)
+            first.sync(START)
+
+            # 5 tokens were consumed in total, 4 of them by the other worker
+            assert first.hit(LIMIT, "1.2.3.4") is False
+
+    def test_storage_errors_keep_pending_consumption(self):
+        storage = MemoryStorage()
+        limiter = TokenBucketRateLimiter(storage, sync_interval_seconds=3600)
+        with _at(START):
+            limiter.hit(LIMIT, "1.2.3.4")
+            with patch.object(storage, "incr", side_effect=ConnectionError("down")):
+                limiter.sync(START)
+            limiter.sync(START)
+
+        assert storage.get(f"{LIMIT.key_for('1.2.3.4')}/bucket/{int(START // 300)}") == 1
+
+    def test_background_thread_reconciles(self):
+        """The first hit starts the process's sync thread, which publishes the consumption."""
+        storage = MemoryStorage()
+        limiter = TokenBucketRateLimiter(storage, sync_interval_seconds=0.01)
+        shared_key = f"{LIMIT.key_for('1.2.3.4')}/bucket/{int(time.time() // LIMIT.get_expiry())}"
+
+        limiter.hit(LIMIT, "1.2.3.4")
+        deadline = time.monotonic() + 5
+        while not storage.get(shared_key) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert storage.get(shared_key) == 1
+
+    def test_full_idle_buckets_are_dropped(self):
+        limiter = TokenBucketRateLimiter(MemoryStorage(), sync_interval_seconds=3600)
+        with _at(START):
+            limiter.hit(LIMIT, "1.2.3.4")
+            limiter.sync(START)
+
+        assert limiter.sync(START + 600) == 0
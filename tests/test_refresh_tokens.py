@@ -0,0 +1,165 @@
+"""Tests for the refresh token store (web/refresh_tokens.py)."""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from web.app import app
+from web.indexes import INDEXES
+from web.refresh_tokens import LastUsedBuffer, find_refresh_token, migrate_refresh_tokens, token_hash
+from web.security import (
+    JWT_ALGORITHM,
+    JWT_SECRET_KEY,
+    SingleFlight,
+    create_access_token,
+    create_refresh_token,
+    try_refresh_access_token,
+)
+
+
+@pytest.mark.auth
+class TestRefreshTokenStore:
+    """Tokens are stored by digest and last_used_at is written in batches."""
+
+    def test_issued_token_is_stored_as_digest(self, mock_db):
+        refresh_token = create_refresh_token("admin")
+
+        stored = mock_db["refresh_tokens"].find_one({"username": "admin"})
+
+        assert stored["token_hash"] == token_hash(refresh_token)
+        assert "token" not in stored
+        assert refresh_token not in str(stored)
+
+    def test_refresh_buffers_last_used(self, client, mock_db, admin_refresh_token):
+        """A refresh does not write; the next flush sets last_used_at with one bulk write."""
+        buffer = LastUsedBuffer(flush_seconds=3600)
+        client.set_cookie("refresh_token", admin_refresh_token)
+
+        with patch("web.auth.last_used", buffer):
+            assert client.post("/api/auth/refresh").status_code == 200
+            assert client.post("/api/auth/refresh").status_code == 200
+
+        digest = token_hash(admin_refresh_token)
+        assert "last_used_at" not in mock_db["refresh_tokens"].find_one({"token_hash": digest})
+        assert buffer.flush() == 1
+        assert mock_db["refresh_tokens"].find_one({"token_hash": digest})["last_used_at"] is not None
+
+    def test_last_used_keeps_latest_stamp(self, mock_db):
+        mock_db["refresh_tokens"].insert_one({"token_hash": "abc", "last_used_at": datetime(2024, 1, 2)})
+        buffer = LastUsedBuffer(flush_seconds=3600)
+        buffer.touch("abc", datetime(2024, 1, 1))
+
+        buffer.flush()
+
+        assert mock_db["refresh_tokens"].find_one({"token_hash": "abc"})["last_used_at"] == datetime(2024, 1, 2)
+
+    def test_revoked_token_is_rejected(self, client, mock_db, admin_refresh_token):
+        client.set_cookie("refresh_token", admin_refresh_token)
+        client.post("/api/auth/logout")
+        client.set_cookie("refresh_token", admin_refresh_token)
+
+        response = client.post("/api/auth/refresh")
+
+        assert response.status_code == 401
+
+    def test_expires_at_has_ttl_index(self):
+        ttl = [spec for spec in INDEXES if spec.collection == "refresh_tokens" and spec.expire_after_seconds is not None]
+
+        assert [(spec.keys, spec.expire_after_seconds) for spec in ttl] == [((("expires_at", 1),), 0)]
+
+
+@pytest.mark.auth
+class TestRefreshTokenMigration:
+    """Legacy clear-text documents are converted in place."""
+
+    def test_legacy_documents_are_hashed(self, mock_db):
+        exp = datetime.now(timezone.utc) + timedelta(days=3)
+        token = jwt.encode({"username": "admin", "exp": exp, "type": "refresh"}, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        mock_db["refresh_tokens"].insert_many(
+            [
+                {"token": token, "username": "admin", "expires_at": exp},
+                {"token": f"{token}x", "username": "admin"},
+                {"token": "not-a-jwt", "username": "admin"},
+            ]
+        )
+        mock_db["refresh_tokens"].create_index("token")
+
+        assert migrate_refresh_tokens() == 3
+
+        documents = list(mock_db["refresh_tokens"].find({}, {"_id": 0}))
+        assert len(documents) == 2
+        assert all("token" not in document for document in documents)
+        assert {document["token_hash"] for document in documents} == {token_hash(token), token_hash(f"{token}x")}
+        assert all(isinstance(document["expires_at"], datetime) for document in documents)
+        assert "token_1" not in mock_db["refresh_tokens"].index_information()
+
+    def test_migration_is_idempotent(self, mock_db):
+        mock_db["refresh_tokens"].insert_one({"token_hash": "abc", "username": "admin", "expires_at": datetime.now()})
+
+        assert migrate_refresh_tokens() == 0
+
+
+@pytest.mark.auth
+class TestRefreshSingleFlight:
+    """Parallel refreshes of one session share a single lookup and access token."""
+
+    def test_parallel_refreshes_do_one_lookup(self, mock_db, admin_refresh_token):
+        workers = 8
+        barrier = threading.Barrier(workers)
+        lookups = []
+
+        def slow_lookup(token):
+            lookups.append(token)
+            time.sleep(0.2)
+            return find_refresh_token(token)
+
+        def refresh_in_request(results):
+            with app.test_request_context("/", headers={"Cookie": f"refresh_token={admin_refresh_token}"}):
+                barrier.wait()
+                results.append(try_refresh_access_token())
+
+        results = []
+        with patch("web.security.refresh_flights", SingleFlight(reuse_seconds=0)), patch(
+            "web.security.find_refresh_token", side_effect=slow_lookup
+        ):
+            threads = [threading.Thread(target=refresh_in_request, args=(results,)) for _ in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(lookups) == 1
+        assert len(results) == workers
+        assert len(set(results)) == 1 and results[0] is not None
+
+    def test_result_is_reused_within_window(self):
+        flights = SingleFlight(reuse_seconds=60)
+        calls = []
+
+        assert flights.do("a", lambda: calls.append(1) or "token") == "token"
+        assert flights.do("a", lambda: calls.append(1) or "other") == "token"
+        assert flights.do("b", lambda: calls.append(1) or "other") == "other"
+        assert len(calls) == 2
+
+    def test_failed_call_is_not_reused(self):
+        flights = SingleFlight(reuse_seconds=60)
+
+        def broken():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            flights.do("a", broken)
+        assert flights.do("a", lambda: "token") == "token"
+
+    def test_workers_mint_identical_tokens_within_window(self):
+        """Expiries are aligned to the reuse window, so other workers mint the same token."""
+        with patch("web.security.time.time", return_value=1_700_000_001.0):
+            first = create_access_token("admin")
+        with patch("web.security.time.time", return_value=1_700_000_009.0):
+            second = create_access_token("admin")
+
+        assert first == second
@@ -0,0 +1,119 @@
+"""Tests for the pet photo rendition cache (web/renditions.py)."""
+
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+
+from bson import ObjectId
+from PIL import Image
+
+from web.renditions import PRESET_RENDITION_WIDTHS, find_rendition
+
+
+def _jpeg_bytes(width=200, height=100):
+    """Return a small JPEG image."""
+    output = BytesIO()
+    Image.new("RGB", (width, height), color=(200, 120, 40)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def pet_with_photo(mock_db, real_fs, test_pet):
+    """Attach a stored photo (without renditions) to test_pet."""
+    photo_file_id = str(real_fs.put(_jpeg_bytes(), filename="cat.jpg", content_type="image/jpeg"))
+    mock_db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"photo_file_id": photo_file_id}})
+    return photo_file_id
+
+
+def _renditions(fs, photo_file_id):
+    return list(fs.find({"metadata.rendition_of": photo_file_id}))
+
+
+@pytest.mark.pets
+class TestPhotoRenditions:
+    """Test generation, reuse and cleanup of resized photos."""
+
+    def test_upload_pregenerates_preset_widths(self, client, mock_db, real_fs, regular_user_token):
+        """Preset widths smaller than the original are rendered on upload."""
+        response = client.post(
+            "/api/pets",
+            data={"name": "Photo Cat", "photo_file": (BytesIO(_jpeg_bytes(100, 50)), "cat.jpg", "image/jpeg")},
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 201
+        photo_file_id = response.get_json()["pet"]["photo_file_id"]
+        widths = sorted(f.metadata["w"] for f in _renditions(real_fs, photo_file_id))
+        assert widths == [w for w in PRESET_RENDITION_WIDTHS if w < 100]
+
+    def test_resized_request_is_cached(self, client, real_fs, regular_user_token, test_pet, pet_with_photo):
+        """The first request renders the size, later requests reuse the stored rendition."""
+        url = f"/api/pets/{test_pet['_id']}/photo?w=33"
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+
+        first = client.get(url, headers=headers)
+
+        assert first.status_code == 200
+        assert first.content_type == "image/webp"
+        assert find_rendition(real_fs, pet_with_photo, 33, None) is not None
+
+        with patch.object(real_fs, "get", side_effect=AssertionError("original must not be read")), patch(
+            "web.renditions.Image.open", side_effect=AssertionError("image must not be decoded")
+        ):
+            second = client.get(url, headers=headers)
+
+        assert second.status_code == 200
+        assert second.data == first.data
+        assert len(_renditions(real_fs, pet_with_photo)) == 1
+
+    def test_if_none_match_returns_304_without_gridfs(self, client, real_fs, regular_user_token, test_pet, pet_with_photo):
+        """Revalidation with a matching ETag is answered without reading GridFS."""
+        url = f"/api/pets/{test_pet['_id']}/photo?w=40"
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        etag = client.get(url, headers=headers).headers["ETag"]
+
+        with patch.object(real_fs, "get", side_effect=AssertionError), patch.object(
+            real_fs, "find_one", side_effect=AssertionError
+        ):
+            response = client.get(url, headers={**headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.data == b""
+
+    def test_etag_differs_per_size(self, client, real_fs, regular_user_token, test_pet, pet_with_photo):
+        """Each requested size has its own validator."""
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        small = client.get(f"/api/pets/{test_pet['_id']}/photo?w=40", headers=headers)
+        original = client.get(f"/api/pets/{test_pet['_id']}/photo", headers=headers)
+
+        assert small.headers["ETag"] != original.headers["ETag"]
+        assert original.content_type == "image/jpeg"
+
+    def test_photo_removal_deletes_renditions(self, client, mock_db, real_fs, regular_user_token, test_pet, pet_with_photo):
+        """Removing a photo also drops every cached rendition."""
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        client.get(f"/api/pets/{test_pet['_id']}/photo?w=40", headers=headers)
+        assert len(_renditions(real_fs, pet_with_photo)) == 1
+
+        response = client.put(
+            f"/api/pets/{test_pet['_id']}",
+            data={"name": test_pet["name"], "remove_photo": "true"},
+            headers=headers,
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 200
+        assert _renditions(real_fs, pet_with_photo) == []
+        assert not real_fs.exists(ObjectId(pet_with_photo))
+
+    def test_pet_deletion_deletes_renditions(self, client, real_fs, regular_user_token, test_pet, pet_with_photo):
+        """Deleting a pet drops its photo renditions."""
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        client.get(f"/api/pets/{test_pet['_id']}/photo?h=20", headers=headers)
+
+        response = client.delete(f"/api/pets/{test_pet['_id']}", headers=headers)
+
+        assert response.status_code == 200
+        assert _renditions(real_fs, pet_with_photo) == []
@@ -0,0 +1,184 @@
+"""Tests for daily rollups (web/rollups.py) maintained by the write routes."""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from web.rollups import ROLLUPS_COLLECTION, apply_inserted, rebuild_rollups, refresh_days
+
+
+def _date(days_ago):
+    return (datetime.now() - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+
+def _rollup(mock_db, pet_id, record_type, days_ago):
+    day = datetime.strptime(_date(days_ago), "%Y-%m-%d")
+    return mock_db[ROLLUPS_COLLECTION].find_one({"pet_id": pet_id, "type": record_type, "day": day}, {"_id": 0})
+
+
+def _post_weight(client, token, pet_id, days_ago, time, weight):
+    return client.post(
+        "/api/weight",
+        json={"pet_id": pet_id, "date": _date(days_ago), "time": time, "weight": weight},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+@pytest.mark.health_records
+class TestDailyRollups:
+    """Rollups follow inserts, updates and deletes."""
+
+    def test_inserts_accumulate_values(self, client, mock_db, regular_user_token, test_pet):
+        """Count, sum, min, max and the value of the latest record are kept per day."""
+        pet_id = str(test_pet["_id"])
+        for time, weight in [("18:00", 5.0), ("08:00", 4.0), ("12:00", 4.5)]:
+            assert _post_weight(client, regular_user_token, pet_id, 1, time, weight).status_code == 201
+
+        rollup = _rollup(mock_db, pet_id, "weight", 1)
+
+        assert rollup["count"] == 3
+        assert rollup["sum"] == 13.5
+        assert (rollup["min"], rollup["max"]) == (4.0, 5.0)
+        assert rollup["last_value"] == 5.0
+
+    def test_update_moves_record_between_days(self, client, mock_db, regular_user_token, test_pet):
+        """Changing the date corrects the rollups of the old and the new day."""
+        pet_id = str(test_pet["_id"])
+        _post_weight(client, regular_user_token, pet_id, 2, "08:00", 4.0)
+        record_id = mock_db["weights"].find_one({"pet_id": pet_id})["_id"]
+
+        response = client.put(
+            f"/api/weight/{record_id}",
+            json={"date": _date(1), "time": "09:00"},
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        assert response.status_code == 200
+        assert _rollup(mock_db, pet_id, "weight", 2) is None
+        assert _rollup(mock_db, pet_id, "weight", 1)["count"] == 1
+
+    def test_delete_recomputes_day(self, client, mock_db, regular_user_token, test_pet):
+        """Deleting the day's maximum lowers max and last_value."""
+        pet_id = str(test_pet["_id"])
+        _post_weight(client, regular_user_token, pet_id, 1, "08:00", 4.0)
+        _post_weight(client, regular_user_token, pet_id, 1, "18:00", 5.0)
+        record_id = mock_db["weights"].find_one({"pet_id": pet_id, "weight": 5.0})["_id"]
+
+        client.delete(f"/api/weight/{record_id}", headers={"Authorization": f"Bearer {regular_user_token}"})
+
+        rollup = _rollup(mock_db, pet_id, "weight", 1)
+        assert (rollup["count"], rollup["max"], rollup["last_value"]) == (1, 4.0, 4.0)
+
+    def test_medication_intakes_are_counted(self, client, mock_db, regular_user_token, test_pet):
+        """Logging and deleting intakes maintains the medications rollup."""
+        pet_id = str(test_pet["_id"])
+        med_id = mock_db["medications"].insert_one(
+            {"pet_id": pet_id, "name": "Med", "username": "testuser", "default_dose": 1}
+        ).inserted_id
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        for time in ("08:00", "20:00"):
+            client.post(f"/api/medications/{med_id}/log", json={"date": _date(1), "time": time}, headers=headers)
+        assert _rollup(mock_db, pet_id, "medications", 1)["count"] == 2
+
+        intake_id = mock_db["medication_intakes"].find_one({"pet_id": pet_id})["_id"]
+        client.delete(f"/api/medications/intakes/{intake_id}", headers=headers)
+
+        assert _rollup(mock_db, pet_id, "medications", 1)["count"] == 1
+
+    def test_deleting_medication_drops_its_intakes(self, client, mock_db, regular_user_token, test_pet):
+        """Intakes deleted with their medication leave the medications rollup."""
+        pet_id = str(test_pet["_id"])
+        med_id = mock_db["medications"].insert_one(
+            {"pet_id": pet_id, "name": "Med", "username": "testuser", "default_dose": 1}
+        ).inserted_id
+        headers = {"Authorization": f"Bearer {regular_user_token}"}
+        for time in ("08:00", "20:00"):
+            client.post(f"/api/medications/{med_id}/log", json={"date": _date(1), "time": time}, headers=headers)
+        assert _rollup(mock_db, pet_id, "medications", 1)["count"] == 2
+
+        assert client.delete(f"/api/medications/{med_id}", headers=headers).status_code == 200
+
+        assert _rollup(mock_db, pet_id, "medications", 1) is None
+
+    def test_batch_insert_is_one_bulk_write_per_step(self, mock_db):
+        """A batch of records over several days costs two writes, and matches a rebuild."""
+        from mongomock.collection import Collection
+
+        day = datetime(2024, 5, 1)
+        records = [
+            {"pet_id": "p1", "date_time": day + timedelta(days=offset, hours=hour), "weight": weight}
+            for offset, hour, weight in [(0, 8, 4.0), (0, 20, 4.4), (0, 12, 4.1), (1, 9, 4.2), (1, 7, 3.9)]
+        ]
+        mock_db["weights"].insert_many(records)
+
+        with patch.object(Collection, "bulk_write", autospec=True, side_effect=Collection.bulk_write) as bulk, patch.object(
+            Collection, "update_one", side_effect=AssertionError("one write per record")
+        ):
+            apply_inserted("weights", records)
+
+        assert bulk.call_count == 2
+        applied = sorted(mock_db[ROLLUPS_COLLECTION].find({}, {"_id": 0}), key=lambda rollup: rollup["day"])
+        assert [(rollup["count"], rollup["min"], rollup["max"], rollup["last_value"]) for rollup in applied] == [
+            (3, 4.0, 4.4, 4.4),
+            (2, 3.9, 4.2, 4.2),
+        ]
+        rebuild_rollups("p1")
+        assert sorted(mock_db[ROLLUPS_COLLECTION].find({}, {"_id": 0}), key=lambda rollup: rollup["day"]) == applied
+
+    def test_refresh_reads_records_in_the_transaction(self):
+        """Records are read with the caller's session, so records deleted in its transaction are not counted."""
+        db = MagicMock()
+        session = object()
+        db["medication_intakes"].find.return_value.sort.return_value = []
+
+        with patch("web.app.db", db):
+            refresh_days("medication_intakes", "p1", [datetime(2024, 5, 1, 8)], session=session)
+
+        assert db["medication_intakes"].find.call_args.kwargs["session"] is session
+        assert db[ROLLUPS_COLLECTION].delete_one.call_args.kwargs["session"] is session
+
+    def test_incremental_rollups_match_rebuild(self, client, mock_db, regular_user_token, test_pet):
+        """The rebuild command produces the same documents as the write paths."""
+        pet_id = str(test_pet["_id"])
+        _post_weight(client, regular_user_token, pet_id, 3, "08:00", 4.0)
+        _post_weight(client, regular_user_token, pet_id, 3, "07:00", 4.4)
+        _post_weight(client, regular_user_token, pet_id, 1, "08:00", 4.2)
+        incremental = sorted(
+            mock_db[ROLLUPS_COLLECTION].find({"pet_id": pet_id}, {"_id": 0}), key=lambda rollup: rollup["day"]
+        )
+
+        assert rebuild_rollups(pet_id) == 2
+        rebuilt = sorted(mock_db[ROLLUPS_COLLECTION].find({"pet_id": pet_id}, {"_id": 0}), key=lambda rollup: rollup["day"])
+
+        assert rebuilt == incremental
+
+    def test_rebuild_replaces_stale_days_and_pets(self, mock_db):
+        """Rollups without records are dropped; days with records are replaced in place."""
+        day = datetime.strptime(_date(2), "%Y-%m-%d")
+        mock_db["weights"].insert_one({"pet_id": "pet-a", "date_time": day + timedelta(hours=8), "weight": 4.0})
+        mock_db[ROLLUPS_COLLECTION].insert_many(
+            [
+                {"pet_id": "pet-a", "type": "weight", "day": day, "count": 5},
+                {"pet_id": "pet-a", "type": "weight", "day": day - timedelta(days=1), "count": 1},
+                {"pet_id": "pet-gone", "type": "weight", "day": day, "count": 1},
+            ]
+        )
+
+        assert rebuild_rollups() == 1
+
+        rollups = list(mock_db[ROLLUPS_COLLECTION].find({}, {"_id": 0}))
+        assert [(rollup["pet_id"], rollup["day"], rollup["count"]) for rollup in rollups] == [("pet-a", day, 1)]
+
+    def test_stats_read_rollups_written_by_routes(self, client, mock_db, regular_user_token, test_pet):
+        """Day buckets reflect records created through the API without a rebuild."""
+        pet_id = str(test_pet["_id"])
+        _post_weight(client, regular_user_token, pet_id, 1, "08:00", 4.0)
+        _post_weight(client, regular_user_token, pet_id, 1, "18:00", 5.0)
+
+        response = client.get(
+            f"/api/stats/health?pet_id={pet_id}&type=weight&bucket=day",
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+
+        assert response.get_json()["data"] == [{"date": _date(1), "value": 4.5}]
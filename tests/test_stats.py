@@ -0,0 +1,138 @@
+"""Tests for health statistics endpoint (/api/stats/health)."""
+
+import pytest
+from datetime import datetime, timedelta
+
+from web.rollups import rebuild_rollups
+
+
+def _day(days_ago, hour=10, minute=0):
+    """Return a naive datetime `days_ago` days before today at the given time."""
+    return (datetime.now() - timedelta(days=days_ago)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+@pytest.mark.health
+class TestHealthStats:
+    """Test raw and bucketed health statistics."""
+
+    def _get(self, client, token, pet, **params):
+        # Records are inserted directly, bypassing the routes like historical data does
+        rebuild_rollups(str(pet["_id"]))
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return client.get(
+            f"/api/stats/health?pet_id={pet['_id']}&{query}",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    def test_stats_without_bucket_returns_one_point_per_record(self, client, mock_db, regular_user_token, test_pet):
+        """Without bucket the endpoint keeps returning raw points."""
+        pet_id = str(test_pet["_id"])
+        mock_db["feedings"].insert_many(
+            [
+                {"pet_id": pet_id, "date_time": _day(2, 9), "food_weight": 40},
+                {"pet_id": pet_id, "date_time": _day(2, 18), "food_weight": 60},
+                {"pet_id": pet_id, "date_time": _day(60), "food_weight": 10},
+            ]
+        )
+
+        response = self._get(client, regular_user_token, test_pet, type="feeding")
+
+        assert response.status_code == 200
+        data = response.get_json()["data"]
+        assert [point["value"] for point in data] == [40, 60]
+        assert data[0]["date"] == _day(2, 9).strftime("%Y-%m-%d %H:%M")
+
+    def test_stats_day_bucket_sums_feeding_by_default(self, client, mock_db, regular_user_token, test_pet):
+        """Feeding portions are summed per day when agg is omitted."""
+        pet_id = str(test_pet["_id"])
+        mock_db["feedings"].insert_many(
+            [
+                {"pet_id": pet_id, "date_time": _day(3, 9), "food_weight": 40},
+                {"pet_id": pet_id, "date_time": _day(3, 18), "food_weight": 60},
+                {"pet_id": pet_id, "date_time": _day(1, 12), "food_weight": 55},
+            ]
+        )
+
+        response = self._get(client, regular_user_token, test_pet, type="feeding", bucket="day")
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["bucket"] == "day"
+        assert body["agg"] == "sum"
+        assert body["data"] == [
+            {"date": _day(3).strftime("%Y-%m-%d"), "value": 100},
+            {"date": _day(1).strftime("%Y-%m-%d"), "value": 55},
+        ]
+
+    def test_stats_count_types_count_records_per_bucket(self, client, mock_db, regular_user_token, test_pet):
+        """Event types without a value field are counted."""
+        pet_id = str(test_pet["_id"])
+        mock_db["asthma_attacks"].insert_many(
+            [
+                {"pet_id": pet_id, "date_time": _day(2, 8)},
+                {"pet_id": pet_id, "date_time": _day(2, 8, 30)},
+                {"pet_id": pet_id, "date_time": _day(2, 20)},
+            ]
+        )
+
+        response = self._get(client, regular_user_token, test_pet, type="asthma", bucket="hour")
+
+        body = response.get_json()
+        assert body["agg"] == "count"
+        assert [point["value"] for point in body["data"]] == [2, 1]
+        assert body["data"][0]["date"] == _day(2, 8).strftime("%Y-%m-%d %H:00")
+
+    @pytest.mark.parametrize(
+        "agg,expected",
+        [("avg", 4.5), ("min", 4.0), ("max", 5.0), ("last", 5.0), ("count", 2), ("sum", 9.0)],
+    )
+    def test_stats_weight_aggregations(self, client, mock_db, regular_user_token, test_pet, agg, expected):
+        """Every supported aggregation is computed inside the bucket."""
+        pet_id = str(test_pet["_id"])
+        mock_db["weights"].insert_many(
+            [
+                {"pet_id": pet_id, "date_time": _day(1, 18), "weight": 5.0},
+                {"pet_id": pet_id, "date_time": _day(1, 8), "weight": 4.0},
+            ]
+        )
+
+        response = self._get(client, regular_user_token, test_pet, type="weight", bucket="day", agg=agg)
+
+        assert response.status_code == 200
+        assert response.get_json()["data"] == [{"date": _day(1).strftime("%Y-%m-%d"), "value": expected}]
+
+    def test_stats_week_bucket_is_labelled_with_monday(self, client, mock_db, regular_user_token, test_pet):
+        """Weekly buckets start on the ISO week's Monday."""
+        pet_id = str(test_pet["_id"])
+        record_dt = _day(10)
+        mock_db["weights"].insert_one({"pet_id": pet_id, "date_time": record_dt, "weight": 4.2})
+
+        response = self._get(client, regular_user_token, test_pet, type="weight", bucket="week")
+
+        monday = (record_dt - timedelta(days=record_dt.weekday())).strftime("%Y-%m-%d")
+        assert response.get_json()["data"] == [{"date": monday, "value": 4.2}]
+
+    def test_stats_month_bucket(self, client, mock_db, regular_user_token, test_pet):
+        """Monthly buckets are labelled with the first day of the month."""
+        pet_id = str(test_pet["_id"])
+        record_dt = _day(5)
+        mock_db["litter_changes"].insert_many(
+            [{"pet_id": pet_id, "date_time": record_dt}, {"pet_id": pet_id, "date_time": record_dt}]
+        )
+
+        response = self._get(client, regular_user_token, test_pet, type="litter", bucket="month")
+
+        assert response.get_json()["data"] == [{"date": record_dt.strftime("%Y-%m-01"), "value": 2}]
+
+    def test_stats_invalid_bucket(self, client, mock_db, regular_user_token, test_pet):
+        """Unknown bucket values are rejected by validation."""
+        response = self._get(client, regular_user_token, test_pet, type="weight", bucket="year")
+
+        assert response.status_code == 422
+
+    def test_stats_unsupported_type(self, client, mock_db, regular_user_token, test_pet):
+        """Unknown record types return a validation error."""
+        response = self._get(client, regular_user_token, test_pet, type="unknown")
+
+        assert response.status_code == 422
+        assert "Unsupported record type" in response.get_json()["error"]
@@ -0,0 +1,64 @@
+"""Tests for streamed, range-capable photo delivery (web/streaming.py)."""
+
+import pytest
+
+
+PHOTO = bytes(range(256)) * 40  # 10240 bytes
+CHUNK_SIZE = 1024
+
+
+@pytest.fixture
+def stored_photo(mock_db, real_fs, test_pet):
+    """Attach a multi-chunk photo to test_pet and return its URL."""
+    photo_file_id = real_fs.put(PHOTO, filename="cat.jpg", content_type="image/jpeg", chunkSize=CHUNK_SIZE)
+    mock_db["pets"].update_one({"_id": test_pet["_id"]}, {"$set": {"photo_file_id": str(photo_file_id)}})
+    return f"/api/pets/{test_pet['_id']}/photo"
+
+
+@pytest.mark.pets
+class TestPhotoStreaming:
+    """Originals are streamed from GridFS and honour Range."""
+
+    def test_full_photo_is_streamed(self, client, regular_user_token, stored_photo):
+        response = client.get(stored_photo, headers={"Authorization": f"Bearer {regular_user_token}"})
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.headers["Content-Length"] == str(len(PHOTO))
+        assert response.headers["Accept-Ranges"] == "bytes"
+        assert response.data == PHOTO
+
+    def test_range_returns_206(self, client, regular_user_token, stored_photo):
+        headers = {"Authorization": f"Bearer {regular_user_token}", "Range": "bytes=1500-4599"}
+
+        response = client.get(stored_photo, headers=headers)
+
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == f"bytes 1500-4599/{len(PHOTO)}"
+        assert response.headers["Content-Length"] == "3100"
+        assert response.data == PHOTO[1500:4600]
+
+    def test_suffix_range(self, client, regular_user_token, stored_photo):
+        headers = {"Authorization": f"Bearer {regular_user_token}", "Range": "bytes=-100"}
+
+        response = client.get(stored_photo, headers=headers)
+
+        assert response.status_code == 206
+        assert response.data == PHOTO[-100:]
+
+    def test_unsatisfiable_range_returns_416(self, client, regular_user_token, stored_photo):
+        headers = {"Authorization": f"Bearer {regular_user_token}", "Range": f"bytes={len(PHOTO) + 10}-"}
+
+        response = client.get(stored_photo, headers=headers)
+
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == f"bytes */{len(PHOTO)}"
+        assert response.get_json()["code"] == "range_not_satisfiable"
+
+    def test_stale_if_range_returns_full_photo(self, client, regular_user_token, stored_photo):
+        headers = {"Authorization": f"Bearer {regular_user_token}", "Range": "bytes=0-9", "If-Range": '"stale"'}
+
+        response = client.get(stored_photo, headers=headers)
+
+        assert response.status_code == 200
+        assert response.data == PHOTO
@@ -0,0 +1,79 @@
+"""Tests for the dashboard summary (web/summary.py)."""
+
+from datetime import datetime
+
+import pytest
+
+
+# Monday
+CLIENT_NOW = "2024-01-15T12:00:00"
+
+
+def _summary(client, token, pet_id, client_datetime=CLIENT_NOW):
+    return client.get(
+        f"/api/pets/{pet_id}/summary?client_datetime={client_datetime}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+@pytest.mark.pets
+class TestPetSummary:
+    """Test GET /api/pets/<pet_id>/summary."""
+
+    def test_records_last_event_and_today_count(self, client, mock_db, regular_user_token, test_pet):
+        """Each type reports its newest record and how many are dated today."""
+        pet_id = str(test_pet["_id"])
+        mock_db["feedings"].insert_many(
+            [
+                {"pet_id": pet_id, "date_time": datetime(2024, 1, 14, 20), "food_weight": 40},
+                {"pet_id": pet_id, "date_time": datetime(2024, 1, 15, 8), "food_weight": 50},
+                {"pet_id": pet_id, "date_time": datetime(2024, 1, 15, 11), "food_weight": 60},
+            ]
+        )
+        mock_db["weights"].insert_one({"pet_id": pet_id, "date_time": datetime(2024, 1, 10, 9), "weight": 4.3})
+
+        response = _summary(client, regular_user_token, pet_id)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["records"]["feeding"]["today_count"] == 2
+        assert data["records"]["feeding"]["last"]["food_weight"] == 60
+        assert data["records"]["weight"]["today_count"] == 0
+        assert data["latest_weight"]["weight"] == 4.3
+        assert data["records"]["asthma"] == {"last": None, "today_count": 0}
+
+    def test_medications_and_upcoming_doses(self, client, mock_db, regular_user_token, test_pet):
+        """Active medications carry intakes_today and taken doses are not upcoming."""
+        pet_id = str(test_pet["_id"])
+        med_id = mock_db["medications"].insert_one(
+            {
+                "pet_id": pet_id,
+                "name": "Med",
+                "type": "pill",
+                "is_active": True,
+                "schedule": {"days": [0], "times": ["08:00", "20:00"]},
+                "created_at": datetime(2024, 1, 1),
+            }
+        ).inserted_id
+        mock_db["medications"].insert_one({"pet_id": pet_id, "name": "Old", "is_active": False})
+        mock_db["medication_intakes"].insert_one(
+            {"pet_id": pet_id, "medication_id": str(med_id), "date_time": datetime(2024, 1, 15, 8)}
+        )
+
+        data = _summary(client, regular_user_token, pet_id).get_json()
+
+        assert [med["name"] for med in data["medications"]] == ["Med"]
+        assert data["medications"][0]["intakes_today"] == 1
+        assert [(dose["time"], dose["is_overdue"]) for dose in data["upcoming_doses"]] == [("20:00", False)]
+
+    def test_requires_pet_access(self, client, mock_db, admin_token, test_pet):
+        """Users without access to the pet get 403."""
+        response = _summary(client, admin_token, str(test_pet["_id"]))
+
+        assert response.status_code == 403
+
+    def test_invalid_pet_id(self, client, mock_db, regular_user_token):
+        """Malformed pet ids are rejected."""
+        response = _summary(client, regular_user_token, "not-an-id")
+
+        assert response.status_code == 422
@@ -0,0 +1,158 @@
+"""Tests for delta sync (web/sync.py)."""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from web.sync import encode_watermark
+
+
+def _sync(client, token, pet_id, since=None, cursor=None):
+    url = f"/api/sync?pet_id={pet_id}" + (f"&since={since}" if since else "") + (f"&cursor={cursor}" if cursor else "")
+    return client.get(url, headers={"Authorization": f"Bearer {token}"})
+
+
+def _sync_pages(client, token, pet_id, since=None):
+    """Follow a sync through all of its pages."""
+    pages = [_sync(client, token, pet_id, since).get_json()]
+    while pages[-1]["has_more"]:
+        pages.append(_sync(client, token, pet_id, cursor=pages[-1]["cursor"]).get_json())
+    return pages
+
+
+@pytest.mark.health_records
+class TestSync:
+    """Test GET /api/sync."""
+
+    def test_without_watermark_returns_full_snapshot(self, client, mock_db, regular_user_token, test_pet):
+        """The first sync returns every record, including ones without updated_at."""
+        pet_id = str(test_pet["_id"])
+        mock_db["weights"].insert_one({"pet_id": pet_id, "date_time": datetime(2024, 1, 1), "weight": "4"})
+        mock_db["feedings"].insert_one({"pet_id": "0" * 24, "date_time": datetime(2024, 1, 1)})
+
+        response = _sync(client, regular_user_token, pet_id)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["full"] is True
+        assert len(data["changes"]["weights"]) == 1
+        assert data["changes"]["feedings"] == []
+        assert "medications" in data["changes"]
+        assert data["watermark"]
+
+    def test_delta_contains_only_changes_after_watermark(self, client, mock_db, regular_user_token, test_pet):
+        """Records stamped before the watermark are not transferred again."""
+        pet_id = str(test_pet["_id"])
+        mock_db["weights"].insert_one(
+            {"pet_id": pet_id, "date_time": datetime(2024, 1, 1), "updated_at": datetime.utcnow() - timedelta(hours=1)}
+        )
+        watermark = _sync(client, regular_user_token, pet_id).get_json()["watermark"]
+
+        client.post(
+            "/api/weight",
+            json={"pet_id": pet_id, "date": datetime.now().strftime("%Y-%m-%d"), "time": "08:00", "weight": "4.2"},
+            headers={"Authorization": f"Bearer {regular_user_token}"},
+        )
+        data = _sync(client, regular_user_token, pet_id, watermark).get_json()
+
+        assert data["full"] is False
+        assert [doc["weight"] for doc in data["changes"]["weights"]] == [4.2]
+
+    def test_deletes_are_reported_as_tombstones(self, client, mock_db, regular_user_token, test_pet):
+        """Deleting a record through its route shows up under deleted."""
+        pet_id = str(test_pet["_id"])
+        record_id = mock_db["litter_changes"].insert_one(
+            {"pet_id": pet_id, "date_time": datetime(2024, 1, 1), "username": "testuser"}
+        ).inserted_id
+        watermark = _sync(client, regular_user_token, pet_id).get_json()["watermark"]
+
+        client.delete(f"/api/litter/{record_id}", headers={"Authorization": f"Bearer {regular_user_token}"})
+        data = _sync(client, regular_user_token, pet_id, watermark).get_json()
+
+        assert data["deleted"]["litter_changes"] == [str(record_id)]
+        assert data["changes"]["litter_changes"] == []
+
+    def test_medication_delete_tombstones_intakes(self, client, mock_db, regular_user_token, test_pet):
+        """Intakes removed together with their medication get tombstones too."""
+        pet_id = str(test_pet["_id"])
+        med_id = mock_db["medications"].insert_one({"pet_id": pet_id, "name": "Med", "username": "testuser"}).inserted_id
+        intake_id = mock_db["medication_intakes"].insert_one(
+            {"pet_id": pet_id, "medication_id": str(med_id), "date_time": datetime(2024, 1, 1)}
+        ).inserted_id
+        watermark = encode_watermark(datetime.utcnow())
+
+        response = client.delete(f"/api/medications/{med_id}", headers={"Authorization": f"Bearer {regular_user_token}"})
+        data = _sync(client, regular_user_token, pet_id, watermark).get_json()
+
+        assert response.status_code == 200
+        assert data["deleted"]["medications"] == [str(med_id)]
+        assert data["deleted"]["medication_intakes"] == [str(intake_id)]
+
+    def test_expired_watermark_forces_full_snapshot(self, client, mock_db, regular_user_token, test_pet):
+        """Watermarks older than the tombstone retention cannot be answered with a delta."""
+        watermark = encode_watermark(datetime.utcnow() - timedelta(days=3650))
+
+        data = _sync(client, regular_user_token, str(test_pet["_id"]), watermark).get_json()
+
+        assert data["full"] is True
+
+    def test_invalid_watermark(self, client, mock_db, regular_user_token, test_pet):
+        """Malformed watermarks are rejected."""
+        response = _sync(client, regular_user_token, str(test_pet["_id"]), "not-a-watermark")
+
+        assert response.status_code == 422
+        assert response.get_json()["code"] == "invalid_watermark"
+
+    def test_requires_pet_access(self, client, mock_db, admin_token, test_pet):
+        """Users without access to the pet get 403."""
+        response = _sync(client, admin_token, str(test_pet["_id"]))
+
+        assert response.status_code == 403
+
+    def test_full_snapshot_is_paged(self, client, mock_db, regular_user_token, test_pet):
+        """Snapshots larger than a page continue with a cursor; every document is sent exactly once."""
+        pet_id = str(test_pet["_id"])
+        stamp = datetime.utcnow() - timedelta(hours=1)
+        weight_ids = [
+            mock_db["weights"].insert_one({"pet_id": pet_id, "date_time": datetime(2024, 1, 1), "updated_at": stamp}).inserted_id
+            for _ in range(3)
+        ]
+        # Legacy records without updated_at sort first
+        weight_ids.append(mock_db["weights"].insert_one({"pet_id": pet_id, "date_time": datetime(2024, 1, 1)}).inserted_id)
+        feeding_id = mock_db["feedings"].insert_one({"pet_id": pet_id, "date_time": datetime(2024, 1, 1)}).inserted_id
+
+        with patch.dict("web.sync.SYNC_CONFIG", {"page_size": 2}):
+            pages = _sync_pages(client, regular_user_token, pet_id)
+
+        assert len(pages) == 3
+        assert all(len(sum(page["changes"].values(), [])) <= 2 for page in pages)
+        assert {page["watermark"] for page in pages} == {pages[0]["watermark"]}
+        assert all(page["full"] for page in pages)
+        sent = [doc["_id"] for page in pages for doc in page["changes"]["weights"]]
+        assert sorted(sent) == sorted(str(record_id) for record_id in weight_ids)
+        assert [doc["_id"] for page in pages for doc in page["changes"]["feedings"]] == [str(feeding_id)]
+        assert pages[-1]["cursor"] is None
+
+    def test_delta_pages_include_tombstones(self, client, mock_db, regular_user_token, test_pet):
+        """Tombstones are paged after the changed documents."""
+        pet_id = str(test_pet["_id"])
+        since = datetime.utcnow()
+        for _ in range(2):
+            mock_db["weights"].insert_one({"pet_id": pet_id, "date_time": since, "updated_at": since})
+        mock_db["deleted_records"].insert_many(
+            [{"collection": "feedings", "record_id": f"f{i}", "pet_id": pet_id, "deleted_at": since} for i in range(3)]
+        )
+
+        with patch.dict("web.sync.SYNC_CONFIG", {"page_size": 2}):
+            pages = _sync_pages(client, regular_user_token, pet_id, encode_watermark(since))
+
+        assert not any(page["full"] for page in pages)
+        assert sum(len(page["changes"]["weights"]) for page in pages) == 2
+        assert sorted(record_id for page in pages for record_id in page["deleted"]["feedings"]) == ["f0", "f1", "f2"]
+
+    def test_invalid_cursor(self, client, mock_db, regular_user_token, test_pet):
+        """Malformed cursors are rejected."""
+        response = _sync(client, regular_user_token, str(test_pet["_id"]), cursor="bogus")
+
+        assert response.status_code == 422
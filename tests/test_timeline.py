@@ -0,0 +1,94 @@
+"""Tests for the merged record timeline (web/timeline.py)."""
+
+from datetime import datetime
+
+import pytest
+
+
+def _timeline(client, token, pet_id, **params):
+    query = "&".join(f"{key}={value}" for key, value in {"pet_id": pet_id, **params}.items())
+    return client.get(f"/api/timeline?{query}", headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.fixture
+def timeline_records(mock_db, test_pet):
+    """Records of several types with interleaved timestamps."""
+    pet_id = str(test_pet["_id"])
+    mock_db["weights"].insert_many(
+        [
+            {"pet_id": pet_id, "date_time": datetime(2024, 1, 1, 8), "weight": 4.0},
+            {"pet_id": pet_id, "date_time": datetime(2024, 1, 3, 8), "weight": 4.1},
+        ]
+    )
+    mock_db["feedings"].insert_many(
+        [
+            {"pet_id": pet_id, "date_time": datetime(2024, 1, 2, 8), "food_weight": 50},
+            {"pet_id": pet_id, "date_time": datetime(2024, 1, 4, 8), "food_weight": 60},
+        ]
+    )
+    mock_db["medication_intakes"].insert_one({"pet_id": pet_id, "date_time": datetime(2024, 1, 5, 8), "dose_taken": 1})
+    mock_db["weights"].insert_one({"pet_id": "0" * 24, "date_time": datetime(2024, 1, 6, 8), "weight": 9.0})
+    return pet_id
+
+
+@pytest.mark.health_records
+class TestTimeline:
+    """Test GET /api/timeline."""
+
+    def test_merges_collections_newest_first(self, client, regular_user_token, timeline_records):
+        """Records of all types come back in one date_time-ordered list."""
+        response = _timeline(client, regular_user_token, timeline_records)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [item["type"] for item in data["items"]] == ["medication_intake", "feeding", "weight", "feeding", "weight"]
+        assert data["items"][0]["record"]["date_time"] == "2024-01-05 08:00"
+        assert data["next_cursor"] is None
+
+    def test_keyset_pagination_walks_all_records(self, client, regular_user_token, timeline_records):
+        """Following next_cursor returns every record exactly once."""
+        seen = []
+        cursor = None
+        while True:
+            params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+            data = _timeline(client, regular_user_token, timeline_records, **params).get_json()
+            seen.extend(item["record"]["date_time"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert seen == sorted(seen, reverse=True)
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_type_filter(self, client, regular_user_token, timeline_records):
+        """Only the requested types are merged."""
+        data = _timeline(client, regular_user_token, timeline_records, types="weight,medication_intake").get_json()
+
+        assert [item["type"] for item in data["items"]] == ["medication_intake", "weight", "weight"]
+
+    def test_date_range_is_inclusive(self, client, regular_user_token, timeline_records):
+        """date_from and date_to cover whole days."""
+        data = _timeline(
+            client, regular_user_token, timeline_records, date_from="2024-01-02", date_to="2024-01-03"
+        ).get_json()
+
+        assert [item["record"]["date_time"] for item in data["items"]] == ["2024-01-03 08:00", "2024-01-02 08:00"]
+
+    def test_unknown_type_is_rejected(self, client, regular_user_token, timeline_records):
+        """Unknown record types fail validation."""
+        response = _timeline(client, regular_user_token, timeline_records, types="weight,grooming")
+
+        assert response.status_code == 422
+
+    def test_invalid_cursor(self, client, regular_user_token, timeline_records):
+        """Malformed cursors are rejected."""
+        response = _timeline(client, regular_user_token, timeline_records, cursor="garbage")
+
+        assert response.status_code == 422
+        assert response.get_json()["code"] == "invalid_cursor"
+
+    def test_requires_pet_access(self, client, admin_token, timeline_records):
+        """Users without access to the pet get 403."""
+        response = _timeline(client, admin_token, timeline_records)
+
+        assert response.status_code == 403
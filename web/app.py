@@ -4,6 +4,7 @@ import logging
 import os
 import sys
 
+import click
 from flask import Flask, make_response, redirect, render_template, request, send_from_directory, url_for
 from flask_cors import CORS
 from flask_limiter import Limiter
@@ -11,18 +12,19 @@ from flask_limiter.errors import RateLimitExceeded
 from flask_limiter.util import get_remote_address
 from flask_pydantic_spec import FlaskPydanticSpec
 from gridfs import GridFS
+from pymongo.errors import PyMongoError
 from werkzeug.exceptions import HTTPException
 
 from web import security
-from web.configs import FLASK_CONFIG, LOGGING_CONFIG, RATE_LIMIT_CONFIG
+from web.configs import FLASK_CONFIG, LOGGING_CONFIG, MONGODB_CONFIG, RATE_LIMIT_CONFIG
 from web.db import db
 from web.errors import error_response
-from web.security import (
-    ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_token_from_request,
-    try_refresh_access_token,
-    verify_token,
-)
+from web.images import ImageTooLarge, UploadRequest
+from web.indexes import ensure_indexes, index_report
+from web.json_provider import select_json_provider
+from web.passwords import PasswordHashingBusy
+from web.rate_limit import rate_limit_key  # registers the "token-bucket" strategy
+from web.security import ACCESS_TOKEN_EXPIRE_MINUTES
 
 
 # Configure logging
@@ -56,17 +58,26 @@ app = Flask(
     template_folder=FLASK_CONFIG["template_folder"],
     static_folder=FLASK_CONFIG["static_folder"],
 )
+# Spools large multipart uploads to disk (web/images.py)
+app.request_class = UploadRequest
 CORS(app, supports_credentials=True)
 app.secret_key = FLASK_CONFIG["secret_key"]
 app.config["JSONIFY_PRETTYPRINT_REGULAR"] = FLASK_CONFIG["jsonify_prettyprint_regular"]
 app.config["JSON_AS_ASCII"] = FLASK_CONFIG["json_as_ascii"]
+# Encodes ObjectId/datetime natively so routes can jsonify documents straight from the cursor
+app.json = select_json_provider(FLASK_CONFIG["json_provider"])(app)
+app.json.ensure_ascii = FLASK_CONFIG["json_as_ascii"]
+# Verify the access token once per request; the auth decorators reuse the result
+app.before_request(security.resolve_identity)
 
 # Setup logging
 logger = setup_logging(app)
 
 # Initialize Flask-Limiter for rate limiting
-# Use memory storage for tests, MongoDB for production
-# No default limits - rate limiting applied only to specific endpoints (login)
+# Use memory storage for tests, MongoDB for production; with the default token-bucket
+# strategy the storage is only used to reconcile per-worker buckets (web/rate_limit.py)
+# No default limits - rate limiting applied only to specific endpoints (login, and the
+# optional write/export limits below)
 # Using empty list [] to disable default limits (recommended in documentation)
 limiter = Limiter(
     app=app,
@@ -146,6 +157,15 @@ from web.users import users_bp  # noqa: E402
 from web.health_records import health_records_bp  # noqa: E402
 from web.medications import medications_bp  # noqa: E402
 from web.export import export_bp  # noqa: E402
+from web.batch import batch_bp  # noqa: E402
+from web.sync import sync_bp  # noqa: E402
+from web.timeline import timeline_bp  # noqa: E402
+from web.summary import summary_bp  # noqa: E402
+from web.metrics import metrics_bp  # noqa: E402
+from web.jobs import jobs_bp  # noqa: E402
+from web.rollups import rebuild_rollups  # noqa: E402
+from web.refresh_tokens import migrate_refresh_tokens  # noqa: E402
+from web.invalidation import start_watcher  # noqa: E402
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(pets_bp)
@@ -153,6 +173,23 @@ app.register_blueprint(users_bp)
 app.register_blueprint(health_records_bp)
 app.register_blueprint(medications_bp)
 app.register_blueprint(export_bp)
+app.register_blueprint(batch_bp)
+app.register_blueprint(sync_bp)
+app.register_blueprint(timeline_bp)
+app.register_blueprint(summary_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(jobs_bp)
+
+# Optional per-user limits shared by all write routes and by all export routes
+if RATE_LIMIT_CONFIG["write_limit"]:
+    for blueprint in (pets_bp, users_bp, health_records_bp, medications_bp, batch_bp):
+        limiter.limit(
+            RATE_LIMIT_CONFIG["write_limit"],
+            key_func=rate_limit_key,
+            methods=["POST", "PUT", "PATCH", "DELETE"],
+        )(blueprint)
+if RATE_LIMIT_CONFIG["export_limit"]:
+    limiter.limit(RATE_LIMIT_CONFIG["export_limit"], key_func=rate_limit_key)(export_bp)
 
 # Register API spec after all blueprints are registered
 api.register(app)
@@ -169,6 +206,47 @@ api.spec["components"]["securitySchemes"] = {
 }
 api.spec["security"] = [{"bearerAuth": []}]
 
+# Make sure every query shape used by the blueprints is backed by an index
+if MONGODB_CONFIG["ensure_indexes"]:
+    try:
+        ensure_indexes(db)
+    except PyMongoError as e:
+        logger.warning(f"Failed to ensure MongoDB indexes on startup: {e}")
+
+
+@app.cli.command("ensure-indexes")
+@click.option("--check", is_flag=True, help="Only report missing/extra indexes, do not create anything.")
+def ensure_indexes_command(check):
+    """Create registered MongoDB indexes and report drift."""
+    if not check:
+        created = ensure_indexes(db)
+        click.echo(f"Created indexes: {', '.join(created) if created else 'none'}")
+
+    missing_total = 0
+    for collection_name, entry in sorted(index_report(db).items()):
+        missing_total += len(entry["missing"])
+        if entry["missing"] or entry["extra"]:
+            click.echo(f"{collection_name}: missing={entry['missing']} extra={entry['extra']}")
+
+    if missing_total:
+        raise SystemExit(1)
+    click.echo("All registered indexes are present")
+
+
+@app.cli.command("rebuild-rollups")
+@click.option("--pet-id", default=None, help="Only rebuild the rollups of this pet.")
+def rebuild_rollups_command(pet_id):
+    """Recompute daily chart rollups from raw health records."""
+    written = rebuild_rollups(pet_id)
+    click.echo(f"Rebuilt daily rollups: {written}")
+
+
+@app.cli.command("migrate-refresh-tokens")
+def migrate_refresh_tokens_command():
+    """Store legacy refresh tokens by digest so the TTL index can expire them."""
+    migrated = migrate_refresh_tokens()
+    click.echo(f"Migrated refresh tokens: {migrated}")
+
 
 # Error handler for rate limit exceeded
 @app.errorhandler(RateLimitExceeded)
@@ -182,6 +260,25 @@ def handle_rate_limit_exceeded(e):
         return render_template("login.html", error=str(e.description)), 429
 
 
+@app.errorhandler(PasswordHashingBusy)
+def handle_password_hashing_busy(e):
+    """Shed logins and password changes while the bcrypt pool is saturated."""
+    if request.is_json or request.path.startswith("/api/"):
+        response, status = error_response("service_busy")
+    else:
+        response = make_response(render_template("login.html", error="Сервер перегружен, повторите попытку позже"))
+        status = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, status
+
+
+@app.errorhandler(ImageTooLarge)
+def handle_image_too_large(e):
+    """Reject photos whose pixel count exceeds IMAGE_MAX_PIXELS."""
+    logger.warning(f"Rejected photo upload: path={request.path}, error={e}")
+    return error_response("image_too_large")
+
+
 @app.route("/favicon.ico")
 def favicon():
     """Serve favicon.ico to prevent 404 errors."""
@@ -213,29 +310,21 @@ def favicon():
 @app.route("/")
 def index():
     """Redirect to login or dashboard."""
-    token = get_token_from_request()
-    if token:
-        payload = verify_token(token, "access")
-        if payload:
-            return redirect(url_for("dashboard"))
-
-    # Try to refresh using refresh token
-    new_token = try_refresh_access_token()
+    payload, new_token = security.authenticate_request()
+    if not payload:
+        return redirect(url_for("auth.login"))
+
+    response = make_response(redirect(url_for("dashboard")))
     if new_token:
-        payload = verify_token(new_token, "access")
-        if payload:
-            response = make_response(redirect(url_for("dashboard")))
-            response.set_cookie(
-                "access_token",
-                new_token,
-                max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-                httponly=True,
-                secure=False,
-                samesite="Lax",
-            )
-            return response
-
-    return redirect(url_for("auth.login"))
+        response.set_cookie(
+            "access_token",
+            new_token,
+            max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            httponly=True,
+            secure=False,
+            samesite="Lax",
+        )
+    return response
 
 
 @app.route("/dashboard")
@@ -248,4 +337,5 @@ def dashboard():
 
 if __name__ == "__main__":
     security.ensure_default_admin()
+    start_watcher(db)
     app.run(host="0.0.0.0", port=5000, debug=FLASK_CONFIG["debug"])
@@ -15,14 +15,12 @@ from functools import wraps
 from flask_pydantic_spec import Request, Response
 
 from web.app import api, limiter, logger  # app-level singletons
-import web.app as app  # use app.db so test patches (web.app.db) are visible
 from web.security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
+    authenticate_request,
     get_current_user,
-    get_token_from_request,
     login_required,
-    try_refresh_access_token,
     verify_token,
     create_access_token,
     create_refresh_token,
@@ -38,6 +36,7 @@ from web.schemas import (
     ErrorResponse,
 )
 from web.errors import error_response
+from web.refresh_tokens import find_refresh_token, last_used, revoke_refresh_token
 from web.messages import get_message
 
 
@@ -46,20 +45,7 @@ def page_login_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = get_token_from_request()
-        payload = None
-        new_token = None
-
-        if token:
-            payload = verify_token(token, "access")
-
-        if not payload:
-            # Token missing or invalid, try to refresh
-            new_token = try_refresh_access_token()
-            if new_token:
-                payload = verify_token(new_token, "access")
-                if not payload:
-                    new_token = None
+        payload, new_token = authenticate_request()
 
         if not payload:
             # No valid token available -> redirect to login page
@@ -170,9 +156,10 @@ def api_refresh():
         return error_response("unauthorized_refresh_token_invalid")
 
     # Check if token exists in database
-    token_record = app.db["refresh_tokens"].find_one({"token": refresh_token})
+    token_record = find_refresh_token(refresh_token)
     if not token_record:
         return error_response("unauthorized_refresh_token_not_found")
+    last_used.touch(token_record["token_hash"])
 
     username = payload.get("username") or ""
 
@@ -203,8 +190,7 @@ def api_logout():
     refresh_token = request.cookies.get("refresh_token")
 
     if refresh_token:
-        # Remove refresh token from database (must see patched app.db in tests)
-        app.db["refresh_tokens"].delete_one({"token": refresh_token})
+        revoke_refresh_token(refresh_token)
 
     response, status = get_message("auth_logout_success")
     response.set_cookie("access_token", "", max_age=0)
@@ -245,18 +231,10 @@ def check_admin():
 def login():
     """Login page."""
     # Check if already logged in
-    token = get_token_from_request()
-    if token:
-        payload = verify_token(token, "access")
-        if payload:
-            return redirect(url_for("dashboard"))
-
-    # If no access token, try to refresh using refresh token
-    new_token = try_refresh_access_token()
-    if new_token:
-        payload = verify_token(new_token, "access")
-        if payload:
-            response = make_response(redirect(url_for("dashboard")))
+    payload, new_token = authenticate_request()
+    if payload:
+        response = make_response(redirect(url_for("dashboard")))
+        if new_token:
             response.set_cookie(
                 "access_token",
                 new_token,
@@ -265,7 +243,7 @@ def login():
                 secure=False,
                 samesite="Lax",
             )
-            return response
+        return response
 
     if request.method == "POST":
         username = request.form.get("username", "").strip()
@@ -0,0 +1,118 @@
+"""Batched health record ingestion.
+
+Clients that log events offline replay them with a single `POST /api/records/batch`
+instead of one create request per event. Authentication runs once per batch and pet
+access is checked once per distinct pet. Documents are written with one unordered
+`insert_many` per collection. Each record gets its own result, so a bad record does
+not reject the rest of the batch. Request bodies may be gzip-compressed
+(`Content-Encoding: gzip`).
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from flask import Blueprint, jsonify, request
+from flask_pydantic_spec import Request, Response
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+import web.app as app  # access db, logger
+from web.app import api
+from web.decorators import inflate_gzip_body
+from web.errors import ERRORS
+from web.health_records import RECORD_TYPES
+from web.helpers import check_pet_access, parse_datetime
+from web.rollups import apply_inserted
+from web.pydantic_helpers import validation_error_message
+from web.schemas import BatchRecordsRequest, BatchRecordsResponse, ErrorResponse
+from web.security import get_current_user, login_required
+
+
+batch_bp = Blueprint("batch", __name__)
+
+# Upper bound of the (inflated) JSON body
+MAX_BATCH_BODY_BYTES = 5 * 1024 * 1024
+
+
+def _error_result(key: str, message: Optional[str] = None) -> dict:
+    """Per-record failure in the same shape as error_response()."""
+    err = ERRORS[key]
+    return {"status": err.status, "code": err.code, "error": message or err.message}
+
+
+@batch_bp.route("/api/records/batch", methods=["POST"])
+@login_required
+@inflate_gzip_body(MAX_BATCH_BODY_BYTES)
+@api.validate(
+    body=Request(BatchRecordsRequest),
+    resp=Response(
+        HTTP_200=BatchRecordsResponse,
+        HTTP_400=ErrorResponse,
+        HTTP_413=ErrorResponse,
+        HTTP_422=ErrorResponse,
+    ),
+    tags=["health-records"],
+)
+def create_records_batch():
+    """Create health records of mixed types for one or more pets in one request."""
+    username, auth_error = get_current_user()
+    if auth_error:
+        return auth_error[0], auth_error[1]
+
+    batch = request.context.body  # type: ignore[attr-defined]
+
+    results: List[dict] = [{"index": index, "client_id": item.client_id} for index, item in enumerate(batch.records)]
+    pet_access: Dict[str, bool] = {}
+    # collection -> [(result index, document)]
+    pending: Dict[str, List[Tuple[int, dict]]] = defaultdict(list)
+
+    for index, item in enumerate(batch.records):
+        record_type = RECORD_TYPES[item.type]
+        try:
+            data = record_type.create_schema.model_validate(item.model_extra or {})
+        except ValidationError as e:
+            results[index].update(_error_result("validation_error", validation_error_message(e)))
+            continue
+
+        if data.pet_id not in pet_access:
+            pet_access[data.pet_id] = check_pet_access(data.pet_id, username)
+        if not pet_access[data.pet_id]:
+            results[index].update(_error_result("pet_forbidden"))
+            continue
+
+        try:
+            event_dt = parse_datetime(data.date, data.time, allow_future=True, max_future_days=1)
+        except ValueError as e:
+            results[index].update(_error_result("validation_error", str(e)))
+            continue
+
+        pending[record_type.collection].append((index, record_type.build(data, data.pet_id, event_dt, username)))
+
+    for collection_name, entries in pending.items():
+        documents = [document for _, document in entries]
+        failed_positions = set()
+        try:
+            # insert_many assigns _id to every document before sending it
+            app.db[collection_name].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed_positions = {error["index"] for error in e.details.get("writeErrors", [])}
+            app.logger.warning(
+                f"Batch insert partially failed: collection={collection_name}, user={username}, "
+                f"failed={len(failed_positions)}"
+            )
+
+        for position, (index, document) in enumerate(entries):
+            if position in failed_positions:
+                results[index].update(_error_result("internal_error"))
+            else:
+                results[index].update({"status": 201, "id": str(document["_id"])})
+        apply_inserted(
+            collection_name, [document for position, document in enumerate(documents) if position not in failed_positions]
+        )
+
+    created = sum(1 for result in results if result["status"] == 201)
+    app.logger.info(
+        f"Batch records ingested: user={username}, pets={len(pet_access)}, "
+        f"created={created}, failed={len(results) - created}"
+    )
+    return jsonify({"results": results, "created": created, "failed": len(results) - created})
@@ -0,0 +1,118 @@
+"""Conditional GET support (ETag / If-None-Match) for read routes.
+
+List routes compute a cheap validator for the documents they would return: the
+`_id`/`updated_at` of the most recently written one, plus either the number of
+matching documents or, for per-pet records, the latest delete tombstone. Every
+create and update route stamps `updated_at`, so inserts and edits move the latest
+stamp; deletions change the count or add a tombstone. Both are answered from
+indexes ((pet_id, ...) prefixes, (pet_id, updated_at) / (updated_at) and the
+tombstones' (pet_id, deleted_at)), without reading the listed documents. When the
+client sends a matching `If-None-Match`, the route answers 304 before any document
+is loaded or serialised.
+"""
+
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import g, make_response, request
+
+import web.app as app  # to access patched app.db in tests
+
+
+# Delete tombstones written by every per-pet record delete route (web/sync.py)
+TOMBSTONES_COLLECTION = "deleted_records"
+
+# Lists must be revalidated on every use, but may be kept by the browser
+LIST_CACHE_CONTROL = "private, no-cache"
+
+
+def collection_validator(collection: str, query: dict, tombstones: Optional[dict] = None) -> str:
+    """
+    Summarise the documents matching `query` as "deletions:last_id:last_updated_at".
+
+    `deletions` is the latest tombstone matching `tombstones` or, without one, the
+    index-counted number of documents. Otherwise only one `find_one` walking the
+    updated_at index backwards: at most two documents are read, whatever the list size.
+    """
+    if tombstones is None:
+        deletions = app.db[collection].count_documents(query)
+    else:
+        tombstone = app.db[TOMBSTONES_COLLECTION].find_one(tombstones, {"_id": 1}, sort=[("deleted_at", -1)])
+        deletions = tombstone["_id"] if tombstone else ""
+
+    last = app.db[collection].find_one(query, {"_id": 1, "updated_at": 1}, sort=[("updated_at", -1)])
+    if last is None:
+        return f"{deletions}::"
+    return f"{deletions}:{last['_id']}:{last.get('updated_at') or ''}"
+
+
+def make_etag(*parts) -> str:
+    """Build an opaque ETag value from arbitrary parts."""
+    return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def not_modified(etag: str, weak: bool = False, cache_control: Optional[str] = None):
+    """
+    Return a 304 response if the request's If-None-Match matches `etag`, else None.
+
+    Args:
+        etag: Unquoted ETag value of the current representation
+        weak: Whether the ETag is sent as a weak validator
+        cache_control: Cache-Control header repeated on the 304 response
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+
+    response = make_response("", 304)
+    response.set_etag(etag, weak=weak)
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def conditional_list(
+    collection: str, query_factory: Callable[[], dict], tombstones_factory: Optional[Callable[[], dict]] = None
+):
+    """
+    Decorator adding ETag/304 handling to a list route.
+
+    Must be applied below the access decorators, as `query_factory` usually reads
+    `g.pet_id` or the current user. The ETag covers the full request URL (page,
+    page_size, ...) and the query, so different views of the same data never share
+    a validator.
+
+    Args:
+        collection: MongoDB collection the route lists
+        query_factory: Returns the filter of the listed documents for the current request
+        tombstones_factory: Returns the filter of the tombstones of deleted listed documents;
+            without it deletions are detected by counting the listed documents
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            query = query_factory()
+            tombstones = tombstones_factory() if tombstones_factory else None
+            etag = make_etag(request.full_path, query, collection_validator(collection, query, tombstones))
+
+            cached = not_modified(etag, weak=True, cache_control=LIST_CACHE_CONTROL)
+            if cached is not None:
+                return cached
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.headers["Cache-Control"] = LIST_CACHE_CONTROL
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+def pet_records_list(collection: str):
+    """`conditional_list` for per-pet record collections (requires @require_pet_access)."""
+    return conditional_list(
+        collection, lambda: {"pet_id": g.pet_id}, lambda: {"pet_id": g.pet_id, "collection": collection}
+    )
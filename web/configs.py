@@ -32,6 +32,8 @@ def load_config() -> Dict[str, Any]:
             "debug": os.getenv("FLASK_DEBUG", "False").lower() == "true",
             "jsonify_prettyprint_regular": False,
             "json_as_ascii": False,
+            # auto (orjson if installed), orjson or stdlib, see web/json_provider.py
+            "json_provider": os.getenv("JSON_PROVIDER", "auto").lower(),
             "template_folder": "templates",
             "static_folder": "static",
         },
@@ -43,12 +45,23 @@ def load_config() -> Dict[str, Any]:
             "algorithm": "HS256",
             "access_token_expire_minutes": 15,
             "refresh_token_expire_days": 7,
+            # Refresh token last_used_at stamps are written in batches at most this often per worker
+            "refresh_last_used_flush_seconds": float(os.getenv("REFRESH_TOKEN_LAST_USED_FLUSH_SECONDS", "60")),
+            # Parallel refreshes of one session within this window share one lookup and access token
+            "refresh_reuse_seconds": float(os.getenv("REFRESH_REUSE_SECONDS", "10")),
         },
         # Rate limiting settings
         "rate_limit": {
             "storage_uri": os.getenv("RATELIMIT_STORAGE_URI", mongo_uri),
             "default_limits": [],
-            "strategy": "fixed-window",
+            # "token-bucket" (web/rate_limit.py) or a Flask-Limiter strategy such as "fixed-window"
+            "strategy": os.getenv("RATELIMIT_STRATEGY", "token-bucket"),
+            # Token buckets are reconciled with the storage at most this often per worker
+            "sync_interval_seconds": float(os.getenv("RATELIMIT_SYNC_SECONDS", "5")),
+            # Optional limits for every write route and every export route, e.g. "120 per minute",
+            # per authenticated user (client address otherwise); empty disables them
+            "write_limit": os.getenv("RATELIMIT_WRITES", ""),
+            "export_limit": os.getenv("RATELIMIT_EXPORTS", ""),
         },
         # Logging settings
         "logging": {
@@ -69,6 +82,87 @@ def load_config() -> Dict[str, Any]:
             "port": mongo_port,
             "db": mongo_db,
             "uri": mongo_uri,
+            # Apply the index registry (web/indexes.py) when the app starts
+            "ensure_indexes": os.getenv("MONGO_ENSURE_INDEXES", "True").lower() == "true",
+        },
+        # CPU-bound work offloading (web/offload.py), used by the gevent worker
+        "offload": {
+            "threads": int(os.getenv("OFFLOAD_THREADS", "4")),
+        },
+        # bcrypt pool and cost (web/passwords.py)
+        "passwords": {
+            # Concurrent bcrypt calls per worker, and how many more may wait before 503
+            "threads": int(os.getenv("PASSWORD_HASH_THREADS", "2")),
+            "queue_depth": int(os.getenv("PASSWORD_HASH_QUEUE", "8")),
+            # Fixed bcrypt cost; 0 calibrates the highest cost from min_rounds up whose hash stays
+            # within target_ms (min_rounds when even that is slower). Cost 12 takes ~250-300ms on
+            # current servers, so the default target only moves faster machines to 13.
+            "rounds": int(os.getenv("BCRYPT_ROUNDS", "0")),
+            "target_ms": float(os.getenv("PASSWORD_HASH_TARGET_MS", "400")),
+            # bcrypt's default cost; existing hashes (and ADMIN_PASSWORD_HASH) use it
+            "min_rounds": 12,
+            "max_rounds": 14,
+        },
+        # Uploaded photo processing (web/images.py)
+        "images": {
+            # Uploads with more pixels are rejected (413) before any pixel is decoded
+            "max_pixels": int(os.getenv("IMAGE_MAX_PIXELS", "50000000")),
+            # Stored originals are scaled down to fit into this box
+            "max_dimension": int(os.getenv("IMAGE_MAX_DIMENSION", "1920")),
+            "quality": int(os.getenv("IMAGE_WEBP_QUALITY", "85")),
+            # WebP encoder effort, 0 (fast) .. 6 (smallest file, several times slower)
+            "webp_method": int(os.getenv("IMAGE_WEBP_METHOD", "4")),
+            # Uploaded files larger than this are spooled to a temporary file instead of memory
+            "spool_threshold_bytes": int(os.getenv("UPLOAD_SPOOL_THRESHOLD_BYTES", str(64 * 1024))),
+            # Directory of the spooled uploads; empty uses the system temporary directory
+            "spool_dir": os.getenv("UPLOAD_SPOOL_DIR", ""),
+        },
+        # Background jobs (web/jobs.py) run by `python -m web.worker`
+        "jobs": {
+            # Routes enqueue exports (on `Prefer: respond-async`), photo optimization, pet purges and
+            # GridFS cleanup instead of doing the work in the request; requires a running worker
+            "enabled": os.getenv("JOBS_ENABLED", "False").lower() == "true",
+            # A claimed job becomes claimable again if its worker has not finished it within this time
+            "visibility_timeout_seconds": float(os.getenv("JOBS_VISIBILITY_TIMEOUT", "300")),
+            "max_attempts": int(os.getenv("JOBS_MAX_ATTEMPTS", "5")),
+            # Retry delay after the first failure, doubled after each further one (capped at an hour)
+            "backoff_seconds": float(os.getenv("JOBS_BACKOFF_SECONDS", "10")),
+            # Idle workers look for new jobs this often
+            "poll_interval_seconds": float(os.getenv("JOBS_POLL_SECONDS", "1")),
+            # Finished jobs and their export files are kept this long
+            "retention_hours": float(os.getenv("JOBS_RETENTION_HOURS", "24")),
+            # Worker processes started by `python -m web.worker`
+            "worker_processes": int(os.getenv("JOBS_WORKER_PROCESSES", "2")),
+        },
+        # Request/Mongo/GridFS/Pillow instrumentation exported at /metrics (web/metrics.py)
+        "metrics": {
+            "enabled": os.getenv("METRICS_ENABLED", "False").lower() == "true",
+            # Shared directory for per-worker snapshots; empty exports only the answering worker
+            "multiproc_dir": os.getenv("METRICS_MULTIPROC_DIR", ""),
+            "flush_seconds": float(os.getenv("METRICS_FLUSH_SECONDS", "5")),
+            # Bearer token required by /metrics when set
+            "token": os.getenv("METRICS_TOKEN", ""),
+        },
+        # Delta sync (web/sync.py)
+        "sync": {
+            # Delete tombstones are kept this long; clients with older watermarks get a full resync
+            "tombstone_retention_days": int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90")),
+            # Documents and tombstones per response; larger syncs continue with the returned cursor
+            "page_size": int(os.getenv("SYNC_PAGE_SIZE", "1000")),
+        },
+        # In-process cache settings
+        "cache": {
+            # Cross-request pet ACL (owner/shared_with) cache lifetime per worker, 0 disables it
+            "pet_acl_ttl_seconds": float(os.getenv("PET_ACL_CACHE_TTL", "0")),
+            # Verified JWT payloads kept per worker (LRU, entries expire with their token), 0 disables it
+            "verified_token_cache_size": int(os.getenv("JWT_VERIFY_CACHE_SIZE", "1024")),
+        },
+        # Cross-worker cache invalidation (web/invalidation.py)
+        "invalidation": {
+            # auto (change streams on replica sets, polling otherwise), change_streams, polling or off
+            "mode": os.getenv("CACHE_INVALIDATION_MODE", "auto").lower(),
+            # Polling period, also the back-off before reopening a failed change stream
+            "poll_interval_seconds": float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "2")),
         },
     }
 
@@ -92,6 +186,8 @@ def get_config_json() -> str:
         safe_config["flask"]["secret_key"] = "***MASKED***"
     if safe_config["jwt"]["secret_key"] and safe_config["jwt"]["secret_key"] != "dev-secret-key-change-in-production":
         safe_config["jwt"]["secret_key"] = "***MASKED***"
+    if safe_config["metrics"]["token"]:
+        safe_config["metrics"]["token"] = "***MASKED***"
     if safe_config["mongodb"]["pass"]:
         safe_config["mongodb"]["pass"] = "***MASKED***"
 
@@ -108,3 +204,11 @@ RATE_LIMIT_CONFIG = _config["rate_limit"]
 LOGGING_CONFIG = _config["logging"]
 ADMIN_CONFIG = _config["admin"]
 MONGODB_CONFIG = _config["mongodb"]
+CACHE_CONFIG = _config["cache"]
+OFFLOAD_CONFIG = _config["offload"]
+PASSWORD_CONFIG = _config["passwords"]
+IMAGE_CONFIG = _config["images"]
+JOBS_CONFIG = _config["jobs"]
+METRICS_CONFIG = _config["metrics"]
+SYNC_CONFIG = _config["sync"]
+INVALIDATION_CONFIG = _config["invalidation"]
@@ -5,6 +5,8 @@ from urllib.parse import quote_plus
 
 from pymongo import MongoClient
 
+from web.metrics import mongo_event_listeners
+
 
 def get_env(name: str, default: str = None) -> str:
     """Get environment variable with optional default."""
@@ -39,7 +41,7 @@ MONGO_POOL_CONFIG = {
 }
 
 # Create MongoDB client and database connection with pool configuration
-client: MongoClient = MongoClient(mongo_uri, **MONGO_POOL_CONFIG)
+client: MongoClient = MongoClient(mongo_uri, event_listeners=mongo_event_listeners(), **MONGO_POOL_CONFIG)
 db = client[MONGO_DB]
 
 # Export mongo_uri for use in Flask-Limiter
@@ -1,10 +1,18 @@
+import zlib
 from functools import wraps
+from io import BytesIO
 from flask import request, g
 from bson import ObjectId
+from werkzeug.wsgi import get_input_stream
 
+from web.errors import error_response
 from web.security import get_current_user, login_required
 from web.helpers import validate_pet_access, get_record_and_validate_access
 
+
+# Compressed request bytes read and inflated per step by inflate_gzip_body
+GZIP_READ_CHUNK_BYTES = 64 * 1024
+
 def require_pet_access(f):
     """
     Decorator to check authentication and pet access.
@@ -84,3 +92,58 @@ def require_record_access(collection_name):
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+
+def inflate_gzip_body(max_bytes):
+    """
+    Decorator to accept `Content-Encoding: gzip` request bodies of at most max_bytes once inflated.
+    Must be applied above @api.validate: the body is replaced by its inflated form before
+    flask-pydantic-spec reads it (its own gzip support inflates without any size limit).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # A compressed body is never larger than its inflated form allows
+            if request.content_length and request.content_length > max_bytes:
+                return error_response("payload_too_large")
+            encoding = request.headers.get("Content-Encoding", "").strip().lower()
+            if encoding in ("", "identity"):
+                return f(*args, **kwargs)
+            if encoding != "gzip":
+                return error_response("invalid_content_encoding")
+
+            # 1. Read and inflate chunk by chunk, stopping past max_bytes of either: neither a
+            #    large upload nor a tiny body expanding into a bomb is held in memory
+            stream = get_input_stream(request.environ)
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            parts = []
+            compressed_size = inflated_size = 0
+            try:
+                while not inflater.eof:
+                    data = stream.read(GZIP_READ_CHUNK_BYTES)
+                    if not data:
+                        break
+                    compressed_size += len(data)
+                    if compressed_size > max_bytes:
+                        return error_response("payload_too_large")
+                    while data:
+                        part = inflater.decompress(data, max_bytes + 1 - inflated_size)
+                        inflated_size += len(part)
+                        if inflated_size > max_bytes:
+                            return error_response("payload_too_large")
+                        parts.append(part)
+                        data = inflater.unconsumed_tail
+            except zlib.error:
+                return error_response("invalid_content_encoding")
+            if not inflater.eof:
+                return error_response("invalid_content_encoding")
+            body = b"".join(parts)
+
+            # 2. Swap in the plain body (request.stream has not been read yet)
+            request.environ["wsgi.input"] = BytesIO(body)
+            request.environ["CONTENT_LENGTH"] = str(len(body))
+            request.environ.pop("HTTP_CONTENT_ENCODING", None)
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -50,6 +50,8 @@ ERRORS: Dict[str, ErrorDef] = {
     # Validation errors (422)
     "invalid_pet_id": ErrorDef("invalid_pet_id", "Неверный формат pet_id", 422),
     "invalid_record_id": ErrorDef("invalid_record_id", "Неверный формат record_id", 422),
+    "invalid_cursor": ErrorDef("invalid_cursor", "Неверный курсор пагинации", 422),
+    "invalid_watermark": ErrorDef("invalid_watermark", "Неверная метка синхронизации", 422),
     "validation_error_pet_id_required": ErrorDef("validation_error_pet_id_required", "pet_id обязателен", 422),
     "validation_error_invalid_record": ErrorDef("validation_error_invalid_record", "Неверная запись", 422),
     "validation_error_no_update_data": ErrorDef("validation_error_no_update_data", "Нет данных для обновления", 422),
@@ -69,8 +71,17 @@ ERRORS: Dict[str, ErrorDef] = {
     # Other
     "no_data_for_export": ErrorDef("no_data_for_export", "Нет данных для экспорта", 404),
     "upload_error": ErrorDef("upload_error", "Ошибка при загрузке файла", 404),
+    "range_not_satisfiable": ErrorDef("range_not_satisfiable", "Запрошенный диапазон недоступен", 416),
+    "job_not_found": ErrorDef("job_not_found", "Задача не найдена", 404),
+    "job_not_finished": ErrorDef("job_not_finished", "Задача еще не завершена", 409),
+    # Request body (400/413)
+    "invalid_content_encoding": ErrorDef("invalid_content_encoding", "Не удалось распаковать тело запроса", 400),
+    "payload_too_large": ErrorDef("payload_too_large", "Слишком большой запрос", 413),
+    "image_too_large": ErrorDef("image_too_large", "Слишком большое изображение", 413),
     # Rate limit (429)
     "rate_limit_exceeded": ErrorDef("rate_limit_exceeded", "Превышен лимит запросов", 429),
+    # Service unavailable (503)
+    "service_busy": ErrorDef("service_busy", "Сервер перегружен, повторите попытку позже", 503),
     # Conflict (409)
     "conflict": ErrorDef("conflict", "Конфликт при обновлении данных", 409),
     # Method not allowed (405)
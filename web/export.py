@@ -1,207 +1,239 @@
-"""Data export routes (CSV/TSV/HTML/Markdown) for health records."""
+"""Data export routes (CSV/TSV/HTML/Markdown) for health records.
+
+Exports are streamed: records are read from the cursor in batches (projected to the
+exported fields only) and rendered into small chunks of the output format, so memory
+usage stays constant regardless of how long the pet's history is. With
+`Prefer: respond-async` (and JOBS_ENABLED) the export is rendered into GridFS by a
+background job instead; the 202 response points at the job to download it from.
+"""
 
 import csv
 import io
+from dataclasses import dataclass
 from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import quote
 
-from flask import Blueprint, make_response, request, g
+from flask import Blueprint, Response as FlaskResponse, g
 from flask_pydantic_spec import Response
 
 import web.app as app  # access db, logger
 from web.app import api
 from web.decorators import require_pet_access
-from web.schemas import ErrorResponse, PetIdQuery
+from web.jobs import (
+    PermanentJobError,
+    accepted,
+    current_job,
+    enqueue,
+    job_handler,
+    renew,
+    result_expiry,
+    wants_async,
+)
+from web.schemas import ErrorResponse, PetIdQuery, SuccessResponse
 from web.errors import error_response
 
 
 export_bp = Blueprint("export", __name__)
 
+# Number of documents fetched from MongoDB per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+# Number of rendered rows buffered before a chunk is sent to the client
+EXPORT_CHUNK_ROWS = 200
+# Background exports renew their job lease after this many chunks (2000 rows)
+EXPORT_RENEW_CHUNKS = 10
 
-@export_bp.route("/api/export/<export_type>/<format_type>", methods=["GET"])
-@api.validate(
-    query=PetIdQuery,
-    resp=Response(
-        HTTP_200=None, HTTP_422=ErrorResponse, HTTP_401=ErrorResponse, HTTP_403=ErrorResponse, HTTP_500=ErrorResponse
+
+@dataclass(frozen=True)
+class ExportSpec:
+    """Definition of a single exportable record type."""
+
+    collection: str
+    title: str
+    fields: Tuple[Tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """Definition of a single export file format."""
+
+    mimetype: str
+    extension: str
+
+
+EXPORT_TYPES: Dict[str, ExportSpec] = {
+    "feeding": ExportSpec(
+        "feedings",
+        "Дневные порции корма",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("food_weight", "Вес корма (г)"),
+            ("comment", "Комментарий"),
+        ),
     ),
-    tags=["export"],
-)
-@require_pet_access
-def export_data(export_type, format_type):
-    """Export data in various formats."""
-    try:
-        # `context` is injected by flask-pydantic-spec at runtime; static checker doesn't know this attribute.
-        data = request.context.query  # type: ignore[attr-defined]
-        pet_id = g.pet_id  # Provided by @require_pet_access
-        username = g.username  # Provided by @require_pet_access
+    "asthma": ExportSpec(
+        "asthma_attacks",
+        "Приступы астмы",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("duration", "Длительность"),
+            ("reason", "Причина"),
+            ("inhalation", "Ингаляция"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "defecation": ExportSpec(
+        "defecations",
+        "Дефекации",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("stool_type", "Тип стула"),
+            ("color", "Цвет стула"),
+            ("food", "Корм"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "litter": ExportSpec(
+        "litter_changes",
+        "Смена лотка",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "weight": ExportSpec(
+        "weights",
+        "Вес",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("weight", "Вес (кг)"),
+            ("food", "Корм"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "eye_drops": ExportSpec(
+        "eye_drops",
+        "Закапывание глаз",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("drops_type", "Тип капель"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "tooth_brushing": ExportSpec(
+        "tooth_brushing",
+        "Чистка зубов",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("brushing_type", "Способ чистки"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "ear_cleaning": ExportSpec(
+        "ear_cleaning",
+        "Чистка ушей",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("cleaning_type", "Способ чистки"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+    "medications": ExportSpec(
+        "medication_intakes",
+        "Прием препаратов",
+        (
+            ("date_time", "Дата и время"),
+            ("username", "Пользователь"),
+            ("medication_name", "Препарат"),
+            ("dose_taken", "Доза"),
+            ("comment", "Комментарий"),
+        ),
+    ),
+}
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "csv": ExportFormat("text/csv", "csv"),
+    "tsv": ExportFormat("text/tab-separated-values", "tsv"),
+    "html": ExportFormat("text/html", "html"),
+    "md": ExportFormat("text/markdown", "md"),
+}
+
 
-        if export_type == "feeding":
-            collection = app.db["feedings"]
-            title = "Дневные порции корма"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("food_weight", "Вес корма (г)"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "asthma":
-            collection = app.db["asthma_attacks"]
-            title = "Приступы астмы"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("duration", "Длительность"),
-                ("reason", "Причина"),
-                ("inhalation", "Ингаляция"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "defecation":
-            collection = app.db["defecations"]
-            title = "Дефекации"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("stool_type", "Тип стула"),
-                ("color", "Цвет стула"),
-                ("food", "Корм"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "litter":
-            collection = app.db["litter_changes"]
-            title = "Смена лотка"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "weight":
-            collection = app.db["weights"]
-            title = "Вес"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("weight", "Вес (кг)"),
-                ("food", "Корм"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "eye_drops":
-            collection = app.db["eye_drops"]
-            title = "Закапывание глаз"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("drops_type", "Тип капель"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "tooth_brushing":
-            collection = app.db["tooth_brushing"]
-            title = "Чистка зубов"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("brushing_type", "Способ чистки"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "ear_cleaning":
-            collection = app.db["ear_cleaning"]
-            title = "Чистка ушей"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("cleaning_type", "Способ чистки"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "ear_cleaning":
-            collection = app.db["ear_cleaning"]
-            title = "Чистка ушей"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("cleaning_type", "Способ чистки"),
-                ("comment", "Комментарий"),
-            ]
-        elif export_type == "medications":
-            collection = app.db["medication_intakes"]
-            title = "Прием препаратов"
-            fields = [
-                ("date_time", "Дата и время"),
-                ("username", "Пользователь"),
-                ("medication_name", "Препарат"),
-                ("dose_taken", "Доза"),
-                ("comment", "Комментарий"),
-            ]
+def export_projection(spec: ExportSpec) -> Dict[str, int]:
+    """Build a projection that fetches only the fields needed for the export."""
+    projection = {"_id": 0}
+    for field_name, _ in spec.fields:
+        if field_name == "medication_name":
+            projection["medication_id"] = 1
         else:
-            return error_response("export_invalid_type")
+            projection[field_name] = 1
+    return projection
 
-        records = list(collection.find({"pet_id": pet_id}).sort([("date_time", -1)]))
 
-        if not records:
-            return error_response("no_data_for_export")
+def format_export_row(
+    record: dict, spec: ExportSpec, medication_names: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """Convert a raw record into a list of display strings in field order."""
+    values = []
+    for field_name, _ in spec.fields:
+        value = record.get(field_name, "")
+
+        if field_name == "date_time":
+            value = value.strftime("%d.%m.%Y %H:%M") if isinstance(value, datetime) else str(value)
+        elif field_name == "username":
+            value = value or "-"
+        elif field_name in ("comment", "food"):
+            value = value if isinstance(value, str) else ""
+            if value.strip() in ("", "Пропустить"):
+                value = "-"
+        elif field_name == "inhalation":
+            value = "Да" if value is True else "Нет" if value is False else "-"
+        elif field_name == "medication_name":
+            value = (medication_names or {}).get(record.get("medication_id"), "Unknown")
+
+        values.append(str(value or ""))
+    return values
+
 
-        # Prepare records
-        if export_type == "medications":
-            from bson import ObjectId
-            med_ids = list(set(r["medication_id"] for r in records))
-            meds = {str(m["_id"]): m["name"] for m in app.db.medications.find({"_id": {"$in": [ObjectId(mid) for mid in med_ids]}})}
-            for r in records:
-                r["medication_name"] = meds.get(r["medication_id"], "Unknown")
-
-        for r in records:
-            if isinstance(r.get("date_time"), datetime):
-                r["date_time"] = r["date_time"].strftime("%d.%m.%Y %H:%M")
-            else:
-                r["date_time"] = str(r.get("date_time", ""))
-
-            if not r.get("username"):
-                r["username"] = "-"
-
-            if r.get("comment", "").strip() in ("", "Пропустить"):
-                r["comment"] = "-"
-
-            if r.get("food", "").strip() in ("", "Пропустить"):
-                r["food"] = "-"
-
-            if export_type == "asthma":
-                inh = r.get("inhalation")
-                if inh is True:
-                    r["inhalation"] = "Да"
-                elif inh is False:
-                    r["inhalation"] = "Нет"
-                else:
-                    r["inhalation"] = "-"
-
-        # Generate file based on format
-        filename_base = f"{title.replace(' ', '_').lower()}_{datetime.now().strftime('%Y%m%d_%H%M')}"
-
-        if format_type == "csv":
-            output = io.StringIO()
-            fieldnames = [ru for _, ru in fields]
-            writer = csv.writer(output)
-            writer.writerow(fieldnames)
-            for r in records:
-                writer.writerow([str(r.get(en, "") or "") for en, _ in fields])
-            content = output.getvalue().encode("utf-8-sig")
-            mimetype = "text/csv"
-            filename = f"{filename_base}.csv"
-
-        elif format_type == "tsv":
-            output = io.StringIO()
-            fieldnames = [ru for _, ru in fields]
-            writer = csv.writer(output, delimiter="\t")
-            writer.writerow(fieldnames)
-            for r in records:
-                writer.writerow([str(r.get(en, "") or "") for en, _ in fields])
-            content = output.getvalue().encode("utf-8")
-            mimetype = "text/tab-separated-values"
-            filename = f"{filename_base}.tsv"
-
-        elif format_type == "html":
-            html = f"""<!DOCTYPE html>
+def _iter_delimited(spec: ExportSpec, rows: Iterable[List[str]], delimiter: str, encoding: str) -> Iterator[bytes]:
+    """Render CSV/TSV chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+    writer.writerow([ru for _, ru in spec.fields])
+
+    buffered_rows = 0
+    for row in rows:
+        writer.writerow(row)
+        buffered_rows += 1
+        if buffered_rows >= EXPORT_CHUNK_ROWS:
+            # utf-8-sig only adds the BOM at the start of the stream, so encode
+            # subsequent chunks as plain utf-8
+            yield buffer.getvalue().encode(encoding)
+            encoding = "utf-8"
+            buffer.seek(0)
+            buffer.truncate()
+            buffered_rows = 0
+
+    yield buffer.getvalue().encode(encoding)
+
+
+def _iter_html(spec: ExportSpec, rows: Iterable[List[str]]) -> Iterator[bytes]:
+    """Render HTML table chunks."""
+    header = f"""<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
+    <title>{spec.title}</title>
     <style>
         body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; padding: 20px; background: #000; color: #fff; }}
         table {{ width: 100%; border-collapse: collapse; background: #1c1c1e; border-radius: 10px; overflow: hidden; }}
@@ -212,51 +244,187 @@ def export_data(export_type, format_type):
     </style>
 </head>
 <body>
-    <h1>{title}</h1>
+    <h1>{spec.title}</h1>
     <table>
         <thead>
             <tr>
 """
-            for _, ru in fields:
-                html += f"                <th>{ru}</th>\n"
-            html += """            </tr>
+    header += "".join(f"                <th>{ru}</th>\n" for _, ru in spec.fields)
+    header += """            </tr>
         </thead>
         <tbody>
 """
-            for r in records:
-                html += "            <tr>\n"
-                for en, _ in fields:
-                    value = str(r.get(en, "") or "").replace("<", "&lt;").replace(">", "&gt;")
-                    html += f"                <td>{value}</td>\n"
-                html += "            </tr>\n"
-            html += """        </tbody>
+    yield header.encode("utf-8")
+
+    parts = []
+    for row in rows:
+        parts.append("            <tr>\n")
+        for value in row:
+            value = value.replace("<", "&lt;").replace(">", "&gt;")
+            parts.append(f"                <td>{value}</td>\n")
+        parts.append("            </tr>\n")
+        if len(parts) >= EXPORT_CHUNK_ROWS * (len(spec.fields) + 2):
+            yield "".join(parts).encode("utf-8")
+            parts = []
+
+    parts.append("""        </tbody>
     </table>
 </body>
-</html>"""
-            content = html.encode("utf-8")
-            mimetype = "text/html"
-            filename = f"{filename_base}.html"
-
-        elif format_type == "md":
-            md = f"# {title}\\n\\n"
-            md += "| " + " | ".join(ru for _, ru in fields) + " |\\n"
-            md += "|" + "---|" * len(fields) + "\\n"
-            for r in records:
-                md += "| " + " | ".join(str(r.get(en, "") or "").replace("|", "\\\\|") for en, _ in fields) + " |\\n"
-            content = md.encode("utf-8")
-            mimetype = "text/markdown"
-            filename = f"{filename_base}.md"
+</html>""")
+    yield "".join(parts).encode("utf-8")
 
-        else:
+
+def _iter_markdown(spec: ExportSpec, rows: Iterable[List[str]]) -> Iterator[bytes]:
+    """Render Markdown table chunks."""
+    header = f"# {spec.title}\n\n"
+    header += "| " + " | ".join(ru for _, ru in spec.fields) + " |\n"
+    header += "|" + "---|" * len(spec.fields) + "\n"
+    yield header.encode("utf-8")
+
+    parts = []
+    for row in rows:
+        parts.append("| " + " | ".join(value.replace("|", "\\|") for value in row) + " |\n")
+        if len(parts) >= EXPORT_CHUNK_ROWS:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def iter_export_chunks(
+    records: Iterable[dict],
+    spec: ExportSpec,
+    format_type: str,
+    medication_names: Optional[Dict[str, str]] = None,
+) -> Iterator[bytes]:
+    """
+    Lazily render records into encoded chunks of the requested format.
+
+    Args:
+        records: Iterable of raw MongoDB documents (typically a cursor)
+        spec: Export type definition
+        format_type: One of EXPORT_FORMATS keys
+        medication_names: Mapping medication_id -> name for intake exports
+
+    Returns:
+        Iterator of bytes chunks; only one chunk worth of rows is held in memory at a time
+    """
+    rows = (format_export_row(record, spec, medication_names) for record in records)
+
+    if format_type == "csv":
+        return _iter_delimited(spec, rows, ",", "utf-8-sig")
+    if format_type == "tsv":
+        return _iter_delimited(spec, rows, "\t", "utf-8")
+    if format_type == "html":
+        return _iter_html(spec, rows)
+    if format_type == "md":
+        return _iter_markdown(spec, rows)
+    raise ValueError(f"Unsupported export format: {format_type}")
+
+
+def open_export(pet_id: str, export_type: str, format_type: str) -> Optional[Tuple[Iterator[bytes], str, str]]:
+    """
+    Start rendering an export of a pet's records.
+
+    Returns:
+        Tuple of (chunk iterator, URL-encoded filename, mimetype), or None if the pet has no such records
+    """
+    spec = EXPORT_TYPES[export_type]
+    export_format = EXPORT_FORMATS[format_type]
+
+    cursor = (
+        app.db[spec.collection]
+        .find({"pet_id": pet_id}, export_projection(spec))
+        .sort([("date_time", -1)])
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+
+    # Peek at the first record so an empty export can still return a JSON error
+    first_record = next(cursor, None)
+    if first_record is None:
+        return None
+
+    medication_names = None
+    if export_type == "medications":
+        # Medications per pet are few, so resolve names up front instead of per intake batch
+        medication_names = {
+            str(med["_id"]): med.get("name", "Unknown")
+            for med in app.db.medications.find({"pet_id": pet_id}, {"name": 1})
+        }
+
+    chunks = iter_export_chunks(chain([first_record], cursor), spec, format_type, medication_names)
+
+    filename_base = f"{spec.title.replace(' ', '_').lower()}_{datetime.now().strftime('%Y%m%d_%H%M')}"
+    encoded_filename = quote(f"{filename_base}.{export_format.extension}")
+    return chunks, encoded_filename, export_format.mimetype
+
+
+@job_handler("export")
+def run_export_job(payload: dict) -> dict:
+    """Render an export into GridFS, kept for the job retention, for download through the job."""
+    opened = open_export(payload["pet_id"], payload["export_type"], payload["format_type"])
+    if opened is None:
+        raise PermanentJobError("No data for export")
+    chunks, filename, mimetype = opened
+
+    job = current_job()
+    grid_in = app.fs.new_file(filename=filename, content_type=mimetype, metadata={"expires_at": result_expiry()})
+    try:
+        for index, chunk in enumerate(chunks, 1):
+            grid_in.write(chunk)
+            # Large exports outlast the visibility timeout; keep the lease so no other worker starts over
+            if job is not None and index % EXPORT_RENEW_CHUNKS == 0:
+                renew(job)
+    except Exception:
+        grid_in.abort()
+        raise
+    grid_in.close()
+    return {"file_id": str(grid_in._id), "filename": filename, "content_type": mimetype}
+
+
+@export_bp.route("/api/export/<export_type>/<format_type>", methods=["GET"])
+@api.validate(
+    query=PetIdQuery,
+    resp=Response(
+        HTTP_200=None,
+        HTTP_202=SuccessResponse,
+        HTTP_422=ErrorResponse,
+        HTTP_401=ErrorResponse,
+        HTTP_403=ErrorResponse,
+        HTTP_500=ErrorResponse,
+    ),
+    tags=["export"],
+)
+@require_pet_access
+def export_data(export_type, format_type):
+    """Export data in various formats; with `Prefer: respond-async` the file is rendered by a background job."""
+    try:
+        pet_id = g.pet_id  # Provided by @require_pet_access
+        username = g.username  # Provided by @require_pet_access
+
+        if export_type not in EXPORT_TYPES:
+            return error_response("export_invalid_type")
+
+        if format_type not in EXPORT_FORMATS:
             return error_response("export_invalid_format")
 
-        encoded_filename = quote(filename)
+        if wants_async():
+            payload = {"pet_id": pet_id, "export_type": export_type, "format_type": format_type}
+            job = enqueue("export", payload, username=username)
+            app.logger.info(f"Data export queued: type={export_type}, format={format_type}, pet_id={pet_id}, user={username}")
+            return accepted("export_queued", job)
+
+        opened = open_export(pet_id, export_type, format_type)
+        if opened is None:
+            return error_response("no_data_for_export")
+        chunks, encoded_filename, mimetype = opened
 
-        response = make_response(content)
+        response = FlaskResponse(chunks)
         response.headers["Content-Type"] = mimetype
         response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{encoded_filename}"
         response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
-        app.logger.info(f"Data exported: type={export_type}, format={format_type}, pet_id={pet_id}, user={username}")
+        app.logger.info(f"Data export started: type={export_type}, format={format_type}, pet_id={pet_id}, user={username}")
         return response
 
     except ValueError as e:
@@ -5,8 +5,12 @@ JSON Naming Convention:
 - See docs/api-naming-conventions.md for full naming rules
 """
 
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Type
+
 from bson import ObjectId
+from pydantic import BaseModel
 import web.app as app  # Import app module to access db and logger
 from flask import Blueprint, jsonify, request, g
 from flask_pydantic_spec import Request, Response
@@ -14,9 +18,12 @@ from web.app import api
 from web.errors import error_response
 from web.messages import get_message
 from web.decorators import require_pet_access, require_record_access
+from web.conditional import pet_records_list
+from web.sync import record_deletions
+from web.rollups import STATS_TYPE_MAPPING, apply_inserted, read_rollups, refresh_days, rollup_buckets
 from web.helpers import (
     parse_event_datetime_safe,
-    apply_pagination,
+    paginate_records,
 )
 from web.schemas import (
     AsthmaAttackCreate,
@@ -61,6 +68,75 @@ from web.schemas import (
 health_records_bp = Blueprint("health_records", __name__)
 
 
+@dataclass(frozen=True)
+class RecordType:
+    """A health record type accepted by its create route and by the batch endpoint."""
+
+    collection: str
+    create_schema: Type[BaseModel]
+    # Type-specific document fields from a validated create model
+    fields: Callable[[Any], dict]
+
+    def build(self, data, pet_id: str, event_dt: datetime, username: str) -> dict:
+        """Build the MongoDB document for a validated create model."""
+        return {
+            "pet_id": pet_id,
+            "date_time": event_dt,
+            **self.fields(data),
+            "username": username,
+            # Change stamp for conditional lists and delta sync
+            "updated_at": datetime.utcnow(),
+        }
+
+
+RECORD_TYPES: Dict[str, RecordType] = {
+    "asthma": RecordType(
+        "asthma_attacks",
+        AsthmaAttackCreate,
+        lambda data: {
+            "duration": data.duration or "",
+            "reason": data.reason or "",
+            "inhalation": data.inhalation,
+            "comment": data.comment or "",
+        },
+    ),
+    "defecation": RecordType(
+        "defecations",
+        DefecationCreate,
+        lambda data: {
+            "stool_type": data.stool_type or "",
+            "color": data.color or "Коричневый",
+            "food": data.food or "",
+            "comment": data.comment or "",
+        },
+    ),
+    "litter": RecordType("litter_changes", LitterChangeCreate, lambda data: {"comment": data.comment or ""}),
+    "weight": RecordType(
+        "weights",
+        WeightRecordCreate,
+        lambda data: {"weight": data.weight or "", "food": data.food or "", "comment": data.comment or ""},
+    ),
+    "feeding": RecordType(
+        "feedings", FeedingCreate, lambda data: {"food_weight": data.food_weight, "comment": data.comment or ""}
+    ),
+    "eye_drops": RecordType(
+        "eye_drops",
+        EyeDropsCreate,
+        lambda data: {"drops_type": data.drops_type or "Обычные", "comment": data.comment or ""},
+    ),
+    "tooth_brushing": RecordType(
+        "tooth_brushing",
+        ToothBrushingCreate,
+        lambda data: {"brushing_type": data.brushing_type or "Щетка", "comment": data.comment or ""},
+    ),
+    "ear_cleaning": RecordType(
+        "ear_cleaning",
+        EarCleaningCreate,
+        lambda data: {"cleaning_type": data.cleaning_type or "Салфетка/Марля", "comment": data.comment or ""},
+    ),
+}
+
+
 # Asthma routes
 @health_records_bp.route("/api/asthma", methods=["POST"])
 @api.validate(
@@ -83,17 +159,10 @@ def add_asthma_attack():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        attack_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "duration": data.duration or "",
-            "reason": data.reason or "",
-            "inhalation": data.inhalation,
-            "comment": data.comment or "",
-            "username": username,
-        }
+        attack_data = RECORD_TYPES["asthma"].build(data, pet_id, event_dt, username)
 
         app.db["asthma_attacks"].insert_one(attack_data)
+        apply_inserted("asthma_attacks", [attack_data])
         app.logger.info(f"Asthma attack recorded: pet_id={pet_id}, user={username}")
         return get_message("asthma_created", status=201)
 
@@ -105,40 +174,23 @@ def add_asthma_attack():
 @health_records_bp.route("/api/asthma", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=AsthmaAttackListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=AsthmaAttackListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("asthma_attacks")
 def get_asthma_attacks():
     """Get asthma attacks for current pet with pagination."""
     # `context` is injected by flask-pydantic-spec at runtime; static checker doesn't know this attribute.
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["asthma_attacks"].count_documents({"pet_id": pet_id})
+    attacks, pagination, page_error = paginate_records("asthma_attacks", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    # Apply pagination
-    from web.helpers import apply_pagination
-
-    base_query = app.db["asthma_attacks"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    attacks = list(paginated_query)
-
-    for attack in attacks:
-        attack["_id"] = str(attack["_id"])
-        attack["pet_id"] = str(attack.get("pet_id", ""))
-        attack["username"] = attack.get("username", "")
-        if isinstance(attack.get("date_time"), datetime):
-            attack["date_time"] = attack["date_time"].strftime("%Y-%m-%d %H:%M")
-    
-    # Debug logging
-    # app.logger.info(f"Asthma attacks returning: {attacks}")
-
-    return jsonify({"attacks": attacks, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"attacks": attacks, **pagination})
 
 
 @health_records_bp.route("/api/asthma/<record_id>", methods=["GET"])
@@ -203,10 +255,12 @@ def update_asthma_attack(record_id):
         if data.comment is not None:
             attack_data["comment"] = data.comment
 
+        attack_data["updated_at"] = datetime.utcnow()
         result = app.db["asthma_attacks"].update_one({"_id": ObjectId(record_id)}, {"$set": attack_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("asthma_attacks", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Asthma attack updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("asthma_updated")
@@ -240,6 +294,8 @@ def delete_asthma_attack(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("asthma_attacks", pet_id, [record_id])
+        refresh_days("asthma_attacks", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Asthma attack deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("asthma_deleted")
@@ -272,17 +328,10 @@ def add_defecation():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        defecation_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "stool_type": data.stool_type or "",
-            "color": data.color or "Коричневый",
-            "food": data.food or "",
-            "comment": data.comment or "",
-            "username": username,
-        }
+        defecation_data = RECORD_TYPES["defecation"].build(data, pet_id, event_dt, username)
 
         app.db["defecations"].insert_one(defecation_data)
+        apply_inserted("defecations", [defecation_data])
         app.logger.info(f"Defecation recorded: pet_id={pet_id}, user={username}")
         return get_message("defecation_created", status=201)
 
@@ -294,36 +343,22 @@ def add_defecation():
 @health_records_bp.route("/api/defecation", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=DefecationListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=DefecationListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("defecations")
 def get_defecations():
     """Get defecations for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["defecations"].count_documents({"pet_id": pet_id})
-
-    # Apply pagination
-    from web.helpers import apply_pagination
-
-    base_query = app.db["defecations"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    defecations = list(paginated_query)
+    defecations, pagination, page_error = paginate_records("defecations", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    for defecation in defecations:
-        defecation["_id"] = str(defecation["_id"])
-        defecation["pet_id"] = str(defecation.get("pet_id", ""))
-        defecation["username"] = defecation.get("username", "")
-        if isinstance(defecation.get("date_time"), datetime):
-            defecation["date_time"] = defecation["date_time"].strftime("%Y-%m-%d %H:%M")
-
-    return jsonify({"defecations": defecations, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"defecations": defecations, **pagination})
 
 
 @health_records_bp.route("/api/defecation/<record_id>", methods=["GET"])
@@ -388,10 +423,12 @@ def update_defecation(record_id):
         if data.comment is not None:
             defecation_data["comment"] = data.comment
 
+        defecation_data["updated_at"] = datetime.utcnow()
         result = app.db["defecations"].update_one({"_id": ObjectId(record_id)}, {"$set": defecation_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("defecations", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Defecation updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("defecation_updated")
@@ -425,6 +462,8 @@ def delete_defecation(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("defecations", pet_id, [record_id])
+        refresh_days("defecations", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Defecation deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("defecation_deleted")
@@ -457,14 +496,10 @@ def add_litter():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        litter_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "comment": data.comment or "",
-            "username": username,
-        }
+        litter_data = RECORD_TYPES["litter"].build(data, pet_id, event_dt, username)
 
         app.db["litter_changes"].insert_one(litter_data)
+        apply_inserted("litter_changes", [litter_data])
         app.logger.info(f"Litter change recorded: pet_id={pet_id}, user={username}")
         return get_message("litter_created", status=201)
 
@@ -476,36 +511,22 @@ def add_litter():
 @health_records_bp.route("/api/litter", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=LitterChangeListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=LitterChangeListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("litter_changes")
 def get_litter_changes():
     """Get litter changes for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["litter_changes"].count_documents({"pet_id": pet_id})
+    litter_changes, pagination, page_error = paginate_records("litter_changes", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    # Apply pagination
-    from web.helpers import apply_pagination
-
-    base_query = app.db["litter_changes"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    litter_changes = list(paginated_query)
-
-    for change in litter_changes:
-        change["_id"] = str(change["_id"])
-        change["pet_id"] = str(change.get("pet_id", ""))
-        change["username"] = change.get("username", "")
-        if isinstance(change.get("date_time"), datetime):
-            change["date_time"] = change["date_time"].strftime("%Y-%m-%d %H:%M")
-
-    return jsonify({"litter_changes": litter_changes, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"litter_changes": litter_changes, **pagination})
 
 
 @health_records_bp.route("/api/litter/<record_id>", methods=["GET"])
@@ -564,10 +585,12 @@ def update_litter(record_id):
         if data.comment is not None:
             litter_data["comment"] = data.comment
 
+        litter_data["updated_at"] = datetime.utcnow()
         result = app.db["litter_changes"].update_one({"_id": ObjectId(record_id)}, {"$set": litter_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("litter_changes", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Litter change updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("litter_updated")
@@ -601,6 +624,8 @@ def delete_litter(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("litter_changes", pet_id, [record_id])
+        refresh_days("litter_changes", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Litter change deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("litter_deleted")
@@ -633,16 +658,10 @@ def add_weight():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        weight_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "weight": data.weight or "",
-            "food": data.food or "",
-            "comment": data.comment or "",
-            "username": username,
-        }
+        weight_data = RECORD_TYPES["weight"].build(data, pet_id, event_dt, username)
 
         app.db["weights"].insert_one(weight_data)
+        apply_inserted("weights", [weight_data])
         app.logger.info(f"Weight recorded: pet_id={pet_id}, user={username}")
         return get_message("weight_created", status=201)
 
@@ -654,36 +673,22 @@ def add_weight():
 @health_records_bp.route("/api/weight", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=WeightRecordListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=WeightRecordListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("weights")
 def get_weights():
     """Get weight measurements for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["weights"].count_documents({"pet_id": pet_id})
-
-    # Apply pagination
-    from web.helpers import apply_pagination
-
-    base_query = app.db["weights"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    weights = list(paginated_query)
-
-    for weight in weights:
-        weight["_id"] = str(weight["_id"])
-        weight["pet_id"] = str(weight.get("pet_id", ""))
-        weight["username"] = weight.get("username", "")
-        if isinstance(weight.get("date_time"), datetime):
-            weight["date_time"] = weight["date_time"].strftime("%Y-%m-%d %H:%M")
+    weights, pagination, page_error = paginate_records("weights", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    return jsonify({"weights": weights, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"weights": weights, **pagination})
 
 
 @health_records_bp.route("/api/weight/<record_id>", methods=["GET"])
@@ -743,10 +748,12 @@ def update_weight(record_id):
             "comment": data.comment or "",
         }
 
+        weight_data["updated_at"] = datetime.utcnow()
         result = app.db["weights"].update_one({"_id": ObjectId(record_id)}, {"$set": weight_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("weights", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Weight updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("weight_updated")
@@ -778,6 +785,8 @@ def delete_weight(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("weights", pet_id, [record_id])
+        refresh_days("weights", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Weight deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("weight_deleted")
@@ -808,15 +817,10 @@ def add_feeding():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        feeding_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "food_weight": data.food_weight if data.food_weight is not None else None,
-            "comment": data.comment or "",
-            "username": username,
-        }
+        feeding_data = RECORD_TYPES["feeding"].build(data, pet_id, event_dt, username)
 
         app.db["feedings"].insert_one(feeding_data)
+        apply_inserted("feedings", [feeding_data])
         app.logger.info(f"Feeding recorded: pet_id={pet_id}, user={username}")
         return get_message("feeding_created", status=201)
 
@@ -828,36 +832,22 @@ def add_feeding():
 @health_records_bp.route("/api/feeding", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=FeedingListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=FeedingListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("feedings")
 def get_feedings():
     """Get feedings for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["feedings"].count_documents({"pet_id": pet_id})
+    feedings, pagination, page_error = paginate_records("feedings", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    # Apply pagination
-    from web.helpers import apply_pagination
-
-    base_query = app.db["feedings"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    feedings = list(paginated_query)
-
-    for feeding in feedings:
-        feeding["_id"] = str(feeding["_id"])
-        feeding["pet_id"] = str(feeding.get("pet_id", ""))
-        feeding["username"] = feeding.get("username", "")
-        if isinstance(feeding.get("date_time"), datetime):
-            feeding["date_time"] = feeding["date_time"].strftime("%Y-%m-%d %H:%M")
-
-    return jsonify({"feedings": feedings, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"feedings": feedings, **pagination})
 
 
 @health_records_bp.route("/api/feeding/<record_id>", methods=["GET"])
@@ -916,10 +906,12 @@ def update_feeding(record_id):
             "comment": data.comment or "",
         }
 
+        feeding_data["updated_at"] = datetime.utcnow()
         result = app.db["feedings"].update_one({"_id": ObjectId(record_id)}, {"$set": feeding_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("feedings", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Feeding updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("feeding_updated")
@@ -951,6 +943,8 @@ def delete_feeding(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("feedings", pet_id, [record_id])
+        refresh_days("feedings", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Feeding deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("feeding_deleted")
@@ -981,15 +975,10 @@ def add_eye_drops():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        eye_drops_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "drops_type": data.drops_type or "Обычные",
-            "comment": data.comment or "",
-            "username": username,
-        }
+        eye_drops_data = RECORD_TYPES["eye_drops"].build(data, pet_id, event_dt, username)
 
         app.db["eye_drops"].insert_one(eye_drops_data)
+        apply_inserted("eye_drops", [eye_drops_data])
         app.logger.info(f"Eye drops recorded: pet_id={pet_id}, user={username}")
         return get_message("eye_drops_created", status=201)
 
@@ -1001,36 +990,22 @@ def add_eye_drops():
 @health_records_bp.route("/api/eye_drops", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=EyeDropsListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=EyeDropsListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("eye_drops")
 def get_eye_drops():
     """Get eye drops records for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["eye_drops"].count_documents({"pet_id": pet_id})
-
-    # Apply pagination
-    from web.helpers import apply_pagination
-
-    base_query = app.db["eye_drops"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    eye_drops = list(paginated_query)
+    eye_drops, pagination, page_error = paginate_records("eye_drops", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    for item in eye_drops:
-        item["_id"] = str(item["_id"])
-        item["pet_id"] = str(item.get("pet_id", ""))
-        item["username"] = item.get("username", "")
-        if isinstance(item.get("date_time"), datetime):
-            item["date_time"] = item["date_time"].strftime("%Y-%m-%d %H:%M")
-
-    return jsonify({"eye_drops": eye_drops, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"eye_drops": eye_drops, **pagination})
 
 
 @health_records_bp.route("/api/eye_drops/<record_id>", methods=["GET"])
@@ -1091,10 +1066,12 @@ def update_eye_drops(record_id):
         if data.comment is not None:
             eye_drops_data["comment"] = data.comment
 
+        eye_drops_data["updated_at"] = datetime.utcnow()
         result = app.db["eye_drops"].update_one({"_id": ObjectId(record_id)}, {"$set": eye_drops_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("eye_drops", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Eye drops updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("eye_drops_updated")
@@ -1128,6 +1105,8 @@ def delete_eye_drops(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("eye_drops", pet_id, [record_id])
+        refresh_days("eye_drops", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Eye drops deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("eye_drops_deleted")
@@ -1160,15 +1139,10 @@ def add_tooth_brushing():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        tooth_brushing_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "brushing_type": data.brushing_type or "Щетка",
-            "comment": data.comment or "",
-            "username": username,
-        }
+        tooth_brushing_data = RECORD_TYPES["tooth_brushing"].build(data, pet_id, event_dt, username)
 
         app.db["tooth_brushing"].insert_one(tooth_brushing_data)
+        apply_inserted("tooth_brushing", [tooth_brushing_data])
         app.logger.info(f"Tooth brushing recorded: pet_id={pet_id}, user={username}")
         return get_message("tooth_brushing_created", status=201)
 
@@ -1180,34 +1154,22 @@ def add_tooth_brushing():
 @health_records_bp.route("/api/tooth_brushing", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=ToothBrushingListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=ToothBrushingListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("tooth_brushing")
 def get_tooth_brushing():
     """Get tooth brushing records for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    # Get total count
-    total = app.db["tooth_brushing"].count_documents({"pet_id": pet_id})
-
-    # Apply pagination
-    base_query = app.db["tooth_brushing"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    tooth_brushing = list(paginated_query)
+    tooth_brushing, pagination, page_error = paginate_records("tooth_brushing", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    for item in tooth_brushing:
-        item["_id"] = str(item["_id"])
-        item["pet_id"] = str(item.get("pet_id", ""))
-        item["username"] = item.get("username", "")
-        if isinstance(item.get("date_time"), datetime):
-            item["date_time"] = item["date_time"].strftime("%Y-%m-%d %H:%M")
-
-    return jsonify({"tooth_brushing": tooth_brushing, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"tooth_brushing": tooth_brushing, **pagination})
 
 
 @health_records_bp.route("/api/tooth_brushing/<record_id>", methods=["GET"])
@@ -1268,10 +1230,12 @@ def update_tooth_brushing(record_id):
         if data.comment is not None:
             tooth_brushing_data["comment"] = data.comment
 
+        tooth_brushing_data["updated_at"] = datetime.utcnow()
         result = app.db["tooth_brushing"].update_one({"_id": ObjectId(record_id)}, {"$set": tooth_brushing_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("tooth_brushing", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Tooth brushing updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("tooth_brushing_updated")
@@ -1305,6 +1269,8 @@ def delete_tooth_brushing(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("tooth_brushing", pet_id, [record_id])
+        refresh_days("tooth_brushing", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Tooth brushing deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("tooth_brushing_deleted")
@@ -1337,15 +1303,10 @@ def add_ear_cleaning():
         if dt_error:
             return dt_error[0], dt_error[1]
 
-        ear_cleaning_data = {
-            "pet_id": pet_id,
-            "date_time": event_dt,
-            "cleaning_type": data.cleaning_type or "Салфетка/Марля",
-            "comment": data.comment or "",
-            "username": username,
-        }
+        ear_cleaning_data = RECORD_TYPES["ear_cleaning"].build(data, pet_id, event_dt, username)
 
         app.db["ear_cleaning"].insert_one(ear_cleaning_data)
+        apply_inserted("ear_cleaning", [ear_cleaning_data])
         app.logger.info(f"Ear cleaning recorded: pet_id={pet_id}, user={username}")
         return get_message("ear_cleaning_created", status=201)
 
@@ -1357,32 +1318,22 @@ def add_ear_cleaning():
 @health_records_bp.route("/api/ear_cleaning", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=EarCleaningListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=EarCleaningListResponse, HTTP_304=None, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["health-records"],
 )
 @require_pet_access
+@pet_records_list("ear_cleaning")
 def get_ear_cleaning():
     """Get ear cleaning records for current pet with pagination."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
-    page = query_params.page
-    page_size = query_params.page_size
     username = g.username
 
-    total = app.db["ear_cleaning"].count_documents({"pet_id": pet_id})
-
-    base_query = app.db["ear_cleaning"].find({"pet_id": pet_id}).sort("date_time", -1)
-    paginated_query, _ = apply_pagination(base_query, page, page_size)
-    ear_cleaning_records = list(paginated_query)
+    ear_cleaning_records, pagination, page_error = paginate_records("ear_cleaning", {"pet_id": pet_id}, query_params)
+    if page_error:
+        return page_error[0], page_error[1]
 
-    for item in ear_cleaning_records:
-        item["_id"] = str(item["_id"])
-        item["pet_id"] = str(item.get("pet_id", ""))
-        item["username"] = item.get("username", "")
-        if isinstance(item.get("date_time"), datetime):
-            item["date_time"] = item["date_time"].strftime("%Y-%m-%d %H:%M")
-
-    return jsonify({"ear_cleaning": ear_cleaning_records, "page": page, "page_size": page_size, "total": total})
+    return jsonify({"ear_cleaning": ear_cleaning_records, **pagination})
 
 
 @health_records_bp.route("/api/ear_cleaning/<record_id>", methods=["GET"])
@@ -1443,10 +1394,12 @@ def update_ear_cleaning(record_id):
         if data.comment is not None:
             ear_cleaning_data["comment"] = data.comment
 
+        ear_cleaning_data["updated_at"] = datetime.utcnow()
         result = app.db["ear_cleaning"].update_one({"_id": ObjectId(record_id)}, {"$set": ear_cleaning_data})
 
         if result.matched_count == 0:
             return error_response("record_not_found")
+        refresh_days("ear_cleaning", pet_id, [g.record.get("date_time"), event_dt])
 
         app.logger.info(f"Ear cleaning updated: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("ear_cleaning_updated")
@@ -1480,6 +1433,8 @@ def delete_ear_cleaning(record_id):
 
         if result.deleted_count == 0:
             return error_response("record_not_found")
+        record_deletions("ear_cleaning", pet_id, [record_id])
+        refresh_days("ear_cleaning", pet_id, [g.record.get("date_time")])
 
         app.logger.info(f"Ear cleaning deleted: record_id={record_id}, pet_id={pet_id}, user={username}")
         return get_message("ear_cleaning_deleted")
@@ -1492,6 +1447,62 @@ def delete_ear_cleaning(record_id):
 
 
 # Statistics routes
+
+# Bucket -> $dateToString format used as the $group key
+STATS_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m-01",
+}
+
+# Buckets made of whole days are served from daily_rollups
+ROLLUP_BUCKETS = {"day", "week", "month"}
+
+# Default aggregation per value field when the client does not pass `agg`
+STATS_DEFAULT_AGG = {
+    "count": "count",
+    "food_weight": "sum",
+    "weight": "avg",
+}
+
+
+def build_stats_pipeline(pet_id, since_date, value_field, bucket, agg):
+    """
+    Build a $group pipeline that aggregates records into time buckets.
+
+    Returns one document per bucket ({"_id": bucket_key, "value": aggregated_value}),
+    so the result size depends on the number of buckets, not on the number of records.
+    """
+    if agg == "count":
+        accumulator = {"$sum": 1}
+    else:
+        value_expr = {"$literal": 1} if value_field == "count" else f"${value_field}"
+        accumulator = {f"${agg}": value_expr}
+
+    return [
+        {"$match": {"pet_id": pet_id, "date_time": {"$gte": since_date}}},
+        # Sorted input makes $last pick the latest record of each bucket
+        {"$sort": {"date_time": 1}},
+        {"$project": {"_id": 0, "date_time": 1, value_field: 1}},
+        {
+            "$group": {
+                "_id": {"$dateToString": {"format": STATS_BUCKET_FORMATS[bucket], "date": "$date_time"}},
+                "value": accumulator,
+            }
+        },
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def format_stats_bucket(bucket, key):
+    """Convert a $group bucket key into the bucket start label returned to clients."""
+    if bucket == "week":
+        # ISO year/week -> date of that week's Monday
+        return datetime.strptime(f"{key}-1", "%G-W%V-%u").strftime("%Y-%m-%d")
+    return key
+
+
 @health_records_bp.route("/api/stats/health", methods=["GET"])
 @api.validate(
     query=HealthStatsQuery,
@@ -1500,39 +1511,44 @@ def delete_ear_cleaning(record_id):
 )
 @require_pet_access
 def get_health_stats():
-    """Get health statistics for charts."""
+    """Get health statistics for charts, optionally aggregated into time buckets."""
     query_params = request.context.query  # type: ignore[attr-defined]
     pet_id = g.pet_id
     record_type = query_params.type
     days = query_params.days or 30
-    username = g.username
+    bucket = query_params.bucket
+
+    if record_type not in STATS_TYPE_MAPPING:
+        return error_response("validation_error", f"Unsupported record type: {record_type}")
 
-    # Map record types to collection names and value fields
-    type_mapping = {
-        "feeding": ("feedings", "food_weight"),
-        "asthma": ("asthma_attacks", "count"),
-        "defecation": ("defecations", "count"),
-        "litter": ("litter_changes", "count"),
-        "weight": ("weights", "weight"),
-        "eye_drops": ("eye_drops", "count"),
-        "tooth_brushing": ("tooth_brushing", "count"),
-        "ear_cleaning": ("ear_cleaning", "count"),
-        "medications": ("medication_intakes", "count"),
-    }
-
-    if record_type not in type_mapping:
-        return error_response("invalid_type", f"Unsupported record type: {record_type}")
-
-    collection_name, value_field = type_mapping[record_type]
+    collection_name, value_field = STATS_TYPE_MAPPING[record_type]
     
     # Calculate date range
     since_date = datetime.now() - timedelta(days=days)
-    
+
+    if bucket in ROLLUP_BUCKETS:
+        # Whole days: read the daily rollups (web/rollups.py) instead of raw records
+        agg = query_params.agg or STATS_DEFAULT_AGG[value_field]
+        stats_data = rollup_buckets(read_rollups(pet_id, record_type, since_date), value_field, bucket, agg)
+        return jsonify({"data": stats_data, "bucket": bucket, "agg": agg})
+
+    if bucket:
+        agg = query_params.agg or STATS_DEFAULT_AGG[value_field]
+        pipeline = build_stats_pipeline(pet_id, since_date, value_field, bucket, agg)
+        stats_data = [
+            {"date": format_stats_bucket(bucket, item["_id"]), "value": item["value"]}
+            for item in app.db[collection_name].aggregate(pipeline)
+            if item["_id"] is not None
+        ]
+        return jsonify({"data": stats_data, "bucket": bucket, "agg": agg})
+
     # Fetch records
-    records = list(app.db[collection_name].find({
-        "pet_id": pet_id,
-        "date_time": {"$gte": since_date}
-    }).sort("date_time", 1))
+    projection = {"_id": 0, "date_time": 1}
+    if value_field != "count":
+        projection[value_field] = 1
+    records = app.db[collection_name].find(
+        {"pet_id": pet_id, "date_time": {"$gte": since_date}}, projection
+    ).sort("date_time", 1)
 
     stats_data = []
     for record in records:
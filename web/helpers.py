@@ -4,22 +4,32 @@ This module is intentionally independent from `web.app` to avoid circular import
 Helpers are imported into `web.app` and used by blueprints via `web.app.*`.
 """
 
+import base64
+import binascii
+import threading
+import time
 from datetime import datetime, timedelta
-from io import BytesIO
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 from bson import ObjectId
 from bson.errors import InvalidId
-from werkzeug.datastructures import FileStorage
-
-from PIL import Image
+from flask import g, has_app_context
 
 import web.app as app  # use app.db and app.logger so test patches (web.app.db) are visible
+from web.configs import CACHE_CONFIG
 from web.errors import error_response
+from web.invalidation import bus as invalidation_bus
 
 
 logger = app.logger
 
+# Fields needed to decide whether a user may access a pet
+PET_ACL_PROJECTION = {"owner": 1, "shared_with": 1}
+
+# Cross-request ACL cache: pet_id -> (expires_at, {"_id", "owner", "shared_with"})
+_pet_acl_cache: Dict[str, Tuple[float, dict]] = {}
+_pet_acl_cache_lock = threading.Lock()
+
 
 def parse_datetime(date_str, time_str=None, allow_future=True, max_future_days=1, max_past_years=50):
     """
@@ -117,13 +127,111 @@ def parse_event_datetime(date_str, time_str, context=""):
         return datetime.now()
 
 
+def _request_pet_cache() -> Optional[dict]:
+    """Per-request pet cache stored in `g` ({pet_id: (pet, is_full_document)}), None outside app context."""
+    if not has_app_context():
+        return None
+    if "pet_cache" not in g:
+        g.pet_cache = {}
+    return g.pet_cache
+
+
+def _get_cached_acl(pet_id: str) -> Optional[dict]:
+    """Return the cached ACL document for a pet if the cross-request cache is enabled and fresh."""
+    if CACHE_CONFIG["pet_acl_ttl_seconds"] <= 0:
+        return None
+    with _pet_acl_cache_lock:
+        entry = _pet_acl_cache.get(pet_id)
+        if entry is None:
+            return None
+        expires_at, acl = entry
+        if expires_at < time.monotonic():
+            del _pet_acl_cache[pet_id]
+            return None
+        return acl
+
+
+def _store_cached_acl(pet_id: str, pet: dict) -> None:
+    """Remember a pet's ACL fields in the cross-request cache (no-op when disabled)."""
+    ttl = CACHE_CONFIG["pet_acl_ttl_seconds"]
+    if ttl <= 0:
+        return
+    acl = {"_id": pet["_id"], "owner": pet.get("owner"), "shared_with": list(pet.get("shared_with", []))}
+    with _pet_acl_cache_lock:
+        _pet_acl_cache[pet_id] = (time.monotonic() + ttl, acl)
+
+
+def load_pet(pet_id, full=True) -> Optional[dict]:
+    """
+    Load a pet at most once per request.
+
+    Args:
+        pet_id: Pet id (string or ObjectId)
+        full: Load the whole document; otherwise only the ACL fields (PET_ACL_PROJECTION)
+              are needed and the cross-request ACL cache may answer
+
+    Returns:
+        The pet document (possibly projected) or None if it does not exist
+
+    Raises:
+        InvalidId, TypeError: If pet_id is not a valid ObjectId
+    """
+    pet_object_id = ObjectId(pet_id)
+    key = str(pet_object_id)
+
+    request_cache = _request_pet_cache()
+    if request_cache is not None and key in request_cache:
+        pet, is_full = request_cache[key]
+        if is_full or not full:
+            return pet
+
+    if not full:
+        acl = _get_cached_acl(key)
+        if acl is not None:
+            return acl
+
+    pet = app.db["pets"].find_one({"_id": pet_object_id}, None if full else PET_ACL_PROJECTION)
+
+    if request_cache is not None:
+        request_cache[key] = (pet, full)
+    if pet is not None:
+        _store_cached_acl(key, pet)
+    return pet
+
+
+def _drop_cached_acl(scope: Optional[str], key: Optional[str]) -> None:
+    """Invalidation bus subscriber: forget a pet's cached ACL, or all of them."""
+    with _pet_acl_cache_lock:
+        if scope is None:
+            _pet_acl_cache.clear()
+        elif scope == "pet":
+            _pet_acl_cache.pop(key, None)
+
+
+invalidation_bus.subscribe(_drop_cached_acl, enabled=lambda: CACHE_CONFIG["pet_acl_ttl_seconds"] > 0)
+
+
+def invalidate_pet_access(pet_id) -> None:
+    """Drop a pet from the per-request and cross-request caches after its ACL changed or it was deleted."""
+    key = str(pet_id)
+    request_cache = _request_pet_cache()
+    if request_cache is not None:
+        request_cache.pop(key, None)
+    # Other workers learn about the write from their invalidation watcher
+    invalidation_bus.publish("pet", key)
+
+
+def has_pet_access(pet: Optional[dict], username) -> bool:
+    """Check if user is the owner of an already loaded pet or it is shared with them."""
+    if not pet:
+        return False
+    return pet.get("owner") == username or username in pet.get("shared_with", [])
+
+
 def check_pet_access(pet_id, username):
     """Check if user has access to pet."""
     try:
-        pet = app.db["pets"].find_one({"_id": ObjectId(pet_id)})
-        if not pet:
-            return False
-        return pet.get("owner") == username or username in pet.get("shared_with", [])
+        return has_pet_access(load_pet(pet_id, full=False), username)
     except (InvalidId, TypeError, ValueError):
         return False
 
@@ -206,7 +314,7 @@ def get_pet_and_validate(pet_id, username, require_owner=False):
                or (None, (jsonify_response, status_code)) if validation fails
     """
     try:
-        pet = app.db["pets"].find_one({"_id": ObjectId(pet_id)})
+        pet = load_pet(pet_id)
         if not pet:
             return None, error_response("pet_not_found")
 
@@ -214,7 +322,7 @@ def get_pet_and_validate(pet_id, username, require_owner=False):
             if pet.get("owner") != username:
                 return None, error_response("owner_action_forbidden")
         else:
-            if not check_pet_access(pet_id, username):
+            if not has_pet_access(pet, username):
                 return None, error_response("pet_forbidden")
 
         return pet, None
@@ -238,49 +346,74 @@ def apply_pagination(query, page: int, page_size: int):
     return query.skip(skip).limit(page_size), skip
 
 
-def optimize_image(file_storage: FileStorage, max_width: int = 1920, max_height: int = 1920, quality: int = 85) -> Optional[Tuple[BytesIO, str]]:
+# Sort order of every record list; _id breaks ties between records with the same date_time
+RECORD_LIST_SORT = [("date_time", -1), ("_id", -1)]
+
+
+def encode_cursor(record: dict) -> str:
+    """Encode the (date_time, _id) position of a record as an opaque cursor."""
+    position = f"{record['date_time'].isoformat()}|{record['_id']}"
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
     """
-    Optimize image by converting to WebP format and resizing if necessary.
+    Decode a cursor produced by encode_cursor().
 
-    Args:
-        file_storage: Werkzeug FileStorage object containing the image
-        max_width: Maximum width for the image (default: 1920)
-        max_height: Maximum height for the image (default: 1920)
-        quality: WebP quality (0-100, default: 85)
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_part, id_part = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(date_part), ObjectId(id_part)
+    except (binascii.Error, UnicodeError, InvalidId, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(cursor: str) -> dict:
+    """Filter selecting records strictly after the cursor position in RECORD_LIST_SORT order."""
+    date_time, record_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"date_time": {"$lt": date_time}},
+            {"date_time": date_time, "_id": {"$lt": record_id}},
+        ]
+    }
+
+
+def paginate_records(collection_name: str, query: dict, query_params):
+    """
+    Fetch one page of a record list sorted by RECORD_LIST_SORT.
+
+    With `query_params.cursor` the page starts right after the cursor position (keyset
+    pagination), so deep pages cost the same as the first one; otherwise `page` is used
+    with skip/limit. The total count is only computed when `query_params.include_total` is set.
 
     Returns:
-        Tuple of (BytesIO object with optimized image, content_type) or None if optimization fails
+        tuple: (records, pagination, error_response) where pagination holds page, page_size,
+               total and next_cursor, or (None, None, (jsonify_response, status_code)) for a bad cursor
     """
+    page_size = query_params.page_size
+    collection = app.db[collection_name]
 
-    try:
-        # Read the original image
-        file_storage.seek(0)
-        image = Image.open(file_storage)
-        
-        # Convert RGBA to RGB if necessary (WebP supports both, but RGB is smaller)
-        if image.mode in ("RGBA", "LA", "P"):
-            # Create white background for transparency
-            rgb_image = Image.new("RGB", image.size, (255, 255, 255))
-            if image.mode == "P":
-                image = image.convert("RGBA")
-            rgb_image.paste(image, mask=image.split()[-1] if image.mode in ("RGBA", "LA") else None)
-            image = rgb_image
-        elif image.mode != "RGB":
-            image = image.convert("RGB")
-
-        # Resize if image is too large
-        if image.width > max_width or image.height > max_height:
-            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-        # Save to WebP format
-        output = BytesIO()
-        image.save(output, format="WEBP", quality=quality, method=6)
-        output.seek(0)
-
-        # Reset original file position
-        file_storage.seek(0)
-
-        return output, "image/webp"
-    except Exception as e:
-        logger.warning(f"Failed to optimize image: {e}", exc_info=True)
-        return None
+    if query_params.cursor:
+        try:
+            base_query = collection.find({"$and": [query, keyset_filter(query_params.cursor)]})
+        except ValueError:
+            return None, None, error_response("invalid_cursor")
+    else:
+        base_query = collection.find(query).skip((query_params.page - 1) * page_size)
+
+    # Fetch one extra record to know whether a next page exists
+    records = list(base_query.sort(RECORD_LIST_SORT).limit(page_size + 1))
+    has_more = len(records) > page_size
+    records = records[:page_size]
+
+    pagination = {
+        "page": query_params.page,
+        "page_size": page_size,
+        "total": collection.count_documents(query) if query_params.include_total else None,
+        "next_cursor": encode_cursor(records[-1]) if has_more else None,
+    }
+    return records, pagination, None
@@ -0,0 +1,204 @@
+"""Memory-bounded processing of uploaded pet photos.
+
+An upload is converted to a WebP fitting into IMAGE_MAX_DIMENSION in stages:
+
+- probe: only the header is read; images over IMAGE_MAX_PIXELS are rejected with
+  `ImageTooLarge` before any pixel is decoded;
+- decode: JPEGs are decoded by libjpeg at 1/2, 1/4 or 1/8 scale (`draft`), the
+  smallest scale still covering the target size, so a 48 MP phone photo never
+  exists in memory at full size;
+- reduce: other formats are shrunk by an integer factor with a cheap box filter
+  (`reduce`) down to twice the target size;
+- convert, resize (LANCZOS) and encode as before, on the already reduced image.
+
+Each stage's duration and peak pixel memory (the Pillow image buffers alive during
+it) are exported as metrics and returned to callers that ask for them.
+
+Multipart file parts above UPLOAD_SPOOL_THRESHOLD_BYTES are spooled to a temporary
+file (`UploadRequest`) instead of being kept in memory.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from typing import Dict, Optional, Tuple
+
+from flask import Request
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from web.configs import IMAGE_CONFIG
+from web.metrics import record_image_stage, timed_pillow
+
+
+logger = logging.getLogger(__name__)
+
+# Bytes Pillow allocates per pixel; every other mode uses 4
+_PIXEL_BYTES = {"1": 1, "L": 1, "P": 1, "I;16": 2}
+
+
+class ImageTooLarge(Exception):
+    """The uploaded image has more pixels than IMAGE_MAX_PIXELS."""
+
+    def __init__(self, max_pixels: int):
+        super().__init__(f"Image has more than {max_pixels} pixels")
+        self.max_pixels = max_pixels
+
+
+class UploadRequest(Request):
+    """Request spooling multipart file parts to disk above the configured size."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(
+            max_size=IMAGE_CONFIG["spool_threshold_bytes"], mode="rb+", dir=IMAGE_CONFIG["spool_dir"] or None
+        )
+
+
+def pixel_bytes(image: Image.Image) -> int:
+    """Memory of the decoded pixels of an image."""
+    return image.width * image.height * _PIXEL_BYTES.get(image.mode, 4)
+
+
+def fit_size(size: Tuple[int, int], max_width: int, max_height: int) -> Tuple[int, int]:
+    """Size of an image scaled down (never up) to fit into max_width x max_height, keeping its aspect ratio."""
+    width, height = size
+    scale = min(1.0, max_width / width, max_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+@contextmanager
+def _stage(stages: Dict[str, dict], name: str):
+    """Time a pipeline stage; the block sets `peak_bytes` in the yielded dict."""
+    stats = {"peak_bytes": 0}
+    started = time.perf_counter()
+    yield stats
+    stats["seconds"] = time.perf_counter() - started
+    stages[name] = stats
+    record_image_stage(name, stats["seconds"], stats["peak_bytes"])
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Flatten transparency onto white and convert to RGB (WebP supports alpha, but RGB is smaller)."""
+    if image.mode in ("RGBA", "LA", "P"):
+        if image.mode == "P":
+            image = image.convert("RGBA")
+        rgb_image = Image.new("RGB", image.size, (255, 255, 255))
+        rgb_image.paste(image, mask=image.split()[-1])
+        return rgb_image
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def probe_image(file) -> Image.Image:
+    """
+    Open an image reading only its header.
+
+    Raises:
+        ImageTooLarge: If the image has more than IMAGE_MAX_PIXELS pixels
+    """
+    file.seek(0)
+    try:
+        image = Image.open(file)
+    except Image.DecompressionBombError:
+        # Pillow's own limit, for images far beyond any sane IMAGE_MAX_PIXELS
+        raise ImageTooLarge(IMAGE_CONFIG["max_pixels"])
+    if image.width * image.height > IMAGE_CONFIG["max_pixels"]:
+        raise ImageTooLarge(IMAGE_CONFIG["max_pixels"])
+    return image
+
+
+def check_image_size(file) -> None:
+    """
+    Reject an upload over IMAGE_MAX_PIXELS without decoding it; unreadable files pass.
+
+    Raises:
+        ImageTooLarge: If the image has more than IMAGE_MAX_PIXELS pixels
+    """
+    try:
+        probe_image(file)
+    except ImageTooLarge:
+        raise
+    except Exception as e:
+        logger.warning(f"Failed to read image header: {e}")
+    finally:
+        file.seek(0)
+
+
+@timed_pillow("optimize")
+def optimize_image(
+    file_storage: FileStorage,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    quality: Optional[int] = None,
+    stages: Optional[Dict[str, dict]] = None,
+) -> Optional[Tuple[BytesIO, str]]:
+    """
+    Convert an uploaded image to a WebP fitting into max_width x max_height.
+
+    Args:
+        file_storage: Uploaded file (any seekable binary file works)
+        max_width: Maximum width (default: IMAGE_MAX_DIMENSION)
+        max_height: Maximum height (default: IMAGE_MAX_DIMENSION)
+        quality: WebP quality 0-100 (default: IMAGE_WEBP_QUALITY)
+        stages: Filled with {stage: {"seconds", "peak_bytes"}} when given
+
+    Returns:
+        Tuple of (BytesIO with the WebP image, content_type), or None if the file could not be processed
+
+    Raises:
+        ImageTooLarge: If the image has more than IMAGE_MAX_PIXELS pixels
+    """
+    max_width = max_width or IMAGE_CONFIG["max_dimension"]
+    max_height = max_height or IMAGE_CONFIG["max_dimension"]
+    quality = quality or IMAGE_CONFIG["quality"]
+    stages = {} if stages is None else stages
+
+    try:
+        with _stage(stages, "probe"):
+            image = probe_image(file_storage)
+            target = fit_size(image.size, max_width, max_height)
+
+        with _stage(stages, "decode") as stats:
+            if image.format == "JPEG":
+                image.draft("RGB", target)
+            image.load()
+            stats["peak_bytes"] = pixel_bytes(image)
+
+        with _stage(stages, "reduce") as stats:
+            factor = min(image.width // (target[0] * 2), image.height // (target[1] * 2))
+            stats["peak_bytes"] = pixel_bytes(image)
+            if factor >= 2 and image.mode not in ("P", "1"):
+                reduced = image.reduce(factor)
+                stats["peak_bytes"] += pixel_bytes(reduced)
+                image = reduced
+
+        with _stage(stages, "convert") as stats:
+            converted = _to_rgb(image)
+            stats["peak_bytes"] = pixel_bytes(image) + (pixel_bytes(converted) if converted is not image else 0)
+            image = converted
+
+        with _stage(stages, "resize") as stats:
+            stats["peak_bytes"] = pixel_bytes(image)
+            if image.size != target:
+                resized = image.resize(target, Image.Resampling.LANCZOS)
+                stats["peak_bytes"] += pixel_bytes(resized)
+                image = resized
+
+        with _stage(stages, "encode") as stats:
+            output = BytesIO()
+            image.save(output, format="WEBP", quality=quality, method=IMAGE_CONFIG["webp_method"])
+            stats["peak_bytes"] = pixel_bytes(image) + output.tell()
+            output.seek(0)
+
+        # Reset original file position
+        file_storage.seek(0)
+
+        return output, "image/webp"
+    except ImageTooLarge:
+        raise
+    except Exception as e:
+        logger.warning(f"Failed to optimize image: {e}", exc_info=True)
+        return None
@@ -0,0 +1,170 @@
+"""MongoDB index registry and bootstrap helpers.
+
+Every query shape issued by the blueprints should be backed by an index declared
+in `INDEXES`. The registry is applied idempotently at startup (see `web.app`) and
+via the `flask ensure-indexes` CLI command, which can also report drift between
+the registry and the indexes that actually exist in the database.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from web.configs import SYNC_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+# Per-pet event collections, all listed by pet_id and ordered by date_time
+RECORD_COLLECTIONS = [
+    "asthma_attacks",
+    "defecations",
+    "litter_changes",
+    "weights",
+    "feedings",
+    "eye_drops",
+    "tooth_brushing",
+    "ear_cleaning",
+    "medication_intakes",
+]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Declarative definition of a single index."""
+
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    # TTL index: documents expire this many seconds after the indexed date
+    expire_after_seconds: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """Index name in the same format MongoDB generates by default."""
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def to_model(self) -> IndexModel:
+        """Build a pymongo IndexModel for create_indexes()."""
+        options = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(list(self.keys), **options)
+
+
+INDEXES: List[IndexSpec] = [
+    # Record list routes: find({"pet_id": ...}).sort([("date_time", -1), ("_id", -1)]) with keyset
+    # pagination on (date_time, _id); the same prefix serves stats and export
+    *[
+        IndexSpec(name, (("pet_id", ASCENDING), ("date_time", DESCENDING), ("_id", DESCENDING)))
+        for name in RECORD_COLLECTIONS
+    ],
+    # Delta sync (web/sync.py): find({"pet_id": ..., "updated_at": {"$gte": ...}}) per collection,
+    # paged in (updated_at, _id) / (deleted_at, _id) order
+    *[
+        IndexSpec(name, (("pet_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)))
+        for name in [*RECORD_COLLECTIONS, "medications"]
+    ],
+    IndexSpec("deleted_records", (("pet_id", ASCENDING), ("deleted_at", ASCENDING), ("_id", ASCENDING))),
+    # Cache invalidation polling without change streams (web/invalidation.py); tombstones
+    # are polled through the deleted_at TTL index below
+    *[IndexSpec(name, (("updated_at", ASCENDING),)) for name in ["pets", "users", *RECORD_COLLECTIONS, "medications"]],
+    # Tombstones older than the retention are dropped; older watermarks get a full resync
+    IndexSpec(
+        "deleted_records",
+        (("deleted_at", ASCENDING),),
+        expire_after_seconds=SYNC_CONFIG["tombstone_retention_days"] * 24 * 3600,
+    ),
+    # Daily chart rollups (web/rollups.py): upserts by key, range reads by day
+    IndexSpec("daily_rollups", (("pet_id", ASCENDING), ("type", ASCENDING), ("day", ASCENDING)), unique=True),
+    # Medication list aggregations ($match medication_id / date_time, $sort date_time)
+    IndexSpec("medication_intakes", (("medication_id", ASCENDING), ("date_time", DESCENDING))),
+    IndexSpec("medications", (("pet_id", ASCENDING), ("created_at", DESCENDING))),
+    # Auth lookups
+    IndexSpec("users", (("username", ASCENDING),), unique=True),
+    # Refresh tokens are looked up by digest (web/refresh_tokens.py) and dropped once expired
+    IndexSpec("refresh_tokens", (("token_hash", ASCENDING),)),
+    IndexSpec("refresh_tokens", (("expires_at", ASCENDING),), expire_after_seconds=0),
+    # Pet list: {"$or": [{"owner": u}, {"shared_with": u}]} sorted by created_at
+    IndexSpec("pets", (("owner", ASCENDING), ("created_at", DESCENDING))),
+    IndexSpec("pets", (("shared_with", ASCENDING), ("created_at", DESCENDING))),
+    # Photo rendition cache lookups (web/renditions.py)
+    IndexSpec("fs.files", (("metadata.rendition_of", ASCENDING), ("metadata.w", ASCENDING), ("metadata.h", ASCENDING))),
+    # Background jobs (web/jobs.py): claims pick the most urgent due job; finished jobs
+    # expire with their export files, which the worker deletes by metadata.expires_at
+    IndexSpec("jobs", (("status", ASCENDING), ("priority", DESCENDING), ("run_at", ASCENDING))),
+    IndexSpec("jobs", (("expires_at", ASCENDING),), expire_after_seconds=0),
+    IndexSpec("fs.files", (("metadata.expires_at", ASCENDING),)),
+]
+
+# Indexes managed by MongoDB or the driver itself; never reported as extra
+UNMANAGED_INDEXES = {"_id_", "filename_1_uploadDate_1"}
+
+
+def _index_signature(keys, unique: bool) -> Tuple[Tuple[Tuple[str, int], ...], bool]:
+    """Normalize index keys/options so registry and server definitions compare equal."""
+    return tuple((field, int(direction)) for field, direction in keys), bool(unique)
+
+
+def index_report(db) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare registered indexes with the ones present in the database.
+
+    Returns:
+        dict: {collection: {"missing": [index names], "extra": [index names]}} for every
+              registered collection. Indexes from UNMANAGED_INDEXES are never reported as extra.
+    """
+    report: Dict[str, Dict[str, List[str]]] = {}
+    expected_by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in INDEXES:
+        expected_by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection_name, specs in expected_by_collection.items():
+        existing = {
+            _index_signature(info["key"], info.get("unique", False)): name
+            for name, info in db[collection_name].index_information().items()
+            if name not in UNMANAGED_INDEXES
+        }
+        expected = {_index_signature(spec.keys, spec.unique): spec.name for spec in specs}
+
+        report[collection_name] = {
+            "missing": [name for signature, name in expected.items() if signature not in existing],
+            "extra": sorted(name for signature, name in existing.items() if signature not in expected),
+        }
+
+    return report
+
+
+def ensure_indexes(db) -> List[str]:
+    """
+    Create every registered index that does not exist yet.
+
+    Safe to call repeatedly: existing indexes are left untouched and extra indexes
+    are only reported, never dropped.
+
+    Returns:
+        list: Names of the indexes created by this call.
+    """
+    report = index_report(db)
+    created = []
+
+    for spec in INDEXES:
+        if spec.name not in report[spec.collection]["missing"]:
+            continue
+        try:
+            db[spec.collection].create_indexes([spec.to_model()])
+            created.append(spec.name)
+            logger.info(f"Index created: collection={spec.collection}, index={spec.name}")
+        except PyMongoError as e:
+            logger.error(f"Failed to create index: collection={spec.collection}, index={spec.name}, error={e}")
+
+    for collection_name, entry in report.items():
+        if entry["extra"]:
+            logger.warning(f"Unregistered indexes found: collection={collection_name}, indexes={entry['extra']}")
+
+    return created
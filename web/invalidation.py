@@ -0,0 +1,326 @@
+"""Cross-worker cache invalidation.
+
+Every worker keeps its in-process caches (pet ACLs, and whatever is cached per pet or
+per user later) coherent with writes made by other workers and nodes. A background
+watcher turns MongoDB writes into version bumps on the process-wide `bus`:
+
+- ("pet", pet_id) for changes to a pet or to any of its records, medications and
+  delete tombstones;
+- ("user", username) for changes to a user account.
+
+Caches subscribe to the bus and drop matching entries, or include `bus.version(...)`
+in their keys. Writes made by the current worker are published directly (see
+`invalidate_pet_access`), so they never wait for the watcher.
+
+The watcher tails a change stream when MongoDB runs as a replica set. On a
+standalone server (or mongomock) it polls the watched collections by their
+`updated_at` stamps (`deleted_at` for tombstones) instead. When the watcher may have
+missed events (stream errors, restarts), it calls `bus.publish_all()` so that every
+cache starts over. The stream is opened inside the watcher thread, so a MongoDB
+outage while a worker boots only delays the watcher instead of failing the worker.
+No watcher runs when every subscribed cache is disabled (PET_ACL_CACHE_TTL=0).
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from web.configs import INVALIDATION_CONFIG
+from web.indexes import RECORD_COLLECTIONS
+
+
+logger = logging.getLogger(__name__)
+
+TOMBSTONES_COLLECTION = "deleted_records"
+# Collections whose documents belong to a pet via their pet_id field
+PET_SCOPED_COLLECTIONS = [*RECORD_COLLECTIONS, "medications", TOMBSTONES_COLLECTION]
+WATCHED_COLLECTIONS = ["pets", "users", *PET_SCOPED_COLLECTIONS]
+
+# Polled writes may commit slightly after their stamp (and clocks drift), so every
+# poll re-reads this window; already seen documents are skipped
+POLL_OVERLAP = timedelta(seconds=5)
+
+# (scope, key); scope None means "everything"
+Subscriber = Callable[[Optional[str], Optional[str]], None]
+
+
+class InvalidationBus:
+    """Process-wide version counters for pets and users with change callbacks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._epoch = 0
+        self._subscribers: List[Subscriber] = []
+        self._enabled_checks: List[Callable[[], bool]] = []
+
+    def subscribe(self, callback: Subscriber, enabled: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Call `callback(scope, key)` on every bump and `callback(None, None)` on publish_all().
+
+        Args:
+            callback: Subscriber dropping invalidated cache entries
+            enabled: Tells whether the subscriber's cache is in use; always in use without it
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            self._enabled_checks.append(enabled or (lambda: True))
+
+    def has_enabled_subscribers(self) -> bool:
+        """True if some subscribed cache is in use, i.e. other workers' writes must be watched."""
+        with self._lock:
+            checks = list(self._enabled_checks)
+        return any(check() for check in checks)
+
+    def version(self, scope: str, key: str) -> Tuple[int, int]:
+        """Current version of a pet or user; changes whenever its data may have changed."""
+        with self._lock:
+            return self._epoch, self._versions.get((scope, key), 0)
+
+    def publish(self, scope: str, key: str) -> None:
+        """Bump the version of a pet ("pet", pet_id) or user ("user", username)."""
+        with self._lock:
+            self._versions[(scope, key)] = self._versions.get((scope, key), 0) + 1
+            subscribers = list(self._subscribers)
+        self._notify(subscribers, scope, key)
+
+    def publish_all(self) -> None:
+        """Invalidate everything, e.g. after the watcher may have missed changes."""
+        with self._lock:
+            self._epoch += 1
+            self._versions.clear()
+            subscribers = list(self._subscribers)
+        self._notify(subscribers, None, None)
+
+    @staticmethod
+    def _notify(subscribers: List[Subscriber], scope: Optional[str], key: Optional[str]) -> None:
+        for callback in subscribers:
+            try:
+                callback(scope, key)
+            except Exception as e:
+                logger.error(f"Invalidation subscriber failed: scope={scope}, key={key}, error={e}")
+
+
+bus = InvalidationBus()
+
+
+def document_scope(collection_name: str, document: Optional[dict]) -> Optional[Tuple[str, str]]:
+    """The (scope, key) a written document invalidates, or None if it cannot be told."""
+    if not document:
+        return None
+    if collection_name == "pets":
+        return ("pet", str(document["_id"])) if document.get("_id") is not None else None
+    if collection_name == "users":
+        return ("user", document["username"]) if document.get("username") else None
+    if collection_name in PET_SCOPED_COLLECTIONS and document.get("pet_id"):
+        return "pet", str(document["pet_id"])
+    return None
+
+
+def change_scope(change: dict) -> Optional[Tuple[str, str]]:
+    """
+    The (scope, key) of a change stream event.
+
+    Deleted records carry no pet_id, but their delete routes also insert a tombstone
+    (web/sync.py) whose insert event does. A deleted pet is identified by its _id.
+    """
+    collection_name = change.get("ns", {}).get("coll")
+    if change.get("operationType") == "delete":
+        return document_scope(collection_name, change.get("documentKey")) if collection_name == "pets" else None
+    return document_scope(collection_name, change.get("fullDocument"))
+
+
+class ChangeStreamWatcher:
+    """Publishes bumps for change stream events of the watched collections."""
+
+    def __init__(self, db, target: InvalidationBus = bus):
+        self.db = db
+        self.bus = target
+
+    def _pipeline(self) -> List[dict]:
+        return [
+            {"$match": {"ns.coll": {"$in": WATCHED_COLLECTIONS}}},
+            # Only the fields change_scope() reads travel over the wire
+            {
+                "$project": {
+                    "ns": 1,
+                    "operationType": 1,
+                    "documentKey": 1,
+                    "fullDocument._id": 1,
+                    "fullDocument.pet_id": 1,
+                    "fullDocument.username": 1,
+                }
+            },
+        ]
+
+    def open(self):
+        """Open the stream; raises OperationFailure on servers without change streams."""
+        return self.db.watch(self._pipeline(), full_document="updateLookup")
+
+    def run(self, stop: threading.Event, stream=None) -> None:
+        """
+        Consume events until `stop` is set.
+
+        The driver resumes the stream by itself after transient errors; an error that
+        reaches this loop means events may have been lost, so every cache is invalidated
+        and a new stream starts from now.
+        """
+        while not stop.is_set():
+            try:
+                with (stream if stream is not None else self.open()) as changes:
+                    stream = None
+                    while not stop.is_set() and changes.alive:
+                        change = changes.try_next()
+                        scope = change_scope(change) if change else None
+                        if scope:
+                            self.bus.publish(*scope)
+            except PyMongoError as e:
+                logger.warning(f"Change stream interrupted, invalidating all caches: {e}")
+                self.bus.publish_all()
+                stop.wait(INVALIDATION_CONFIG["poll_interval_seconds"])
+
+
+def _naive_utc(stamp) -> Optional[datetime]:
+    """Stamps are written both naive (utcnow) and timezone-aware; compare them as naive UTC."""
+    if not isinstance(stamp, datetime):
+        return None
+    if stamp.tzinfo is not None:
+        return stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return stamp
+
+
+class PollingWatcher:
+    """Publishes bumps for documents whose change stamp moved past the last poll."""
+
+    def __init__(self, db, target: InvalidationBus = bus, since: Optional[datetime] = None):
+        self.db = db
+        self.bus = target
+        start = since or datetime.utcnow()
+        self._marks: Dict[str, datetime] = {name: start for name in WATCHED_COLLECTIONS}
+        # (collection, _id, stamp) seen inside the overlap window
+        self._seen: Set[Tuple[str, object, datetime]] = set()
+
+    @staticmethod
+    def _stamp_field(collection_name: str) -> str:
+        return "deleted_at" if collection_name == TOMBSTONES_COLLECTION else "updated_at"
+
+    def poll_once(self) -> int:
+        """Read changes of every watched collection once; returns the number of bumps."""
+        bumps = 0
+        for collection_name in WATCHED_COLLECTIONS:
+            field = self._stamp_field(collection_name)
+            mark = self._marks[collection_name]
+            documents = self.db[collection_name].find(
+                {field: {"$gt": mark - POLL_OVERLAP}}, {"_id": 1, "pet_id": 1, "username": 1, field: 1}
+            )
+            for document in documents:
+                stamp = _naive_utc(document.get(field))
+                if stamp is None:
+                    continue
+                seen_key = (collection_name, document["_id"], stamp)
+                if seen_key in self._seen:
+                    continue
+                self._seen.add(seen_key)
+                mark = max(mark, stamp)
+                scope = document_scope(collection_name, document)
+                if scope:
+                    self.bus.publish(*scope)
+                    bumps += 1
+            self._marks[collection_name] = mark
+
+        horizon = min(self._marks.values()) - POLL_OVERLAP
+        self._seen = {entry for entry in self._seen if entry[2] > horizon}
+        return bumps
+
+    def run(self, stop: threading.Event) -> None:
+        """Poll every `poll_interval_seconds` until `stop` is set."""
+        while not stop.wait(INVALIDATION_CONFIG["poll_interval_seconds"]):
+            try:
+                self.poll_once()
+            except PyMongoError as e:
+                logger.warning(f"Invalidation poll failed, invalidating all caches: {e}")
+                self.bus.publish_all()
+
+
+_watcher_thread: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+
+def _select_watcher(db, mode: str):
+    """
+    Watcher for the configured mode and its opened stream; "auto" prefers change streams.
+
+    Raises:
+        PyMongoError: If the server cannot be reached
+    """
+    if mode in ("auto", "change_streams"):
+        watcher = ChangeStreamWatcher(db)
+        try:
+            return watcher, watcher.open()
+        except (OperationFailure, NotImplementedError, TypeError) as e:
+            # Standalone server ("$changeStream is only supported on replica sets") or mongomock
+            if mode == "change_streams":
+                raise
+            logger.info(f"Change streams unavailable, polling for invalidations: {e}")
+    return PollingWatcher(db), None
+
+
+def _run_watcher(db, mode: str, stop: threading.Event) -> None:
+    """Watcher thread: select the watcher, retrying while MongoDB is unreachable, and run it until `stop`."""
+    while not stop.is_set():
+        try:
+            watcher, stream = _select_watcher(db, mode)
+        except PyMongoError as e:
+            # Server unreachable (or change streams failing in change_streams mode): caches may
+            # have been filled meanwhile, so start them over and retry
+            logger.warning(f"Cache invalidation watcher not started, invalidating all caches: {e}")
+            bus.publish_all()
+            stop.wait(INVALIDATION_CONFIG["poll_interval_seconds"])
+            continue
+
+        logger.info(f"Cache invalidation watcher started: {type(watcher).__name__}")
+        if isinstance(watcher, ChangeStreamWatcher):
+            watcher.run(stop, stream)
+        else:
+            watcher.run(stop)
+        return
+
+
+def start_watcher(db, mode: Optional[str] = None) -> Optional[threading.Thread]:
+    """
+    Start this process's invalidation watcher thread (once per worker, after fork).
+
+    Does no I/O: the thread connects, so a MongoDB outage cannot fail the caller.
+
+    Returns:
+        The watcher thread, or None when invalidation is disabled or no cache needs it
+    """
+    global _watcher_thread
+    mode = mode or INVALIDATION_CONFIG["mode"]
+    if mode == "off":
+        return None
+    if not bus.has_enabled_subscribers():
+        logger.info("No cache needs invalidations, watcher not started")
+        return None
+    if _watcher_thread is not None and _watcher_thread.is_alive():
+        return _watcher_thread
+
+    _watcher_stop.clear()
+    _watcher_thread = threading.Thread(
+        target=_run_watcher, args=(db, mode, _watcher_stop), name="cache-invalidation", daemon=True
+    )
+    _watcher_thread.start()
+    return _watcher_thread
+
+
+def stop_watcher(timeout: float = 5.0) -> None:
+    """Stop the watcher thread started by start_watcher()."""
+    global _watcher_thread
+    _watcher_stop.set()
+    if _watcher_thread is not None:
+        _watcher_thread.join(timeout)
+    _watcher_thread = None
+
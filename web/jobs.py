@@ -0,0 +1,347 @@
+"""Background jobs stored in MongoDB, run by `python -m web.worker`.
+
+Routes enqueue work into the `jobs` collection and answer 202 with the job's status
+URL (`GET /api/jobs/<job_id>`) instead of exporting, optimizing photos or purging
+data inside a request bound by the gunicorn timeout. Handlers are registered with
+`@job_handler(kind)` next to the code they run.
+
+Claiming is a single `find_one_and_update` over jobs whose `run_at` has passed,
+highest priority first: it marks the job running, increments `attempts` and moves
+`run_at` one visibility timeout ahead. A worker dying mid-job therefore only delays
+the job; once `run_at` passes again another worker claims it. Handlers that may run
+longer than the visibility timeout (exports) call `renew(current_job())` as they make
+progress to move `run_at` ahead again. Finishing and renewing are fenced by
+`attempts`, so a worker whose lease expired cannot overwrite the attempt that
+replaced it; a failed renewal raises `LeaseLost` to stop the outdated attempt.
+
+A failed attempt is retried after JOBS_BACKOFF_SECONDS, doubled for every further
+failure, until JOBS_MAX_ATTEMPTS; `PermanentJobError` fails the job at once. Finished
+jobs expire after JOBS_RETENTION_HOURS (TTL index on `expires_at`), and the worker
+deletes export files of the same age.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, jsonify, request, url_for
+from flask_pydantic_spec import Response
+from pymongo import ReturnDocument
+
+import web.app as app  # to access patched app.db/app.fs in tests
+from web.app import api, logger
+from web.configs import JOBS_CONFIG
+from web.errors import error_response
+from web.messages import get_message
+from web.schemas import ErrorResponse, JobResponse
+from web.security import get_current_user, login_required
+from web.streaming import send_gridfs_file
+
+
+jobs_bp = Blueprint("jobs", __name__)
+
+JOBS_COLLECTION = "jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Photo work is awaited by the user who uploaded it; purges and cleanup are not
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+MAX_BACKOFF_SECONDS = 3600
+
+# Files produced by jobs (exports) are private and fetched once
+RESULT_CACHE_CONTROL = "private, no-cache"
+
+Handler = Callable[[dict], Optional[dict]]
+HANDLERS: Dict[str, Handler] = {}
+
+# Job whose handler runs in this thread (see current_job)
+_running = threading.local()
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying cannot fix."""
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another attempt took it over."""
+
+
+def job_handler(kind: str):
+    """Register the function running jobs of this kind; it gets the payload and returns the result (or None)."""
+
+    def decorator(func: Handler) -> Handler:
+        HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def _now() -> datetime:
+    # Naive UTC, as pymongo returns stored datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def jobs_enabled() -> bool:
+    """True if routes should hand work to the worker processes."""
+    return JOBS_CONFIG["enabled"]
+
+
+def wants_async() -> bool:
+    """True if jobs are enabled and the client asked for an asynchronous answer (`Prefer: respond-async`)."""
+    return jobs_enabled() and "respond-async" in request.headers.get("Prefer", "").lower()
+
+
+def result_expiry() -> datetime:
+    """Expiry of a job finished now, and of the files it produced."""
+    return _now() + timedelta(hours=JOBS_CONFIG["retention_hours"])
+
+
+def enqueue(kind: str, payload: dict, username: Optional[str] = None, priority: int = PRIORITY_NORMAL) -> dict:
+    """
+    Queue a job for the workers.
+
+    Returns:
+        dict: The stored job document
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    now = _now()
+    job = {
+        "kind": kind,
+        "payload": payload,
+        "username": username,
+        "priority": priority,
+        "status": QUEUED,
+        "attempts": 0,
+        "run_at": now,
+        "created_at": now,
+    }
+    job["_id"] = app.db[JOBS_COLLECTION].insert_one(job).inserted_id
+    logger.info(f"Job queued: id={job['_id']}, kind={kind}, user={username}")
+    return job
+
+
+def claim(worker_id: str) -> Optional[dict]:
+    """Atomically take the most urgent due job, or None if there is none."""
+    while True:
+        now = _now()
+        job = app.db[JOBS_COLLECTION].find_one_and_update(
+            {"status": {"$in": [QUEUED, RUNNING]}, "run_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "run_at": now + timedelta(seconds=JOBS_CONFIG["visibility_timeout_seconds"]),
+                    "worker": worker_id,
+                    "started_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", -1), ("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return None
+        if job["attempts"] <= JOBS_CONFIG["max_attempts"]:
+            return job
+        # The worker of the final attempt never finished it
+        _finish(job, FAILED, error=job.get("error") or "Visibility timeout expired")
+
+
+def _fenced(job: dict) -> dict:
+    """Filter matching the job only while this attempt still holds it."""
+    return {"_id": job["_id"], "status": RUNNING, "attempts": job["attempts"]}
+
+
+def current_job() -> Optional[dict]:
+    """The claimed job whose handler is running in this thread, or None outside `run_job`."""
+    return getattr(_running, "job", None)
+
+
+def renew(job: dict) -> None:
+    """
+    Extend a running job's lease by one visibility timeout from now.
+
+    Raises:
+        LeaseLost: If the lease already expired and another attempt claimed the job
+    """
+    run_at = _now() + timedelta(seconds=JOBS_CONFIG["visibility_timeout_seconds"])
+    # matched, not modified: a renewal within the same millisecond leaves run_at unchanged
+    if app.db[JOBS_COLLECTION].update_one(_fenced(job), {"$set": {"run_at": run_at}}).matched_count != 1:
+        raise LeaseLost(f"Job lease lost: id={job['_id']}, attempt={job['attempts']}")
+
+
+def _finish(job: dict, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+    now = _now()
+    update = {"status": status, "result": result, "error": error, "finished_at": now, "expires_at": result_expiry()}
+    return app.db[JOBS_COLLECTION].update_one(_fenced(job), {"$set": update}).modified_count == 1
+
+
+def complete(job: dict, result: Optional[dict] = None) -> bool:
+    """Mark the claimed job succeeded. False if its lease was lost to another attempt."""
+    return _finish(job, SUCCEEDED, result=result)
+
+
+def fail(job: dict, error: str, permanent: bool = False) -> bool:
+    """
+    Record a failed attempt: retry later with exponential backoff, or fail the job for good.
+
+    Returns:
+        bool: False if the lease was lost to another attempt
+    """
+    if permanent or job["attempts"] >= JOBS_CONFIG["max_attempts"]:
+        return _finish(job, FAILED, error=error)
+
+    delay = min(MAX_BACKOFF_SECONDS, JOBS_CONFIG["backoff_seconds"] * 2 ** (job["attempts"] - 1))
+    update = {"status": QUEUED, "run_at": _now() + timedelta(seconds=delay), "error": error}
+    return app.db[JOBS_COLLECTION].update_one(_fenced(job), {"$set": update}).modified_count == 1
+
+
+def run_job(job: dict) -> None:
+    """Run a claimed job's handler and record the outcome."""
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        fail(job, f"Unknown job kind: {job['kind']}", permanent=True)
+        return
+
+    _running.job = job
+    try:
+        result = handler(job["payload"])
+    except LeaseLost:
+        logger.warning(f"Job attempt abandoned after its lease expired: id={job['_id']}, kind={job['kind']}")
+    except PermanentJobError as e:
+        logger.warning(f"Job failed permanently: id={job['_id']}, kind={job['kind']}, error={e}")
+        fail(job, str(e), permanent=True)
+    except Exception as e:
+        logger.warning(f"Job attempt failed: id={job['_id']}, kind={job['kind']}, attempt={job['attempts']}, error={e}")
+        fail(job, str(e))
+    else:
+        if complete(job, result):
+            logger.info(f"Job succeeded: id={job['_id']}, kind={job['kind']}, attempt={job['attempts']}")
+        else:
+            logger.warning(f"Job finished after its lease expired: id={job['_id']}, kind={job['kind']}")
+    finally:
+        _running.job = None
+
+
+def run_next(worker_id: str) -> bool:
+    """Claim and run one job. Returns False if no job was due."""
+    job = claim(worker_id)
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def purge_expired_files() -> int:
+    """Delete files produced by jobs (exports) whose retention has passed. Returns the number deleted."""
+    deleted = 0
+    for grid_out in app.fs.find({"metadata.expires_at": {"$lte": _now()}}):
+        app.fs.delete(grid_out._id)
+        deleted += 1
+    return deleted
+
+
+def job_to_item(job: dict) -> dict:
+    """Public representation of a job (JobItem)."""
+    job_id = str(job["_id"])
+    result = job.get("result")
+    return {
+        "id": job_id,
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error"),
+        "result": result,
+        "status_url": url_for("jobs.get_job_status", job_id=job_id),
+        "download_url": (
+            url_for("jobs.download_job_result", job_id=job_id)
+            if job["status"] == SUCCEEDED and result and result.get("file_id")
+            else None
+        ),
+    }
+
+
+def accepted(message_key: str, job: dict, **fields):
+    """202 response for work handed to a job, pointing at its status URL."""
+    item = job_to_item(job)
+    response, status = get_message(message_key, status=202, job=item, **fields)
+    response.headers["Location"] = item["status_url"]
+    return response, status
+
+
+def _load_own_job(job_id: str, username: str) -> Optional[dict]:
+    """The job if it exists and was queued by this user."""
+    try:
+        job = app.db[JOBS_COLLECTION].find_one({"_id": ObjectId(job_id)})
+    except InvalidId:
+        return None
+    if job is None or job.get("username") != username:
+        return None
+    return job
+
+
+@jobs_bp.route("/api/jobs/<job_id>", methods=["GET"])
+@login_required
+@api.validate(
+    resp=Response(HTTP_200=JobResponse, HTTP_401=ErrorResponse, HTTP_404=ErrorResponse, HTTP_500=ErrorResponse),
+    tags=["jobs"],
+)
+def get_job_status(job_id):
+    """Get the state of a background job queued by the current user."""
+    username, auth_error = get_current_user()
+    if auth_error:
+        return auth_error[0], auth_error[1]
+
+    job = _load_own_job(job_id, username)
+    if job is None:
+        return error_response("job_not_found")
+    return jsonify({"job": job_to_item(job)})
+
+
+@jobs_bp.route("/api/jobs/<job_id>/download", methods=["GET"])
+@login_required
+@api.validate(
+    resp=Response(
+        HTTP_200=None,
+        HTTP_206=None,
+        HTTP_401=ErrorResponse,
+        HTTP_404=ErrorResponse,
+        HTTP_409=ErrorResponse,
+        HTTP_500=ErrorResponse,
+    ),
+    tags=["jobs"],
+)
+def download_job_result(job_id):
+    """Download the file produced by a finished job (exports)."""
+    username, auth_error = get_current_user()
+    if auth_error:
+        return auth_error[0], auth_error[1]
+
+    job = _load_own_job(job_id, username)
+    if job is None:
+        return error_response("job_not_found")
+    result = job.get("result") or {}
+    if job["status"] != SUCCEEDED or not result.get("file_id"):
+        return error_response("job_not_finished")
+
+    try:
+        grid_out = app.fs.get(ObjectId(result["file_id"]))
+    except Exception as e:
+        logger.warning(f"Job result file missing: id={job_id}, error={e}")
+        return error_response("job_not_found")
+
+    response = send_gridfs_file(grid_out, result["content_type"], result["file_id"], RESULT_CACHE_CONTROL)
+    response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{result['filename']}"
+    response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
+    return response
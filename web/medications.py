@@ -5,14 +5,17 @@ from flask_pydantic_spec import Request, Response
 from bson import ObjectId
 from bson.errors import InvalidId
 from datetime import datetime
+from typing import List, Optional
 
 import web.app as app
 from web.app import api
 from web.errors import error_response
 from web.decorators import require_pet_access, require_record_access
+from web.sync import record_deletions
+from web.rollups import apply_inserted, refresh_days
 from web.helpers import (
     parse_event_datetime_safe,
-    apply_pagination,
+    paginate_records,
 )
 from web.schemas import (
     MedicationCreate,
@@ -32,6 +35,87 @@ from web.schemas import (
 medications_bp = Blueprint("medications", __name__)
 
 
+def parse_client_datetime(client_datetime_str: Optional[str]) -> datetime:
+    """Client's local "now" (ISO or "YYYY-MM-DD HH:MM"); server UTC time if missing or malformed."""
+    if client_datetime_str:
+        try:
+            # Handle ISO format including potentially 'T' and maybe timezone 
+            # Simplest is to assume frontend sends ISO string
+            if 'T' in client_datetime_str:
+                return datetime.fromisoformat(client_datetime_str.replace('Z', '+00:00'))
+            # Fallback or simple format
+            return datetime.strptime(client_datetime_str, "%Y-%m-%d %H:%M")
+        except ValueError:
+            pass
+    return datetime.utcnow()
+
+
+def find_today_intakes(medications: List[dict], today_start: datetime) -> List[dict]:
+    """Intakes of the given medications logged since the start of the day, in one query."""
+    med_ids = [str(med["_id"]) for med in medications]
+    return list(app.db.medication_intakes.find({
+        "medication_id": {"$in": med_ids},
+        "date_time": {"$gte": today_start}
+    }))
+
+
+def build_upcoming_doses(medications: List[dict], now: datetime, today_intakes: List[dict]) -> List[dict]:
+    """Scheduled doses of today that have not been taken yet (dashboard)."""
+    upcoming = []
+    current_day = now.weekday()
+
+    # Group intakes by medication_id
+    taken_times_by_med = {}
+    for intake in today_intakes:
+        med_id = intake.get("medication_id")
+        if med_id not in taken_times_by_med:
+            taken_times_by_med[med_id] = set()
+        if intake.get("date_time"):
+            intake_time = intake["date_time"].strftime("%H:%M")
+            taken_times_by_med[med_id].add(intake_time)
+
+    for med in medications:
+        schedule = med.get("schedule", {})
+        sched_days = schedule.get("days", [])
+        sched_times = schedule.get("times", [])
+
+        if not sched_days or not sched_times:
+            continue
+
+        med_id_str = str(med["_id"])
+        taken_times = taken_times_by_med.get(med_id_str, set())
+
+        # Find next occurrence
+        # We'll return all doses for 'today' that haven't been taken yet
+        if current_day in sched_days:
+            for t in sched_times:
+                # Skip if already taken today
+                if t in taken_times:
+                    continue
+
+                # Check if time is overdue
+                try:
+                    dose_hour, dose_min = map(int, t.split(':'))
+                    dose_time = now.replace(hour=dose_hour, minute=dose_min, second=0, microsecond=0)
+                    is_overdue = now > dose_time
+                except (ValueError, TypeError):
+                    is_overdue = False
+
+                upcoming.append({
+                    "medication_id": med_id_str,
+                    "name": med["name"],
+                    "type": med.get("type", "pill"),
+                    "time": t,
+                    "date": now.strftime("%Y-%m-%d"),
+                    "is_overdue": is_overdue,
+                    "inventory_warning": bool(
+                        med.get("inventory_enabled", False) and 
+                        (med.get("inventory_current") or 0) <= (med.get("inventory_warning_threshold") or 0)
+                    )
+                })
+    return upcoming
+
+
 @medications_bp.route("/api/medications", methods=["POST"])
 @api.validate(
     body=Request(MedicationCreate),
@@ -49,6 +133,7 @@ def add_medication():
         medication_data = data.model_dump()
         medication_data["username"] = username
         medication_data["created_at"] = datetime.utcnow()
+        medication_data["updated_at"] = medication_data["created_at"]
 
         result = app.db.medications.insert_one(medication_data)
         
@@ -125,16 +210,11 @@ def get_medications():
         
         # Process results
         for doc in meds:
-            doc["_id"] = str(doc["_id"])
-            med_id_str = doc["_id"]
+            med_id_str = str(doc["_id"])
             
             last_intake = last_intakes.get(med_id_str)
-            if last_intake and last_intake.get("date_time"):
-                dt = last_intake["date_time"]
-                doc["last_taken_at"] = dt.strftime("%Y-%m-%d %H:%M")
-            else:
-                doc["last_taken_at"] = None
-            
+            # ObjectId/datetime values are encoded by the app JSON provider
+            doc["last_taken_at"] = last_intake.get("date_time") if last_intake else None
             doc["intakes_today"] = today_counts.get(med_id_str, 0)
 
         return jsonify({"medications": meds})
@@ -162,6 +242,7 @@ def update_medication(id):
         if not update_data:
             return error_response("validation_error_no_update_data")
 
+        update_data["updated_at"] = datetime.utcnow()
         app.db.medications.update_one({"_id": medication_id}, {"$set": update_data})
         
         return jsonify({"message": "Medication updated"})
@@ -183,6 +264,11 @@ def delete_medication(id):
         medication_id = medication["_id"]
         username = g.username
 
+        pet_id = medication["pet_id"]
+        intakes = list(app.db.medication_intakes.find({"medication_id": id}, {"_id": 1, "date_time": 1}))
+        intake_ids = [doc["_id"] for doc in intakes]
+        intake_times = [doc.get("date_time") for doc in intakes]
+
         # Atomic deletion: use session-based transaction if replica set is available
         # Otherwise, use best-effort approach with proper error handling
         try:
@@ -201,6 +287,10 @@ def delete_medication(id):
                     if med_result.deleted_count == 0:
                         # Should not happen as we already checked existence
                         raise Exception("Medication not found during deletion")
+
+                    record_deletions("medication_intakes", pet_id, intake_ids, session=session)
+                    refresh_days("medication_intakes", pet_id, intake_times, session=session)
+                    record_deletions("medications", pet_id, [medication_id], session=session)
                     
                     app.logger.info(
                         f"Deleted medication {id} and {intakes_result.deleted_count} related intakes"
@@ -220,9 +310,12 @@ def delete_medication(id):
                 med_result = app.db.medications.delete_one({"_id": medication_id})
                 if med_result.deleted_count == 0:
                     return error_response("not_found")
+                record_deletions("medications", pet_id, [medication_id])
                 
                 try:
                     intakes_result = app.db.medication_intakes.delete_many({"medication_id": id})
+                    record_deletions("medication_intakes", pet_id, intake_ids)
+                    refresh_days("medication_intakes", pet_id, intake_times)
                     app.logger.info(
                         f"Deleted medication {id} and {intakes_result.deleted_count} related intakes (fallback)"
                     )
@@ -291,7 +384,7 @@ def log_intake(id):
                 # Use atomic update with condition to prevent race conditions
                 result = app.db.medications.update_one(
                     {"_id": medication_id, "inventory_current": current_inventory},
-                    {"$set": {"inventory_current": new_inventory}}
+                    {"$set": {"inventory_current": new_inventory, "updated_at": datetime.utcnow()}}
                 )
                 
                 if result.matched_count > 0:
@@ -321,8 +414,10 @@ def log_intake(id):
             "username": username,
             "created_at": datetime.utcnow()
         }
+        intake_data["updated_at"] = intake_data["created_at"]
 
         app.db.medication_intakes.insert_one(intake_data)
+        apply_inserted("medication_intakes", [intake_data])
 
         return jsonify({"message": "Intake logged"}), 201
     except Exception as e:
@@ -333,7 +428,7 @@ def log_intake(id):
 @medications_bp.route("/api/medications/intakes", methods=["GET"])
 @api.validate(
     query=PetIdPaginationQuery,
-    resp=Response(HTTP_200=MedicationIntakeListResponse, HTTP_403=ErrorResponse),
+    resp=Response(HTTP_200=MedicationIntakeListResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
     tags=["medications"],
 )
 @require_pet_access
@@ -342,31 +437,19 @@ def get_medication_intakes():
     try:
         query_params = request.context.query  # type: ignore[attr-defined]
         pet_id = g.pet_id
-        page = query_params.page
-        page_size = query_params.page_size
 
-        total = app.db.medication_intakes.count_documents({"pet_id": pet_id})
-        
-        base_query = app.db.medication_intakes.find({"pet_id": pet_id}).sort("date_time", -1)
-        paginated_query, _ = apply_pagination(base_query, page, page_size)
-        intakes = list(paginated_query)
+        intakes, pagination, page_error = paginate_records("medication_intakes", {"pet_id": pet_id}, query_params)
+        if page_error:
+            return page_error[0], page_error[1]
 
         # Enhance with medication name
         med_ids = list(set(i["medication_id"] for i in intakes))
         meds = {str(m["_id"]): m["name"] for m in app.db.medications.find({"_id": {"$in": [ObjectId(mid) for mid in med_ids]}})}
 
         for i in intakes:
-            i["_id"] = str(i["_id"])
             i["medication_name"] = meds.get(i["medication_id"], "Unknown")
-            if isinstance(i.get("date_time"), datetime):
-                i["date_time"] = i["date_time"].strftime("%Y-%m-%d %H:%M")
         
-        return jsonify({
-            "intakes": intakes,
-            "page": page,
-            "page_size": page_size,
-            "total": total
-        })
+        return jsonify({"intakes": intakes, **pagination})
     except Exception as e:
         app.logger.error(f"Error fetching intakes: {e}")
         return error_response("internal_error")
@@ -415,7 +498,7 @@ def delete_intake(id):
                         "_id": medication_id,
                         "inventory_current": current_inventory
                     },
-                    {"$set": {"inventory_current": new_inventory}}
+                    {"$set": {"inventory_current": new_inventory, "updated_at": datetime.utcnow()}}
                 )
                 
                 if result.matched_count > 0:
@@ -423,6 +506,8 @@ def delete_intake(id):
                 # If matched_count == 0, Loop will retry fetch and update
 
         app.db.medication_intakes.delete_one({"_id": intake_id})
+        record_deletions("medication_intakes", intake["pet_id"], [intake_id])
+        refresh_days("medication_intakes", intake["pet_id"], [intake.get("date_time")])
         
         return jsonify({"message": "Intake deleted"})
     except Exception as e:
@@ -442,92 +527,17 @@ def get_upcoming_doses():
     try:
         query_params = request.context.query
         pet_id = g.pet_id
-        client_datetime_str = query_params.client_datetime
 
         # Fetch only active medications
         medications = list(app.db.medications.find({"pet_id": pet_id, "is_active": True}))
         
         if not medications:
             return jsonify({"doses": []})
-        
-        
-        upcoming = []
-        
-        # Determine "now" and "today" based on client datetime
-        if client_datetime_str:
-            try:
-                # Handle ISO format including potentially 'T' and maybe timezone 
-                # Simplest is to assume frontend sends ISO string
-                if 'T' in client_datetime_str:
-                    now = datetime.fromisoformat(client_datetime_str.replace('Z', '+00:00'))
-                else:
-                    # Fallback or simple format
-                    now = datetime.strptime(client_datetime_str, "%Y-%m-%d %H:%M")
-            except ValueError:
-                now = datetime.utcnow()
-        else:
-            now = datetime.utcnow()
 
-        current_day = now.weekday()
-        today_start = datetime(now.year, now.month, now.day)
-        
-        # Optimize: batch fetch all today's intakes in one query
-        med_ids = [str(med["_id"]) for med in medications]
-        today_intakes_all = list(app.db.medication_intakes.find({
-            "medication_id": {"$in": med_ids},
-            "date_time": {"$gte": today_start}
-        }))
-        
-        # Group intakes by medication_id
-        taken_times_by_med = {}
-        for intake in today_intakes_all:
-            med_id = intake.get("medication_id")
-            if med_id not in taken_times_by_med:
-                taken_times_by_med[med_id] = set()
-            if intake.get("date_time"):
-                intake_time = intake["date_time"].strftime("%H:%M")
-                taken_times_by_med[med_id].add(intake_time)
-        
-        for med in medications:
-            schedule = med.get("schedule", {})
-            sched_days = schedule.get("days", [])
-            sched_times = schedule.get("times", [])
-            
-            if not sched_days or not sched_times:
-                continue
-                
-            med_id_str = str(med["_id"])
-            taken_times = taken_times_by_med.get(med_id_str, set())
-            
-            # Find next occurrence
-            # We'll return all doses for 'today' that haven't been taken yet
-            if current_day in sched_days:
-                for t in sched_times:
-                    # Skip if already taken today
-                    if t in taken_times:
-                        continue
-                    
-                    # Check if time is overdue
-                    try:
-                        dose_hour, dose_min = map(int, t.split(':'))
-                        dose_time = now.replace(hour=dose_hour, minute=dose_min, second=0, microsecond=0)
-                        is_overdue = now > dose_time
-                    except (ValueError, TypeError):
-                        is_overdue = False
-                    
-                    upcoming.append({
-                        "medication_id": med_id_str,
-                        "name": med["name"],
-                        "type": med.get("type", "pill"),
-                        "time": t,
-                        "date": now.strftime("%Y-%m-%d"),
-                        "is_overdue": is_overdue,
-                        "inventory_warning": bool(
-                            med.get("inventory_enabled", False) and 
-                            (med.get("inventory_current") or 0) <= (med.get("inventory_warning_threshold") or 0)
-                        )
-                    })
-        
+        now = parse_client_datetime(query_params.client_datetime)
+        today_intakes = find_today_intakes(medications, datetime(now.year, now.month, now.day))
+        upcoming = build_upcoming_doses(medications, now, today_intakes)
+
         return jsonify({"doses": upcoming})
     except Exception as e:
         app.logger.error(f"Error fetching upcoming doses: {e}")
@@ -62,6 +62,8 @@ MESSAGES: Dict[str, MessageDef] = {
     "ear_cleaning_created": MessageDef("Запись о чистке ушей создана"),
     "ear_cleaning_updated": MessageDef("Запись о чистке ушей обновлена"),
     "ear_cleaning_deleted": MessageDef("Запись о чистке ушей удалена"),
+    # Background jobs
+    "export_queued": MessageDef("Экспорт поставлен в очередь"),
 }
 
 
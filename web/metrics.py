@@ -0,0 +1,339 @@
+"""Request-scoped instrumentation exported in the Prometheus text format.
+
+Collected when METRICS_ENABLED is set:
+- latency histogram and request count per route (url rule, not raw path) and method;
+- MongoDB command count/duration (pymongo CommandListener) and commands per request;
+- GridFS bytes read, time spent in Pillow, and time and pixel memory per photo upload stage.
+
+Every gunicorn worker keeps its own registry. With METRICS_MULTIPROC_DIR set, workers
+periodically write snapshots into that directory and `/metrics` sums all of them, so
+any worker can answer the scrape for the whole server. When disabled, every hook
+returns after a single flag check and no command listener is attached to the client.
+"""
+
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, List, Tuple
+
+from flask import Blueprint, Response, g, has_request_context, request
+from pymongo import monitoring
+
+from web.configs import METRICS_CONFIG
+from web.errors import error_response
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+ENABLED = METRICS_CONFIG["enabled"]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+MEGABYTE = 1024 * 1024
+BYTES_BUCKETS = tuple(size * MEGABYTE for size in (1, 4, 16, 32, 64, 128, 256, 512))
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "petzy_http_requests_total": ("counter", "HTTP requests by route, method and status.", None),
+    "petzy_http_request_duration_seconds": ("histogram", "HTTP request latency by route and method.", LATENCY_BUCKETS),
+    "petzy_http_request_mongo_commands": ("histogram", "MongoDB commands issued per HTTP request by route.", COUNT_BUCKETS),
+    "petzy_mongo_commands_total": ("counter", "MongoDB commands by command name.", None),
+    "petzy_mongo_command_failures_total": ("counter", "Failed MongoDB commands by command name.", None),
+    "petzy_mongo_command_duration_seconds": ("histogram", "MongoDB command duration by command name.", LATENCY_BUCKETS),
+    "petzy_gridfs_read_bytes_total": ("counter", "Bytes read from GridFS files.", None),
+    "petzy_pillow_duration_seconds": ("histogram", "Time spent decoding/resizing/encoding images by operation.", LATENCY_BUCKETS),
+    "petzy_image_stage_bytes": ("histogram", "Peak pixel memory of each photo upload stage.", BYTES_BUCKETS),
+}
+
+SNAPSHOT_PATTERN = "metrics-*.json"
+# Sum of the snapshots of every exited worker (see fold_snapshot)
+DEAD_SNAPSHOT = "metrics-dead.json"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0.0] * (len(buckets) + 2)
+            series[bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict:
+        """JSON-serializable copy of every series."""
+        with self._lock:
+            return {
+                "counters": [[name, list(map(list, labels)), value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, list(map(list, labels)), list(series)] for (name, labels), series in self.histograms.items()
+                ],
+            }
+
+    def merge(self, snapshot: dict) -> None:
+        """Add the series of a snapshot to this registry."""
+        with self._lock:
+            for name, labels, value in snapshot.get("counters", []):
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0.0) + value
+            for name, labels, series in snapshot.get("histograms", []):
+                key = (name, tuple(map(tuple, labels)))
+                current = self.histograms.get(key)
+                self.histograms[key] = list(series) if current is None else [a + b for a, b in zip(current, series)]
+
+
+registry = MetricsRegistry()
+_last_flush = 0.0
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(source: MetricsRegistry) -> str:
+    """Render a registry in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        if metric_type == "counter":
+            series = sorted((labels, value) for (metric, labels), value in source.counters.items() if metric == name)
+        else:
+            series = sorted((labels, value) for (metric, labels), value in source.histograms.items() if metric == name)
+        if not series:
+            continue
+
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in series:
+            if metric_type == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip((*buckets, "+Inf"), value[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels((*labels, ('le', le)))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+def _snapshot_path(directory: str, pid: int = None) -> str:
+    return os.path.join(directory, f"metrics-{pid or os.getpid()}.json")
+
+
+def _write_snapshot(path: str, snapshot: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    # Readers never see a half-written file
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def flush_snapshot(force: bool = False) -> None:
+    """Write this worker's snapshot into METRICS_MULTIPROC_DIR (at most every flush_seconds unless forced)."""
+    global _last_flush
+    directory = METRICS_CONFIG["multiproc_dir"]
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < METRICS_CONFIG["flush_seconds"]:
+        return
+    _last_flush = now
+
+    os.makedirs(directory, exist_ok=True)
+    _write_snapshot(_snapshot_path(directory), registry.snapshot())
+
+
+def fold_snapshot(directory: str, pid: int) -> None:
+    """
+    Add the snapshot of an exited worker to the dead workers' total and remove it.
+
+    Called from the gunicorn master (child_exit), one worker at a time, so scrapes read
+    one file per live worker plus one, and a reused pid starts from an empty snapshot.
+    """
+    path = _snapshot_path(directory, pid)
+    if not os.path.exists(path):
+        return
+    dead = MetricsRegistry()
+    dead_path = os.path.join(directory, DEAD_SNAPSHOT)
+    dead.merge(_read_snapshot(dead_path))
+    dead.merge(_read_snapshot(path))
+    _write_snapshot(dead_path, dead.snapshot())
+    os.remove(path)
+
+
+def collect() -> MetricsRegistry:
+    """Registry to export: this worker's, or the sum of every worker snapshot in METRICS_MULTIPROC_DIR."""
+    directory = METRICS_CONFIG["multiproc_dir"]
+    if not directory:
+        return registry
+
+    flush_snapshot(force=True)
+    combined = MetricsRegistry()
+    # Exited workers are folded into DEAD_SNAPSHOT, so counters stay monotonic across worker restarts
+    for path in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)):
+        combined.merge(_read_snapshot(path))
+    return combined
+
+
+def clear_snapshots(directory: str) -> None:
+    """Remove snapshots left by a previous server run (called from gunicorn on_starting)."""
+    for path in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)):
+        os.remove(path)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Count and time MongoDB commands, attributing them to the current request."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        if ENABLED:
+            registry.inc("petzy_mongo_command_failures_total", (("command", event.command_name),))
+        self._record(event)
+
+    @staticmethod
+    def _record(event):
+        if not ENABLED:
+            return
+        labels = (("command", event.command_name),)
+        registry.inc("petzy_mongo_commands_total", labels)
+        registry.observe("petzy_mongo_command_duration_seconds", event.duration_micros / 1_000_000, labels)
+        # pymongo calls listeners on the thread/greenlet that issued the command
+        if has_request_context():
+            g.metrics_mongo_commands = g.get("metrics_mongo_commands", 0) + 1
+
+
+def mongo_event_listeners() -> list:
+    """Command listeners for MongoClient(event_listeners=...); empty when metrics are disabled."""
+    return [MongoCommandListener()] if ENABLED else []
+
+
+def record_gridfs_read(size: int) -> None:
+    """Count bytes read from a GridFS file."""
+    if ENABLED:
+        registry.inc("petzy_gridfs_read_bytes_total", (), size)
+
+
+@contextmanager
+def pillow_timer(operation: str):
+    """Time a block of Pillow work."""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("petzy_pillow_duration_seconds", time.perf_counter() - started, (("operation", operation),))
+
+
+def record_image_stage(stage: str, seconds: float, peak_bytes: int) -> None:
+    """Record duration and peak pixel memory of a photo upload stage."""
+    if ENABLED:
+        registry.observe("petzy_pillow_duration_seconds", seconds, (("operation", f"upload_{stage}"),))
+        registry.observe("petzy_image_stage_bytes", peak_bytes, (("stage", stage),))
+
+
+def timed_pillow(operation: str):
+    """Decorator form of pillow_timer for image helpers."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with pillow_timer(operation):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    """Remember when the request started."""
+    if ENABLED:
+        g.metrics_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def record_request(response):
+    """Record latency, status and Mongo command count of the finished request."""
+    if not ENABLED or "metrics_started" not in g:
+        return response
+
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    labels = (("route", route), ("method", request.method))
+    registry.inc("petzy_http_requests_total", (*labels, ("status", str(response.status_code))))
+    registry.observe("petzy_http_request_duration_seconds", time.perf_counter() - g.metrics_started, labels)
+    registry.observe("petzy_http_request_mongo_commands", g.get("metrics_mongo_commands", 0), (("route", route),))
+    flush_snapshot()
+    return response
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint (404 while metrics are disabled)."""
+    if not ENABLED:
+        return error_response("not_found")
+
+    token = METRICS_CONFIG["token"]
+    if token:
+        auth_header = request.headers.get("Authorization", "")
+        provided = auth_header[len("Bearer ") :] if auth_header.startswith("Bearer ") else ""
+        if not hmac.compare_digest(provided.encode(), token.encode()):
+            return error_response("unauthorized")
+
+    return Response(render(collect()), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+if ENABLED and METRICS_CONFIG["multiproc_dir"]:
+    # Keep the last requests of the process; gunicorn workers exit through os._exit,
+    # so gunicorn.conf.py flushes them from its worker_exit hook instead
+    atexit.register(flush_snapshot, True)
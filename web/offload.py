@@ -0,0 +1,52 @@
+"""Offloading of CPU-bound work (Pillow) out of the request greenlet.
+
+Under the gevent worker (GUNICORN_WORKER_CLASS=gevent) all requests of a worker share
+one OS thread, so a photo re-encode would stall every other request in that worker.
+`run_cpu_bound` runs such calls in gevent's native thread pool (bounded by
+OFFLOAD_THREADS) and only suspends the calling greenlet; Pillow releases the GIL, so
+the work really runs in parallel with the event loop. bcrypt has its own bounded pool
+(web/passwords.py).
+
+Under the default sync worker each request already owns its worker process, so the
+call simply runs inline.
+"""
+
+import logging
+from typing import Callable, TypeVar
+
+from web.configs import OFFLOAD_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def gevent_active() -> bool:
+    """True if the process was monkey-patched by gevent (gunicorn gevent worker)."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+
+def _gevent_threadpool():
+    """Return the hub's native thread pool, sized from OFFLOAD_CONFIG."""
+    import gevent
+
+    pool = gevent.get_hub().threadpool
+    if pool.maxsize != OFFLOAD_CONFIG["threads"]:
+        pool.maxsize = OFFLOAD_CONFIG["threads"]
+    return pool
+
+
+def run_cpu_bound(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a CPU-bound callable without blocking other requests of the worker.
+
+    Exceptions raised by `func` propagate to the caller unchanged.
+    """
+    if not gevent_active():
+        return func(*args, **kwargs)
+    return _gevent_threadpool().apply(func, args, kwargs)
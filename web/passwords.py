@@ -0,0 +1,174 @@
+"""Password hashing on a bounded pool with an auto-calibrated bcrypt cost.
+
+bcrypt checks and hashes run on a small per-worker pool (PASSWORD_HASH_THREADS native
+threads; gevent's thread pool under the gevent worker) instead of the request thread.
+At most PASSWORD_HASH_QUEUE further calls may wait for it; beyond that a call fails
+fast with `PasswordHashingBusy`, which the app turns into 503 + Retry-After, so a
+login storm cannot pin every worker while other routes starve. The limit is per
+process: only workers serving concurrent requests (gevent, gthread) can reach it; a
+sync worker admits one call at a time and spends the bcrypt time on its request.
+
+The bcrypt cost is measured once per worker: the highest cost (within
+min_rounds..max_rounds) whose hash time stays under `target_ms`, unless BCRYPT_ROUNDS
+fixes it. `target_ms` only raises the cost above min_rounds. min_rounds is bcrypt's default cost 12, so calibration never picks a cost
+weaker than existing hashes. A successful login rehashes a password stored with a
+lower cost only; hashes are never downgraded, so workers whose measurements differ
+cannot rehash the same password back and forth.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+import bcrypt
+
+from web.configs import PASSWORD_CONFIG
+from web.offload import gevent_active
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(Exception):
+    """The password pool and its queue are full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hashing is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordPool:
+    """Bounded executor for bcrypt calls with a queue-depth limit."""
+
+    def __init__(self, threads: int, queue_depth: int):
+        self.threads = threads
+        self.queue_depth = queue_depth
+        self._lock = threading.Lock()
+        self._admitted = 0
+        # Average duration of one call, for Retry-After
+        self._average_seconds = 0.25
+        self._executor = None
+        self._executor_pid: Optional[int] = None
+
+    def _get_executor(self):
+        # Created lazily in each worker: threads of a pool created before the fork are gone
+        if self._executor is None or self._executor_pid != os.getpid():
+            if gevent_active():
+                from gevent.threadpool import ThreadPool
+
+                self._executor = ThreadPool(self.threads)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="bcrypt")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Seconds until the calls ahead of a new one are likely done."""
+        return max(1, math.ceil(self._average_seconds * self._admitted / self.threads))
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Run `func(*args)` on the pool and wait for its result.
+
+        Raises:
+            PasswordHashingBusy: If `threads + queue_depth` calls are already admitted
+        """
+        with self._lock:
+            if self._admitted >= self.threads + self.queue_depth:
+                raise PasswordHashingBusy(self.retry_after())
+            self._admitted += 1
+            executor = self._get_executor()
+
+        started = time.perf_counter()
+        try:
+            if isinstance(executor, ThreadPoolExecutor):
+                return executor.submit(func, *args).result()
+            return executor.apply(func, args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._admitted -= 1
+                self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+
+
+password_pool = PasswordPool(PASSWORD_CONFIG["threads"], PASSWORD_CONFIG["queue_depth"])
+
+# Hash timings taken per calibration; the fastest one is the least disturbed by other load
+CALIBRATION_SAMPLES = 3
+
+_calibrated_rounds: Optional[int] = None
+_calibration_lock = threading.Lock()
+
+
+def _time_hash(rounds: int) -> float:
+    """Seconds one bcrypt hash with this cost takes here."""
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds))
+    return time.perf_counter() - started
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """
+    Highest bcrypt cost whose hash time stays under `target_ms`, or `min_rounds` if
+    even that cost takes longer (logged as a warning).
+
+    Each extra round doubles the time, so the fastest of CALIBRATION_SAMPLES
+    measurements at `min_rounds` is extrapolated. Never below `min_rounds`, even on
+    slow hardware. The measurements run on the password pool like any other hash,
+    so they never stall the request thread (or the gevent hub).
+    """
+    samples = [password_pool.run(_time_hash, min_rounds) for _ in range(CALIBRATION_SAMPLES)]
+    seconds = max(min(samples), 1e-6)
+    if seconds * 1000 > target_ms:
+        logger.warning(
+            f"bcrypt cost {min_rounds} takes {seconds * 1000:.0f}ms, over the {target_ms:.0f}ms target; "
+            f"using the minimum cost {min_rounds}"
+        )
+    extra = math.floor(math.log2(target_ms / 1000 / seconds)) if seconds * 1000 < target_ms else 0
+    rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+    logger.info(f"bcrypt cost calibrated: rounds={rounds}, {min_rounds} rounds took {seconds * 1000:.0f}ms")
+    return rounds
+
+
+def bcrypt_rounds() -> int:
+    """bcrypt cost for new hashes: BCRYPT_ROUNDS, or calibrated once per worker."""
+    global _calibrated_rounds
+    if PASSWORD_CONFIG["rounds"]:
+        return PASSWORD_CONFIG["rounds"]
+    if _calibrated_rounds is None:
+        with _calibration_lock:
+            if _calibrated_rounds is None:
+                _calibrated_rounds = calibrate_rounds(
+                    PASSWORD_CONFIG["target_ms"], PASSWORD_CONFIG["min_rounds"], PASSWORD_CONFIG["max_rounds"]
+                )
+    return _calibrated_rounds
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of a password with the current cost."""
+    salt = bcrypt.gensalt(bcrypt_rounds())
+    return password_pool.run(bcrypt.hashpw, password.encode(), salt).decode()
+
+
+def check_password(password: str, password_hash: str) -> bool:
+    """True if the password matches the stored bcrypt hash."""
+    return password_pool.run(bcrypt.checkpw, password.encode(), password_hash.encode())
+
+
+def hash_rounds(password_hash: str) -> Optional[int]:
+    """Cost a bcrypt hash was made with ("$2b$12$..." -> 12)."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if the hash was made with a lower cost than new hashes get."""
+    return (hash_rounds(password_hash) or 0) < bcrypt_rounds()
@@ -1,18 +1,31 @@
 """Pets management routes (API)."""
 
 from datetime import datetime, timezone
-from io import BytesIO
+from typing import List, Optional, Tuple
 
-from PIL import Image
 from bson import ObjectId
 from bson.errors import InvalidId
-from flask import Blueprint, jsonify, make_response, request, url_for
+from flask import Blueprint, jsonify, request, url_for
 from flask_pydantic_spec import Request, Response
 
 from web.app import api, logger  # shared logger and api
 from web.security import login_required, get_current_user
 import web.app as app  # to access patched app.db/app.fs in tests
-from web.helpers import get_pet_and_validate, parse_date, optimize_image
+from web.helpers import (
+    get_pet_and_validate,
+    has_pet_access,
+    invalidate_pet_access,
+    load_pet,
+    parse_date,
+)
+from web.conditional import conditional_list, not_modified
+from web.images import ImageTooLarge, check_image_size, optimize_image
+from web.jobs import PRIORITY_HIGH, PRIORITY_LOW, PermanentJobError, accepted, enqueue, job_handler, jobs_enabled
+from web.metrics import record_gridfs_read
+from web.offload import run_cpu_bound
+from web.sync import record_deletions
+from web.renditions import delete_renditions, find_rendition, get_or_create_rendition, pregenerate_renditions
+from web.streaming import send_bytes, send_gridfs_file
 from web.errors import error_response
 from web.messages import get_message
 from web.pydantic_helpers import validate_request_data
@@ -30,6 +43,25 @@ from web.schemas import (
 
 pets_bp = Blueprint("pets", __name__)
 
+# A photo_file_id never changes content, so photo responses can be cached forever
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Collections holding records of a pet, deleted with it
+PET_RELATED_COLLECTIONS = [
+    "asthma_attacks",
+    "defecations",
+    "weights",
+    "feedings",
+    "litter_changes",
+    "eye_drops",
+    "ear_cleaning",
+    "tooth_brushing",
+    "medication_intakes",
+    "medications",
+    "deleted_records",
+    "daily_rollups",
+]
+
 # Default tiles settings (alphabetical order in Russian)
 DEFAULT_TILES_SETTINGS = {
     "order": [
@@ -62,6 +94,16 @@ def get_tiles_settings(pet: dict) -> dict:
     return DEFAULT_TILES_SETTINGS
 
 
+def pet_related_queries(pet_id: str) -> List[Tuple[str, dict]]:
+    """(collection, query) pairs matching every record that belongs to a pet, except its own delete tombstone."""
+    return [
+        (collection_name, {"pet_id": pet_id, "collection": {"$ne": "pets"}})
+        if collection_name == "deleted_records"
+        else (collection_name, {"pet_id": pet_id})
+        for collection_name in PET_RELATED_COLLECTIONS
+    ]
+
+
 def convert_objectid_to_str(obj):
     """Recursively convert all ObjectId instances to strings."""
     if isinstance(obj, ObjectId):
@@ -73,9 +115,164 @@ def convert_objectid_to_str(obj):
     return obj
 
 
+def store_pet_photo(photo_file) -> str:
+    """
+    Optimize an uploaded photo, store it in GridFS with its preset renditions and return its id.
+
+    With background jobs enabled the upload is stored as is; the caller queues its
+    optimization (`queue_photo_optimization`) once the pet references it.
+
+    Raises:
+        ImageTooLarge: If the photo has more pixels than accepted (nothing is stored)
+    """
+    if jobs_enabled():
+        check_image_size(photo_file)
+        return str(app.fs.put(photo_file, filename=photo_file.filename, content_type=photo_file.content_type))
+
+    # Optimize image to WebP format
+    optimized_result = run_cpu_bound(optimize_image, photo_file)
+    if optimized_result:
+        optimized_file, content_type = optimized_result
+        # Generate filename with .webp extension
+        original_filename = photo_file.filename
+        filename_without_ext = original_filename.rsplit(".", 1)[0] if "." in original_filename else original_filename
+        optimized_filename = f"{filename_without_ext}.webp"
+
+        photo_file_id = str(
+            app.fs.put(
+                optimized_file,
+                filename=optimized_filename,
+                content_type=content_type,
+            )
+        )
+        # Render the sizes the frontend asks for now, so photo requests never resize
+        pregenerate_renditions(app.fs, photo_file_id, optimized_file)
+        return photo_file_id
+
+    # Fallback to original file if optimization fails
+    return str(
+        app.fs.put(
+            photo_file,
+            filename=photo_file.filename,
+            content_type=photo_file.content_type,
+        )
+    )
+
+
+def delete_pet_photo(photo_file_id, pet_id) -> None:
+    """Delete a pet photo and its cached renditions from GridFS (best-effort)."""
+    try:
+        app.fs.delete(ObjectId(photo_file_id))
+    except Exception as e:
+        logger.warning(f"Failed to delete photo: photo_id={photo_file_id}, pet_id={pet_id}, error={e}")
+    delete_renditions(app.fs, photo_file_id)
+
+
+def discard_pet_photo(photo_file_id, pet_id) -> None:
+    """Delete a photo the pet no longer references, in a background job when enabled."""
+    if jobs_enabled():
+        enqueue("delete_photo", {"photo_file_id": photo_file_id, "pet_id": pet_id}, priority=PRIORITY_LOW)
+    else:
+        delete_pet_photo(photo_file_id, pet_id)
+
+
+def queue_photo_optimization(photo_file_id, pet_id, username) -> None:
+    """Queue the optimization of a photo stored as uploaded (background jobs only)."""
+    if jobs_enabled() and photo_file_id:
+        enqueue("optimize_photo", {"photo_file_id": photo_file_id, "pet_id": pet_id}, username=username, priority=PRIORITY_HIGH)
+
+
+@job_handler("delete_photo")
+def run_delete_photo_job(payload: dict) -> None:
+    """Delete a photo and its renditions no longer referenced by a pet."""
+    delete_pet_photo(payload["photo_file_id"], payload["pet_id"])
+
+
+@job_handler("optimize_photo")
+def run_optimize_photo_job(payload: dict) -> Optional[dict]:
+    """Replace an uploaded photo by its optimized version and renditions, unless the pet changed photo meanwhile."""
+    original_id = payload["photo_file_id"]
+    pet_query = {"_id": ObjectId(payload["pet_id"]), "photo_file_id": original_id}
+    if app.db["pets"].count_documents(pet_query, limit=1) == 0:
+        # Replaced, removed or deleted: whoever did it also deletes the original
+        return None
+
+    # GridOut is seekable: Pillow reads the header and then the chunks it decodes,
+    # never a second full copy of the upload
+    original = app.fs.get(ObjectId(original_id))
+    filename = original.filename or "photo"
+    try:
+        optimized_result = optimize_image(original)
+    except ImageTooLarge as e:
+        raise PermanentJobError(str(e))
+    finally:
+        original.close()
+    if not optimized_result:
+        # Keep serving the original, as synchronous uploads do
+        return {"photo_file_id": original_id}
+
+    optimized_file, content_type = optimized_result
+    filename_without_ext = filename.rsplit(".", 1)[0] if "." in filename else filename
+    photo_file_id = str(app.fs.put(optimized_file, filename=f"{filename_without_ext}.webp", content_type=content_type))
+    pregenerate_renditions(app.fs, photo_file_id, optimized_file)
+
+    result = app.db["pets"].update_one(
+        pet_query, {"$set": {"photo_file_id": photo_file_id, "updated_at": datetime.now(timezone.utc)}}
+    )
+    if result.modified_count == 0:
+        # The photo changed while optimizing
+        delete_pet_photo(photo_file_id, payload["pet_id"])
+        return None
+    delete_pet_photo(original_id, payload["pet_id"])
+    return {"photo_file_id": photo_file_id}
+
+
+def purge_pet_records(pet_id: str) -> Tuple[int, List[str]]:
+    """
+    Best-effort deletion of a deleted pet's related records.
+
+    Every collection is attempted even if an earlier one fails.
+
+    Returns:
+        Tuple of (number of deleted records, collections whose deletion failed)
+    """
+    total_deleted = 0
+    failed_collections = []
+    for collection_name, query in pet_related_queries(pet_id):
+        try:
+            result = app.db[collection_name].delete_many(query)
+            if result.deleted_count > 0:
+                logger.info(f"Deleted {result.deleted_count} records from {collection_name} for pet {pet_id}")
+                total_deleted += result.deleted_count
+        except Exception as col_error:
+            logger.error(f"Failed to delete from {collection_name} for pet {pet_id}: {col_error}")
+            failed_collections.append(collection_name)
+
+    if failed_collections:
+        logger.warning(
+            f"Some related records may not have been deleted for pet {pet_id}: {', '.join(failed_collections)}"
+        )
+    return total_deleted, failed_collections
+
+
+@job_handler("purge_pet")
+def run_purge_pet_job(payload: dict) -> dict:
+    """Delete the records and photo of a pet already deleted by the request."""
+    pet_id = payload["pet_id"]
+    total_deleted, failed_collections = purge_pet_records(pet_id)
+    if payload.get("photo_file_id"):
+        delete_pet_photo(payload["photo_file_id"], pet_id)
+    if failed_collections:
+        # Deleting again is harmless, so let the queue retry with backoff
+        raise RuntimeError(f"Failed to purge {', '.join(failed_collections)}")
+    logger.info(f"Pet records purged: id={pet_id}, total_related_records={total_deleted}")
+    return {"deleted_records": total_deleted}
+
+
 @pets_bp.route("/api/pets", methods=["GET"])
 @login_required
-@api.validate(resp=Response(HTTP_200=PetListResponse), tags=["pets"])
+@api.validate(resp=Response(HTTP_200=PetListResponse, HTTP_304=None), tags=["pets"])
+@conditional_list("pets", lambda: {"$or": [{"owner": request.current_user}, {"shared_with": request.current_user}]})
 def get_pets():
     """Get list of all pets accessible to current user."""
     username, auth_error = get_current_user()
@@ -86,37 +283,19 @@ def get_pets():
 
     processed_pets = []
     for pet in pets:
-        # Convert all ObjectId instances to strings recursively
-        pet = convert_objectid_to_str(pet)
-        
-        # Ensure _id is string (already converted by convert_objectid_to_str, but double-check)
-        pet["_id"] = str(pet["_id"])
-        
-        # Convert photo_file_id to string if it exists
+        # ObjectId/datetime values are encoded by the app JSON provider
         if pet.get("photo_file_id"):
-            pet["photo_file_id"] = str(pet["photo_file_id"])
+            photo_file_id = str(pet["photo_file_id"])
             # Add cache-busting parameter using photo_file_id so browser gets new image when it changes
-            pet["photo_url"] = url_for("pets.get_pet_photo", pet_id=pet["_id"], _external=False) + f"?v={pet['photo_file_id'][:8]}"
-        
+            pet["photo_url"] = url_for("pets.get_pet_photo", pet_id=str(pet["_id"]), _external=False) + f"?v={photo_file_id[:8]}"
+
         if isinstance(pet.get("birth_date"), datetime):
             pet["birth_date"] = pet["birth_date"].strftime("%Y-%m-%d")
-        if isinstance(pet.get("created_at"), datetime):
-            pet["created_at"] = pet["created_at"].strftime("%Y-%m-%d %H:%M")
 
         pet["current_user_is_owner"] = pet.get("owner") == username
-        
         # Ensure tiles_settings is present (use default if missing)
-        tiles_settings = get_tiles_settings(pet)
-        # Convert any ObjectId in tiles_settings to string
-        pet["tiles_settings"] = convert_objectid_to_str(tiles_settings)
-        
-        # Convert any ObjectId in shared_with to string (if present)
-        if pet.get("shared_with"):
-            pet["shared_with"] = [str(uid) if isinstance(uid, ObjectId) else uid for uid in pet["shared_with"]]
-        
-        # Final pass: convert any remaining ObjectId instances
-        pet = convert_objectid_to_str(pet)
-        
+        pet["tiles_settings"] = get_tiles_settings(pet)
+
         processed_pets.append(pet)
 
     return jsonify({"pets": processed_pets})
@@ -126,7 +305,13 @@ def get_pets():
 @login_required
 @api.validate(
     body=Request(PetCreate),
-    resp=Response(HTTP_201=SuccessResponse, HTTP_422=ErrorResponse, HTTP_401=ErrorResponse, HTTP_500=ErrorResponse),
+    resp=Response(
+        HTTP_201=SuccessResponse,
+        HTTP_413=ErrorResponse,
+        HTTP_422=ErrorResponse,
+        HTTP_401=ErrorResponse,
+        HTTP_500=ErrorResponse,
+    ),
     tags=["pets"],
 )
 def create_pet():
@@ -154,31 +339,7 @@ def create_pet():
         if is_multipart and "photo_file" in request.files:
             photo_file = request.files["photo_file"]
             if photo_file.filename:
-                # Optimize image to WebP format
-                optimized_result = optimize_image(photo_file)
-                if optimized_result:
-                    optimized_file, content_type = optimized_result
-                    # Generate filename with .webp extension
-                    original_filename = photo_file.filename
-                    filename_without_ext = original_filename.rsplit(".", 1)[0] if "." in original_filename else original_filename
-                    optimized_filename = f"{filename_without_ext}.webp"
-                    
-                    photo_file_id = str(
-                        app.fs.put(
-                            optimized_file,
-                            filename=optimized_filename,
-                            content_type=content_type,
-                        )
-                    )
-                else:
-                    # Fallback to original file if optimization fails
-                    photo_file_id = str(
-                        app.fs.put(
-                            photo_file,
-                            filename=photo_file.filename,
-                            content_type=photo_file.content_type,
-                        )
-                    )
+                photo_file_id = store_pet_photo(photo_file)
 
         birth_date = parse_date(data.birth_date, allow_future=False)
 
@@ -195,6 +356,8 @@ def create_pet():
             "created_at": datetime.now(timezone.utc),
             "created_by": username,
         }
+        # List validators (web/conditional.py) and invalidation polling track updated_at
+        pet_data["updated_at"] = pet_data["created_at"]
 
         # Add photo_file_id for multipart or photo_url for JSON
         if is_multipart:
@@ -210,6 +373,7 @@ def create_pet():
 
         result = app.db["pets"].insert_one(pet_data)
         pet_data["_id"] = str(result.inserted_id)
+        queue_photo_optimization(photo_file_id, pet_data["_id"], username)
         if isinstance(pet_data.get("birth_date"), datetime):
             pet_data["birth_date"] = pet_data["birth_date"].strftime("%Y-%m-%d")
         if isinstance(pet_data.get("created_at"), datetime):
@@ -278,6 +442,7 @@ def get_pet(pet_id):
     body=Request(PetUpdate),
     resp=Response(
         HTTP_200=SuccessResponse,
+        HTTP_413=ErrorResponse,
         HTTP_422=ErrorResponse,
         HTTP_403=ErrorResponse,
         HTTP_404=ErrorResponse,
@@ -309,55 +474,21 @@ def update_pet(pet_id):
         # Handle photo file upload/removal (only for multipart/form-data)
         photo_file_id = pet.get("photo_file_id") if pet else None
         if is_multipart:
-            if "photo_file" in request.files:
-                photo_file = request.files["photo_file"]
-                if photo_file.filename:
-                    # Delete old photo if exists
-                    old_photo_id = pet.get("photo_file_id") if pet else None
-                    if old_photo_id:
-                        try:
-                            app.fs.delete(ObjectId(old_photo_id))
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to delete old photo: photo_id={old_photo_id}, pet_id={pet_id}, error={e}"
-                            )
-
-                    # Optimize image to WebP format
-                    optimized_result = optimize_image(photo_file)
-                    if optimized_result:
-                        optimized_file, content_type = optimized_result
-                        # Generate filename with .webp extension
-                        original_filename = photo_file.filename
-                        filename_without_ext = original_filename.rsplit(".", 1)[0] if "." in original_filename else original_filename
-                        optimized_filename = f"{filename_without_ext}.webp"
-                        
-                        photo_file_id = str(
-                            app.fs.put(
-                                optimized_file,
-                                filename=optimized_filename,
-                                content_type=content_type,
-                            )
-                        )
-                    else:
-                        # Fallback to original file if optimization fails
-                        photo_file_id = str(
-                            app.fs.put(
-                                photo_file,
-                                filename=photo_file.filename,
-                                content_type=photo_file.content_type,
-                            )
-                        )
-                elif request.form.get("remove_photo") == "true":
-                    # Remove photo
-                    old_photo_id = pet.get("photo_file_id") if pet else None
-                    if old_photo_id:
-                        try:
-                            app.fs.delete(ObjectId(old_photo_id))
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to delete photo: photo_id={old_photo_id}, pet_id={pet_id}, error={e}"
-                            )
-                    photo_file_id = None
+            photo_file = request.files.get("photo_file")
+            if photo_file and photo_file.filename:
+                # Store the new photo first: a rejected upload must not lose the current one
+                photo_file_id = store_pet_photo(photo_file)
+
+                # Delete old photo (and its renditions) if exists
+                old_photo_id = pet.get("photo_file_id") if pet else None
+                if old_photo_id:
+                    discard_pet_photo(old_photo_id, pet_id)
+            elif request.form.get("remove_photo") == "true":
+                # Remove photo
+                old_photo_id = pet.get("photo_file_id") if pet else None
+                if old_photo_id:
+                    discard_pet_photo(old_photo_id, pet_id)
+                photo_file_id = None
 
         birth_date = parse_date(data.birth_date, allow_future=False)
 
@@ -405,7 +536,10 @@ def update_pet(pet_id):
         if not update_data:
             return error_response("validation_error_no_update_data")
 
+        update_data["updated_at"] = datetime.now(timezone.utc)
         app.db["pets"].update_one({"_id": ObjectId(pet_id)}, {"$set": update_data})
+        if update_data.get("photo_file_id"):
+            queue_photo_optimization(update_data["photo_file_id"], pet_id, username)
         logger.info(f"Pet updated: id={pet_id}, user={username}")
         return get_message("pet_updated")
 
@@ -456,7 +590,11 @@ def share_pet(pet_id):
         if share_username in shared_with:
             return error_response("validation_error_already_shared")
 
-        app.db["pets"].update_one({"_id": ObjectId(pet_id)}, {"$addToSet": {"shared_with": share_username}})
+        app.db["pets"].update_one(
+            {"_id": ObjectId(pet_id)},
+            {"$addToSet": {"shared_with": share_username}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+        invalidate_pet_access(pet_id)
 
         logger.info(f"Pet shared: id={pet_id}, owner={username}, shared_with={share_username}")
         return get_message("pet_shared", username=share_username)
@@ -483,7 +621,11 @@ def unshare_pet(pet_id, share_username):
         if access_error:
             return access_error[0], access_error[1]
 
-        app.db["pets"].update_one({"_id": ObjectId(pet_id)}, {"$pull": {"shared_with": share_username}})
+        app.db["pets"].update_one(
+            {"_id": ObjectId(pet_id)},
+            {"$pull": {"shared_with": share_username}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+        invalidate_pet_access(pet_id)
 
         logger.info(f"Pet unshared: id={pet_id}, owner={username}, unshared_from={share_username}")
         return get_message("pet_unshared", username=share_username)
@@ -498,6 +640,7 @@ def unshare_pet(pet_id, share_username):
 @api.validate(
     resp=Response(
         HTTP_200=SuccessResponse,
+        HTTP_202=SuccessResponse,
         HTTP_422=ErrorResponse,
         HTTP_403=ErrorResponse,
         HTTP_404=ErrorResponse,
@@ -506,7 +649,7 @@ def unshare_pet(pet_id, share_username):
     tags=["pets"],
 )
 def delete_pet(pet_id):
-    """Delete pet and all related records (cascading delete)."""
+    """Delete pet and all related records (cascading delete, in a background job when enabled)."""
     try:
         username, auth_error = get_current_user()
         if auth_error:
@@ -518,24 +661,22 @@ def delete_pet(pet_id):
 
         pet_id_obj = ObjectId(pet_id)
         
-        # List of collections with related records to delete
-        # Using pet_id as string for most collections
-        collections_to_clean = [
-            ("asthma_attacks", {"pet_id": pet_id}),
-            ("defecations", {"pet_id": pet_id}),
-            ("weights", {"pet_id": pet_id}),
-            ("feedings", {"pet_id": pet_id}),
-            ("litter_changes", {"pet_id": pet_id}),
-            ("eye_drops", {"pet_id": pet_id}),
-            ("ear_cleaning", {"pet_id": pet_id}),
-            ("tooth_brushing", {"pet_id": pet_id}),
-            ("medication_intakes", {"pet_id": pet_id}),
-            ("medications", {"pet_id": pet_id}),
-        ]
+        # Related records to delete (pet_id is stored as string)
+        collections_to_clean = pet_related_queries(pet_id)
         
         # Delete photo from GridFS if exists
         old_photo_id = pet.get("photo_file_id") if pet else None
 
+        if jobs_enabled():
+            # The pet disappears now; its records and photo are purged by a worker
+            if app.db["pets"].delete_one({"_id": pet_id_obj}).deleted_count == 0:
+                return error_response("pet_not_found")
+            record_deletions("pets", pet_id, [pet_id])
+            invalidate_pet_access(pet_id)
+            job = enqueue("purge_pet", {"pet_id": pet_id, "photo_file_id": old_photo_id}, username=username, priority=PRIORITY_LOW)
+            logger.info(f"Pet deleted, purge queued: id={pet_id}, user={username}, job_id={job['_id']}")
+            return accepted("pet_deleted", job)
+
         # Try to use transaction if available
         try:
             with app.db.client.start_session() as session:
@@ -575,28 +716,8 @@ def delete_pet(pet_id):
                 if result.deleted_count == 0:
                     return error_response("pet_not_found")
                 
-                # Best-effort deletion of related records
-                total_deleted = 0
-                failed_collections = []
-                for collection_name, query in collections_to_clean:
-                    try:
-                        result = app.db[collection_name].delete_many(query)
-                        if result.deleted_count > 0:
-                            logger.info(
-                                f"Deleted {result.deleted_count} records from {collection_name} for pet {pet_id}"
-                            )
-                            total_deleted += result.deleted_count
-                    except Exception as col_error:
-                        logger.error(
-                            f"Failed to delete from {collection_name} for pet {pet_id}: {col_error}"
-                        )
-                        failed_collections.append(collection_name)
-                
-                if failed_collections:
-                    logger.warning(
-                        f"Some related records may not have been deleted for pet {pet_id}: "
-                        f"{', '.join(failed_collections)}"
-                    )
+                # Best-effort deletion of related records; failures are logged
+                total_deleted, _ = purge_pet_records(pet_id)
                 
                 logger.info(
                     f"Pet deleted (fallback): id={pet_id}, user={username}, "
@@ -606,16 +727,15 @@ def delete_pet(pet_id):
                 # Re-raise if it's not a transaction-related error
                 raise
 
+        # Lets sync clients and other workers' invalidation watchers see the deletion
+        record_deletions("pets", pet_id, [pet_id])
+        invalidate_pet_access(pet_id)
+
         # Delete photo from GridFS (outside transaction as GridFS doesn't support transactions)
         if old_photo_id:
-            try:
-                app.fs.delete(ObjectId(old_photo_id))
-                logger.info(f"Deleted photo {old_photo_id} for pet {pet_id}")
-            except Exception as photo_error:
-                # Log but don't fail the request
-                logger.warning(
-                    f"Failed to delete photo {old_photo_id} for pet {pet_id}: {photo_error}"
-                )
+            # Logs but doesn't fail the request
+            delete_pet_photo(old_photo_id, pet_id)
+            logger.info(f"Deleted photo {old_photo_id} for pet {pet_id}")
 
         logger.info(f"Pet deleted: id={pet_id}, user={username}")
         return get_message("pet_deleted")
@@ -631,10 +751,13 @@ def delete_pet(pet_id):
     query=PhotoQueryParams,
     resp=Response(
         HTTP_200=None,
+        HTTP_206=None,
+        HTTP_304=None,
         HTTP_422=ErrorResponse,
         HTTP_401=ErrorResponse,
         HTTP_403=ErrorResponse,
         HTTP_404=ErrorResponse,
+        HTTP_416=ErrorResponse,
         HTTP_500=ErrorResponse,
     ),
     tags=["pets"],
@@ -646,11 +769,11 @@ def get_pet_photo(pet_id):
         if not username:
             return error_response("unauthorized")
 
-        pet = app.db["pets"].find_one({"_id": ObjectId(pet_id)})
+        pet = load_pet(pet_id)
         if not pet:
             return error_response("pet_not_found")
 
-        if pet.get("owner") != username and username not in pet.get("shared_with", []):
+        if not has_pet_access(pet, username):
             return error_response("pet_forbidden")
 
         photo_file_id = pet.get("photo_file_id")
@@ -661,40 +784,40 @@ def get_pet_photo(pet_id):
         width = request.args.get("w", type=int)
         height = request.args.get("h", type=int)
 
+        # A new upload always gets a new photo_file_id, so the validator of a given
+        # photo/size never changes and revalidation can be answered without GridFS
+        etag = f"{photo_file_id}_{width}_{height}"
+        cached = not_modified(etag, cache_control=PHOTO_CACHE_CONTROL)
+        if cached is not None:
+            return cached
+
         try:
-            photo_file = app.fs.get(ObjectId(photo_file_id))
-            photo_data = photo_file.read()
-            content_type = photo_file.content_type or "image/jpeg"
-
-            # If resizing requested
-            if (width or height) and content_type.startswith("image/"):
-                try:
-                    img = Image.open(BytesIO(photo_data))
-                    
-                    # Calculate aspect ratio if only one dimension is provided
-                    if width and not height:
-                        height = int(img.height * (width / img.width))
-                    elif height and not width:
-                        width = int(img.width * (height / img.height))
-                    
-                    if width and height:
-                        img.thumbnail((width, height), Image.Resampling.LANCZOS)
-                        
-                        output = BytesIO()
-                        # Use WebP if requested or keep original format (but WebP is better for optimization)
-                        format_to_save = "WEBP"
-                        img.save(output, format=format_to_save, quality=85, method=6)
-                        photo_data = output.getvalue()
-                        content_type = "image/webp"
-                except Exception as resize_err:
-                    logger.warning(f"Resizing failed: {resize_err}")
+            response = None
+
+            # Serve a cached rendition if this size was generated before
+            if width or height:
+                rendition = find_rendition(app.fs, photo_file_id, width, height)
+                if rendition is not None:
+                    content_type = rendition.content_type or "image/webp"
+                    response = send_gridfs_file(rendition, content_type, etag, PHOTO_CACHE_CONTROL)
+
+            if response is None:
+                photo_file = app.fs.get(ObjectId(photo_file_id))
+                content_type = photo_file.content_type or "image/jpeg"
+
+                if (width or height) and content_type.startswith("image/"):
+                    # Resizing needs the whole original: render once and cache for subsequent requests
+                    photo_data = photo_file.read()
+                    photo_file.close()
+                    record_gridfs_read(len(photo_data))
+                    rendered = get_or_create_rendition(app.fs, photo_file_id, photo_data, width, height)
                     # Fallback to original data if resizing fails
+                    photo_data, content_type = rendered or (photo_data, content_type)
+                    response = send_bytes(photo_data, content_type, etag, PHOTO_CACHE_CONTROL)
+                else:
+                    # Originals are streamed chunk by chunk rather than read into memory
+                    response = send_gridfs_file(photo_file, content_type, etag, PHOTO_CACHE_CONTROL)
 
-            response = make_response(photo_data)
-            response.headers.set("Content-Type", content_type)
-            response.headers.set("Content-Disposition", "inline")
-            response.headers.set("Cache-Control", "public, max-age=31536000, immutable")
-            response.headers.set("ETag", f'"{photo_file_id}_{width}_{height}"')
             logger.info(f"Pet photo retrieved: pet_id={pet_id}, user={username}, size={width}x{height}")
             return response
         except Exception as e:
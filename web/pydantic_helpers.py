@@ -14,6 +14,17 @@ from web.errors import error_response
 T = TypeVar("T", bound=BaseModel)
 
 
+def validation_error_message(e: ValidationError) -> str:
+    """Human-readable message of the first Pydantic error (without the "Value error, " prefix)."""
+    errors = e.errors()
+    if not errors:
+        return str(e)
+    msg = errors[0].get("msg", str(e))
+    if msg.startswith("Value error, "):
+        msg = msg[len("Value error, ") :]
+    return msg
+
+
 def validate_request_data(
     request: Request, model_class: Type[T], context: str = ""
 ) -> Tuple[Optional[T], Optional[Tuple]]:
@@ -70,15 +81,7 @@ def validate_request_data(
             from web.app import logger
             logger.warning(f"Validation error in {context}: {e}")
         
-        # Get first error message
-        errors = e.errors()
-        if errors and len(errors) > 0:
-            msg = errors[0].get("msg", str(e))
-            if msg.startswith("Value error, "):
-                msg = msg[len("Value error, ") :]
-            return None, error_response("validation_error", msg)
-            
-        return None, error_response("validation_error", str(e))
+        return None, error_response("validation_error", validation_error_message(e))
     except Exception as e:
         # Handle other unexpected errors
         if context:
@@ -0,0 +1,203 @@
+"""Token-bucket rate limiting strategy for Flask-Limiter.
+
+Registered as the "token-bucket" strategy (the default `RATELIMIT_STRATEGY`). Every
+worker keeps an in-memory bucket per limit key: a limit of "5 per 5 minutes" holds up
+to 5 tokens and refills one per minute, so there are no 2x bursts at window boundaries
+and a hit costs no storage round trip.
+
+Buckets are reconciled with the configured limiter storage (Mongo collections with a
+TTL index, or `memory://` as the local stand-in) every `sync_interval_seconds` by a
+background thread, started on the first hit in each process (after the gunicorn fork),
+so requests never wait for the reconciliation: each worker adds the tokens it consumed
+to a shared counter of the current limit period (`Storage.incr`) and debits its own
+buckets by what the other workers consumed since its previous sync. A bucket seen for
+the first time starts from the shared counter, so a client cannot get a fresh burst
+from every worker.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import g
+from flask_limiter.util import get_remote_address
+from limits import RateLimitItem
+from limits.strategies import STRATEGIES, RateLimiter, WindowStats
+
+from web.configs import RATE_LIMIT_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_NAME = "token-bucket"
+
+
+def rate_limit_key() -> str:
+    """Limit key of the current request: the authenticated user, else the client address."""
+    payload = g.get("auth_payload")
+    if payload and payload.get("username"):
+        return f"user:{payload['username']}"
+    return get_remote_address()
+
+
+class _Bucket:
+    """Tokens of one limit key in this worker, plus its reconciliation state."""
+
+    __slots__ = ("item", "tokens", "updated_at", "pending", "window", "synced_total")
+
+    def __init__(self, item: RateLimitItem, tokens: float, now: float, window: int, synced_total: int):
+        self.item = item
+        self.tokens = tokens
+        self.updated_at = now
+        # Tokens consumed here and not yet added to the shared counter
+        self.pending = 0
+        # Shared counter window and its total at the last sync
+        self.window = window
+        self.synced_total = synced_total
+
+    def refill(self, now: float) -> None:
+        rate = self.item.amount / self.item.get_expiry()
+        self.tokens = min(float(self.item.amount), self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """Per-worker token buckets periodically reconciled through the limiter storage."""
+
+    def __init__(self, storage, sync_interval_seconds: Optional[float] = None):
+        super().__init__(storage)
+        if sync_interval_seconds is None:
+            sync_interval_seconds = RATE_LIMIT_CONFIG["sync_interval_seconds"]
+        self.sync_interval_seconds = sync_interval_seconds
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        # Process running the sync thread; a forked worker starts its own
+        self._sync_pid: Optional[int] = None
+
+    @staticmethod
+    def _window(item: RateLimitItem, now: float) -> int:
+        return int(now // item.get_expiry())
+
+    @staticmethod
+    def _shared_key(key: str, window: int) -> str:
+        return f"{key}/bucket/{window}"
+
+    def _bucket(self, item: RateLimitItem, identifiers: Tuple[str, ...], now: float) -> _Bucket:
+        """The key's bucket, created from the shared counter on first use in this worker."""
+        key = item.key_for(*identifiers)
+        with self._lock:
+            bucket = self._buckets.get(key)
+        if bucket is not None:
+            return bucket
+
+        window = self._window(item, now)
+        try:
+            consumed = self.storage.get(self._shared_key(key, window))
+        except Exception as e:
+            logger.warning(f"Rate limit storage unavailable, starting a full bucket: key={key}, error={e}")
+            consumed = 0
+        # The counter does not tell when its tokens were consumed; at most everything
+        # refilled since the period started has come back
+        refilled = (now - window * item.get_expiry()) * item.amount / item.get_expiry()
+        tokens = min(float(item.amount), max(0.0, item.amount - consumed + refilled))
+        with self._lock:
+            return self._buckets.setdefault(key, _Bucket(item, tokens, now, window, consumed))
+
+    def _ensure_sync_thread(self) -> None:
+        """Start this process's reconciliation thread; threads do not survive a fork."""
+        pid = os.getpid()
+        if self._sync_pid == pid:
+            return
+        with self._lock:
+            if self._sync_pid == pid:
+                return
+            self._sync_pid = pid
+        threading.Thread(target=self._sync_loop, name="rate-limit-sync", daemon=True).start()
+
+    def _sync_loop(self) -> None:
+        while True:
+            time.sleep(self.sync_interval_seconds)
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Rate limit sync failed: {e}", exc_info=True)
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        self._ensure_sync_thread()
+        now = time.time()
+        bucket = self._bucket(item, identifiers, now)
+        with self._lock:
+            bucket.refill(now)
+            allowed = bucket.tokens >= cost
+            if allowed:
+                bucket.tokens -= cost
+                bucket.pending += cost
+        return allowed
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        now = time.time()
+        bucket = self._bucket(item, identifiers, now)
+        with self._lock:
+            bucket.refill(now)
+            return bucket.tokens >= cost
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        """Remaining whole tokens, and the time at which the bucket is full again."""
+        now = time.time()
+        bucket = self._bucket(item, identifiers, now)
+        with self._lock:
+            bucket.refill(now)
+            missing = item.amount - bucket.tokens
+            return WindowStats(now + missing * item.get_expiry() / item.amount, int(bucket.tokens))
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        key = item.key_for(*identifiers)
+        with self._lock:
+            self._buckets.pop(key, None)
+        self.storage.clear(self._shared_key(key, self._window(item, time.time())))
+
+    def sync(self, now: Optional[float] = None) -> int:
+        """
+        Reconcile buckets with the shared counters.
+
+        Returns:
+            int: Number of buckets reconciled
+        """
+        now = now or time.time()
+        with self._lock:
+            batch: List[Tuple[str, _Bucket, int]] = []
+            for key, bucket in list(self._buckets.items()):
+                bucket.refill(now)
+                if not bucket.pending and bucket.tokens >= bucket.item.amount:
+                    # Full and nothing to report: the shared counter is read again on next use
+                    del self._buckets[key]
+                    continue
+                batch.append((key, bucket, bucket.pending))
+                bucket.pending = 0
+
+        for key, bucket, sent in batch:
+            window = self._window(bucket.item, now)
+            shared_key = self._shared_key(key, window)
+            try:
+                if sent:
+                    total = self.storage.incr(shared_key, bucket.item.get_expiry(), amount=sent)
+                else:
+                    total = self.storage.get(shared_key)
+            except Exception as e:
+                logger.warning(f"Rate limit sync failed: key={key}, error={e}")
+                with self._lock:
+                    bucket.pending += sent
+                continue
+
+            previous = bucket.synced_total if bucket.window == window else 0
+            foreign = max(0, total - previous - sent)
+            with self._lock:
+                bucket.tokens = max(0.0, bucket.tokens - foreign)
+                bucket.window = window
+                bucket.synced_total = total
+        return len(batch)
+
+
+STRATEGIES[STRATEGY_NAME] = TokenBucketRateLimiter
@@ -0,0 +1,157 @@
+"""Refresh token store.
+
+Refresh tokens are stored by their SHA-256 digest (`token_hash`), never in clear, so a
+leaked `refresh_tokens` collection cannot be replayed. A TTL index on `expires_at`
+drops tokens once they expire.
+
+A refresh is a single indexed `find_one`. Its `last_used_at` (informational, used by
+nobody on the request path) goes into a per-worker buffer that is written with one
+unordered `bulk_write` at most every `refresh_last_used_flush_seconds`, and when the
+worker exits, instead of an `update_one` per refresh.
+
+Documents written before this module stored the token itself; they are converted by
+`flask --app web.app migrate-refresh-tokens`.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import jwt
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+import web.app as app  # access db
+from web.configs import JWT_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKENS_COLLECTION = "refresh_tokens"
+LEGACY_TOKEN_INDEX = "token_1"
+
+
+def token_hash(token: str) -> str:
+    """Digest a refresh token is stored and looked up by."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def store_refresh_token(token: str, username: str, expires_at: datetime) -> None:
+    """Remember an issued refresh token until it expires."""
+    app.db[REFRESH_TOKENS_COLLECTION].insert_one(
+        {
+            "token_hash": token_hash(token),
+            "username": username,
+            "created_at": datetime.now(timezone.utc),
+            "expires_at": expires_at,
+        }
+    )
+
+
+def find_refresh_token(token: str) -> Optional[dict]:
+    """Stored document of a refresh token, or None if it was revoked or has expired."""
+    return app.db[REFRESH_TOKENS_COLLECTION].find_one({"token_hash": token_hash(token)})
+
+
+def revoke_refresh_token(token: str) -> None:
+    """Forget a refresh token (logout)."""
+    app.db[REFRESH_TOKENS_COLLECTION].delete_one({"token_hash": token_hash(token)})
+
+
+class LastUsedBuffer:
+    """Coalesces last_used_at stamps of refresh tokens into periodic bulk writes."""
+
+    def __init__(self, flush_seconds: float):
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def touch(self, digest: str, used_at: Optional[datetime] = None) -> None:
+        """Record a use of the token with this digest; flushes when the interval has passed."""
+        used_at = used_at or datetime.now(timezone.utc)
+        with self._lock:
+            previous = self._pending.get(digest)
+            if previous is None or used_at > previous:
+                self._pending[digest] = used_at
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write buffered stamps with one unordered bulk_write.
+
+        Returns:
+            int: Number of tokens whose stamp was sent
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        operations = [
+            UpdateOne({"token_hash": digest}, {"$max": {"last_used_at": used_at}}) for digest, used_at in pending.items()
+        ]
+        try:
+            app.db[REFRESH_TOKENS_COLLECTION].bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            # Stamps are informational; losing one interval is preferable to retrying on the request path
+            logger.warning(f"Failed to flush refresh token last_used_at: tokens={len(pending)}, error={e}")
+        return len(pending)
+
+
+last_used = LastUsedBuffer(JWT_CONFIG["refresh_last_used_flush_seconds"])
+atexit.register(last_used.flush)
+
+
+def _legacy_expiry(token: str) -> Optional[datetime]:
+    """exp claim of a legacy token, read without verification (it was verified when issued)."""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False, "verify_exp": False})
+    except jwt.InvalidTokenError:
+        return None
+    exp = claims.get("exp")
+    return datetime.fromtimestamp(exp, timezone.utc) if isinstance(exp, (int, float)) else None
+
+
+def migrate_refresh_tokens(batch_size: int = 1000) -> int:
+    """
+    Replace clear-text tokens of legacy documents with their digest.
+
+    Documents without an expiry get it from the token's exp claim (so the TTL index
+    applies to them); unreadable ones are removed. The legacy index on `token` is dropped.
+
+    Returns:
+        int: Number of documents migrated or removed
+    """
+    collection = app.db[REFRESH_TOKENS_COLLECTION]
+    migrated = 0
+    operations: List[UpdateOne] = []
+
+    for document in collection.find({"token": {"$exists": True}}, {"token": 1, "expires_at": 1}):
+        token = document["token"]
+        update = {"$set": {"token_hash": token_hash(token)}, "$unset": {"token": ""}}
+        if not isinstance(document.get("expires_at"), datetime):
+            expires_at = _legacy_expiry(token)
+            if expires_at is None:
+                collection.delete_one({"_id": document["_id"]})
+                migrated += 1
+                continue
+            update["$set"]["expires_at"] = expires_at
+        operations.append(UpdateOne({"_id": document["_id"]}, update))
+        migrated += 1
+        if len(operations) >= batch_size:
+            collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+
+    if LEGACY_TOKEN_INDEX in collection.index_information():
+        collection.drop_index(LEGACY_TOKEN_INDEX)
+    return migrated
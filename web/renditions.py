@@ -0,0 +1,163 @@
+"""Derived-image (rendition) cache for pet photos.
+
+Resized photos are stored in GridFS next to the original, tagged with
+`metadata.rendition_of` = original photo_file_id and the requested `w`/`h`.
+A rendition is generated once (on upload for the sizes the frontend uses, or
+lazily on first request for any other size) and then served straight from GridFS,
+so Pillow decoding/encoding no longer happens on every photo request.
+"""
+
+import logging
+from io import BytesIO
+from typing import Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from web.metrics import timed_pillow
+from web.offload import run_cpu_bound
+
+
+logger = logging.getLogger(__name__)
+
+# Widths requested by frontend/src/components/PetImage.tsx: the blurred placeholder (20)
+# and 1x/2x/3x srcset entries for the 40px navbar avatar and the 48px pets list avatar
+PRESET_RENDITION_WIDTHS = (20, 40, 48, 80, 96, 120, 144)
+
+RENDITION_CONTENT_TYPE = "image/webp"
+RENDITION_QUALITY = 85
+
+
+def _rendition_query(photo_file_id: str, width: Optional[int], height: Optional[int]) -> dict:
+    """Build the GridFS files filter identifying a single rendition."""
+    return {
+        "metadata.rendition_of": str(photo_file_id),
+        "metadata.w": width or 0,
+        "metadata.h": height or 0,
+    }
+
+
+def render_image(img: Image.Image, width: Optional[int], height: Optional[int]) -> Optional[bytes]:
+    """
+    Resize a decoded image to fit into width x height and encode it as WebP.
+
+    If only one dimension is provided, the other is derived from the aspect ratio.
+
+    Returns:
+        WebP bytes, or None if neither dimension was provided
+    """
+    if width and not height:
+        height = int(img.height * (width / img.width))
+    elif height and not width:
+        width = int(img.width * (height / img.height))
+
+    if not (width and height):
+        return None
+
+    resized = img.copy()
+    resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+    output = BytesIO()
+    resized.save(output, format="WEBP", quality=RENDITION_QUALITY, method=6)
+    return output.getvalue()
+
+
+@timed_pillow("resize")
+def _render_bytes(original_data: bytes, width: Optional[int], height: Optional[int]) -> Optional[bytes]:
+    """Decode original bytes and render a single rendition (CPU-bound, safe to offload)."""
+    return render_image(Image.open(BytesIO(original_data)), width, height)
+
+
+@timed_pillow("pregenerate")
+def _render_widths(image_data: BytesIO, widths: Iterable[int]) -> List[Tuple[int, bytes]]:
+    """Decode an image once and render every width smaller than the original (CPU-bound, safe to offload)."""
+    image_data.seek(0)
+    img = Image.open(image_data)
+    img.load()
+
+    rendered = []
+    for width in widths:
+        if width >= img.width:
+            # Upscaling is never done; requests this large get the original bytes
+            continue
+        data = render_image(img, width, None)
+        if data is not None:
+            rendered.append((width, data))
+    return rendered
+
+
+def _store_rendition(fs, photo_file_id: str, width: Optional[int], height: Optional[int], data: bytes) -> None:
+    """Persist a rendition in GridFS."""
+    fs.put(
+        data,
+        filename=f"{photo_file_id}_{width or 0}x{height or 0}.webp",
+        content_type=RENDITION_CONTENT_TYPE,
+        metadata={"rendition_of": str(photo_file_id), "w": width or 0, "h": height or 0},
+    )
+
+
+def find_rendition(fs, photo_file_id: str, width: Optional[int], height: Optional[int]):
+    """Return the cached rendition GridOut or None."""
+    return fs.find_one(_rendition_query(photo_file_id, width, height))
+
+
+def get_or_create_rendition(
+    fs, photo_file_id: str, original_data: bytes, width: Optional[int], height: Optional[int]
+) -> Optional[Tuple[bytes, str]]:
+    """
+    Render and cache a rendition from already loaded original bytes.
+
+    Returns:
+        tuple: (data, content_type), or None if the original could not be resized
+    """
+    try:
+        data = run_cpu_bound(_render_bytes, original_data, width, height)
+    except Exception as e:
+        logger.warning(f"Resizing failed: photo_id={photo_file_id}, size={width}x{height}, error={e}")
+        return None
+
+    if data is None:
+        return None
+
+    try:
+        _store_rendition(fs, photo_file_id, width, height, data)
+    except Exception as e:
+        # Caching is best-effort: the rendition is still served for this request
+        logger.warning(f"Failed to cache rendition: photo_id={photo_file_id}, size={width}x{height}, error={e}")
+
+    return data, RENDITION_CONTENT_TYPE
+
+
+def pregenerate_renditions(fs, photo_file_id: str, image_data: BytesIO, widths: Iterable[int] = PRESET_RENDITION_WIDTHS) -> int:
+    """
+    Generate and store renditions for the preset widths right after upload.
+
+    The original is decoded once and reused for every size. Failures are logged and
+    ignored: missing renditions are generated lazily on first request.
+
+    Returns:
+        int: Number of renditions stored
+    """
+    stored = 0
+    try:
+        # Rendering runs off the request greenlet; GridFS writes stay on it
+        for width, data in run_cpu_bound(_render_widths, image_data, widths):
+            _store_rendition(fs, photo_file_id, width, None, data)
+            stored += 1
+    except Exception as e:
+        logger.warning(f"Failed to pregenerate renditions: photo_id={photo_file_id}, error={e}")
+    finally:
+        image_data.seek(0)
+
+    return stored
+
+
+def delete_renditions(fs, photo_file_id: str) -> int:
+    """Delete every cached rendition of a photo. Returns the number of deleted files."""
+    deleted = 0
+    try:
+        for rendition in fs.find({"metadata.rendition_of": str(photo_file_id)}):
+            fs.delete(rendition._id)
+            deleted += 1
+    except Exception as e:
+        logger.warning(f"Failed to delete renditions: photo_id={photo_file_id}, error={e}")
+    return deleted
@@ -0,0 +1,245 @@
+"""Daily rollups of health records for charts.
+
+`daily_rollups` holds one small document per (pet_id, type, day) with the number of
+records and the count, sum, min, max and last of their values. Inserts update it
+in place with `$inc`/`$min`/`$max` upserts. Updates and deletes cannot be undone
+that way (an old minimum is unknown), so they recompute the affected days from
+that day's records. Day/week/month charts read these documents (at most 365 for a
+year) instead of aggregating raw events on every request.
+
+Records written outside the routes (imports, restores, data from before this
+collection existed) are picked up by `flask --app web.app rebuild-rollups`.
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+import web.app as app  # access db, logger
+
+
+ROLLUPS_COLLECTION = "daily_rollups"
+
+# Record types -> (collection name, value field); "count" means every record counts as 1
+STATS_TYPE_MAPPING = {
+    "feeding": ("feedings", "food_weight"),
+    "asthma": ("asthma_attacks", "count"),
+    "defecation": ("defecations", "count"),
+    "litter": ("litter_changes", "count"),
+    "weight": ("weights", "weight"),
+    "eye_drops": ("eye_drops", "count"),
+    "tooth_brushing": ("tooth_brushing", "count"),
+    "ear_cleaning": ("ear_cleaning", "count"),
+    "medications": ("medication_intakes", "count"),
+}
+
+# Collection -> (record type, value field)
+ROLLUP_SOURCES: Dict[str, Tuple[str, str]] = {
+    collection: (record_type, value_field) for record_type, (collection, value_field) in STATS_TYPE_MAPPING.items()
+}
+
+
+def day_start(moment: datetime) -> datetime:
+    """Midnight of the day a record belongs to."""
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _record_value(record: dict, value_field: str) -> Optional[float]:
+    """Numeric value of a record, or None for count-only types and missing values."""
+    if value_field == "count":
+        return None
+    value = record.get(value_field)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def summarize_day(records: List[dict], value_field: str) -> dict:
+    """Rollup fields of one day's records (sorted by date_time)."""
+    values = [value for value in (_record_value(record, value_field) for record in records) if value is not None]
+    return {
+        "count": len(records),
+        "value_count": len(values),
+        "sum": sum(values),
+        "min": min(values) if values else None,
+        "max": max(values) if values else None,
+        "last_at": records[-1]["date_time"],
+        "last_value": _record_value(records[-1], value_field),
+    }
+
+
+def apply_inserted(collection_name: str, records: Iterable[dict], session=None) -> None:
+    """
+    Add newly inserted records of a collection to their days' rollups.
+
+    Records are combined per (pet_id, day) first, so a batch costs one bulk upsert
+    plus, for valued types, one bulk `last_value` update, whatever its size.
+    """
+    if collection_name not in ROLLUP_SOURCES:
+        return
+    record_type, value_field = ROLLUP_SOURCES[collection_name]
+
+    days: Dict[Tuple[str, datetime], List[dict]] = {}
+    for record in records:
+        days.setdefault((record["pet_id"], day_start(record["date_time"])), []).append(record)
+    if not days:
+        return
+
+    upserts, last_values = [], []
+    for (pet_id, day), day_records in days.items():
+        key = {"pet_id": pet_id, "type": record_type, "day": day}
+        values = [value for value in (_record_value(record, value_field) for record in day_records) if value is not None]
+        latest = day_records[0]
+        for record in day_records[1:]:
+            if record["date_time"] >= latest["date_time"]:
+                latest = record
+
+        update = {"$inc": {"count": len(day_records)}, "$max": {"last_at": latest["date_time"]}}
+        if values:
+            update["$inc"].update({"value_count": len(values), "sum": sum(values)})
+            update["$min"] = {"min": min(values)}
+            update["$max"]["max"] = max(values)
+        upserts.append(UpdateOne(key, update, upsert=True))
+        if value_field != "count":
+            # last_value belongs to the latest record of the day; only the writer that
+            # moved last_at to its own date_time may set it
+            last_values.append(
+                UpdateOne(
+                    {**key, "last_at": latest["date_time"]},
+                    {"$set": {"last_value": _record_value(latest, value_field)}},
+                )
+            )
+
+    rollups = app.db[ROLLUPS_COLLECTION]
+    rollups.bulk_write(upserts, ordered=False, session=session)
+    # A separate write: operations of an unordered bulk may run in any order
+    if last_values:
+        rollups.bulk_write(last_values, ordered=False, session=session)
+
+
+def refresh_days(collection_name: str, pet_id: str, moments: Iterable[Optional[datetime]], session=None) -> None:
+    """
+    Recompute the rollups of the days containing `moments` after records were updated or deleted.
+
+    Inside a transaction pass its `session`: the day's records are then read as the
+    transaction sees them, without the records it deleted.
+    """
+    if collection_name not in ROLLUP_SOURCES:
+        return
+    record_type, value_field = ROLLUP_SOURCES[collection_name]
+
+    for day in {day_start(moment) for moment in moments if isinstance(moment, datetime)}:
+        records = list(
+            app.db[collection_name]
+            .find({"pet_id": pet_id, "date_time": {"$gte": day, "$lt": day + timedelta(days=1)}}, session=session)
+            .sort("date_time", 1)
+        )
+        key = {"pet_id": pet_id, "type": record_type, "day": day}
+        if records:
+            app.db[ROLLUPS_COLLECTION].replace_one(
+                key, {**key, **summarize_day(records, value_field)}, upsert=True, session=session
+            )
+        else:
+            app.db[ROLLUPS_COLLECTION].delete_one(key, session=session)
+
+
+def _replace_pet_rollups(pet_id: str, record_type: str, rollups: List[dict]) -> None:
+    """Swap a pet's rollups of one type for freshly computed ones, day by day."""
+    key = {"pet_id": pet_id, "type": record_type}
+    operations = [ReplaceOne({**key, "day": rollup["day"]}, rollup, upsert=True) for rollup in rollups]
+    # Days whose records are all gone; existing days are replaced, never deleted first
+    operations.append(DeleteMany({**key, "day": {"$nin": [rollup["day"] for rollup in rollups]}}))
+    app.db[ROLLUPS_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def rebuild_rollups(pet_id: Optional[str] = None) -> int:
+    """
+    Recompute rollups from raw records, for all pets or a single one.
+
+    Each pet's rollups are swapped in once its records are summarized, so charts
+    never read an empty or partial set. A record written to a pet while that pet is
+    being rebuilt can still be overwritten by the rebuilt day; run the rebuild while
+    the API is not taking writes, or rebuild that pet again.
+
+    Returns:
+        int: Number of rollup documents written
+    """
+    scope = {"pet_id": pet_id} if pet_id else {}
+    written = 0
+    for collection_name, (record_type, value_field) in ROLLUP_SOURCES.items():
+        projection = {"_id": 0, "pet_id": 1, "date_time": 1}
+        if value_field != "count":
+            projection[value_field] = 1
+        # pet_id descending: the (pet_id, date_time -1, _id -1) index read backwards
+        records = app.db[collection_name].find({**scope, "date_time": {"$type": "date"}}, projection).sort(
+            [("pet_id", -1), ("date_time", 1)]
+        )
+        rebuilt_pets = []
+        for record_pet_id, pet_records in groupby(records, key=lambda record: record.get("pet_id")):
+            rollups = [
+                {"pet_id": record_pet_id, "type": record_type, "day": day, **summarize_day(list(day_records), value_field)}
+                for day, day_records in groupby(pet_records, key=lambda record: day_start(record["date_time"]))
+            ]
+            _replace_pet_rollups(record_pet_id, record_type, rollups)
+            rebuilt_pets.append(record_pet_id)
+            written += len(rollups)
+
+        # Pets without any dated record of this type left
+        if not pet_id:
+            app.db[ROLLUPS_COLLECTION].delete_many({"type": record_type, "pet_id": {"$nin": rebuilt_pets}})
+        elif not rebuilt_pets:
+            app.db[ROLLUPS_COLLECTION].delete_many({"type": record_type, "pet_id": pet_id})
+    return written
+
+
+def read_rollups(pet_id: str, record_type: str, since: datetime) -> List[dict]:
+    """Rollups of a pet and type from the day of `since` on, oldest first."""
+    return list(
+        app.db[ROLLUPS_COLLECTION]
+        .find({"pet_id": pet_id, "type": record_type, "day": {"$gte": day_start(since)}})
+        .sort("day", 1)
+    )
+
+
+def _bucket_label(day: datetime, bucket: str) -> str:
+    """Bucket start label of a day, matching the raw-event aggregation."""
+    if bucket == "week":
+        return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+    if bucket == "month":
+        return day.strftime("%Y-%m-01")
+    return day.strftime("%Y-%m-%d")
+
+
+def rollup_buckets(rollups: List[dict], value_field: str, bucket: str, agg: str) -> List[dict]:
+    """
+    Combine daily rollups into day/week/month chart points.
+
+    Count-only types aggregate the value 1 per record, like the raw-event pipeline.
+    """
+    points = []
+    for label, days in groupby(rollups, key=lambda rollup: _bucket_label(rollup["day"], bucket)):
+        days = list(days)
+        count = sum(rollup["count"] for rollup in days)
+
+        if agg == "count":
+            value = count
+        elif value_field == "count":
+            value = count if agg == "sum" else 1
+        else:
+            with_values = [rollup for rollup in days if rollup.get("value_count")]
+            value_count = sum(rollup["value_count"] for rollup in with_values)
+            if agg == "sum":
+                value = sum(rollup["sum"] for rollup in with_values)
+            elif agg == "avg":
+                value = sum(rollup["sum"] for rollup in with_values) / value_count if value_count else None
+            elif agg == "min":
+                value = min((rollup["min"] for rollup in with_values), default=None)
+            elif agg == "max":
+                value = max((rollup["max"] for rollup in with_values), default=None)
+            else:  # last
+                value = days[-1].get("last_value")
+
+        points.append({"date": label, "value": value})
+    return points
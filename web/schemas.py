@@ -5,8 +5,8 @@ Naming Convention:
 - See docs/api-naming-conventions.md for full naming rules
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, List, Annotated, Any
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Annotated, Any, Dict, Literal
 from pydantic import BaseModel, Field, field_validator, ConfigDict, StringConstraints
 
 # Custom type for ObjectId strings
@@ -82,7 +82,8 @@ class PaginatedResponse(BaseModel):
 
     page: int = Field(..., description="Текущая страница")
     page_size: int = Field(..., description="Размер страницы")
-    total: int = Field(..., description="Общее количество записей")
+    total: Optional[int] = Field(None, description="Общее количество записей (null, если include_total=false)")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (null на последней странице)")
 
 
 # ============================================================================
@@ -1044,8 +1045,10 @@ class EarCleaningListResponse(PaginatedResponse):
 class PaginationQuery(BaseModel):
     """Pagination query parameters."""
 
-    page: int = Field(1, ge=1, description="Номер страницы (начиная с 1)")
+    page: int = Field(1, ge=1, description="Номер страницы (начиная с 1, игнорируется при указании cursor)")
     page_size: int = Field(100, ge=1, le=1000, description="Количество элементов на странице (1-1000)")
+    cursor: Optional[str] = Field(None, description="Курсор из next_cursor предыдущего ответа")
+    include_total: bool = Field(True, description="Считать общее количество записей")
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -1090,6 +1093,24 @@ class HealthStatsQuery(PetIdQuery):
 
     type: str = Field(..., description="Тип записи (feeding, asthma, weight и т.д.)")
     days: Optional[int] = Field(30, description="Количество дней")
+    bucket: Optional[Literal["hour", "day", "week", "month"]] = Field(
+        None, description="Интервал группировки (без него возвращается каждая запись)"
+    )
+    agg: Optional[Literal["sum", "avg", "min", "max", "count", "last"]] = Field(
+        None, description="Агрегация значений внутри интервала (по умолчанию зависит от типа)"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "pet_id": "507f1f77bcf86cd799439011",
+                "type": "weight",
+                "days": 365,
+                "bucket": "week",
+                "agg": "avg",
+            }
+        }
+    )
 
 
 class HealthStatsItem(BaseModel):
@@ -1103,6 +1124,8 @@ class HealthStatsResponse(BaseModel):
     """Statistics response for charts."""
 
     data: List[HealthStatsItem]
+    bucket: Optional[str] = None
+    agg: Optional[str] = None
 
 
 # ============================================================================
@@ -1219,3 +1242,205 @@ class UpcomingDoseItem(BaseModel):
 
 class UpcomingDosesResponse(BaseModel):
     doses: List[UpcomingDoseItem]
+
+
+# ============================================================================
+# Batch Ingestion Schemas
+# ============================================================================
+
+BatchRecordType = Literal[
+    "asthma", "defecation", "litter", "weight", "feeding", "eye_drops", "tooth_brushing", "ear_cleaning"
+]
+
+MAX_BATCH_RECORDS = 500
+
+
+class BatchRecordItem(BaseModel):
+    """A single record of a batch: the create body of its type plus `type` (fields are validated per type)."""
+
+    type: BatchRecordType = Field(..., description="Тип записи")
+    client_id: Optional[str] = Field(None, max_length=100, description="Идентификатор записи на клиенте")
+
+    model_config = ConfigDict(extra="allow")
+
+
+class BatchRecordsRequest(BaseModel):
+    """Batch of health records logged offline."""
+
+    records: List[BatchRecordItem] = Field(..., min_length=1, max_length=MAX_BATCH_RECORDS)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "records": [
+                    {
+                        "type": "weight",
+                        "client_id": "c-1",
+                        "pet_id": "507f1f77bcf86cd799439011",
+                        "date": "2024-01-15",
+                        "time": "08:00",
+                        "weight": "4.5",
+                    },
+                    {
+                        "type": "feeding",
+                        "client_id": "c-2",
+                        "pet_id": "507f1f77bcf86cd799439011",
+                        "date": "2024-01-15",
+                        "time": "08:05",
+                        "food_weight": 50,
+                    },
+                ]
+            }
+        }
+    )
+
+
+class BatchRecordResult(BaseModel):
+    """Outcome of one batch record, in request order."""
+
+    index: int
+    client_id: Optional[str] = None
+    status: int = Field(..., description="HTTP-статус, который вернул бы одиночный POST")
+    id: Optional[str] = None
+    code: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchRecordsResponse(BaseModel):
+    """Per-record results of a batch."""
+
+    results: List[BatchRecordResult]
+    created: int
+    failed: int
+
+
+# ============================================================================
+# Sync Schemas
+# ============================================================================
+
+
+class SyncQuery(PetIdQuery):
+    """Query parameters for delta sync."""
+
+    since: Optional[str] = Field(None, description="watermark из предыдущего ответа (без него — полная выгрузка)")
+    cursor: Optional[str] = Field(None, description="cursor из предыдущей страницы (since тогда не нужен)")
+
+
+class SyncResponse(BaseModel):
+    """Changes of a pet since a watermark."""
+
+    full: bool = Field(..., description="Полная выгрузка: клиент должен заменить локальные данные")
+    changes: Dict[str, List[dict]] = Field(..., description="Созданные/измененные документы по коллекциям")
+    deleted: Dict[str, List[str]] = Field(..., description="ID удаленных документов по коллекциям")
+    watermark: str = Field(..., description="Передать как since в следующем запросе после последней страницы")
+    has_more: bool = Field(..., description="Есть следующая страница")
+    cursor: Optional[str] = Field(None, description="Передать как cursor для следующей страницы")
+
+
+# ============================================================================
+# Timeline Schemas
+# ============================================================================
+
+
+TimelineType = Literal[
+    "asthma",
+    "defecation",
+    "litter",
+    "weight",
+    "feeding",
+    "eye_drops",
+    "tooth_brushing",
+    "ear_cleaning",
+    "medication_intake",
+]
+
+
+class TimelineQuery(PetIdQuery):
+    """Query parameters for the merged record timeline."""
+
+    types: Optional[str] = Field(None, description="Типы записей через запятую (по умолчанию все)")
+    date_from: Optional[date] = Field(None, description="Начальная дата включительно (YYYY-MM-DD)")
+    date_to: Optional[date] = Field(None, description="Конечная дата включительно (YYYY-MM-DD)")
+    page_size: int = Field(100, ge=1, le=1000, description="Количество элементов на странице (1-1000)")
+    cursor: Optional[str] = Field(None, description="Курсор из next_cursor предыдущего ответа")
+
+    @field_validator("types")
+    @classmethod
+    def validate_types(cls, v):
+        """Validate the comma-separated list of record types."""
+        if not v:
+            return None
+        allowed = TimelineType.__args__
+        types = [t.strip() for t in v.split(",") if t.strip()]
+        unknown = [t for t in types if t not in allowed]
+        if unknown:
+            raise ValueError(f"Неизвестные типы записей: {', '.join(unknown)}")
+        return ",".join(types) or None
+
+
+class TimelineItem(BaseModel):
+    """A record of any type in the timeline."""
+
+    type: TimelineType
+    record: dict
+
+
+class TimelineResponse(BaseModel):
+    """One page of the merged record timeline."""
+
+    items: List[TimelineItem]
+    page_size: int = Field(..., description="Размер страницы")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (null на последней странице)")
+
+
+# ============================================================================
+# Dashboard Summary Schemas
+# ============================================================================
+
+
+class PetSummaryQuery(BaseModel):
+    """Query parameters for the dashboard summary."""
+
+    client_datetime: Optional[str] = Field(None, description="Client local datetime (ISO format)")
+
+
+class RecordTypeSummary(BaseModel):
+    """Latest record and today's number of records of one type."""
+
+    last: Optional[dict] = Field(None, description="Последняя запись (null, если записей нет)")
+    today_count: int = Field(0, description="Количество записей за сегодня")
+
+
+class PetSummaryResponse(BaseModel):
+    """Everything the dashboard shows for a pet."""
+
+    records: Dict[str, RecordTypeSummary] = Field(..., description="Сводка по типам записей")
+    latest_weight: Optional[dict] = Field(None, description="Последнее взвешивание")
+    medications: List[dict] = Field(..., description="Активные курсы лекарств с intakes_today")
+    upcoming_doses: List[UpcomingDoseItem] = Field(..., description="Непринятые дозы на сегодня")
+
+
+# ============================================================================
+# Background Job Schemas
+# ============================================================================
+
+
+class JobItem(BaseModel):
+    """State of a background job."""
+
+    id: str
+    kind: str = Field(..., description="Тип задачи (export, optimize_photo, purge_pet, delete_photo)")
+    status: Literal["queued", "running", "succeeded", "failed"]
+    attempts: int = Field(..., description="Число начатых попыток")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = Field(None, description="Ошибка последней неудачной попытки")
+    result: Optional[dict] = None
+    status_url: str = Field(..., description="URL для опроса состояния")
+    download_url: Optional[str] = Field(None, description="URL готового файла (экспорт)")
+
+
+class JobResponse(BaseModel):
+    """Background job response."""
+
+    job: JobItem
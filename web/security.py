@@ -5,17 +5,23 @@ It exposes JWT helpers, auth helpers and access decorators which are re-exported
 from `web.app` and imported directly from blueprints.
 """
 
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
+import hashlib
 import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
 
-import bcrypt
 import jwt
-from flask import request
+from flask import g, request
 
-from web.configs import JWT_CONFIG, ADMIN_CONFIG
+from web.configs import CACHE_CONFIG, JWT_CONFIG, ADMIN_CONFIG
 from web.db import db
 from web.errors import error_response
+from web.passwords import PasswordHashingBusy, check_password, hash_password, needs_rehash
+from web.refresh_tokens import find_refresh_token, last_used, store_refresh_token, token_hash  # reads web.app.db at call time only
 
 
 logger = logging.getLogger(__name__)
@@ -25,6 +31,7 @@ JWT_SECRET_KEY = JWT_CONFIG["secret_key"]
 JWT_ALGORITHM = JWT_CONFIG["algorithm"]
 ACCESS_TOKEN_EXPIRE_MINUTES = JWT_CONFIG["access_token_expire_minutes"]
 REFRESH_TOKEN_EXPIRE_DAYS = JWT_CONFIG["refresh_token_expire_days"]
+REFRESH_REUSE_SECONDS = JWT_CONFIG["refresh_reuse_seconds"]
 
 # Authentication credentials - REQUIRED from environment
 ADMIN_USERNAME = ADMIN_CONFIG["username"]
@@ -40,22 +47,41 @@ if not ADMIN_PASSWORD_HASH:
 
 
 def verify_user_credentials(username, password):
-    """Verify user credentials from database or fallback to admin."""
+    """
+    Verify user credentials from database or fallback to admin.
+
+    A matching password stored with another bcrypt cost than the current one is rehashed.
+
+    Raises:
+        PasswordHashingBusy: If the password pool is saturated
+    """
     # First, try to find user in database
     user = db["users"].find_one({"username": username, "is_active": True})
     if user:
         try:
-            return bcrypt.checkpw(password.encode(), user["password_hash"].encode())
+            valid = check_password(password, user["password_hash"])
         except (ValueError, TypeError, KeyError):
             return False
+        if valid and needs_rehash(user["password_hash"]):
+            _rehash_password(username, password)
+        return valid
 
     # Fallback to admin credentials for backward compatibility
     try:
-        return username == ADMIN_USERNAME and bcrypt.checkpw(password.encode(), ADMIN_PASSWORD_HASH.encode())
+        return username == ADMIN_USERNAME and check_password(password, ADMIN_PASSWORD_HASH)
     except (ValueError, TypeError):
         return False
 
 
+def _rehash_password(username, password):
+    """Store the password with the current bcrypt cost; the login succeeds either way."""
+    try:
+        db["users"].update_one({"username": username}, {"$set": {"password_hash": hash_password(password)}})
+    except PasswordHashingBusy:
+        return
+    logger.info(f"Password rehashed with current bcrypt cost: user={username}")
+
+
 def ensure_default_admin():
     """Ensure default admin user exists in database."""
     admin_user = db["users"].find_one({"username": ADMIN_USERNAME})
@@ -78,8 +104,16 @@ def ensure_default_admin():
 
 
 def create_access_token(username):
-    """Create JWT access token."""
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    """
+    Create JWT access token.
+
+    The expiry is aligned to `refresh_reuse_seconds` windows, so every worker that mints
+    a token for the same user within one window produces the same token (the payload
+    carries nothing else that differs between them).
+    """
+    window = REFRESH_REUSE_SECONDS
+    issued_at = int(time.time() // window * window) if window > 0 else int(time.time())
+    expire = datetime.fromtimestamp(issued_at, timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"username": username, "exp": expire, "type": "access"}
     return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
@@ -90,29 +124,133 @@ def create_refresh_token(username):
     payload = {"username": username, "exp": expire, "type": "refresh"}
     token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
-    db["refresh_tokens"].insert_one(
-        {
-            "token": token,
-            "username": username,
-            "created_at": datetime.now(timezone.utc),
-            "expires_at": expire,
-        }
-    )
+    store_refresh_token(token, username, expire)
 
     return token
 
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified token payloads, keyed by the token's SHA-256 digest.
+
+    Only successfully verified tokens are stored, and each entry is dropped once the
+    token's own `exp` has passed, so a cached token is never accepted for longer than
+    jwt.decode would accept it.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Payload of a previously verified, still valid token."""
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        """Remember a verified payload until its expiry (tokens without exp are not cached)."""
+        if self.max_size <= 0 or not isinstance(payload.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload["exp"], payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every cached payload."""
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(CACHE_CONFIG["verified_token_cache_size"])
+
+
+class _Flight:
+    """A call shared by the requests that asked for the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.reusable_until = 0.0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key.
+
+    The first caller runs the function; callers arriving while it runs wait for it and
+    share its result, as do callers within `reuse_seconds` after it finished. Calls that
+    raise are not reused.
+    """
+
+    def __init__(self, reuse_seconds: float):
+        self.reuse_seconds = reuse_seconds
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Result of `func()`, computed at most once per key at a time."""
+        now = time.monotonic()
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or (flight.done.is_set() and flight.reusable_until <= now)
+            if leader:
+                # Finished flights past their reuse window are dropped whenever a new one starts
+                self._flights = {
+                    other_key: other
+                    for other_key, other in self._flights.items()
+                    if not other.done.is_set() or other.reusable_until > now
+                }
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = func()
+            flight.reusable_until = time.monotonic() + self.reuse_seconds
+        finally:
+            flight.done.set()
+        return flight.result
+
+
+refresh_flights = SingleFlight(REFRESH_REUSE_SECONDS)
+
+
 def verify_token(token, token_type="access"):
     """Verify JWT token and return payload."""
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        if payload.get("type") != token_type:
+    payload = verified_tokens.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
             return None
-        return payload
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
+        except jwt.InvalidTokenError:
+            return None
+        verified_tokens.put(token, payload)
+
+    if payload.get("type") != token_type:
         return None
+    return dict(payload)
 
 
 def get_token_from_request():
@@ -137,23 +275,54 @@ def try_refresh_access_token():
     if not payload:
         return None
 
-    # Check if token exists in database
-    token_record = db["refresh_tokens"].find_one({"token": refresh_token})
-    if not token_record:
-        return None
+    def refresh():
+        # Check if token exists in database (revoked tokens are deleted)
+        token_record = find_refresh_token(refresh_token)
+        if not token_record:
+            return None
 
-    username = payload.get("username")
+        # Track usage; written in periodic batches (see web/refresh_tokens.py)
+        last_used.touch(token_record["token_hash"])
 
-    # Create new access token
-    access_token = create_access_token(username or "")
+        return create_access_token(payload.get("username") or "")
 
-    # Update token in database (optional, for tracking)
-    db["refresh_tokens"].update_one(
-        {"token": refresh_token},
-        {"$set": {"last_used_at": datetime.now(timezone.utc)}},
-    )
+    # Parallel requests of an expired session share one lookup and one minted token
+    return refresh_flights.do(token_hash(refresh_token), refresh)
+
+
+def resolve_identity():
+    """
+    before_request hook: verify the request's access token once.
 
-    return access_token
+    The outcome is kept in `g` for login_required, page_login_required and
+    get_current_user, so nested decorators never verify the token again.
+    """
+    token = get_token_from_request()
+    g.auth_payload = verify_token(token, "access") if token else None
+    g.auth_refreshed_token = None
+    if g.auth_payload:
+        setattr(request, "current_user", g.auth_payload.get("username"))
+
+
+def authenticate_request():
+    """
+    Identity of the current request, falling back to the refresh token cookie at most once.
+
+    Returns:
+        tuple: (payload, new_access_token) where payload is None if not authenticated and
+               new_access_token is set only when the access token was refreshed
+    """
+    if "auth_payload" not in g:
+        resolve_identity()
+
+    if g.auth_payload is None and not g.get("auth_refresh_attempted"):
+        g.auth_refresh_attempted = True
+        new_token = try_refresh_access_token()
+        if new_token:
+            g.auth_payload = verify_token(new_token, "access")
+            g.auth_refreshed_token = new_token if g.auth_payload else None
+
+    return g.auth_payload, g.auth_refreshed_token
 
 
 def get_current_user():
@@ -180,22 +349,8 @@ def login_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from flask import g  # imported lazily to avoid hard dependency at import time
-
-        token = get_token_from_request()
-        payload = None
-        new_token = None
-
-        if token:
-            payload = verify_token(token, "access")
-
-        if not payload:
-            # Token missing or invalid, try to refresh
-            new_token = try_refresh_access_token()
-            if new_token:
-                payload = verify_token(new_token, "access")
-                if not payload:
-                    new_token = None
+        # Resolved once per request (see resolve_identity), refreshing if needed
+        payload, new_token = authenticate_request()
 
         if not payload:
             return error_response("unauthorized")
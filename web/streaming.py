@@ -0,0 +1,63 @@
+"""Streamed, range-capable responses for stored files (pet photos).
+
+A GridFS file is sent one `chunk_size` block at a time (255 KiB by default) instead of
+being read into memory first, so a large original costs about one chunk of heap per
+concurrent download. `Range` requests are answered with 206 and only the requested
+bytes: the file is seeked to the start of the range, so the chunks before it are never
+fetched. An unsatisfiable range gets 416 with `Content-Range: bytes */<length>`.
+"""
+
+from typing import Iterable
+
+from flask import Response, request
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.wsgi import FileWrapper
+
+from web.errors import error_response
+from web.metrics import record_gridfs_read
+
+
+def _send(body: Iterable[bytes], length: int, content_type: str, etag: str, cache_control: str) -> Response:
+    response = Response(body, content_type=content_type, direct_passthrough=True)
+    response.content_length = length
+    response.accept_ranges = "bytes"
+    response.headers["Content-Disposition"] = "inline"
+    response.headers["Cache-Control"] = cache_control
+    response.set_etag(etag)
+    try:
+        # Sets 206, Content-Range and the range's Content-Length, and honours If-Range
+        response.make_conditional(request, accept_ranges=True, complete_length=length)
+    except RequestedRangeNotSatisfiable:
+        response.close()
+        error, status = error_response("range_not_satisfiable")
+        error.status_code = status
+        error.headers["Content-Range"] = f"bytes */{length}"
+        return error
+    return response
+
+
+def send_gridfs_file(grid_out, content_type: str, etag: str, cache_control: str) -> Response:
+    """
+    Stream a GridFS file, honouring `Range`.
+
+    The file is closed when the response is closed. Werkzeug's FileWrapper is used
+    rather than the server's `wsgi.file_wrapper` as it is seekable, which the range
+    handling needs to skip to the start of the range.
+
+    Args:
+        grid_out: Open GridOut of the file
+        content_type: Content-Type of the response
+        etag: Unquoted ETag of the representation (also the If-Range validator)
+        cache_control: Cache-Control header
+    """
+    response = _send(
+        FileWrapper(grid_out, buffer_size=grid_out.chunk_size), grid_out.length, content_type, etag, cache_control
+    )
+    if response.status_code in (200, 206):
+        record_gridfs_read(response.content_length or 0)
+    return response
+
+
+def send_bytes(data: bytes, content_type: str, etag: str, cache_control: str) -> Response:
+    """Send in-memory content (a freshly rendered photo) with the same headers and `Range` support."""
+    return _send([data], len(data), content_type, etag, cache_control)
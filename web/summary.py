@@ -0,0 +1,86 @@
+"""Dashboard summary: everything the pet dashboard shows in one request.
+
+Opening the dashboard used to fan out into the pet, medications, upcoming doses
+and per-tile list requests, each repeating authentication and the pet access
+check. `GET /api/pets/<pet_id>/summary` checks access once and reads each record
+collection through its `(pet_id, date_time, _id)` index: one range read of today's
+records gives both the tile's last event and today's count, and only types without
+a record today need a second single-document lookup.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request
+from flask_pydantic_spec import Response
+
+import web.app as app  # access db, logger
+from web.app import api
+from web.health_records import RECORD_TYPES
+from web.helpers import RECORD_LIST_SORT, validate_pet_access
+from web.medications import build_upcoming_doses, find_today_intakes, parse_client_datetime
+from web.schemas import ErrorResponse, PetSummaryQuery, PetSummaryResponse
+from web.security import get_current_user, login_required
+
+
+summary_bp = Blueprint("summary", __name__)
+
+
+def summarize_records(collection_name: str, pet_id: str, today_start: datetime) -> dict:
+    """Last record of a collection and the number of records dated today."""
+    collection = app.db[collection_name]
+    tomorrow_start = today_start + timedelta(days=1)
+
+    # Records may be dated up to a day ahead, so "since today" also holds the newest one
+    recent = list(collection.find({"pet_id": pet_id, "date_time": {"$gte": today_start}}).sort(RECORD_LIST_SORT))
+    if recent:
+        last = recent[0]
+    else:
+        last = collection.find_one({"pet_id": pet_id}, sort=RECORD_LIST_SORT)
+
+    return {
+        "last": last,
+        "today_count": sum(1 for record in recent if record["date_time"] < tomorrow_start),
+    }
+
+
+@summary_bp.route("/api/pets/<pet_id>/summary", methods=["GET"])
+@login_required
+@api.validate(
+    query=PetSummaryQuery,
+    resp=Response(HTTP_200=PetSummaryResponse, HTTP_403=ErrorResponse, HTTP_422=ErrorResponse),
+    tags=["pets"],
+)
+def get_pet_summary(pet_id):
+    """Get the dashboard summary of a pet."""
+    username, auth_error = get_current_user()
+    if auth_error:
+        return auth_error[0], auth_error[1]
+
+    success, access_error = validate_pet_access(pet_id, username)
+    if not success:
+        return access_error[0], access_error[1]
+
+    query_params = request.context.query  # type: ignore[attr-defined]
+    now = parse_client_datetime(query_params.client_datetime)
+    today_start = datetime(now.year, now.month, now.day)
+
+    records = {
+        name: summarize_records(record_type.collection, pet_id, today_start)
+        for name, record_type in RECORD_TYPES.items()
+    }
+
+    medications = list(app.db.medications.find({"pet_id": pet_id, "is_active": True}).sort("created_at", -1))
+    today_intakes = find_today_intakes(medications, today_start) if medications else []
+    intakes_today = Counter(intake.get("medication_id") for intake in today_intakes)
+    for medication in medications:
+        medication["intakes_today"] = intakes_today[str(medication["_id"])]
+
+    return jsonify(
+        {
+            "records": records,
+            "latest_weight": records["weight"]["last"],
+            "medications": medications,
+            "upcoming_doses": build_upcoming_doses(medications, now, today_intakes),
+        }
+    )
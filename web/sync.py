@@ -0,0 +1,206 @@
+"""Delta sync: everything that changed for a pet since a watermark.
+
+Every create/update route stamps `updated_at` and every delete route writes a
+tombstone into `deleted_records`, so `GET /api/sync?pet_id=&since=` can answer with
+one `(pet_id, updated_at)` index range per collection instead of clients re-fetching
+whole lists. Without `since`, or with a watermark older than the tombstone retention,
+the response is a full snapshot (`full: true`) that replaces the client's local data.
+
+Responses hold at most SYNC_PAGE_SIZE documents and tombstones. Collections are read
+one after the other in (updated_at, _id) order, tombstones last in (deleted_at, _id)
+order, each page continuing from the keyset position in `cursor` (`has_more: true`).
+Every page of one sync carries the watermark taken at its first page; clients store
+it once the last page is applied.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, g, jsonify, request
+from flask_pydantic_spec import Response
+
+import web.app as app  # access db, logger
+from web.app import api
+from web.configs import SYNC_CONFIG
+from web.decorators import require_pet_access
+from web.errors import error_response
+from web.indexes import RECORD_COLLECTIONS
+from web.schemas import ErrorResponse, SyncQuery, SyncResponse
+
+
+sync_bp = Blueprint("sync", __name__)
+
+TOMBSTONES_COLLECTION = "deleted_records"
+SYNC_COLLECTIONS = [*RECORD_COLLECTIONS, "medications"]
+
+# Changes stamped shortly before the previous watermark may commit after it was issued
+# (and app servers' clocks may drift slightly), so every delta re-reads this window;
+# clients apply changes by _id, so repeated documents are harmless
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Read in this order, each as (collection, stamp field); tombstones only in deltas
+SYNC_STAGES: List[Tuple[str, str]] = [*((name, "updated_at") for name in SYNC_COLLECTIONS), (TOMBSTONES_COLLECTION, "deleted_at")]
+
+
+def record_deletions(collection_name: str, pet_id: str, record_ids: Iterable, session=None) -> None:
+    """Write delete tombstones for records removed from a synced collection."""
+    now = datetime.utcnow()
+    tombstones = [
+        {"collection": collection_name, "record_id": str(record_id), "pet_id": pet_id, "deleted_at": now}
+        for record_id in record_ids
+    ]
+    if tombstones:
+        app.db[TOMBSTONES_COLLECTION].insert_many(tombstones, session=session)
+
+
+def encode_watermark(moment: datetime) -> str:
+    """Opaque watermark for a server timestamp."""
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_watermark(watermark: str) -> datetime:
+    """
+    Decode a watermark produced by encode_watermark.
+
+    Raises:
+        ValueError: If the watermark is malformed
+    """
+    try:
+        padded = watermark + "=" * (-len(watermark) % 4)
+        return datetime.fromisoformat(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e)) from e
+
+
+def encode_sync_cursor(since: Optional[datetime], started: datetime, stage: int, last: Optional[dict], field: str) -> str:
+    """Opaque continuation of a paged sync: its window, and the stage and keyset position to resume at."""
+    stamp = last.get(field) if last else None
+    position = {
+        "since": since.isoformat() if since else None,
+        "started": started.isoformat(),
+        "stage": stage,
+        "stamp": stamp.isoformat() if isinstance(stamp, datetime) else None,
+        "id": str(last["_id"]) if last else None,
+    }
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by encode_sync_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return {
+            "since": datetime.fromisoformat(position["since"]) if position["since"] else None,
+            "started": datetime.fromisoformat(position["started"]),
+            "stage": int(position["stage"]),
+            "stamp": datetime.fromisoformat(position["stamp"]) if position["stamp"] else None,
+            "id": ObjectId(position["id"]) if position["id"] else None,
+        }
+    except (binascii.Error, UnicodeDecodeError, InvalidId, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid sync cursor: {cursor}") from e
+
+
+def after_position(field: str, stamp: Optional[datetime], record_id: ObjectId) -> dict:
+    """Filter selecting documents strictly after (stamp, _id) in ascending order; unstamped documents sort first."""
+    if stamp is None:
+        return {"$or": [{field: None, "_id": {"$gt": record_id}}, {field: {"$ne": None}}]}
+    return {"$or": [{field: {"$gt": stamp}}, {field: stamp, "_id": {"$gt": record_id}}]}
+
+
+@sync_bp.route("/api/sync", methods=["GET"])
+@api.validate(
+    query=SyncQuery,
+    resp=Response(HTTP_200=SyncResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    tags=["sync"],
+)
+@require_pet_access
+def sync_pet():
+    """Get records created, updated or deleted since a watermark, one page at a time."""
+    query_params = request.context.query  # type: ignore[attr-defined]
+    pet_id = g.pet_id
+
+    since: Optional[datetime] = None
+    stage, stamp, record_id = 0, None, None
+    if query_params.cursor:
+        try:
+            position = decode_sync_cursor(query_params.cursor)
+        except ValueError:
+            return error_response("invalid_watermark")
+        since, started, stage = position["since"], position["started"], position["stage"]
+        stamp, record_id = position["stamp"], position["id"]
+    else:
+        # Taken before reading so that writes racing with this sync land in the next delta
+        started = datetime.utcnow()
+        if query_params.since:
+            try:
+                since = decode_watermark(query_params.since)
+            except ValueError:
+                return error_response("invalid_watermark")
+            if since < started - timedelta(days=SYNC_CONFIG["tombstone_retention_days"]):
+                # Tombstones of that period may already have expired
+                since = None
+
+    # A full snapshot has nothing to delete: the client replaces its data
+    stages = SYNC_STAGES if since is not None else SYNC_STAGES[:-1]
+    changes = {name: [] for name in SYNC_COLLECTIONS}
+    deleted = {name: [] for name in SYNC_COLLECTIONS}
+    budget = SYNC_CONFIG["page_size"]
+    next_cursor = None
+
+    for index in range(stage, len(stages)):
+        collection_name, field = stages[index]
+        conditions = [{"pet_id": pet_id}]
+        if since is not None:
+            conditions.append({field: {"$gte": since - SYNC_OVERLAP}})
+        if index == stage and record_id is not None:
+            conditions.append(after_position(field, stamp, record_id))
+        projection = {"collection": 1, "record_id": 1, "deleted_at": 1} if collection_name == TOMBSTONES_COLLECTION else None
+
+        # One document more than fits tells whether this stage continues on the next page
+        docs = list(
+            app.db[collection_name]
+            .find({"$and": conditions}, projection)
+            .sort([(field, 1), ("_id", 1)])
+            .limit(budget + 1)
+        )
+        if len(docs) > budget:
+            docs = docs[:budget]
+            next_cursor = encode_sync_cursor(since, started, index, docs[-1] if docs else None, field)
+
+        if collection_name == TOMBSTONES_COLLECTION:
+            for tombstone in docs:
+                deleted.setdefault(tombstone["collection"], []).append(tombstone["record_id"])
+        else:
+            changes[collection_name] = docs
+
+        budget -= len(docs)
+        if next_cursor is None and budget == 0 and index + 1 < len(stages):
+            next_cursor = encode_sync_cursor(since, started, index + 1, None, field)
+        if next_cursor is not None:
+            break
+
+    app.logger.info(
+        f"Sync: pet_id={pet_id}, user={g.username}, full={since is None}, has_more={next_cursor is not None}, "
+        f"changed={sum(len(docs) for docs in changes.values())}, deleted={sum(len(ids) for ids in deleted.values())}"
+    )
+    return jsonify(
+        {
+            "full": since is None,
+            "changes": changes,
+            "deleted": deleted,
+            "watermark": encode_watermark(started),
+            "has_more": next_cursor is not None,
+            "cursor": next_cursor,
+        }
+    )
@@ -0,0 +1,103 @@
+"""Unified record timeline: all record types of a pet merged by date_time.
+
+`GET /api/timeline` replaces the History page's per-type list requests. Every
+selected collection is read through its `(pet_id, date_time, _id)` index in
+RECORD_LIST_SORT order, and the cursors are merged lazily with a k-way heap merge,
+so each cursor is only advanced as far as the page needs (at most page_size + 1
+documents in total are taken). `$unionWith` + `$sort` would have to sort the union
+of all matching documents instead. Pagination is keyset-based with the same
+(date_time, _id) cursors as the per-type lists.
+"""
+
+import heapq
+import math
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from flask import Blueprint, g, jsonify, request
+from flask_pydantic_spec import Response
+
+import web.app as app  # access db, logger
+from web.app import api
+from web.decorators import require_pet_access
+from web.errors import error_response
+from web.health_records import RECORD_TYPES
+from web.helpers import RECORD_LIST_SORT, encode_cursor, keyset_filter
+from web.schemas import ErrorResponse, TimelineQuery, TimelineResponse
+
+
+timeline_bp = Blueprint("timeline", __name__)
+
+# Timeline type -> collection
+TIMELINE_TYPES = {
+    **{name: record_type.collection for name, record_type in RECORD_TYPES.items()},
+    "medication_intake": "medication_intakes",
+}
+
+
+def _tagged(name: str, cursor):
+    """Yield (type, record) entries of one cursor."""
+    for record in cursor:
+        yield name, record
+
+
+def _position(entry) -> tuple:
+    """Merge key of a (type, record) entry, matching RECORD_LIST_SORT."""
+    record = entry[1]
+    return record["date_time"], record["_id"]
+
+
+@timeline_bp.route("/api/timeline", methods=["GET"])
+@api.validate(
+    query=TimelineQuery,
+    resp=Response(HTTP_200=TimelineResponse, HTTP_422=ErrorResponse, HTTP_403=ErrorResponse),
+    tags=["health-records"],
+)
+@require_pet_access
+def get_timeline():
+    """Get records of all (or the selected) types for current pet, newest first."""
+    query_params = request.context.query  # type: ignore[attr-defined]
+    pet_id = g.pet_id
+    page_size = query_params.page_size
+
+    types = query_params.types.split(",") if query_params.types else list(TIMELINE_TYPES)
+
+    conditions = [{"pet_id": pet_id}]
+    date_range = {}
+    if query_params.date_from:
+        date_range["$gte"] = datetime.combine(query_params.date_from, time.min)
+    if query_params.date_to:
+        date_range["$lt"] = datetime.combine(query_params.date_to + timedelta(days=1), time.min)
+    if date_range:
+        conditions.append({"date_time": date_range})
+    if query_params.cursor:
+        try:
+            conditions.append(keyset_filter(query_params.cursor))
+        except ValueError:
+            return error_response("invalid_cursor")
+    query = {"$and": conditions}
+
+    # An evenly spread page needs about page_size / k documents from each collection;
+    # cursors of busier collections fetch further batches only when the merge reaches them
+    batch_size = math.ceil((page_size + 1) / len(types))
+    cursors = {
+        name: app.db[TIMELINE_TYPES[name]].find(query).sort(RECORD_LIST_SORT).limit(page_size + 1).batch_size(batch_size)
+        for name in types
+    }
+    try:
+        streams = [_tagged(name, cursor) for name, cursor in cursors.items()]
+        entries = list(islice(heapq.merge(*streams, key=_position, reverse=True), page_size + 1))
+    finally:
+        for cursor in cursors.values():
+            cursor.close()
+
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+
+    return jsonify(
+        {
+            "items": [{"type": name, "record": record} for name, record in entries],
+            "page_size": page_size,
+            "next_cursor": encode_cursor(entries[-1][1]) if has_more else None,
+        }
+    )
@@ -2,7 +2,6 @@
 
 from datetime import datetime, timezone
 
-import bcrypt
 from flask import Blueprint, jsonify, request
 from flask_pydantic_spec import Request, Response
 
@@ -11,6 +10,7 @@ from web.security import login_required, admin_required
 import web.app as app  # to access patched app.db in tests
 from web.security import ADMIN_USERNAME
 from web.messages import get_message
+from web.passwords import hash_password
 from web.schemas import (
     UserCreate,
     UserUpdate,
@@ -84,7 +84,7 @@ def create_user():
         if existing:
             return error_response("user_exists")
 
-        password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        password_hash = hash_password(password)
 
         current_user = getattr(request, "current_user", "admin")
 
@@ -161,12 +161,13 @@ def update_user(username):
             update_data["is_active"] = data.is_active
         if data.password is not None:
             # Hash the new password
-            password_hash = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+            password_hash = hash_password(data.password)
             update_data["password_hash"] = password_hash
 
         if not update_data:
             return error_response("validation_error_no_update_data")
 
+        update_data["updated_at"] = datetime.now(timezone.utc)
         result = app.db["users"].update_one({"username": username}, {"$set": update_data})
 
         if result.matched_count == 0:
@@ -194,7 +195,9 @@ def delete_user(username):
         if username == ADMIN_USERNAME:
             return error_response("validation_error_admin_deactivation")
 
-        result = app.db["users"].update_one({"username": username}, {"$set": {"is_active": False}})
+        result = app.db["users"].update_one(
+            {"username": username}, {"$set": {"is_active": False, "updated_at": datetime.now(timezone.utc)}}
+        )
 
         if result.matched_count == 0:
             return error_response("user_not_found")
@@ -228,9 +231,12 @@ def reset_user_password(username):
         if not user:
             return error_response("user_not_found")
 
-        password_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+        password_hash = hash_password(new_password)
 
-        result = app.db["users"].update_one({"username": username}, {"$set": {"password_hash": password_hash}})
+        result = app.db["users"].update_one(
+            {"username": username},
+            {"$set": {"password_hash": password_hash, "updated_at": datetime.now(timezone.utc)}},
+        )
 
         if result.matched_count == 0:
             return error_response("user_not_found")
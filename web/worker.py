@@ -0,0 +1,103 @@
+"""Background job worker: `python -m web.worker [--processes N] [--drain]`.
+
+Starts N processes (JOBS_WORKER_PROCESSES by default), each claiming and running jobs
+from the `jobs` collection (web/jobs.py) one at a time and polling every
+JOBS_POLL_SECONDS while idle. Processes that die are restarted. SIGTERM/SIGINT let
+every process finish its current job, then stop; a job interrupted harder than that
+is claimed again after the visibility timeout.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from web.configs import JOBS_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+# Idle workers delete expired export files this often
+PURGE_INTERVAL_SECONDS = 600
+
+
+def _work(index: int, stop, drain: bool) -> None:
+    """Job loop of one worker process."""
+    # The parent turns Ctrl+C into a graceful stop for every process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import web.app as app
+    from web.jobs import purge_expired_files, run_next
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    app.logger.info(f"Job worker started: id={worker_id}")
+    next_purge = 0.0
+
+    with app.app.app_context():
+        while not stop.is_set():
+            try:
+                if run_next(worker_id):
+                    continue
+                if drain:
+                    break
+                if time.monotonic() >= next_purge:
+                    purged = purge_expired_files()
+                    if purged:
+                        app.logger.info(f"Deleted expired job files: {purged}")
+                    next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+            except Exception as e:
+                # MongoDB unavailable or similar: keep the process and retry after a poll interval
+                app.logger.error(f"Job worker error: id={worker_id}, error={e}", exc_info=True)
+            stop.wait(JOBS_CONFIG["poll_interval_seconds"])
+
+    app.logger.info(f"Job worker stopped: id={worker_id}")
+
+
+def run_workers(processes: int, drain: bool = False) -> None:
+    """Run worker processes until stopped by a signal (or, with drain, until no job is due)."""
+    # Fresh interpreters: no MongoClient or thread is inherited from this process
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+
+    def request_stop(signum, frame):
+        logger.info(f"Stopping job workers (signal {signum})")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    def start(index):
+        process = context.Process(target=_work, args=(index, stop, drain), name=f"petzy-worker-{index}")
+        process.start()
+        return process
+
+    workers = {index: start(index) for index in range(processes)}
+    while workers:
+        for index, process in list(workers.items()):
+            process.join(timeout=1)
+            if process.is_alive():
+                continue
+            if stop.is_set() or (drain and process.exitcode == 0):
+                del workers[index]
+            else:
+                logger.warning(f"Job worker {process.name} exited with code {process.exitcode}, restarting")
+                workers[index] = start(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers.")
+    parser.add_argument(
+        "--processes", type=int, default=JOBS_CONFIG["worker_processes"], help="Number of worker processes"
+    )
+    parser.add_argument("--drain", action="store_true", help="Exit once no job is due")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(message)s")
+    run_workers(max(1, args.processes), drain=args.drain)
+
+
+if __name__ == "__main__":
+    main()